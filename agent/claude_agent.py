@@ -2,15 +2,20 @@
 Claude AI Agent с Function Calling
 """
 
+import asyncio
 import json
+import time
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-from anthropic import Anthropic
+from functools import partial
+from typing import Dict, Any, List, Optional, AsyncIterator, Callable
 
 from utils.logger import get_logger
 from utils.config import load_config
-from agent.tools import TOOLS, get_system_prompt, get_tool_by_name
+from agent.tools import TOOLS, get_system_blocks, get_tool_by_name
+from agent.llm_provider import get_async_anthropic_client
+from agent.intent_parser import FastIntentParser
+from agent.response_cache import VAULT_TOOLS, ResponseCache
 from integrations.ollama_client import get_ollama_client, is_ollama_available
 
 logger = get_logger(__name__)
@@ -19,12 +24,13 @@ logger = get_logger(__name__)
 class ClaudeAgent:
     """Класс для работы с Claude AI через Function Calling"""
 
-    def __init__(self, config: Optional[Dict[str, Any]] = None):
+    def __init__(self, config: Optional[Dict[str, Any]] = None, memory_manager=None):
         """
         Инициализация агента
 
         Args:
             config: Конфигурация (если None, загружается автоматически)
+            memory_manager: MemoryManager для контекста пользователя (опционально)
         """
         if config is None:
             config = load_config()
@@ -37,9 +43,44 @@ class ClaudeAgent:
         self.temperature = config['claude'].get('temperature', 0.7)
         self.use_dynamic_model = config['claude'].get('use_dynamic_model', True)
         self.use_ollama_fallback = config.get('ollama', {}).get('enabled', False)
+        self.use_prompt_cache = config['claude'].get('prompt_cache', True)
+        self.memory_enabled = config.get('memory', {}).get('enabled', False)
+        self.memory_manager = memory_manager
+
+        # Бюджет цикла инструментов (число обращений к модели и время)
+        self.max_tool_steps = config['claude'].get('max_tool_steps', 4)
+        self.tool_loop_budget = config['claude'].get('tool_loop_budget', 20.0)
+
+        # Executor для блокирующих вызовов интеграций (None - executor по умолчанию)
+        self.executor = None
+
+        # Локальный разбор частых команд без LLM
+        fast_path_config = config.get('fast_path', {})
+        self.intent_parser = None
+        if fast_path_config.get('enabled', True):
+            self.intent_parser = FastIntentParser(
+                min_confidence=fast_path_config.get('min_confidence', 0.9)
+            )
+
+        # Кэш ответов на повторяющиеся запросы только для чтения
+        response_cache_config = config.get('response_cache', {})
+        self.response_cache = None
+        if response_cache_config.get('enabled', True):
+            self.response_cache = ResponseCache(
+                max_entries=response_cache_config.get('max_entries', 500),
+                ttl=response_cache_config.get('ttl', 300)
+            )
+
+        # Ответы по vault сбрасываются при изменении индекса vault
+        # (подписка при первом обращении к vault)
+        self._vault_cache_subscribed = False
 
-        # Инициализация Anthropic клиента
-        self.client = Anthropic(api_key=self.api_key)
+        # Асинхронный Anthropic клиент с общим пулом соединений
+        self.client = get_async_anthropic_client(
+            self.api_key,
+            max_connections=config['claude'].get('max_connections', 20),
+            timeout=config['claude'].get('timeout', 60)
+        )
 
         # Инициализация Ollama (если включен)
         self.ollama_client = None
@@ -172,62 +213,321 @@ class ClaudeAgent:
         logger.info(f"Обработка сообщения от {user_id}: {message}")
 
         try:
-            # Подготовить системный промпт с текущей датой/временем
-            today = datetime.now().strftime("%Y-%m-%d (%A)")
-            current_time = datetime.now().strftime("%H:%M")
-            system_prompt = get_system_prompt(today, current_time)
+            cached_result = self._get_cached_result(message, user_id, conversation_history)
+            if cached_result:
+                return cached_result
 
-            # Подготовить историю сообщений
-            messages = []
+            # Частые команды - без обращения к Claude
+            fast_result = await self._try_fast_path(message, user_id, conversation_history)
+            if fast_result:
+                self._cache_result(message, user_id, fast_result)
+                return fast_result
 
-            if conversation_history:
-                for msg in conversation_history:
-                    messages.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
+            request = await self._build_request(message, user_id, conversation_history)
 
-            # Добавить текущее сообщение
-            messages.append({
-                "role": "user",
-                "content": message
-            })
-
-            # Выбрать подходящую модель
-            selected_model = self._select_model(message)
-
-            # Выполнить запрос к Claude
-            response = self.client.messages.create(
-                model=selected_model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                system=system_prompt,
-                tools=TOOLS,
-                messages=messages
-            )
+            # Выполнить запрос к Claude (не блокирует event loop)
+            started = time.perf_counter()
+            response = await self.client.messages.create(**request)
+            latency_ms = int((time.perf_counter() - started) * 1000)
 
             logger.info(f"Получен ответ от Claude (stop_reason: {response.stop_reason})")
 
             # Подсчитать использованные токены
             tokens_used = response.usage.input_tokens + response.usage.output_tokens
+            usage = self._extract_usage(response, latency_ms)
 
             # Обработать ответ
-            return await self._process_response(response, user_id, tokens_used)
+            result = await self._process_response(response, user_id, tokens_used, request, usage)
+            result["usage"] = usage
+            self._cache_result(message, user_id, result, conversation_history)
+            return result
 
         except Exception as e:
             logger.error(f"Ошибка при обработке через Claude: {e}", exc_info=True)
-            return {
+            return self._error_result(e)
+
+    async def process_message_stream(
+        self,
+        message: str,
+        user_id: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Обрабатывает сообщение через Claude в потоковом режиме
+
+        Текст ответа отдаётся по мере генерации (Messages streaming API),
+        итоговый результат - последним событием.
+
+        Args:
+            message: Текст сообщения
+            user_id: ID пользователя
+            conversation_history: История разговора (опционально)
+
+        Yields:
+            События двух типов:
+            - {"type": "delta", "text": "..."} - очередной фрагмент текста
+            - {"type": "result", "result": {...}} - итог в формате process_message
+        """
+        logger.info(f"Потоковая обработка сообщения от {user_id}: {message}")
+
+        try:
+            cached_result = self._get_cached_result(message, user_id, conversation_history)
+            if cached_result:
+                yield {"type": "result", "result": cached_result}
+                return
+
+            fast_result = await self._try_fast_path(message, user_id, conversation_history)
+            if fast_result:
+                self._cache_result(message, user_id, fast_result)
+                yield {"type": "result", "result": fast_result}
+                return
+
+            request = await self._build_request(message, user_id, conversation_history)
+
+            started = time.perf_counter()
+            async with self.client.messages.stream(**request) as stream:
+                async for text in stream.text_stream:
+                    yield {"type": "delta", "text": text}
+
+                response = await stream.get_final_message()
+            latency_ms = int((time.perf_counter() - started) * 1000)
+
+            logger.info(f"Получен потоковый ответ от Claude (stop_reason: {response.stop_reason})")
+
+            tokens_used = response.usage.input_tokens + response.usage.output_tokens
+            usage = self._extract_usage(response, latency_ms)
+            result = await self._process_response(response, user_id, tokens_used, request, usage)
+            result["usage"] = usage
+            self._cache_result(message, user_id, result, conversation_history)
+
+        except Exception as e:
+            logger.error(f"Ошибка при потоковой обработке через Claude: {e}", exc_info=True)
+            result = self._error_result(e)
+
+        yield {"type": "result", "result": result}
+
+    async def _try_fast_path(
+        self,
+        message: str,
+        user_id: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Пытается обработать команду локальным парсером, без LLM
+
+        Args:
+            message: Текст сообщения
+            user_id: ID пользователя
+            conversation_history: История разговора (для поиска в кэше)
+
+        Returns:
+            Результат в формате process_message или None (нужен LLM)
+        """
+        if not self.intent_parser:
+            return None
+
+        started = time.perf_counter()
+        intent = self.intent_parser.match(message)
+        if intent is None:
+            return None
+
+        logger.info(
+            f"Fast path: {intent.tool_name} (правило {intent.rule}, "
+            f"уверенность {intent.confidence:.2f}, {(time.perf_counter() - started) * 1000:.1f} мс)"
+        )
+
+        if self._requires_confirmation(intent.tool_name):
+            result = self._confirmation_result(
+                [{"name": intent.tool_name, "input": intent.tool_input}],
+                [],
+                0
+            )
+        else:
+            # Команда fast path самодостаточна: подходит ответ, сохранённый
+            # без истории (с пустой историей его уже искали)
+            if conversation_history:
+                cached_result = self._get_cached_result(message, user_id)
+                if cached_result:
+                    return cached_result
+
+            tool_result = await self._execute_tool(intent.tool_name, intent.tool_input, user_id)
+            result = {
                 "action": "executed",
-                "action_type": "error",
-                "response_text": f"❌ Произошла ошибка: {str(e)}",
-                "tokens_used": 0
+                "action_type": intent.tool_name,
+                "response_text": tool_result["message"],
+                "tokens_used": 0,
+                "cacheable": tool_result["success"],
+                "tools_used": [intent.tool_name]
             }
 
+        result["source"] = "fast_path"
+        return result
+
+    def _get_cached_result(
+        self,
+        message: str,
+        user_id: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ищет ответ в кэше ответов
+
+        Args:
+            message: Текст сообщения
+            user_id: ID пользователя
+            conversation_history: История разговора (None - ответ без истории)
+
+        Returns:
+            Результат из кэша или None
+        """
+        if not self.response_cache:
+            return None
+
+        return self.response_cache.get(user_id, message, conversation_history)
+
+    def _cache_result(
+        self,
+        message: str,
+        user_id: str,
+        result: Dict[str, Any],
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> None:
+        """
+        Сохраняет результат в кэш ответов (только запросы на чтение)
+
+        Args:
+            message: Текст сообщения
+            user_id: ID пользователя
+            result: Результат обработки
+            conversation_history: История, с которой получен ответ
+                (None - ответ от неё не зависит)
+        """
+        if self.response_cache:
+            self.response_cache.put(user_id, message, result, conversation_history)
+
+    async def _build_request(
+        self,
+        message: str,
+        user_id: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Готовит параметры запроса к Messages API
+
+        Системный промпт разделён на кэшируемый статический префикс
+        (инструкции + TOOLS) и небольшой динамический блок (дата, время, память).
+
+        Args:
+            message: Текст сообщения
+            user_id: ID пользователя
+            conversation_history: История разговора (опционально)
+
+        Returns:
+            Параметры для messages.create / messages.stream
+        """
+        # Подготовить системный промпт с текущей датой/временем
+        today = datetime.now().strftime("%Y-%m-%d (%A)")
+        current_time = datetime.now().strftime("%H:%M")
+        user_context = await self._get_user_context(user_id)
+        system_blocks = get_system_blocks(today, current_time, user_context)
+
+        if not self.use_prompt_cache:
+            for block in system_blocks:
+                block.pop("cache_control", None)
+
+        # Подготовить историю сообщений
+        messages = []
+
+        if conversation_history:
+            for msg in conversation_history:
+                messages.append({
+                    "role": msg["role"],
+                    "content": msg["content"]
+                })
+
+        # Добавить текущее сообщение
+        messages.append({
+            "role": "user",
+            "content": message
+        })
+
+        return {
+            "model": self._select_model(message),
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "system": system_blocks,
+            "tools": TOOLS,
+            "messages": messages
+        }
+
+    async def _get_user_context(self, user_id: str) -> Optional[str]:
+        """
+        Получает контекст пользователя из персистентной памяти
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Текст контекста или None (память выключена или недоступна)
+        """
+        if not self.memory_enabled:
+            return None
+
+        try:
+            if self.memory_manager is None:
+                from agent.memory import get_memory_manager
+                self.memory_manager = get_memory_manager()
+
+            return await self.memory_manager.get_context_prompt(user_id)
+
+        except Exception as e:
+            logger.warning(f"Не удалось получить контекст пользователя {user_id}: {e}")
+            return None
+
+    def _extract_usage(self, response, latency_ms: int) -> Dict[str, int]:
+        """
+        Извлекает детализацию токенов из ответа Claude
+
+        Args:
+            response: Ответ от Claude API
+            latency_ms: Время запроса в миллисекундах
+
+        Returns:
+            Словарь с входными/выходными и кэшированными токенами
+        """
+        usage = response.usage
+        cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+        cache_creation = getattr(usage, "cache_creation_input_tokens", None) or 0
+
+        logger.debug(
+            f"Токены: input={usage.input_tokens}, output={usage.output_tokens}, "
+            f"cache_read={cache_read}, cache_creation={cache_creation}, {latency_ms} мс"
+        )
+
+        return {
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_tokens": cache_read,
+            "cache_creation_tokens": cache_creation,
+            "latency_ms": latency_ms
+        }
+
+    def _error_result(self, error: Exception) -> Dict[str, Any]:
+        """Формирует результат для ошибки обработки"""
+        return {
+            "action": "executed",
+            "action_type": "error",
+            "response_text": f"❌ Произошла ошибка: {str(error)}",
+            "tokens_used": 0
+        }
+
     async def _process_response(
         self,
         response,
         user_id: str,
-        tokens_used: int
+        tokens_used: int,
+        request: Optional[Dict[str, Any]] = None,
+        usage: Optional[Dict[str, int]] = None
     ) -> Dict[str, Any]:
         """
         Обрабатывает ответ от Claude
@@ -236,26 +536,22 @@ class ClaudeAgent:
             response: Ответ от Claude API
             user_id: ID пользователя
             tokens_used: Количество использованных токенов
+            request: Параметры исходного запроса (нужны для продолжения диалога)
+            usage: Детализация токенов (дополняется шагами цикла инструментов)
 
         Returns:
             Результат обработки
         """
         # Если Claude хочет использовать инструменты
         if response.stop_reason == "tool_use":
-            return await self._handle_tool_use(response, user_id, tokens_used)
+            return await self._handle_tool_use(response, user_id, tokens_used, request, usage)
 
         # Если Claude просто ответил текстом
         elif response.stop_reason == "end_turn":
-            # Извлечь текстовый ответ
-            text_content = ""
-            for block in response.content:
-                if block.type == "text":
-                    text_content += block.text
-
             return {
                 "action": "executed",
                 "action_type": "general",
-                "response_text": text_content,
+                "response_text": self._extract_text(response),
                 "tokens_used": tokens_used
             }
 
@@ -272,66 +568,269 @@ class ClaudeAgent:
         self,
         response,
         user_id: str,
-        tokens_used: int
+        tokens_used: int,
+        request: Optional[Dict[str, Any]] = None,
+        usage: Optional[Dict[str, int]] = None
     ) -> Dict[str, Any]:
         """
-        Обрабатывает использование инструментов Claude
+        Обрабатывает использование инструментов Claude (агентный цикл)
+
+        На каждом шаге все инструменты только для чтения из ответа выполняются
+        параллельно, а их результаты возвращаются модели как tool_result.
+        Инструменты записи не выполняются - для них формируется запрос на
+        подтверждение. Цикл ограничен max_tool_steps обращениями к модели
+        и tool_loop_budget секундами.
 
         Args:
             response: Ответ от Claude с tool_use
             user_id: ID пользователя
             tokens_used: Количество использованных токенов
+            request: Параметры исходного запроса
+            usage: Детализация токенов (дополняется шагами цикла)
 
         Returns:
-            Результат с запросом на подтверждение
+            Итоговый ответ модели или запрос на подтверждение
         """
-        # Извлечь все tool_use блоки
-        tool_uses = [block for block in response.content if block.type == "tool_use"]
+        deadline = time.monotonic() + self.tool_loop_budget
+        messages = list(request["messages"]) if request else []
+        tool_messages: List[str] = []
+        tools_used: List[str] = []
+        first_tool_name = None
+        all_succeeded = True
+        step = 0
+
+        while True:
+            tool_uses = [block for block in response.content if block.type == "tool_use"]
+
+            if not tool_uses:
+                if response.stop_reason != "end_turn":
+                    logger.warning(f"Неожиданный stop_reason: {response.stop_reason}")
+                break
+
+            first_tool_name = first_tool_name or tool_uses[0].name
+            read_uses = [t for t in tool_uses if not self._requires_confirmation(t.name)]
+            write_uses = [t for t in tool_uses if self._requires_confirmation(t.name)]
+
+            logger.info(
+                f"Шаг {step + 1}: Claude хочет использовать инструменты: "
+                f"{', '.join(t.name for t in tool_uses)}"
+            )
 
-        if not tool_uses:
-            return {
-                "action": "executed",
-                "action_type": "no_tools",
-                "response_text": "Не удалось определить действие",
-                "tokens_used": tokens_used
-            }
+            # Инструменты чтения - параллельно
+            results = await asyncio.gather(*[
+                self._execute_tool(t.name, t.input, user_id) for t in read_uses
+            ])
+            tool_messages.extend(result["message"] for result in results)
+            tools_used.extend(t.name for t in read_uses if t.name not in tools_used)
+            all_succeeded = all_succeeded and all(result["success"] for result in results)
+
+            # Инструменты записи - только после подтверждения пользователем
+            if write_uses:
+                return self._confirmation_result(
+                    [{"name": t.name, "input": t.input} for t in write_uses],
+                    tool_messages,
+                    tokens_used
+                )
 
-        # Пока обрабатываем только первый инструмент
-        tool_use = tool_uses[0]
-        tool_name = tool_use.name
-        tool_input = tool_use.input
+            step += 1
+            remaining = deadline - time.monotonic()
 
-        logger.info(f"Claude хочет использовать инструмент: {tool_name}")
-        logger.debug(f"Параметры: {tool_input}")
+            if not request or step >= self.max_tool_steps or remaining <= 0:
+                logger.warning(
+                    f"Цикл инструментов остановлен (шагов: {step}, "
+                    f"осталось времени: {remaining:.1f}s)"
+                )
+                return {
+                    "action": "executed",
+                    "action_type": first_tool_name,
+                    "response_text": "\n\n".join(tool_messages),
+                    "tokens_used": tokens_used,
+                    "tools_used": tools_used
+                }
 
-        # Проверить, требует ли действие подтверждения
-        requires_confirmation = self._requires_confirmation(tool_name)
+            # Вернуть результаты модели
+            messages.append({
+                "role": "assistant",
+                "content": self._serialize_content(response.content)
+            })
+            messages.append({
+                "role": "user",
+                "content": [
+                    {
+                        "type": "tool_result",
+                        "tool_use_id": tool_use.id,
+                        "content": result["message"],
+                        "is_error": not result.get("success", True)
+                    }
+                    for tool_use, result in zip(read_uses, results)
+                ]
+            })
 
-        if requires_confirmation:
-            # Создать запрос на подтверждение
-            confirmation_id = str(uuid.uuid4())
-            confirmation_text = self._generate_confirmation_text(tool_name, tool_input)
+            try:
+                started = time.perf_counter()
+                response = await asyncio.wait_for(
+                    self.client.messages.create(**{**request, "messages": messages}),
+                    timeout=remaining
+                )
+                latency_ms = int((time.perf_counter() - started) * 1000)
+            except asyncio.TimeoutError:
+                logger.warning("Превышен бюджет времени цикла инструментов")
+                return {
+                    "action": "executed",
+                    "action_type": first_tool_name,
+                    "response_text": "\n\n".join(tool_messages),
+                    "tokens_used": tokens_used,
+                    "tools_used": tools_used
+                }
 
-            return {
-                "action": "confirm",
-                "action_type": tool_name,
-                "confirmation_id": confirmation_id,
-                "confirmation_text": confirmation_text,
-                "response_text": "",  # Будет заполнено после подтверждения
-                "tool_name": tool_name,
-                "tool_input": tool_input,
-                "tokens_used": tokens_used
-            }
-        else:
-            # Выполнить действие сразу
-            result = await self._execute_tool(tool_name, tool_input, user_id)
+            tokens_used += response.usage.input_tokens + response.usage.output_tokens
+            if usage is not None:
+                for key, value in self._extract_usage(response, latency_ms).items():
+                    usage[key] = usage.get(key, 0) + value
+
+        response_text = (
+            self._extract_text(response)
+            or "\n\n".join(tool_messages)
+            or "Не удалось определить действие"
+        )
+
+        return {
+            "action": "executed",
+            "action_type": first_tool_name or "no_tools",
+            "response_text": response_text,
+            "tokens_used": tokens_used,
+            "cacheable": all_succeeded,
+            "tools_used": tools_used
+        }
+
+    def _confirmation_result(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        tool_messages: List[str],
+        tokens_used: int
+    ) -> Dict[str, Any]:
+        """
+        Формирует запрос на подтверждение для инструментов записи
 
-            return {
-                "action": "executed",
-                "action_type": tool_name,
-                "response_text": result["message"],
-                "tokens_used": tokens_used
-            }
+        Args:
+            tool_calls: Вызовы, требующие подтверждения ({"name", "input"})
+            tool_messages: Результаты уже выполненных инструментов чтения
+            tokens_used: Количество использованных токенов
+
+        Returns:
+            Результат с action="confirm"
+        """
+        confirmation_text = "\n".join(
+            self._generate_confirmation_text(call["name"], call["input"])
+            for call in tool_calls
+        )
+
+        for call in tool_calls:
+            logger.debug(f"Требует подтверждения: {call['name']} {call['input']}")
+
+        return {
+            "action": "confirm",
+            "action_type": tool_calls[0]["name"],
+            "confirmation_id": str(uuid.uuid4()),
+            "confirmation_text": confirmation_text,
+            "response_text": "\n\n".join(tool_messages),  # Результаты инструментов чтения
+            "tool_name": tool_calls[0]["name"],
+            "tool_input": tool_calls[0]["input"],
+            "tool_calls": tool_calls,
+            "tokens_used": tokens_used
+        }
+
+    def _extract_text(self, response) -> str:
+        """Извлекает текст из ответа Claude"""
+        return "".join(block.text for block in response.content if block.type == "text")
+
+    def _serialize_content(self, content) -> List[Dict[str, Any]]:
+        """
+        Преобразует блоки ответа Claude в параметры следующего запроса
+
+        Args:
+            content: response.content
+
+        Returns:
+            Список блоков в формате Messages API
+        """
+        blocks = []
+        for block in content:
+            if block.type == "text":
+                blocks.append({"type": "text", "text": block.text})
+            elif block.type == "tool_use":
+                blocks.append({
+                    "type": "tool_use",
+                    "id": block.id,
+                    "name": block.name,
+                    "input": block.input
+                })
+        return blocks
+
+    async def _run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Выполняет блокирующий вызов интеграции в executor
+
+        Args:
+            func: Синхронная функция
+            *args, **kwargs: Аргументы функции
+
+        Returns:
+            Результат функции
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def _get_vault(self) -> Any:
+        """
+        Клиент Obsidian (создаётся в executor)
+
+        Первое создание ObsidianVault открывает индекс vault и загружает
+        метаданные всех заметок - это не должно занимать event loop.
+
+        Returns:
+            ObsidianVault или ObsidianRESTAPI
+        """
+        from integrations.obsidian import get_vault
+
+        vault = await self._run_blocking(get_vault)
+
+        search_index = getattr(vault, 'search_index', None)
+        if self.response_cache and search_index is not None and not self._vault_cache_subscribed:
+            self._vault_cache_subscribed = True
+            loop = asyncio.get_running_loop()
+
+            def on_vault_change(changed: List[str], deleted: List[str]) -> None:
+                # Вызывается из потока наблюдателя; кэш живёт в event loop
+                try:
+                    loop.call_soon_threadsafe(self.response_cache.invalidate_tools, VAULT_TOOLS)
+                except RuntimeError:
+                    # Event loop закрыт (остановка приложения)
+                    pass
+
+            search_index.add_listener(on_vault_change)
+
+        return vault
+
+    async def _call_integration(self, client: Any, method: str, **kwargs) -> Any:
+        """
+        Вызывает метод интеграции, предпочитая асинхронную версию
+
+        Сетевые клиенты (Obsidian REST API) предоставляют <method>_async
+        на общем пуле соединений; остальные выполняются в executor.
+
+        Args:
+            client: Клиент интеграции
+            method: Имя синхронного метода
+            **kwargs: Аргументы метода
+
+        Returns:
+            Результат метода
+        """
+        async_method = getattr(client, f"{method}_async", None)
+        if async_method is not None:
+            return await async_method(**kwargs)
+        return await self._run_blocking(getattr(client, method), **kwargs)
 
     def _requires_confirmation(self, tool_name: str) -> bool:
         """
@@ -398,6 +897,31 @@ class ClaudeAgent:
         tool_name: str,
         tool_input: Dict[str, Any],
         user_id: str
+    ) -> Dict[str, Any]:
+        """
+        Выполняет инструмент и сбрасывает кэш ответов после записи
+
+        Args:
+            tool_name: Название инструмента
+            tool_input: Параметры
+            user_id: ID пользователя
+
+        Returns:
+            Результат выполнения с полем "message"
+        """
+        result = await self._run_tool(tool_name, tool_input, user_id)
+
+        # Запись (даже частично неудачная) могла изменить данные пользователя
+        if self.response_cache and self._requires_confirmation(tool_name):
+            self.response_cache.invalidate_user(user_id)
+
+        return result
+
+    async def _run_tool(
+        self,
+        tool_name: str,
+        tool_input: Dict[str, Any],
+        user_id: str
     ) -> Dict[str, Any]:
         """
         Выполняет инструмент
@@ -416,7 +940,6 @@ class ClaudeAgent:
             # Импорты интеграций
             from integrations.google_calendar import get_calendar
             from integrations.google_tasks import get_tasks as get_tasks_client
-            from integrations.obsidian import get_vault
 
             if tool_name == "add_calendar_event":
                 # Интеграция с Google Calendar (асинхронно)
@@ -462,7 +985,8 @@ class ClaudeAgent:
             elif tool_name == "add_task":
                 # Интеграция с Google Tasks
                 tasks = get_tasks_client()
-                result = tasks.add_task(
+                result = await self._run_blocking(
+                    tasks.add_task,
                     title=tool_input.get('title'),
                     notes=tool_input.get('notes'),
                     due_date=tool_input.get('due_date')
@@ -476,7 +1000,7 @@ class ClaudeAgent:
                 # Интеграция с Google Tasks
                 tasks = get_tasks_client()
                 items = tool_input.get("items", [])
-                result = tasks.add_shopping_items(items)
+                result = await self._run_blocking(tasks.add_shopping_items, items)
                 return {
                     "success": True,
                     "message": f"🛒 Добавлено в покупки: {', '.join(items)}"
@@ -489,9 +1013,13 @@ class ClaudeAgent:
                 show_completed = tool_input.get('show_completed', False)
 
                 if task_list == 'shopping':
-                    task_list_items = tasks_client.get_shopping_list(show_completed)
+                    task_list_items = await self._run_blocking(
+                        tasks_client.get_shopping_list, show_completed
+                    )
                 else:
-                    task_list_items = tasks_client.get_tasks(show_completed=show_completed)
+                    task_list_items = await self._run_blocking(
+                        tasks_client.get_tasks, show_completed=show_completed
+                    )
 
                 if not task_list_items:
                     return {
@@ -512,8 +1040,9 @@ class ClaudeAgent:
 
             elif tool_name == "create_note":
                 # Интеграция с Obsidian
-                vault = get_vault()
-                result = vault.create_note(
+                vault = await self._get_vault()
+                result = await self._call_integration(
+                    vault, 'create_note',
                     title=tool_input.get('title'),
                     content=tool_input.get('content'),
                     tags=tool_input.get('tags')
@@ -525,8 +1054,9 @@ class ClaudeAgent:
 
             elif tool_name == "search_notes":
                 # Интеграция с Obsidian
-                vault = get_vault()
-                results = vault.search_notes(
+                vault = await self._get_vault()
+                results = await self._call_integration(
+                    vault, 'search_notes',
                     query=tool_input.get('query'),
                     limit=tool_input.get('limit', 5)
                 )
@@ -547,6 +1077,54 @@ class ClaudeAgent:
                     "message": f"🔍 Найдено заметок: {len(results)}\n" + "\n".join(notes_text)
                 }
 
+            elif tool_name == "find_notes_by_tag":
+                # Интеграция с Obsidian (индекс метаданных vault)
+                vault = await self._get_vault()
+                tag = tool_input.get('tag', '').lstrip('#')
+                results = await self._run_blocking(
+                    vault.find_notes_by_tag,
+                    tag=tag,
+                    limit=tool_input.get('limit', 20)
+                )
+
+                if not results:
+                    return {
+                        "success": True,
+                        "message": f"🏷 Заметки с тегом #{tag} не найдены"
+                    }
+
+                notes_text = [f"• {note['title']}" for note in results]
+
+                return {
+                    "success": True,
+                    "message": f"🏷 Заметок с тегом #{tag}: {len(results)}\n" + "\n".join(notes_text)
+                }
+
+            elif tool_name == "get_note_links":
+                # Интеграция с Obsidian (граф ссылок vault)
+                vault = await self._get_vault()
+                info = await self._run_blocking(vault.get_note_links, tool_input.get('note', ''))
+
+                lines = [f"📝 {info['title']}"]
+                if info['tags']:
+                    lines.append("Теги: " + ", ".join(f"#{tag}" for tag in info['tags']))
+                if info['links']:
+                    lines.append(f"Ссылается на ({len(info['links'])}):")
+                    lines.extend(
+                        f"• {link['title'] or link['link']}" + ("" if link['relative_path'] else " (нет заметки)")
+                        for link in info['links']
+                    )
+                if info['backlinks']:
+                    lines.append(f"Ссылаются на неё ({len(info['backlinks'])}):")
+                    lines.extend(f"• {note['title']}" for note in info['backlinks'])
+                if not info['links'] and not info['backlinks']:
+                    lines.append("Связей с другими заметками нет")
+
+                return {
+                    "success": True,
+                    "message": "\n".join(lines)
+                }
+
             else:
                 return {
                     "success": False,
@@ -577,16 +1155,26 @@ class ClaudeAgent:
         """
         action_data = json.loads(confirmation_data['action_data'])
 
-        tool_name = action_data.get('tool_name')
-        tool_input = action_data.get('tool_input')
+        # Несколько действий из одного ответа или одно (старый формат)
+        tool_calls = action_data.get('tool_calls') or [
+            {"name": action_data.get('tool_name'), "input": action_data.get('tool_input')}
+        ]
 
-        if not tool_name or not tool_input:
+        if not all(call.get('name') and call.get('input') for call in tool_calls):
             return {
                 "success": False,
                 "message": "❌ Некорректные данные подтверждения"
             }
 
-        # Выполнить инструмент
-        result = await self._execute_tool(tool_name, tool_input, user_id)
+        # Выполнить инструменты по порядку
+        results = []
+        for call in tool_calls:
+            results.append(await self._execute_tool(call['name'], call['input'], user_id))
 
-        return result
+        if len(results) == 1:
+            return results[0]
+
+        return {
+            "success": all(result["success"] for result in results),
+            "message": "\n".join(result["message"] for result in results)
+        }
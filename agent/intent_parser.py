@@ -0,0 +1,534 @@
+"""
+Локальный детерминированный разбор частых команд (fast path)
+
+Формульные команды ("добавь в покупки молоко и хлеб", "что у меня завтра",
+"покажи задачи") разбираются правилами прямо в параметры инструментов из TOOLS,
+без обращения к LLM. Если уверенность разбора ниже порога - команда уходит в Claude.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, time as dt_time
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ParsedIntent:
+    """Результат локального разбора команды"""
+    tool_name: str
+    tool_input: Dict[str, Any]
+    confidence: float
+    rule: str
+    notes: List[str] = field(default_factory=list)
+
+
+# Числительные, которые встречаются в относительных датах
+NUMBER_WORDS = {
+    'один': 1, 'одну': 1, 'одна': 1, 'два': 2, 'две': 2, 'три': 3, 'четыре': 4,
+    'пять': 5, 'шесть': 6, 'семь': 7, 'восемь': 8, 'девять': 9, 'десять': 10,
+}
+
+# Дни недели: основа слова -> номер (0 = понедельник)
+WEEKDAY_STEMS = {
+    'понедельник': 0, 'вторник': 1, 'сред': 2, 'четверг': 3,
+    'пятниц': 4, 'суббот': 5, 'воскресень': 6,
+}
+
+# Формы дней недели в датах ("в среду", "до пятницы", "понедельника"):
+# явные окончания, а не основа + любые буквы - иначе "средства",
+# "среди" читаются как среда
+WEEKDAY_FORMS = [
+    r'понедельник[аеу]?', r'вторник[аеу]?', r'сред[аеуы]', r'четверг[аеу]?',
+    r'пятниц[аеуы]', r'суббот[аеуы]', r'воскресень[еяю]',
+]
+
+_NUMBER = r'(?:\d+|' + '|'.join(NUMBER_WORDS) + r')'
+_WEEKDAY = r'(?:' + '|'.join(WEEKDAY_FORMS) + r')'
+
+# Выражения даты (дни и периоды)
+DAY_PATTERN = re.compile(
+    r'\b(?:на\s+|в\s+|во\s+)?(?P<day>'
+    r'сегодня|завтра|послезавтра'
+    r'|(?:(?:эт[уио][тм]?|следующ[а-я]+)\s+)?' + _WEEKDAY +
+    r'|через\s+(?:' + _NUMBER + r'\s+)?(?:день|дня|дней|недел[юиь])'
+    r'|(?:эт[оуй][йм]?|текущ[а-я]+)\s+недел[еию]'
+    r'|следующ[а-я]+\s+недел[еию]'
+    r'|выходны[ех]'
+    r')\b'
+)
+
+# Относительное время: "через 2 часа", "через полчаса", "через 15 минут"
+RELATIVE_TIME_PATTERN = re.compile(
+    r'через\s+(?P<amount>' + _NUMBER + r'\s+)?(?P<unit>час[аов]*|минут[уы]?|полчаса)\b'
+)
+
+# Время суток: "в 15:00", "в 9 утра", "в 7 вечера", "в 15 часов"
+CLOCK_PATTERN = re.compile(
+    r'\bв\s+(?P<hour>\d{1,2})(?:[:.](?P<minute>\d{2}))?'
+    r'(?:\s+час(?:а|ов)?)?(?:\s+(?P<period>утра|дня|вечера|ночи))?\b'
+)
+
+# Команды добавления в покупки
+SHOPPING_ADD_PATTERNS = [
+    re.compile(
+        r'^(?:добавь|добавить|запиши|внеси|закинь)\s+(?:мне\s+)?(?:в\s+)?(?:список\s+)?'
+        r'(?:покупк[иу]|покупок|магазин)\s*[:\-—,]?\s*(?P<items>.+)$'
+    ),
+    re.compile(
+        r'^(?:добавь|добавить|запиши|внеси|закинь)\s+(?P<items>.+?)\s+'
+        r'(?:в|к)\s+(?:список\s+)?(?:покупк[иа][м]?|покупок|магазин)$'
+    ),
+    re.compile(
+        r'^(?:надо\s+|нужно\s+)?(?:купить|купи)\s+(?P<items>.+?)\s*,?\s+'
+        r'(?:в|к)\s+(?:список(?:\s+покупок)?|покупк[иа][м]?)$'
+    ),
+    # Без "в покупки" / "в список": "купить квартиру", "купи мне что-нибудь
+    # вкусное" - не список покупок, уверенность ниже порога (решает LLM)
+    re.compile(r'^(?:надо\s+|нужно\s+)?(?:купить|купи)\s*[:\-—,]?\s*(?P<items>.+)$'),
+]
+
+# Индекс правила "купить ..." без указания списка
+_BARE_BUY_RULE = len(SHOPPING_ADD_PATTERNS) - 1
+
+# Команды просмотра календаря (дата - отдельным выражением)
+CALENDAR_READ_PATTERNS = [
+    re.compile(r'^что\s+(?:у\s+меня\s+)?(?:запланировано\s+|в\s+календаре\s+|по\s+плану\s+)?(?P<rest>.*)$'),
+    re.compile(r'^какие\s+(?:у\s+меня\s+)?(?:планы|встречи|события|дела)(?P<rest>.*)$'),
+    re.compile(r'^(?:покажи|показать|открой)\s+(?:мой\s+|мои\s+)?(?:календарь|события|встречи|планы)(?P<rest>.*)$'),
+    re.compile(r'^(?:мои\s+)?(?:планы|события|встречи)(?P<rest>.*)$'),
+]
+
+# Команды просмотра задач и покупок
+TASKS_READ_PATTERNS = [
+    (re.compile(
+        r'^(?:покажи|показать|выведи)\s+(?:мне\s+)?(?:мои\s+|все\s+)?(?:задачи|список\s+задач|дела)$'
+    ), 'tasks'),
+    (re.compile(r'^(?:какие\s+)?(?:у\s+меня\s+)?(?:есть\s+)?задачи$'), 'tasks'),
+    (re.compile(r'^(?:мои\s+)?(?:задачи|список\s+задач)$'), 'tasks'),
+    (re.compile(r'^что\s+(?:мне\s+)?(?:нужно|надо)\s+сделать$'), 'tasks'),
+    (re.compile(
+        r'^(?:покажи|показать|выведи)\s+(?:мне\s+)?(?:мой\s+)?(?:список\s+)?покуп(?:ок|ки)$'
+    ), 'shopping'),
+    (re.compile(r'^(?:мой\s+)?список\s+покупок$'), 'shopping'),
+    (re.compile(r'^что\s+(?:мне\s+)?(?:нужно\s+|надо\s+)?купить$'), 'shopping'),
+]
+
+# Команды добавления события с указанием времени
+CALENDAR_ADD_PATTERN = re.compile(
+    r'^(?:запиши|запланируй|поставь|добавь|создай|напомни)\s+(?:мне\s+)?(?P<rest>.+)$'
+)
+
+# Слова, после которых разбор правилами ненадёжен - пусть решает LLM
+UNCERTAIN_MARKERS = re.compile(
+    r'\b(?:если|или|почему|зачем|объясни|проанализируй|сравни|посоветуй|подробно'
+    r'|не|кроме|вместо|удали|отмени|перенеси)\b'
+)
+
+# Частые названия событий в винительном падеже ("запиши встречу") -> именительный
+SUMMARY_NOMINATIVE = {
+    'встречу': 'встреча', 'тренировку': 'тренировка', 'поездку': 'поездка',
+    'консультацию': 'консультация', 'планерку': 'планерка', 'стрижку': 'стрижка',
+    'презентацию': 'презентация', 'прогулку': 'прогулка',
+}
+
+# Слова, которые не могут быть товаром
+NON_ITEM_WORDS = {
+    'задачу', 'задача', 'встречу', 'событие', 'заметку', 'напоминание', 'календарь',
+}
+
+
+class FastIntentParser:
+    """
+    Разбор частых команд правилами и простой грамматикой
+
+    Разбирает только высоко-уверенные случаи; всё остальное возвращает
+    с низкой уверенностью или None, чтобы команда ушла в LLM.
+    """
+
+    def __init__(self, min_confidence: float = 0.9):
+        """
+        Инициализация парсера
+
+        Args:
+            min_confidence: Минимальная уверенность для выполнения без LLM
+        """
+        self.min_confidence = min_confidence
+
+    def match(self, message: str, now: Optional[datetime] = None) -> Optional[ParsedIntent]:
+        """
+        Разбирает команду и возвращает результат, только если он надёжен
+
+        Args:
+            message: Текст команды
+            now: Текущее время (для тестов и бенчмарков)
+
+        Returns:
+            ParsedIntent с уверенностью не ниже min_confidence или None
+        """
+        intent = self.parse(message, now)
+
+        if intent and intent.confidence >= self.min_confidence:
+            return intent
+
+        return None
+
+    def parse(self, message: str, now: Optional[datetime] = None) -> Optional[ParsedIntent]:
+        """
+        Разбирает команду в вызов инструмента
+
+        Args:
+            message: Текст команды
+            now: Текущее время (для тестов и бенчмарков)
+
+        Returns:
+            Лучший найденный ParsedIntent (с любой уверенностью) или None
+        """
+        now = now or datetime.now()
+        cased = self._normalize(message, lower=False)
+        text = cased.lower()
+
+        if not text or len(text) > 200:
+            return None
+
+        candidates = [
+            self._parse_tasks_read(text),
+            self._parse_shopping_add(text),
+            self._parse_calendar_read(text, now),
+            self._parse_calendar_add(text, cased, now),
+        ]
+        candidates = [c for c in candidates if c is not None]
+
+        if not candidates:
+            return None
+
+        intent = max(candidates, key=lambda c: c.confidence)
+
+        # Признаки сложного запроса снижают уверенность
+        if UNCERTAIN_MARKERS.search(text):
+            intent.confidence = min(intent.confidence, 0.5)
+            intent.notes.append("uncertain_marker")
+
+        logger.debug(
+            f"Fast path: {intent.tool_name} ({intent.rule}, уверенность {intent.confidence:.2f})"
+        )
+        return intent
+
+    # Правила
+
+    def _parse_shopping_add(self, text: str) -> Optional[ParsedIntent]:
+        """Добавление товаров в список покупок"""
+        for index, pattern in enumerate(SHOPPING_ADD_PATTERNS):
+            match = pattern.match(text)
+            if not match:
+                continue
+
+            items = self._split_items(match.group('items'))
+            if not items:
+                return None
+
+            confidence = 0.95
+            notes = []
+
+            if index == _BARE_BUY_RULE:
+                confidence = 0.7
+                notes.append("no_list_marker")
+
+            # Длинные "товары" - скорее фраза, чем список покупок
+            if any(len(item) > 40 or len(item.split()) > 4 for item in items):
+                confidence = 0.6
+                notes.append("long_item")
+
+            if any(item in NON_ITEM_WORDS for item in items):
+                confidence = 0.3
+                notes.append("non_item")
+
+            # Дата внутри списка ("купить молоко завтра") - не товар
+            if DAY_PATTERN.search(text) or CLOCK_PATTERN.search(text):
+                confidence = min(confidence, 0.6)
+                notes.append("date_in_items")
+
+            return ParsedIntent(
+                tool_name="add_shopping_item",
+                tool_input={"items": items},
+                confidence=confidence,
+                rule=f"shopping_add_{index}",
+                notes=notes
+            )
+
+        return None
+
+    def _parse_tasks_read(self, text: str) -> Optional[ParsedIntent]:
+        """Просмотр задач и списка покупок"""
+        for pattern, task_list in TASKS_READ_PATTERNS:
+            if pattern.match(text):
+                return ParsedIntent(
+                    tool_name="get_tasks",
+                    tool_input={"task_list": task_list, "show_completed": False},
+                    confidence=0.97,
+                    rule=f"tasks_read_{task_list}"
+                )
+
+        return None
+
+    def _parse_calendar_read(self, text: str, now: datetime) -> Optional[ParsedIntent]:
+        """Просмотр событий за день или период"""
+        for index, pattern in enumerate(CALENDAR_READ_PATTERNS):
+            match = pattern.match(text)
+            if not match:
+                continue
+
+            rest = match.group('rest').strip()
+            period = parse_period(rest, now)
+            if period is None:
+                return None
+
+            (time_min, time_max), leftover = period
+
+            # Всё, кроме выражения даты, должно быть "пустым"
+            leftover = re.sub(r'\b(?:у\s+меня|запланировано|в\s+календаре)\b', '', leftover).strip()
+            confidence = 0.95 if not leftover else 0.5
+
+            return ParsedIntent(
+                tool_name="get_calendar_events",
+                tool_input={
+                    "time_min": time_min.isoformat(),
+                    "time_max": time_max.isoformat(),
+                    "max_results": 10
+                },
+                confidence=confidence,
+                rule=f"calendar_read_{index}",
+                notes=[f"leftover:{leftover}"] if leftover else []
+            )
+
+        return None
+
+    def _parse_calendar_add(self, text: str, cased: str, now: datetime) -> Optional[ParsedIntent]:
+        """Добавление события с датой/временем ("запиши на завтра в 15:00 встречу с врачом")"""
+        match = CALENDAR_ADD_PATTERN.match(text)
+        if not match:
+            return None
+
+        rest = match.group('rest')
+
+        # Команды для задач, покупок и заметок разбирают другие правила / LLM
+        if re.match(r'^(?:в\s+)?(?:покупк|список|задач|заметк)', rest):
+            return None
+
+        parsed = parse_datetime(rest, now)
+        if parsed is None:
+            return None
+
+        start, has_time, leftover = parsed
+        summary = re.sub(r'^(?:про|о|об|что|чтобы)\s+', '', leftover).strip(' ,.:;-—')
+
+        if not summary:
+            return None
+
+        # Вернуть исходный регистр (lower() не меняет длину строки)
+        position = text.find(summary)
+        if position != -1:
+            summary = cased[position:position + len(summary)]
+
+        words = summary.split(' ', 1)
+        words[0] = SUMMARY_NOMINATIVE.get(words[0].lower(), words[0])
+        summary = ' '.join(words)
+
+        confidence = 0.92 if has_time else 0.6
+
+        return ParsedIntent(
+            tool_name="add_calendar_event",
+            tool_input={
+                "summary": summary[:1].upper() + summary[1:],
+                "start_time": start.replace(tzinfo=None).isoformat(timespec='seconds')
+            },
+            confidence=confidence,
+            rule="calendar_add",
+            notes=[] if has_time else ["no_time"]
+        )
+
+    # Вспомогательные методы
+
+    def _normalize(self, message: str, lower: bool = True) -> str:
+        """Единые пробелы, без завершающей пунктуации и обращений (и нижний регистр)"""
+        text = message.replace('ё', 'е').replace('Ё', 'Е')
+        text = re.sub(r'\s+', ' ', text).strip()
+        text = re.sub(r'^(?:привет,?\s+)?(?:ассистент|зиночка)[,!]?\s+', '', text, flags=re.IGNORECASE)
+        text = re.sub(r'^(?:пожалуйста,?\s+)', '', text, flags=re.IGNORECASE)
+        text = re.sub(r',?\s+пожалуйста$', '', text, flags=re.IGNORECASE)
+        text = text.strip(' ?!.')
+        return text.lower() if lower else text
+
+    def _split_items(self, items_text: str) -> List[str]:
+        """Разбивает перечисление товаров: "молоко, хлеб и яйца" -> [молоко, хлеб, яйца]"""
+        parts = re.split(r'\s*(?:,|;|\s+и\s+|\s+а\s+также\s+)\s*', items_text)
+        items = []
+        for part in parts:
+            item = part.strip(' .:;-—"\'')
+            if item and item not in items:
+                items.append(item)
+        return items
+
+
+def _to_number(token: Optional[str]) -> int:
+    """Преобразует число цифрами или словом ("два") в int (по умолчанию 1)"""
+    if not token:
+        return 1
+    token = token.strip()
+    if token.isdigit():
+        return int(token)
+    return NUMBER_WORDS.get(token, 1)
+
+
+def _day_bounds(day: datetime) -> Tuple[datetime, datetime]:
+    """Начало и конец календарного дня"""
+    start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1) - timedelta(seconds=1)
+
+
+def _weekday_date(expression: str, now: datetime) -> datetime:
+    """Дата для "в понедельник" / "в следующий понедельник" / "в эту пятницу\""""
+    weekday = next(wd for stem, wd in WEEKDAY_STEMS.items() if stem in expression)
+
+    if expression.startswith('следующ'):
+        # День недели на следующей календарной неделе
+        next_monday = now + timedelta(days=7 - now.weekday())
+        return next_monday + timedelta(days=weekday)
+
+    # Ближайший такой день (сегодня, если совпадает)
+    return now + timedelta(days=(weekday - now.weekday()) % 7)
+
+
+def parse_period(text: str, now: datetime) -> Optional[Tuple[Tuple[datetime, datetime], str]]:
+    """
+    Разбирает период для просмотра календаря
+
+    Поддерживает: сегодня, завтра, послезавтра, (следующий) день недели,
+    через N дней/неделю, эта/следующая неделя, выходные.
+
+    Args:
+        text: Фрагмент текста с выражением даты
+        now: Текущее время
+
+    Returns:
+        ((начало, конец) периода в локальной зоне, остаток текста) или None
+    """
+    match = DAY_PATTERN.search(text)
+    if not match:
+        return None
+
+    now = now.astimezone() if now.tzinfo is None else now
+    day = match.group('day')
+    leftover = (text[:match.start()] + ' ' + text[match.end():]).strip()
+
+    if day == 'сегодня':
+        period = (now, _day_bounds(now)[1])
+    elif day == 'завтра':
+        period = _day_bounds(now + timedelta(days=1))
+    elif day == 'послезавтра':
+        period = _day_bounds(now + timedelta(days=2))
+    elif day.startswith('через'):
+        amount = _to_number(re.search(_NUMBER, day).group(0) if re.search(_NUMBER, day) else None)
+        days = amount * 7 if 'недел' in day else amount
+        period = _day_bounds(now + timedelta(days=days))
+    elif 'недел' in day and not any(stem in day for stem in WEEKDAY_STEMS):
+        monday = _day_bounds(now - timedelta(days=now.weekday()))[0]
+        if day.startswith('следующ'):
+            monday += timedelta(days=7)
+            period = (monday, monday + timedelta(days=7) - timedelta(seconds=1))
+        else:
+            period = (now, monday + timedelta(days=7) - timedelta(seconds=1))
+    elif day.startswith('выходн'):
+        saturday = _day_bounds(now + timedelta(days=(5 - now.weekday()) % 7))[0]
+        if now.weekday() == 6:
+            saturday -= timedelta(days=1)
+        period = (max(now, saturday), saturday + timedelta(days=2) - timedelta(seconds=1))
+    else:
+        period = _day_bounds(_weekday_date(day, now))
+
+    return period, leftover
+
+
+def parse_datetime(text: str, now: datetime) -> Optional[Tuple[datetime, bool, str]]:
+    """
+    Разбирает момент времени для нового события
+
+    Поддерживает "через 2 часа", "через полчаса", "завтра в 15:00",
+    "в понедельник в 9 утра", "в 18:30" (сегодня или завтра, если время прошло).
+
+    Args:
+        text: Текст команды без глагола
+        now: Текущее время
+
+    Returns:
+        (момент начала, указано ли время, остаток текста) или None
+    """
+    relative = RELATIVE_TIME_PATTERN.search(text)
+    if relative:
+        unit = relative.group('unit')
+        if unit == 'полчаса':
+            delta = timedelta(minutes=30)
+        elif unit.startswith('час'):
+            delta = timedelta(hours=_to_number(relative.group('amount')))
+        else:
+            delta = timedelta(minutes=_to_number(relative.group('amount')))
+
+        start = (now + delta).replace(second=0, microsecond=0)
+        leftover = text[:relative.start()] + ' ' + text[relative.end():]
+        return start, True, _squash(leftover)
+
+    day_match = DAY_PATTERN.search(text)
+    clock_match = CLOCK_PATTERN.search(text)
+
+    if not day_match and not clock_match:
+        return None
+
+    day = now
+    spans = []
+
+    if day_match:
+        (day_start, _), _ = parse_period(day_match.group(0), now)
+        day = day_start.replace(tzinfo=None) if now.tzinfo is None else day_start
+        spans.append(day_match.span())
+
+    if clock_match:
+        hour = int(clock_match.group('hour'))
+        minute = int(clock_match.group('minute') or 0)
+        period = clock_match.group('period')
+
+        if period in ('дня', 'вечера') and hour < 12:
+            hour += 12
+        elif period == 'ночи' and hour == 12:
+            hour = 0
+
+        if hour > 23 or minute > 59:
+            return None
+
+        start = datetime.combine(day.date(), dt_time(hour, minute), tzinfo=day.tzinfo)
+
+        # "в 9" без даты, когда 9:00 уже прошло - значит завтра
+        if not day_match and start <= now:
+            start += timedelta(days=1)
+
+        spans.append(clock_match.span())
+        has_time = True
+    else:
+        start = datetime.combine(day.date(), dt_time(12, 0), tzinfo=day.tzinfo)
+        has_time = False
+
+    leftover = text
+    for span_start, span_end in sorted(spans, reverse=True):
+        leftover = leftover[:span_start] + ' ' + leftover[span_end:]
+
+    return start, has_time, _squash(leftover)
+
+
+def _squash(text: str) -> str:
+    """Убирает лишние пробелы и предлоги-сироты по краям"""
+    text = re.sub(r'\s+', ' ', text).strip(' ,.')
+    text = re.sub(r'^(?:на|в|во)\s+', '', text)
+    text = re.sub(r'\s+(?:на|в|во)$', '', text)
+    return text.strip(' ,.')
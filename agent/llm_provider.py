@@ -11,6 +11,60 @@ from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Общие асинхронные клиенты Anthropic (один пул соединений на API ключ)
+_anthropic_clients: Dict[str, Any] = {}
+
+
+def get_async_anthropic_client(
+    api_key: str,
+    max_connections: int = 20,
+    timeout: float = 60.0
+):
+    """
+    Получить общий асинхронный клиент Anthropic
+
+    Все агенты и провайдеры процесса используют один httpx пул соединений,
+    поэтому параллельные запросы к Claude не блокируют event loop
+    и переиспользуют keep-alive соединения.
+
+    Args:
+        api_key: API ключ Anthropic
+        max_connections: Максимум одновременных соединений в пуле
+        timeout: Таймаут запроса в секундах
+
+    Returns:
+        AsyncAnthropic клиент
+    """
+    client = _anthropic_clients.get(api_key)
+
+    if client is None:
+        import httpx
+        from anthropic import AsyncAnthropic
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(timeout, connect=10.0)
+        )
+        client = AsyncAnthropic(api_key=api_key, http_client=http_client)
+        _anthropic_clients[api_key] = client
+        logger.info(f"Создан асинхронный клиент Anthropic (пул: {max_connections} соединений)")
+
+    return client
+
+
+async def close_async_anthropic_clients():
+    """Закрывает все общие клиенты Anthropic (вызывается при остановке)"""
+    for client in list(_anthropic_clients.values()):
+        try:
+            await client.close()
+        except Exception as e:
+            logger.warning(f"Ошибка при закрытии клиента Anthropic: {e}")
+
+    _anthropic_clients.clear()
+
 
 @dataclass
 class LLMResponse:
@@ -63,17 +117,23 @@ class LLMProvider(ABC):
 class ClaudeProvider(LLMProvider):
     """Провайдер для Claude API (Anthropic)"""
 
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-20250514"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-20250514",
+        max_connections: int = 20,
+        timeout: float = 60.0
+    ):
         """
         Инициализация Claude провайдера
 
         Args:
             api_key: API ключ Anthropic
             model: Модель Claude для использования
+            max_connections: Размер общего пула соединений (claude.max_connections)
+            timeout: Таймаут запроса в секундах (claude.timeout)
         """
-        from anthropic import Anthropic
-
-        self.client = Anthropic(api_key=api_key)
+        self.client = get_async_anthropic_client(api_key, max_connections=max_connections, timeout=timeout)
         self.model = model
         logger.info(f"Claude провайдер инициализирован (модель: {model})")
 
@@ -102,7 +162,7 @@ class ClaudeProvider(LLMProvider):
             if tools:
                 kwargs["tools"] = tools
 
-            response = self.client.messages.create(**kwargs)
+            response = await self.client.messages.create(**kwargs)
 
             # Извлечь текстовый контент
             text_content = ""
@@ -385,7 +445,9 @@ def create_llm_router(config: Dict[str, Any]) -> HybridLLMRouter:
     claude_config = config.get('claude', {})
     primary = ClaudeProvider(
         api_key=claude_config['api_key'],
-        model=claude_config.get('model', 'claude-sonnet-4-20250514')
+        model=claude_config.get('model', 'claude-sonnet-4-20250514'),
+        max_connections=claude_config.get('max_connections', 20),
+        timeout=claude_config.get('timeout', 60)
     )
 
     # Создать Ollama провайдер (если включен)
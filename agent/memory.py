@@ -3,13 +3,16 @@
 Хранит историю действий, частые паттерны и предпочтения пользователя
 """
 
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
-from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
 import json
 
+import aiosqlite
+
+from agent.user_profile import UserProfile, INTERACTION_DAYS, MAX_KEYWORDS, MAX_SHOPPING_ITEMS
+from utils.cache import AsyncTTLCache, TTLCache
 from utils.database import Database
 from utils.logger import get_logger
+from utils.text_normalizer import TERM_KEYWORD, TERM_SHOPPING
 
 logger = get_logger(__name__)
 
@@ -17,130 +20,133 @@ logger = get_logger(__name__)
 class UserMemory:
     """
     Персистентная память для пользователя
-    Анализирует историю и предоставляет контекст для улучшения ответов
+    Предоставляет контекст для улучшения ответов из профиля пользователя
+    (agent/user_profile.py), который обновляется при каждой записи
     """
 
-    def __init__(self, user_id: str, db: Database):
+    def __init__(self, user_id: str, db: Database, half_life_days: float = 30.0):
         """
         Инициализация памяти пользователя
 
         Args:
             user_id: ID пользователя
             db: Экземпляр базы данных
+            half_life_days: Период полураспада счётчиков профиля
         """
         self.user_id = user_id
         self.db = db
+        self.half_life_days = half_life_days
         logger.debug(f"Инициализирована память для пользователя {user_id}")
 
-    async def get_context_summary(self, days: int = 30) -> Dict[str, Any]:
+    async def get_profile(self) -> UserProfile:
         """
-        Получает сводку контекста пользователя за период
+        Получает профиль пользователя одним чтением
 
-        Args:
-            days: Количество дней для анализа
+        Профиль, которого ещё нет или который создан хуком записи без
+        учёта истории, один раз строится по истории (rebuild_profile).
 
         Returns:
-            Словарь с контекстной информацией
+            UserProfile
         """
-        logger.info(f"Получение контекста для {self.user_id} за {days} дней")
+        data = await self.db.get_user_profile(self.user_id)
 
-        # Получить статистику действий
-        stats = await self.db.get_usage_stats(self.user_id, days=days)
+        if data is None or not data.get('bootstrapped'):
+            return await self.rebuild_profile()
 
-        # Получить недавние сообщения
-        recent_messages = await self.db.get_message_history(self.user_id, limit=50)
+        return UserProfile.from_dict(data, self.half_life_days)
 
-        # Анализировать частые действия
-        action_types = [stat['action_type'] for stat in stats]
-        frequent_actions = Counter(action_types).most_common(5)
+    async def rebuild_profile(self) -> UserProfile:
+        """
+        Строит профиль заново по статистике и агрегатам терминов
 
-        # Анализировать частые слова в запросах
-        user_messages = [msg['content'] for msg in recent_messages if msg['role'] == 'user']
-        frequent_keywords = self._extract_frequent_keywords(user_messages)
+        Чтение истории и сохранение профиля идут в одной транзакции
+        соединения записи: хук записи не может обновить профиль между
+        ними, поэтому записи, сделанные во время перестройки, не теряются.
 
-        # Определить временные паттерны (когда пользователь активен)
-        active_hours = self._analyze_active_hours(recent_messages)
+        Returns:
+            Сохранённый UserProfile
+        """
+        logger.info(f"Построение профиля {self.user_id} по истории")
 
-        summary = {
-            "user_id": self.user_id,
-            "total_interactions": len(stats),
-            "frequent_actions": [
-                {"action": action, "count": count}
-                for action, count in frequent_actions
-            ],
-            "frequent_keywords": frequent_keywords,
-            "active_hours": active_hours,
-            "last_interaction": recent_messages[0]['timestamp'] if recent_messages else None
-        }
+        async with self.db._write() as conn:
+            profile = await self._build_profile(conn)
+            await self.db.store_user_profiles(conn, {self.user_id: profile.to_dict()})
 
-        logger.debug(f"Сводка контекста: {summary}")
-        return summary
+        return profile
 
-    def _extract_frequent_keywords(self, messages: List[str], top_n: int = 10) -> List[str]:
+    async def _build_profile(self, conn: aiosqlite.Connection) -> UserProfile:
         """
-        Извлекает частые ключевые слова из сообщений
+        Строит профиль по статистике и агрегатам терминов
 
         Args:
-            messages: Список сообщений
-            top_n: Количество топовых слов
+            conn: Соединение записи (внутри транзакции перестройки)
 
         Returns:
-            Список частых ключевых слов
-        """
-        # Простой анализ: разделить на слова и посчитать частоту
-        # Исключить стоп-слова
-        stop_words = {
-            'в', 'на', 'и', 'с', 'по', 'для', 'не', 'что', 'это', 'как',
-            'а', 'я', 'у', 'из', 'за', 'к', 'до', 'о', 'об', 'от', 'про',
-            'добавь', 'покажи', 'создай', 'запиши', 'напомни'
-        }
+            UserProfile с bootstrapped=True
+        """
+        stats = await self.db.get_usage_stats(self.user_id, days=INTERACTION_DAYS, conn=conn)
+        keywords = await self.db.get_frequent_terms(
+            self.user_id, TERM_KEYWORD, limit=MAX_KEYWORDS, conn=conn
+        )
+        shopping = await self.db.get_frequent_terms(
+            self.user_id, TERM_SHOPPING, limit=MAX_SHOPPING_ITEMS, conn=conn
+        )
 
-        words = []
-        for msg in messages:
-            # Привести к нижнему регистру и разделить
-            msg_words = msg.lower().split()
-            # Фильтровать стоп-слова и короткие слова
-            words.extend([
-                word for word in msg_words
-                if len(word) > 3 and word not in stop_words
-            ])
+        # События в хронологическом порядке, чтобы затухание шло по времени
+        events = [(stat['timestamp'], None, stat) for stat in stats]
+        events.extend((term['last_seen'], TERM_KEYWORD, term) for term in keywords)
+        events.extend((term['last_seen'], TERM_SHOPPING, term) for term in shopping)
+        events.sort(key=lambda event: str(event[0]))
 
-        # Посчитать частоту
-        counter = Counter(words)
-        return [word for word, count in counter.most_common(top_n)]
+        profile = UserProfile(half_life_days=self.half_life_days)
+        for timestamp, kind, record in events:
+            if kind is None:
+                profile.apply_action(record['action_type'], timestamp)
+            else:
+                profile.seed_term(kind, record['term'], record['surface'], record['count'], timestamp)
 
-    def _analyze_active_hours(self, messages: List[Dict[str, Any]]) -> List[int]:
+        profile.bootstrapped = True
+        return profile
+
+    async def get_context_summary(self, days: int = INTERACTION_DAYS) -> Dict[str, Any]:
         """
-        Анализирует в какие часы пользователь наиболее активен
+        Получает сводку контекста пользователя
 
         Args:
-            messages: История сообщений
+            days: Период для количества взаимодействий (не больше INTERACTION_DAYS)
 
         Returns:
-            Список часов (0-23) когда пользователь активен
+            Словарь с контекстной информацией
         """
-        hours = []
-        for msg in messages:
-            try:
-                timestamp = datetime.fromisoformat(msg['timestamp'])
-                hours.append(timestamp.hour)
-            except:
-                continue
+        profile = await self.get_profile()
+        return self._summarize(profile, days)
 
-        # Найти часы с наибольшей активностью
-        if not hours:
-            return []
+    def _summarize(self, profile: UserProfile, days: int = INTERACTION_DAYS) -> Dict[str, Any]:
+        """
+        Формирует сводку контекста из профиля
+
+        Args:
+            profile: Профиль пользователя
+            days: Период для количества взаимодействий
 
-        counter = Counter(hours)
-        # Вернуть часы с активностью выше среднего
-        avg_activity = sum(counter.values()) / len(counter)
-        active_hours = [hour for hour, count in counter.items() if count > avg_activity]
+        Returns:
+            Словарь с контекстной информацией
+        """
+        summary = {
+            "user_id": self.user_id,
+            "total_interactions": profile.interactions(days=min(days, INTERACTION_DAYS)),
+            "frequent_actions": profile.top_actions(5),
+            "frequent_keywords": profile.top_keywords(10),
+            "active_hours": profile.active_hours(),
+            "last_interaction": profile.last_interaction
+        }
 
-        return sorted(active_hours)
+        logger.debug(f"Сводка контекста: {summary}")
+        return summary
 
     async def get_frequent_shopping_items(self, limit: int = 10) -> List[str]:
         """
-        Получает часто покупаемые товары
+        Получает часто покупаемые товары (за всё время, по user_terms)
 
         Args:
             limit: Максимальное количество товаров
@@ -148,29 +154,8 @@ class UserMemory:
         Returns:
             Список частых товаров
         """
-        logger.info(f"Получение частых покупок для {self.user_id}")
-
-        # Получить историю сообщений с действиями add_shopping_item
-        messages = await self.db.get_message_history(self.user_id, limit=200)
-
-        shopping_items = []
-        for msg in messages:
-            if msg['role'] == 'user' and any(
-                keyword in msg['content'].lower()
-                for keyword in ['молоко', 'хлеб', 'яйца', 'сыр', 'масло', 'покупк']
-            ):
-                # Извлечь возможные названия товаров
-                words = msg['content'].lower().split()
-                # Простая эвристика: слова после "добавь", "купить"
-                for i, word in enumerate(words):
-                    if word in ['добавь', 'купить', 'купи'] and i + 1 < len(words):
-                        item = words[i + 1].strip(',.:;')
-                        if len(item) > 2:
-                            shopping_items.append(item)
-
-        # Посчитать частоту
-        counter = Counter(shopping_items)
-        return [item for item, count in counter.most_common(limit)]
+        items = await self.db.get_frequent_terms(self.user_id, TERM_SHOPPING, limit=limit)
+        return [item['surface'] for item in items]
 
     async def get_context_prompt(self) -> str:
         """
@@ -180,7 +165,8 @@ class UserMemory:
         Returns:
             Текст с контекстом
         """
-        summary = await self.get_context_summary(days=30)
+        profile = await self.get_profile()
+        summary = self._summarize(profile)
 
         # Формировать человеко-читаемый контекст
         context_parts = []
@@ -198,8 +184,8 @@ class UserMemory:
             keywords_str = ", ".join(summary['frequent_keywords'][:5])
             context_parts.append(f"Часто упоминаемые темы: {keywords_str}.")
 
-        # Получить частые покупки
-        frequent_items = await self.get_frequent_shopping_items(limit=5)
+        # Частые покупки
+        frequent_items = profile.top_shopping_items(5)
         if frequent_items:
             items_str = ", ".join(frequent_items)
             context_parts.append(f"Часто покупаемые товары: {items_str}.")
@@ -230,20 +216,106 @@ class UserMemory:
 class MemoryManager:
     """
     Менеджер памяти для всех пользователей
-    Управляет созданием и хранением экземпляров UserMemory
+    Управляет созданием и хранением экземпляров UserMemory и кэширует
+    готовый текст контекста пользователя
     """
 
-    def __init__(self, db: Database):
+    def __init__(
+        self,
+        db: Database,
+        half_life_days: float = 30.0,
+        cache_max_entries: int = 1000,
+        context_cache_ttl: float = 300.0
+    ):
         """
         Инициализация менеджера памяти
 
+        Регистрирует хук записи, который обновляет профили пользователей
+        при сохранении сообщений и статистики и сбрасывает их кэш
+        контекста. Записи из других процессов (бот и API) видны после
+        истечения TTL.
+
         Args:
             db: Экземпляр базы данных
+            half_life_days: Период полураспада счётчиков профиля
+            cache_max_entries: Максимум пользователей в кэшах
+            context_cache_ttl: Время жизни текста контекста (секунды)
         """
         self.db = db
-        self._cache: Dict[str, UserMemory] = {}
+        self.half_life_days = half_life_days
+        self.context_cache_ttl = context_cache_ttl
+        self._cache = TTLCache(max_entries=cache_max_entries, ttl=3600.0)
+        self._context_cache = AsyncTTLCache(max_entries=cache_max_entries, ttl=context_cache_ttl)
+        self.db.add_write_hook(self._update_profiles)
         logger.info("MemoryManager инициализирован")
 
+    async def _update_profiles(
+        self,
+        db: aiosqlite.Connection,
+        records: List[Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        """
+        Хук записи: применяет сохранённые записи к профилям
+
+        Один SELECT и один UPSERT на пакет записей.
+
+        Args:
+            db: Соединение записи (внутри транзакции вставки)
+            records: Список (таблица, запись)
+        """
+        # Ответы ассистента и сообщения без терминов профиль не меняют
+        records = [
+            (table, record) for table, record in records
+            if table == 'usage_stats' or record.get('terms')
+        ]
+        if not records:
+            return
+
+        user_ids = list(dict.fromkeys(record['user_id'] for _, record in records))
+        stored = await self.db.load_user_profiles(db, user_ids)
+        profiles = {
+            user_id: UserProfile.from_dict(stored.get(user_id, {}), self.half_life_days)
+            for user_id in user_ids
+        }
+
+        for table, record in records:
+            profile = profiles[record['user_id']]
+            if table == 'messages':
+                if record.get('terms'):
+                    profile.apply_terms(json.loads(record['terms']), record['timestamp'])
+            else:
+                profile.apply_action(record['action_type'], record['timestamp'])
+
+        await self.db.store_user_profiles(
+            db, {user_id: profile.to_dict() for user_id, profile in profiles.items()}
+        )
+
+        # Сбросить кэш только после коммита: иначе параллельный запрос
+        # успеет закэшировать контекст по ещё не зафиксированному профилю
+        def invalidate() -> None:
+            for user_id in user_ids:
+                self.invalidate_context(user_id)
+
+        self.db.after_commit(invalidate)
+
+    def invalidate_context(self, user_id: str) -> None:
+        """
+        Сбрасывает кэш контекста пользователя
+
+        Args:
+            user_id: ID пользователя
+        """
+        self._context_cache.delete(user_id)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Получает метрики кэша контекста
+
+        Returns:
+            Словарь метрик AsyncTTLCache
+        """
+        return self._context_cache.stats()
+
     def get_user_memory(self, user_id: str) -> UserMemory:
         """
         Получает или создаёт память пользователя
@@ -254,10 +326,32 @@ class MemoryManager:
         Returns:
             UserMemory для данного пользователя
         """
-        if user_id not in self._cache:
-            self._cache[user_id] = UserMemory(user_id, self.db)
+        user_memory = self._cache.get(user_id)
+
+        if user_memory is None:
+            user_memory = UserMemory(user_id, self.db, self.half_life_days)
+            self._cache.set(user_id, user_memory)
 
-        return self._cache[user_id]
+        return user_memory
+
+    async def get_context_prompt(self, user_id: str) -> str:
+        """
+        Получает текстовый контекст пользователя для системного промпта
+
+        Текст кэшируется до записи нового сообщения или статистики
+        пользователя (или до истечения TTL); одновременные запросы
+        одного пользователя ждут одно вычисление.
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Текст с контекстом пользователя
+        """
+        return await self._context_cache.get_or_compute(
+            user_id,
+            lambda: self.get_user_memory(user_id).get_context_prompt()
+        )
 
     async def get_enriched_system_prompt(
         self,
@@ -274,8 +368,7 @@ class MemoryManager:
         Returns:
             Обогащённый промпт
         """
-        user_memory = self.get_user_memory(user_id)
-        user_context = await user_memory.get_context_prompt()
+        user_context = await self.get_context_prompt(user_id)
 
         enriched_prompt = f"""{base_prompt}
 
@@ -327,12 +420,16 @@ class MemoryManager:
 _memory_manager: Optional[MemoryManager] = None
 
 
-def get_memory_manager(db: Optional[Database] = None) -> MemoryManager:
+def get_memory_manager(
+    db: Optional[Database] = None,
+    config: Optional[Dict[str, Any]] = None
+) -> MemoryManager:
     """
     Получает глобальный экземпляр MemoryManager
 
     Args:
         db: Database экземпляр (если нужно создать новый менеджер)
+        config: Конфигурация (по умолчанию загружается из config.yaml)
 
     Returns:
         MemoryManager
@@ -340,11 +437,20 @@ def get_memory_manager(db: Optional[Database] = None) -> MemoryManager:
     global _memory_manager
 
     if _memory_manager is None:
-        if db is None:
+        if config is None:
             from utils.config import load_config
             config = load_config()
+
+        if db is None:
             db = Database(config['database']['path'])
 
-        _memory_manager = MemoryManager(db)
+        memory_config = config.get('memory', {})
+        cache_config = memory_config.get('context_cache', {})
+        _memory_manager = MemoryManager(
+            db,
+            half_life_days=memory_config.get('profile_half_life_days', 30.0),
+            cache_max_entries=cache_config.get('max_entries', 1000),
+            context_cache_ttl=cache_config.get('ttl', 300)
+        )
 
     return _memory_manager
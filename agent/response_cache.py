@@ -0,0 +1,247 @@
+"""
+Кэш ответов агента на повторяющиеся запросы только для чтения
+
+Ключ - пользователь, нормализованная фраза, дата (относительные даты
+"сегодня", "на этой неделе" меняют смысл в полночь) и отпечаток
+предыдущего обмена репликами: уточнения вроде "а в пятницу?" или
+"покажи ещё" имеют смысл только после своего вопроса. Ответ, полученный
+без истории, от неё не зависит и отдаётся при любой. Записи пользователя
+сбрасываются при любом выполнении инструмента записи, ответы, в которых
+читался vault, - при изменении индекса vault.
+
+Кэш живёт в памяти процесса: бот и API держат каждый свой, и запись,
+подтверждённая через API, не сбрасывает кэш бота (и наоборот). Такой
+ответ может устареть не дольше чем на TTL (response_cache.ttl), поэтому
+TTL держится коротким.
+"""
+
+import copy
+import hashlib
+import json
+import re
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from utils.cache import TTLCache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Инструменты, результаты которых можно кэшировать
+READ_ONLY_TOOLS = {"get_calendar_events", "get_tasks", "search_notes", "find_notes_by_tag", "get_note_links"}
+
+# Инструменты, читающие vault: их ответы устаревают при изменении файлов
+# (правки в Obsidian, git pull), а не только при записи через агента
+VAULT_TOOLS = {"search_notes", "find_notes_by_tag", "get_note_links"}
+
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]+")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_utterance(text: str) -> str:
+    """
+    Нормализует фразу для ключа кэша
+
+    Приводит к нижнему регистру, заменяет ё на е, убирает пунктуацию
+    и лишние пробелы.
+
+    Args:
+        text: Исходная фраза
+
+    Returns:
+        Нормализованная фраза
+    """
+    text = text.lower().replace("ё", "е")
+    text = _PUNCTUATION_PATTERN.sub(" ", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def history_digest(history: Optional[List[Dict[str, str]]], message: str = "") -> str:
+    """
+    Отпечаток контекста, от которого может зависеть ответ
+
+    Бот и API сохраняют реплику пользователя до вызова агента, поэтому
+    история заканчивается текущим сообщением - оно в отпечаток не
+    входит. Уточнение ("а в пятницу?") зависит от предыдущего обмена,
+    поэтому берётся только последняя пара "вопрос - ответ" перед ним.
+
+    Args:
+        history: История разговора [{"role", "content"}]
+        message: Текущее сообщение
+
+    Returns:
+        Пустая строка, если предыдущего обмена нет, иначе короткий хэш
+    """
+    history = list(history or [])
+    current = normalize_utterance(message)
+    while (
+        history and history[-1].get("role") == "user"
+        and normalize_utterance(history[-1].get("content") or "") == current
+    ):
+        history.pop()
+
+    # Последний ответ ассистента и вопрос, на который он ответил
+    for index in range(len(history) - 1, -1, -1):
+        if history[index].get("role") == "assistant":
+            exchange = history[max(index - 1, 0):index + 1]
+            break
+    else:
+        return ""
+
+    payload = json.dumps(
+        [(msg.get("role"), msg.get("content")) for msg in exchange], ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """Кэш результатов process_message для запросов только для чтения"""
+
+    def __init__(self, max_entries: int = 500, ttl: float = 300.0):
+        """
+        Инициализация кэша
+
+        Args:
+            max_entries: Максимальное количество записей
+            ttl: Время жизни записи в секундах
+        """
+        self._cache = TTLCache(max_entries=max_entries, ttl=ttl)
+
+    def _make_key(
+        self,
+        user_id: str,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        now: Optional[datetime] = None
+    ) -> Tuple[str, str, str, str]:
+        """Формирует ключ: пользователь, нормализованная фраза, дата, отпечаток истории"""
+        date_bucket = (now or datetime.now()).strftime("%Y-%m-%d")
+        return (str(user_id), normalize_utterance(message), date_bucket, history_digest(history, message))
+
+    def get(
+        self,
+        user_id: str,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ищет сохранённый результат
+
+        Args:
+            user_id: ID пользователя
+            message: Текст сообщения
+            history: История разговора (None - ответ, не зависящий от истории)
+
+        Returns:
+            Копия результата (без расхода токенов) или None
+        """
+        result = self._cache.get(self._make_key(user_id, message, history))
+        if result is None:
+            return None
+
+        logger.info(f"Ответ из кэша для {user_id} ({result.get('action_type')})")
+
+        result = copy.deepcopy(result)
+        result["tokens_used"] = 0
+        result["source"] = "cache"
+        return result
+
+    def put(
+        self,
+        user_id: str,
+        message: str,
+        result: Dict[str, Any],
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> bool:
+        """
+        Сохраняет результат, если он получен только инструментами чтения
+
+        Args:
+            user_id: ID пользователя
+            message: Текст сообщения
+            result: Результат process_message
+            history: История, с которой получен ответ (None - ответ от
+                неё не зависит, например fast path)
+
+        Returns:
+            True если результат сохранён
+        """
+        if not self.is_cacheable(result):
+            return False
+
+        cached = copy.deepcopy(result)
+        cached.pop("usage", None)
+        self._cache.set(self._make_key(user_id, message, history), cached)
+        return True
+
+    @staticmethod
+    def is_cacheable(result: Dict[str, Any]) -> bool:
+        """
+        Проверяет, можно ли кэшировать результат
+
+        Кэшируются только выполненные запросы, в которых использовались
+        лишь инструменты чтения и все они завершились успешно.
+
+        Args:
+            result: Результат process_message
+
+        Returns:
+            True если результат можно кэшировать
+        """
+        return (
+            result.get("action") == "executed"
+            and result.get("action_type") in READ_ONLY_TOOLS
+            and result.get("cacheable", False)
+        )
+
+    def invalidate_user(self, user_id: str) -> int:
+        """
+        Сбрасывает все записи пользователя
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Количество удалённых записей
+        """
+        user_id = str(user_id)
+        removed = self._cache.invalidate(lambda key: key[0] == user_id)
+
+        if removed:
+            logger.debug(f"Кэш ответов сброшен для {user_id}: {removed} записей")
+
+        return removed
+
+    def invalidate_tools(self, tools) -> int:
+        """
+        Сбрасывает записи всех пользователей, в которых использовался
+        хотя бы один из этих инструментов
+
+        Args:
+            tools: Названия инструментов
+
+        Returns:
+            Количество удалённых записей
+        """
+        tools = set(tools)
+        removed = self._cache.invalidate_items(
+            lambda key, value: not tools.isdisjoint(value.get("tools_used") or [value.get("action_type")])
+        )
+
+        if removed:
+            logger.debug(f"Кэш ответов сброшен для {', '.join(sorted(tools))}: {removed} записей")
+
+        return removed
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Получает метрики кэша
+
+        Returns:
+            Размер, попадания, промахи, доля попаданий, вытеснения и сбросы
+        """
+        return self._cache.stats()
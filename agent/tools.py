@@ -159,6 +159,38 @@ TOOLS: List[Dict[str, Any]] = [
             },
             "required": ["query"]
         }
+    },
+    {
+        "name": "find_notes_by_tag",
+        "description": "Находит заметки Obsidian с тегом (включая вложенные теги, например 'проект/альфа' для 'проект'). Используй для запросов 'заметки с тегом X', 'что у меня по #проект'.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "tag": {
+                    "type": "string",
+                    "description": "Тег без # (например 'проект')"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Максимальное количество результатов (по умолчанию 20)"
+                }
+            },
+            "required": ["tag"]
+        }
+    },
+    {
+        "name": "get_note_links",
+        "description": "Показывает связи заметки Obsidian: на какие заметки она ссылается и какие заметки ссылаются на неё (обратные ссылки), а также её теги. Используй для запросов 'что ссылается на X', 'связанные заметки'.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "note": {
+                    "type": "string",
+                    "description": "Название заметки, имя файла или алиас"
+                }
+            },
+            "required": ["note"]
+        }
     }
 ]
 
@@ -190,18 +222,19 @@ def get_all_tool_names() -> List[str]:
 
 
 # Системный промпт для Claude
+# Статическая часть: не меняется между запросами и кэшируется на стороне провайдера
+# вместе с TOOLS. Всё переменное (дата, время, память) - в DYNAMIC_CONTEXT_TEMPLATE.
 SYSTEM_PROMPT = """Ты - персональный AI-ассистент, который помогает пользователю управлять календарем, задачами и заметками.
 
 Твои возможности:
 - **Google Calendar**: добавление и просмотр событий
 - **Google Tasks**: управление задачами и списком покупок
-- **Obsidian**: создание и поиск заметок
+- **Obsidian**: создание и поиск заметок, поиск по тегам и ссылкам между заметками
 
 Важные правила:
 
 1. **Понимание дат и времени:**
-   - Сегодня: {today}
-   - Текущее время: {current_time}
+   - Текущие дата и время указаны в разделе "Текущий контекст" ниже
    - Всегда преобразуй относительные даты ("завтра", "в понедельник", "через неделю") в абсолютные даты ISO 8601
    - Если пользователь не указал время, используй разумное время по умолчанию (например, 12:00 для встреч)
 
@@ -231,6 +264,40 @@ SYSTEM_PROMPT = """Ты - персональный AI-ассистент, кот
 
 Всегда старайся понять намерение пользователя и помочь максимально эффективно."""
 
+# Динамическая часть системного промпта (меняется от запроса к запросу)
+DYNAMIC_CONTEXT_TEMPLATE = """## Текущий контекст
+
+- Сегодня: {today}
+- Текущее время: {current_time}"""
+
+USER_CONTEXT_TEMPLATE = """
+
+## Контекст пользователя
+
+{user_context}
+
+Используй эту информацию, чтобы лучше понимать запросы пользователя и предлагать релевантные действия."""
+
+
+def get_dynamic_context(today: str, current_time: str, user_context: str = None) -> str:
+    """
+    Получить динамическую часть системного промпта
+
+    Args:
+        today: Текущая дата в формате YYYY-MM-DD
+        current_time: Текущее время в формате HH:MM
+        user_context: Контекст пользователя из памяти (опционально)
+
+    Returns:
+        Текст с датой, временем и контекстом пользователя
+    """
+    context = DYNAMIC_CONTEXT_TEMPLATE.format(today=today, current_time=current_time)
+
+    if user_context:
+        context += USER_CONTEXT_TEMPLATE.format(user_context=user_context)
+
+    return context
+
 
 def get_system_prompt(today: str, current_time: str) -> str:
     """
@@ -243,4 +310,37 @@ def get_system_prompt(today: str, current_time: str) -> str:
     Returns:
         Системный промпт
     """
-    return SYSTEM_PROMPT.format(today=today, current_time=current_time)
+    return f"{SYSTEM_PROMPT}\n\n{get_dynamic_context(today, current_time)}"
+
+
+def get_system_blocks(
+    today: str,
+    current_time: str,
+    user_context: str = None
+) -> List[Dict[str, Any]]:
+    """
+    Получить системный промпт в виде блоков для prompt caching
+
+    Кэш Anthropic покрывает префикс запроса tools → system до метки
+    cache_control, поэтому метка на статическом блоке кэширует и TOOLS,
+    и инструкции. Дата, время и память идут отдельным блоком после метки.
+
+    Args:
+        today: Текущая дата в формате YYYY-MM-DD
+        current_time: Текущее время в формате HH:MM
+        user_context: Контекст пользователя из памяти (опционально)
+
+    Returns:
+        Список блоков для параметра system Messages API
+    """
+    return [
+        {
+            "type": "text",
+            "text": SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"}
+        },
+        {
+            "type": "text",
+            "text": get_dynamic_context(today, current_time, user_context)
+        }
+    ]
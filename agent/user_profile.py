@@ -0,0 +1,242 @@
+"""
+Инкрементальный профиль пользователя для памяти ассистента
+
+Профиль обновляется при каждой записи сообщения или статистики
+(хук записи Database) и хранится одной строкой в user_profiles, поэтому
+контекст для системного промпта строится без пересчёта истории.
+Ключевые слова и товары учитываются по нормальной форме из
+messages.terms (utils/text_normalizer.py), для вывода хранится слово в
+том виде, в котором оно встретилось впервые.
+
+Счётчики ключевых слов, действий, часов активности и покупок затухают
+экспоненциально (период полураспада - half_life_days): старые интересы
+постепенно уступают новым. Число взаимодействий хранится по дням за
+последние INTERACTION_DAYS дней.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+from utils.text_normalizer import TERM_KEYWORD, TERM_SHOPPING
+
+# Сколько дней хранить счётчик взаимодействий по дням
+INTERACTION_DAYS = 30
+
+# Ограничения размера профиля
+MAX_KEYWORDS = 200
+MAX_SHOPPING_ITEMS = 100
+MIN_SCORE = 0.05
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """Разбирает timestamp SQLite ("YYYY-MM-DD HH:MM:SS", UTC)"""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class UserProfile:
+    """Агрегированный профиль пользователя"""
+
+    half_life_days: float = 30.0
+    keywords: Dict[str, float] = field(default_factory=dict)
+    actions: Dict[str, float] = field(default_factory=dict)
+    shopping: Dict[str, float] = field(default_factory=dict)
+    hours: List[float] = field(default_factory=lambda: [0.0] * 24)
+    # Нормальная форма -> слово для вывода
+    surfaces: Dict[str, str] = field(default_factory=dict)
+    daily_interactions: Dict[str, int] = field(default_factory=dict)
+    last_interaction: Optional[str] = None
+    # Момент, к которому приведены затухающие счётчики
+    decay_at: Optional[str] = None
+    # Профиль построен по истории (а не только по записям после создания)
+    bootstrapped: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], half_life_days: float = 30.0) -> "UserProfile":
+        """
+        Восстанавливает профиль из сохранённого JSON
+
+        Args:
+            data: Словарь из user_profiles.data
+            half_life_days: Период полураспада счётчиков
+
+        Returns:
+            UserProfile
+        """
+        hours = list(data.get('hours') or [])
+        return cls(
+            half_life_days=half_life_days,
+            keywords=dict(data.get('keywords') or {}),
+            actions=dict(data.get('actions') or {}),
+            shopping=dict(data.get('shopping') or {}),
+            hours=(hours + [0.0] * 24)[:24],
+            surfaces=dict(data.get('surfaces') or {}),
+            daily_interactions=dict(data.get('daily_interactions') or {}),
+            last_interaction=data.get('last_interaction'),
+            decay_at=data.get('decay_at'),
+            bootstrapped=bool(data.get('bootstrapped', False))
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Сериализует профиль для user_profiles.data"""
+        return {
+            "keywords": {k: round(v, 3) for k, v in self.keywords.items()},
+            "actions": {k: round(v, 3) for k, v in self.actions.items()},
+            "shopping": {k: round(v, 3) for k, v in self.shopping.items()},
+            "hours": [round(v, 3) for v in self.hours],
+            "surfaces": self.surfaces,
+            "daily_interactions": self.daily_interactions,
+            "last_interaction": self.last_interaction,
+            "decay_at": self.decay_at,
+            "bootstrapped": self.bootstrapped
+        }
+
+    def _weight(self, moment: datetime) -> float:
+        """
+        Приводит счётчики к моменту события и возвращает вес события
+
+        Если событие новее decay_at, все счётчики затухают до него
+        (вес 1.0). Более старое событие (например, из буфера записи)
+        добавляется с меньшим весом.
+        """
+        if self.decay_at is None:
+            self.decay_at = moment.strftime("%Y-%m-%d %H:%M:%S")
+            return 1.0
+
+        reference = parse_timestamp(self.decay_at) or moment
+        delta_days = (moment - reference).total_seconds() / 86400
+
+        if delta_days <= 0:
+            return 0.5 ** (-delta_days / self.half_life_days)
+
+        factor = 0.5 ** (delta_days / self.half_life_days)
+        for counter in (self.keywords, self.actions, self.shopping):
+            for key in list(counter):
+                counter[key] *= factor
+        self.hours = [value * factor for value in self.hours]
+        self.decay_at = moment.strftime("%Y-%m-%d %H:%M:%S")
+        return 1.0
+
+    def apply_terms(self, terms: Iterable[Sequence[str]], timestamp: Any) -> None:
+        """
+        Учитывает термины сообщения пользователя: ключевые слова и покупки
+
+        Args:
+            terms: Термины из messages.terms: (вид, нормальная форма, слово)
+            timestamp: Время сообщения
+        """
+        moment = parse_timestamp(timestamp) or datetime.utcnow()
+        weight = self._weight(moment)
+
+        for kind, term, surface in terms:
+            self._add_term(kind, term, surface, weight)
+
+        self._prune()
+
+    def seed_term(self, kind: str, term: str, surface: str, count: int, last_seen: Any) -> None:
+        """
+        Добавляет накопленный счётчик термина (построение профиля по агрегатам)
+
+        Все упоминания считаются сделанными в last_seen.
+
+        Args:
+            kind: Вид термина (keyword/shopping)
+            term: Нормальная форма
+            surface: Слово для вывода
+            count: Количество упоминаний
+            last_seen: Время последнего упоминания
+        """
+        moment = parse_timestamp(last_seen) or datetime.utcnow()
+        self._add_term(kind, term, surface, self._weight(moment) * count)
+        self._prune()
+
+    def _add_term(self, kind: str, term: str, surface: str, weight: float) -> None:
+        """Увеличивает счётчик термина"""
+        counter = self.shopping if kind == TERM_SHOPPING else self.keywords if kind == TERM_KEYWORD else None
+        if counter is None:
+            return
+
+        counter[term] = counter.get(term, 0.0) + weight
+        self.surfaces.setdefault(term, surface)
+
+    def apply_action(self, action_type: str, timestamp: Any) -> None:
+        """
+        Учитывает запись статистики: действие, час и день активности
+
+        Args:
+            action_type: Тип действия
+            timestamp: Время записи
+        """
+        moment = parse_timestamp(timestamp) or datetime.utcnow()
+        weight = self._weight(moment)
+
+        self.actions[action_type] = self.actions.get(action_type, 0.0) + weight
+        self.hours[moment.hour] += weight
+
+        day = moment.strftime("%Y-%m-%d")
+        self.daily_interactions[day] = self.daily_interactions.get(day, 0) + 1
+
+        stamp = moment.strftime("%Y-%m-%d %H:%M:%S")
+        if self.last_interaction is None or stamp > self.last_interaction:
+            self.last_interaction = stamp
+
+        # Удалить дни за пределами окна
+        oldest = (moment - timedelta(days=INTERACTION_DAYS)).strftime("%Y-%m-%d")
+        for old_day in [d for d in self.daily_interactions if d < oldest]:
+            del self.daily_interactions[old_day]
+
+    def _prune(self) -> None:
+        """Ограничивает размер счётчиков слов и покупок"""
+        for counter, limit in ((self.keywords, MAX_KEYWORDS), (self.shopping, MAX_SHOPPING_ITEMS)):
+            for key in [k for k, v in counter.items() if v < MIN_SCORE]:
+                del counter[key]
+
+            if len(counter) > limit:
+                keep = sorted(counter.items(), key=lambda item: item[1], reverse=True)[:limit]
+                counter.clear()
+                counter.update(keep)
+
+        for term in [t for t in self.surfaces if t not in self.keywords and t not in self.shopping]:
+            del self.surfaces[term]
+
+    # --- Чтение ---
+
+    def interactions(self, days: int = INTERACTION_DAYS, today: Optional[datetime] = None) -> int:
+        """Количество взаимодействий за последние days дней"""
+        first_day = ((today or datetime.utcnow()) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+        return sum(count for day, count in self.daily_interactions.items() if day >= first_day)
+
+    def top_keywords(self, limit: int = 10) -> List[str]:
+        """Самые частые ключевые слова"""
+        return [self.surfaces.get(term, term) for term in _top(self.keywords, limit)]
+
+    def top_actions(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Самые частые действия с (затухающими) счётчиками"""
+        return [
+            {"action": action, "count": round(self.actions[action])}
+            for action in _top(self.actions, limit)
+        ]
+
+    def top_shopping_items(self, limit: int = 10) -> List[str]:
+        """Самые частые покупки"""
+        return [self.surfaces.get(term, term) for term in _top(self.shopping, limit)]
+
+    def active_hours(self) -> List[int]:
+        """Часы (0-23, UTC) с активностью выше средней"""
+        active = {hour: value for hour, value in enumerate(self.hours) if value >= MIN_SCORE}
+        if not active:
+            return []
+
+        average = sum(active.values()) / len(active)
+        return sorted(hour for hour, value in active.items() if value > average)
+
+
+def _top(counter: Dict[str, float], limit: int) -> List[str]:
+    """Ключи с наибольшими значениями"""
+    return [key for key, _ in sorted(counter.items(), key=lambda item: item[1], reverse=True)[:limit]]
@@ -2,6 +2,8 @@
 FastAPI приложение для REST API
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -11,14 +13,44 @@ import time
 from api.routes import voice, text, confirm, tts, voice_confirm
 from api.models import HealthResponse, ErrorResponse
 from utils.logger import get_logger
-from utils.database import Database
 from utils.config import load_config
+from utils.services import get_services
 
 logger = get_logger(__name__)
 
 # Загрузить конфигурацию
 config = load_config()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка общих сервисов приложения"""
+    logger.info("=" * 60)
+    logger.info("🚀 Запуск REST API сервера")
+    logger.info("=" * 60)
+
+    # Один агент, одна БД и общие пулы соединений на все роуты
+    services = get_services(config)
+    await services.start()
+    app.state.services = services
+
+    # Модель быстрых подтверждений (/voice-confirm) грузится в фоне
+    # (с executor "worker" она уже загружена в ASR worker)
+    services.transcription.preload_confirmation()
+
+    logger.info("✅ REST API сервер готов к работе")
+    logger.info(f"📖 Документация: http://{config['api']['host']}:{config['api']['port']}/api/docs")
+    logger.info("=" * 60)
+
+    yield
+
+    logger.info("=" * 60)
+    logger.info("⏸️  Остановка REST API сервера")
+    logger.info("=" * 60)
+
+    await services.stop()
+
+
 # Создать FastAPI приложение
 app = FastAPI(
     title="AI Assistant API",
@@ -26,7 +58,8 @@ app = FastAPI(
     description="REST API для персонального AI-ассистента с голосовой активацией",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    lifespan=lifespan
 )
 
 
@@ -136,32 +169,6 @@ async def root():
     }
 
 
-# Событие при запуске приложения
-@app.on_event("startup")
-async def startup_event():
-    """Выполняется при запуске приложения"""
-    logger.info("=" * 60)
-    logger.info("🚀 Запуск REST API сервера")
-    logger.info("=" * 60)
-
-    # Инициализировать базу данных
-    db = Database(config['database']['path'])
-    await db.init_db()
-
-    logger.info("✅ REST API сервер готов к работе")
-    logger.info(f"📖 Документация: http://{config['api']['host']}:{config['api']['port']}/api/docs")
-    logger.info("=" * 60)
-
-
-# Событие при остановке приложения
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Выполняется при остановке приложения"""
-    logger.info("=" * 60)
-    logger.info("⏸️  Остановка REST API сервера")
-    logger.info("=" * 60)
-
-
 if __name__ == "__main__":
     import uvicorn
 
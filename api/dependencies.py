@@ -0,0 +1,38 @@
+"""
+Зависимости FastAPI: доступ к общим сервисам приложения
+"""
+
+from fastapi import Request
+
+from agent.claude_agent import ClaudeAgent
+from integrations.transcription import TranscriptionService
+from utils.database import Database
+from utils.services import ServiceContainer
+
+
+def get_service_container(request: Request) -> ServiceContainer:
+    """
+    Возвращает контейнер сервисов, поднятый в lifespan приложения
+
+    Args:
+        request: Текущий запрос
+
+    Returns:
+        ServiceContainer
+    """
+    return request.app.state.services
+
+
+def get_db(request: Request) -> Database:
+    """Возвращает общую базу данных"""
+    return get_service_container(request).db
+
+
+def get_agent(request: Request) -> ClaudeAgent:
+    """Возвращает общий Claude Agent"""
+    return get_service_container(request).agent
+
+
+def get_transcription(request: Request) -> TranscriptionService:
+    """Возвращает общий сервис распознавания речи"""
+    return get_service_container(request).transcription
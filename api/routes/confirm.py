@@ -4,21 +4,16 @@ Route для подтверждения действий
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from api.middleware.auth import verify_token
+from api.dependencies import get_db, get_agent
 from api.models import ConfirmRequest, CommandResponse, ErrorResponse
 from agent.claude_agent import ClaudeAgent
 from utils.database import Database
-from utils.config import load_config
 from utils.logger import get_logger
 from integrations.tts import get_or_create_tts_url
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-# Загрузить конфигурацию и инициализировать зависимости
-config = load_config()
-db = Database(config['database']['path'])
-agent = ClaudeAgent(config)
-
 
 @router.post(
     "/confirm",
@@ -33,7 +28,9 @@ agent = ClaudeAgent(config)
 )
 async def confirm_action(
     request: ConfirmRequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(verify_token),
+    db: Database = Depends(get_db),
+    agent: ClaudeAgent = Depends(get_agent)
 ) -> CommandResponse:
     """
     Обрабатывает подтверждение действия
@@ -41,6 +38,8 @@ async def confirm_action(
     Args:
         request: Запрос с ID подтверждения и ответом
         token: Валидированный API токен
+        db: База данных
+        agent: Claude Agent
 
     Returns:
         Результат выполнения действия или отмены
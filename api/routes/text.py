@@ -2,23 +2,22 @@
 Route для обработки текстовых команд
 """
 
+import json
+from typing import Any, Dict, List
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from api.middleware.auth import verify_token
+from api.dependencies import get_db, get_agent
 from api.models import TextCommandRequest, CommandResponse, ErrorResponse
 from agent.claude_agent import ClaudeAgent
 from utils.database import Database
-from utils.config import load_config
 from utils.logger import get_logger
 from integrations.tts import get_or_create_tts_url
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-# Загрузить конфигурацию и инициализировать зависимости
-config = load_config()
-db = Database(config['database']['path'])
-agent = ClaudeAgent(config)
-
 
 @router.post(
     "/text-command",
@@ -32,7 +31,9 @@ agent = ClaudeAgent(config)
 )
 async def text_command(
     request: TextCommandRequest,
-    token: str = Depends(verify_token)
+    token: str = Depends(verify_token),
+    db: Database = Depends(get_db),
+    agent: ClaudeAgent = Depends(get_agent)
 ) -> CommandResponse:
     """
     Обрабатывает текстовую команду от пользователя
@@ -40,6 +41,8 @@ async def text_command(
     Args:
         request: Запрос с текстом команды
         token: Валидированный API токен
+        db: База данных
+        agent: Claude Agent
 
     Returns:
         Ответ с результатом обработки
@@ -50,26 +53,7 @@ async def text_command(
     logger.info(f"Получена текстовая команда от {user_id}: {request.text}")
 
     try:
-        # Сохранить сообщение пользователя в БД
-        await db.save_message(
-            user_id=user_id,
-            role="user",
-            content=request.text,
-            session_id=request.context_id
-        )
-
-        # Получить историю разговора для контекста
-        conversation_history = []
-        if request.context_id:
-            messages = await db.get_message_history(
-                user_id=user_id,
-                limit=5,
-                session_id=request.context_id
-            )
-            conversation_history = [
-                {"role": msg["role"], "content": msg["content"]}
-                for msg in messages
-            ]
+        conversation_history = await _prepare_conversation(db, request, user_id)
 
         # Обработать через Claude Agent
         result = await agent.process_message(
@@ -78,36 +62,7 @@ async def text_command(
             conversation_history=conversation_history
         )
 
-        # Сохранить ответ ассистента в БД
-        response_text = result.get('confirmation_text') or result.get('response_text', '')
-        await db.save_message(
-            user_id=user_id,
-            role="assistant",
-            content=response_text,
-            session_id=request.context_id
-        )
-
-        # Сохранить статистику
-        await db.save_usage_stats(
-            user_id=user_id,
-            interface="api_text",
-            action_type=result.get('action_type', 'text_command'),
-            tokens_used=result.get('tokens_used', 0)
-        )
-
-        # Сгенерировать TTS URL
-        tts_text = result.get('confirmation_text') or result.get('response_text', '')
-        audio_url = get_or_create_tts_url(tts_text) if tts_text else None
-
-        # Сформировать ответ
-        response = CommandResponse(
-            status="success",
-            action=result['action'],
-            confirmation_text=result.get('confirmation_text'),
-            response_text=result.get('response_text', ''),
-            audio_url=audio_url,
-            confirmation_id=result.get('confirmation_id')
-        )
+        response = await _finalize_result(db, request, user_id, result)
 
         logger.info(f"Команда обработана успешно (action: {result['action']})")
         return response
@@ -118,3 +73,169 @@ async def text_command(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing command: {str(e)}"
         )
+
+
+@router.post(
+    "/text-command/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Server-Sent Events"},
+        401: {"model": ErrorResponse, "description": "Unauthorized"}
+    },
+    summary="Обработать текстовую команду (потоково)",
+    description=(
+        "Как /text-command, но отдаёт ответ через Server-Sent Events: "
+        "события `delta` с фрагментами текста и финальное событие `result` "
+        "с CommandResponse"
+    )
+)
+async def text_command_stream(
+    request: TextCommandRequest,
+    token: str = Depends(verify_token),
+    db: Database = Depends(get_db),
+    agent: ClaudeAgent = Depends(get_agent)
+) -> StreamingResponse:
+    """
+    Обрабатывает текстовую команду с потоковой выдачей ответа
+
+    Args:
+        request: Запрос с текстом команды
+        token: Валидированный API токен
+        db: База данных
+        agent: Claude Agent
+
+    Returns:
+        Поток Server-Sent Events
+    """
+
+    user_id = request.user_id or "api_user"
+
+    logger.info(f"Получена потоковая текстовая команда от {user_id}: {request.text}")
+
+    async def event_stream():
+        try:
+            conversation_history = await _prepare_conversation(db, request, user_id)
+
+            result: Dict[str, Any] = {}
+            async for event in agent.process_message_stream(
+                message=request.text,
+                user_id=user_id,
+                conversation_history=conversation_history
+            ):
+                if event["type"] == "delta":
+                    yield _sse_event("delta", {"text": event["text"]})
+                else:
+                    result = event["result"]
+
+            response = await _finalize_result(db, request, user_id, result)
+            yield _sse_event("result", response.model_dump())
+
+            logger.info(f"Потоковая команда обработана успешно (action: {result['action']})")
+
+        except Exception as e:
+            logger.error(f"Ошибка при потоковой обработке текстовой команды: {e}", exc_info=True)
+            yield _sse_event("error", {"status": "error", "error": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Отключить буферизацию в nginx
+        }
+    )
+
+
+async def _prepare_conversation(
+    db: Database,
+    request: TextCommandRequest,
+    user_id: str
+) -> List[Dict[str, str]]:
+    """
+    Сохраняет сообщение пользователя и загружает историю разговора
+
+    Args:
+        db: База данных
+        request: Запрос с текстом команды
+        user_id: ID пользователя
+
+    Returns:
+        История разговора для контекста
+    """
+    # Сохранить сообщение пользователя в БД
+    await db.save_message(
+        user_id=user_id,
+        role="user",
+        content=request.text,
+        session_id=request.context_id
+    )
+
+    # Получить историю разговора для контекста
+    conversation_history = []
+    if request.context_id:
+        messages = await db.get_message_history(
+            user_id=user_id,
+            limit=5,
+            session_id=request.context_id
+        )
+        conversation_history = [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in messages
+        ]
+
+    return conversation_history
+
+
+async def _finalize_result(
+    db: Database,
+    request: TextCommandRequest,
+    user_id: str,
+    result: Dict[str, Any]
+) -> CommandResponse:
+    """
+    Сохраняет ответ и статистику, формирует CommandResponse
+
+    Args:
+        db: База данных
+        request: Исходный запрос
+        user_id: ID пользователя
+        result: Результат обработки агентом
+
+    Returns:
+        Ответ API
+    """
+    # Сохранить ответ ассистента в БД
+    response_text = result.get('confirmation_text') or result.get('response_text', '')
+    await db.save_message(
+        user_id=user_id,
+        role="assistant",
+        content=response_text,
+        session_id=request.context_id
+    )
+
+    # Сохранить статистику
+    await db.save_usage_stats(
+        user_id=user_id,
+        interface="api_text",
+        action_type=result.get('action_type', 'text_command'),
+        tokens_used=result.get('tokens_used', 0),
+        usage=result.get('usage')
+    )
+
+    # Сгенерировать TTS URL
+    tts_text = result.get('confirmation_text') or result.get('response_text', '')
+    audio_url = get_or_create_tts_url(tts_text) if tts_text else None
+
+    # Сформировать ответ
+    return CommandResponse(
+        status="success",
+        action=result['action'],
+        confirmation_text=result.get('confirmation_text'),
+        response_text=result.get('response_text', ''),
+        audio_url=audio_url,
+        confirmation_id=result.get('confirmation_id')
+    )
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Форматирует событие Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
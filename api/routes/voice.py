@@ -4,24 +4,20 @@ Route для обработки голосовых команд
 
 import os
 import uuid
+from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from api.middleware.auth import verify_token
+from api.dependencies import get_db, get_agent, get_transcription
 from api.models import CommandResponse, ErrorResponse
 from agent.claude_agent import ClaudeAgent
 from utils.database import Database
-from utils.config import load_config
 from utils.logger import get_logger
-from integrations.whisper import transcribe_audio
+from integrations.transcription import TranscriptionBusy, TranscriptionService
 from integrations.tts import get_or_create_tts_url
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-# Загрузить конфигурацию и инициализировать зависимости
-config = load_config()
-db = Database(config['database']['path'])
-agent = ClaudeAgent(config)
-
 # Временная директория для аудио файлов
 TEMP_DIR = "data/temp"
 os.makedirs(TEMP_DIR, exist_ok=True)
@@ -32,6 +28,7 @@ os.makedirs(TEMP_DIR, exist_ok=True)
     response_model=CommandResponse,
     responses={
         401: {"model": ErrorResponse, "description": "Unauthorized"},
+        429: {"model": ErrorResponse, "description": "Speech recognition queue is full"},
         500: {"model": ErrorResponse, "description": "Internal Server Error"}
     },
     summary="Обработать голосовую команду",
@@ -39,7 +36,10 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 )
 async def voice_command(
     audio: UploadFile = File(..., description="Аудио файл (.ogg, .mp3, .wav, .m4a)"),
-    token: str = Depends(verify_token)
+    token: str = Depends(verify_token),
+    db: Database = Depends(get_db),
+    agent: ClaudeAgent = Depends(get_agent),
+    transcription: TranscriptionService = Depends(get_transcription)
 ) -> CommandResponse:
     """
     Обрабатывает голосовую команду от пользователя
@@ -47,6 +47,9 @@ async def voice_command(
     Args:
         audio: Аудио файл с командой
         token: Валидированный API токен
+        db: База данных
+        agent: Claude Agent
+        transcription: Сервис распознавания речи
 
     Returns:
         Ответ с результатом обработки
@@ -79,8 +82,8 @@ async def voice_command(
 
         logger.info(f"Аудио файл сохранён: {temp_filepath} ({len(content)} bytes)")
 
-        # Распознать речь через Whisper API
-        transcribed_text = transcribe_audio(temp_filepath, language="ru")
+        # Распознать речь (в пуле, с ограничением очереди)
+        transcribed_text = await transcription.transcribe(temp_filepath, language="ru")
 
         if not transcribed_text:
             raise HTTPException(
@@ -117,7 +120,8 @@ async def voice_command(
             user_id=user_id,
             interface="api_voice",
             action_type=result.get('action_type', 'voice_command'),
-            tokens_used=result.get('tokens_used', 0)
+            tokens_used=result.get('tokens_used', 0),
+            usage=result.get('usage')
         )
 
         # Сгенерировать TTS URL
@@ -139,6 +143,12 @@ async def voice_command(
 
     except HTTPException:
         raise
+    except TranscriptionBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Speech recognition is busy. Please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.error(f"Ошибка при обработке голосовой команды: {e}", exc_info=True)
         raise HTTPException(
@@ -154,3 +164,20 @@ async def voice_command(
                 logger.debug(f"Удалён временный файл: {temp_filepath}")
             except Exception as e:
                 logger.warning(f"Не удалось удалить временный файл: {e}")
+
+
+@router.get(
+    "/voice/metrics",
+    summary="Метрики распознавания речи",
+    description="Очередь, ожидание и время декодирования по моделям Whisper"
+)
+async def voice_metrics(
+    token: str = Depends(verify_token),
+    transcription: TranscriptionService = Depends(get_transcription)
+) -> Dict[str, Any]:
+    """Возвращает метрики сервиса распознавания"""
+    stats = transcription.stats()
+    worker = await transcription.worker_stats()
+    if worker is not None:
+        stats['asr_worker'] = worker
+    return stats
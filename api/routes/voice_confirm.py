@@ -4,24 +4,21 @@ Route для голосового подтверждения действий (
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from api.middleware.auth import verify_token
+from api.dependencies import get_db, get_agent, get_transcription
 from api.models import CommandResponse, ErrorResponse
 from agent.claude_agent import ClaudeAgent
 from utils.database import Database
-from utils.config import load_config
 from utils.logger import get_logger
 from integrations.tts import get_or_create_tts_url
-from integrations.whisper import transcribe_audio
+from integrations.transcription import TranscriptionBusy, TranscriptionService
+from typing import Optional
 import tempfile
 import os
+import re
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-# Загрузить конфигурацию и инициализировать зависимости
-config = load_config()
-db = Database(config['database']['path'])
-agent = ClaudeAgent(config)
-
 
 @router.post(
     "/voice-confirm",
@@ -29,6 +26,7 @@ agent = ClaudeAgent(config)
     responses={
         401: {"model": ErrorResponse, "description": "Unauthorized"},
         404: {"model": ErrorResponse, "description": "Confirmation not found"},
+        429: {"model": ErrorResponse, "description": "Speech recognition queue is full"},
         500: {"model": ErrorResponse, "description": "Internal Server Error"}
     },
     summary="Голосовое подтверждение действия",
@@ -38,18 +36,25 @@ async def voice_confirm_action(
     audio: UploadFile = File(..., description="Аудио файл с ответом (да/нет)"),
     confirmation_id: str = Form(..., description="ID подтверждения"),
     user_id: str = Form(None, description="ID пользователя"),
-    token: str = Depends(verify_token)
+    token: str = Depends(verify_token),
+    db: Database = Depends(get_db),
+    agent: ClaudeAgent = Depends(get_agent),
+    transcription: TranscriptionService = Depends(get_transcription)
 ) -> CommandResponse:
     """
     Обрабатывает голосовое подтверждение действия
 
-    Распознаёт аудио через Whisper и определяет, согласен ли пользователь
+    Короткий ответ распознаётся маленькой моделью по словарю
+    подтверждений; неуверенный результат - полным Whisper
 
     Args:
         audio: Аудио файл с ответом пользователя
         confirmation_id: ID подтверждения из БД
         user_id: ID пользователя
         token: Валидированный API токен
+        db: База данных
+        agent: Claude Agent
+        transcription: Сервис распознавания речи
 
     Returns:
         Результат выполнения действия или отмены
@@ -70,10 +75,14 @@ async def voice_confirm_action(
 
         logger.debug(f"Аудио сохранено: {temp_file_path}")
 
-        # Распознать речь
         try:
-            transcribed_text = transcribe_audio(temp_file_path, language="ru")
-            logger.info(f"Распознанный текст: {transcribed_text}")
+            confirmed = await _recognize_confirmation(transcription, temp_file_path)
+        except TranscriptionBusy as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Speech recognition is busy. Please retry later.",
+                headers={"Retry-After": str(e.retry_after)}
+            )
         except Exception as e:
             logger.error(f"Ошибка распознавания речи: {e}", exc_info=True)
             raise HTTPException(
@@ -81,12 +90,9 @@ async def voice_confirm_action(
                 detail=f"Speech recognition failed: {str(e)}"
             )
 
-        # Определить намерение (Да или Нет)
-        confirmed = _detect_confirmation_intent(transcribed_text)
-
         if confirmed is None:
             # Не удалось понять ответ
-            logger.warning(f"Не удалось определить намерение: {transcribed_text}")
+            logger.warning("Не удалось определить намерение")
 
             response_text = "Извините, я не поняла ваш ответ. Скажите 'да' или 'нет'."
             audio_url = get_or_create_tts_url(response_text)
@@ -176,7 +182,32 @@ async def voice_confirm_action(
                 logger.warning(f"Не удалось удалить временный файл: {e}")
 
 
-def _detect_confirmation_intent(text: str) -> bool:
+async def _recognize_confirmation(transcription: TranscriptionService, audio_file_path: str) -> Optional[bool]:
+    """
+    Распознаёт ответ: сначала быстро по словарю подтверждений, при
+    низкой уверенности - полным распознаванием и поиском ключевых слов
+
+    Args:
+        transcription: Сервис распознавания речи
+        audio_file_path: Путь к аудио-файлу
+
+    Returns:
+        True - согласие, False - отказ или отмена, None - не понятно
+
+    Raises:
+        TranscriptionBusy: Очередь распознавания заполнена
+    """
+    result = await transcription.recognize_confirmation(audio_file_path)
+    if result is not None and result.confident:
+        return result.intent == 'yes'
+
+    transcribed_text = await transcription.transcribe(audio_file_path, language="ru")
+    logger.info(f"Распознанный текст: {transcribed_text}")
+
+    return _detect_confirmation_intent(transcribed_text)
+
+
+def _detect_confirmation_intent(text: str) -> Optional[bool]:
     """
     Определяет намерение пользователя по распознанному тексту
 
@@ -188,7 +219,9 @@ def _detect_confirmation_intent(text: str) -> bool:
         False - если пользователь отказался
         None - если не удалось определить
     """
-    text_lower = text.lower().strip()
+    # Целые слова: "да" не должно находиться в "надо", "правильно" - в "неправильно"
+    words = re.sub(r'[^\w\s]', ' ', text.lower().replace('ё', 'е')).split()
+    text_lower = f" {' '.join(words)} "
 
     # Позитивные ответы
     positive_keywords = [
@@ -204,18 +237,18 @@ def _detect_confirmation_intent(text: str) -> bool:
         'неправильно', 'неверно', 'ошибка', 'стоп'
     ]
 
+    # Сначала негативные: "не согласен" содержит "согласен"
+    for keyword in negative_keywords:
+        if f' {keyword} ' in text_lower:
+            logger.info(f"Обнаружен отказ: '{keyword}' в '{text}'")
+            return False
+
     # Проверить позитивные
     for keyword in positive_keywords:
-        if keyword in text_lower:
+        if f' {keyword} ' in text_lower:
             logger.info(f"Обнаружено подтверждение: '{keyword}' в '{text}'")
             return True
 
-    # Проверить негативные
-    for keyword in negative_keywords:
-        if keyword in text_lower:
-            logger.info(f"Обнаружен отказ: '{keyword}' в '{text}'")
-            return False
-
     # Не удалось определить
     logger.warning(f"Не удалось определить намерение в тексте: '{text}'")
     return None
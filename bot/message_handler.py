@@ -4,9 +4,11 @@
 
 import uuid
 import json
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+import time
+from telegram import Update, Message, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 from utils.logger import get_logger
 from utils.database import Database
@@ -14,22 +16,33 @@ from agent.claude_agent import ClaudeAgent
 
 logger = get_logger(__name__)
 
+# Максимальная длина сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Маркер, показывающий что ответ ещё генерируется
+STREAM_CURSOR = " ▌"
+
 
 class MessageHandlerBot:
     """Класс для обработки текстовых сообщений"""
 
-    def __init__(self, config: Dict[str, Any], db: Database):
+    def __init__(self, config: Dict[str, Any], db: Database, agent: Optional[ClaudeAgent] = None):
         """
         Инициализация обработчика
 
         Args:
             config: Конфигурация
             db: База данных
+            agent: Общий Claude Agent (если None, создаётся собственный)
         """
         self.config = config
         self.db = db
-        # Инициализация Claude Agent
-        self.agent = ClaudeAgent(config)
+        self.agent = agent or ClaudeAgent(config)
+
+        # Потоковые ответы (прогрессивное редактирование сообщения)
+        telegram_config = config.get('telegram', {})
+        self.streaming = telegram_config.get('streaming', True)
+        self.stream_edit_interval = telegram_config.get('stream_edit_interval', 1.0)
 
     async def handle_text_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -55,9 +68,12 @@ class MessageHandlerBot:
                 content=message_text
             )
 
-            # TODO: Обработать через Claude Agent
-            # На данный момент - заглушка
-            response = await self._process_with_agent(message_text, user_id, context)
+            # Обработать через Claude Agent
+            stream_message = None
+            if self.streaming:
+                response, stream_message = await self._stream_with_agent(update, message_text, user_id)
+            else:
+                response = await self._process_with_agent(message_text, user_id, context)
 
             # Сохранить ответ ассистента в БД
             await self.db.save_message(
@@ -68,7 +84,13 @@ class MessageHandlerBot:
 
             # Если требуется подтверждение
             if response.get('action') == 'confirm':
-                await self._send_confirmation(update, context, response)
+                await self._send_confirmation(update, context, response, stream_message)
+            elif stream_message:
+                # Заменить черновик итоговым ответом
+                await self._edit_stream_message(
+                    stream_message,
+                    response.get('response_text') or 'Понял вас!'
+                )
             else:
                 # Просто отправить ответ
                 await update.message.reply_text(
@@ -80,7 +102,8 @@ class MessageHandlerBot:
                 user_id=user_id,
                 interface="telegram",
                 action_type=response.get('action_type', 'message'),
-                tokens_used=response.get('tokens_used', 0)
+                tokens_used=response.get('tokens_used', 0),
+                usage=response.get('usage')
             )
 
         except Exception as e:
@@ -128,11 +151,90 @@ class MessageHandlerBot:
 
         return response
 
+    async def _stream_with_agent(
+        self,
+        update: Update,
+        message: str,
+        user_id: str
+    ) -> Tuple[Dict[str, Any], Optional[Message]]:
+        """
+        Обработать сообщение через Claude Agent в потоковом режиме
+
+        Текст ответа появляется в одном сообщении, которое редактируется
+        не чаще stream_edit_interval секунд (ограничение Telegram на edit).
+
+        Args:
+            update: Telegram update
+            message: Текст сообщения
+            user_id: ID пользователя
+
+        Returns:
+            (результат обработки, отправленное сообщение-черновик или None)
+        """
+        conversation_history = [
+            {"role": msg["role"], "content": msg["content"]}
+            for msg in await self.db.get_message_history(user_id, limit=5)
+        ]
+
+        stream_message: Optional[Message] = None
+        buffer = ""
+        last_edit = 0.0
+        result: Dict[str, Any] = {}
+
+        async for event in self.agent.process_message_stream(
+            message=message,
+            user_id=user_id,
+            conversation_history=conversation_history
+        ):
+            if event["type"] == "result":
+                result = event["result"]
+                continue
+
+            buffer += event["text"]
+            now = time.monotonic()
+
+            if not buffer.strip() or now - last_edit < self.stream_edit_interval:
+                continue
+
+            draft = buffer[:TELEGRAM_MESSAGE_LIMIT - len(STREAM_CURSOR)] + STREAM_CURSOR
+            if stream_message is None:
+                stream_message = await update.message.reply_text(draft)
+            else:
+                await self._edit_stream_message(stream_message, draft)
+            last_edit = now
+
+        return result, stream_message
+
+    async def _edit_stream_message(
+        self,
+        stream_message: Message,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None
+    ):
+        """
+        Отредактировать сообщение-черновик
+
+        Args:
+            stream_message: Сообщение для редактирования
+            text: Новый текст
+            reply_markup: Кнопки (опционально)
+        """
+        try:
+            await stream_message.edit_text(
+                text[:TELEGRAM_MESSAGE_LIMIT],
+                reply_markup=reply_markup
+            )
+        except BadRequest as e:
+            # Telegram отклоняет edit без изменений текста
+            if "not modified" not in str(e).lower():
+                raise
+
     async def _send_confirmation(
         self,
         update: Update,
         context: ContextTypes.DEFAULT_TYPE,
-        response: Dict[str, Any]
+        response: Dict[str, Any],
+        stream_message: Optional[Message] = None
     ):
         """
         Отправить запрос на подтверждение с кнопками
@@ -141,6 +243,7 @@ class MessageHandlerBot:
             update: Telegram update
             context: Callback context
             response: Ответ от агента с данными подтверждения
+            stream_message: Сообщение-черновик потокового ответа (будет заменено)
         """
         confirmation_id = response['confirmation_id']
         confirmation_text = response['confirmation_text']
@@ -163,11 +266,19 @@ class MessageHandlerBot:
         ]
         reply_markup = InlineKeyboardMarkup(keyboard)
 
+        # Результаты инструментов чтения из того же запроса показать перед вопросом
+        message_text = confirmation_text
+        if response.get('response_text'):
+            message_text = f"{response['response_text']}\n\n{confirmation_text}"
+
         # Отправить сообщение с кнопками
-        await update.message.reply_text(
-            confirmation_text,
-            reply_markup=reply_markup
-        )
+        if stream_message:
+            await self._edit_stream_message(stream_message, message_text, reply_markup)
+        else:
+            await update.message.reply_text(
+                message_text,
+                reply_markup=reply_markup
+            )
 
         logger.info(f"Отправлен запрос на подтверждение: {confirmation_id}")
 
@@ -3,6 +3,7 @@ Telegram бот для AI-ассистента
 """
 
 import asyncio
+import signal
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -16,7 +17,7 @@ from typing import Dict, Any
 
 from utils.config import load_config
 from utils.logger import get_logger
-from utils.database import Database
+from utils.services import get_services
 from bot.message_handler import MessageHandlerBot
 from bot.voice_handler import VoiceHandlerBot
 
@@ -37,12 +38,13 @@ class TelegramBot:
         self.bot_token = config['telegram']['bot_token']
         self.allowed_users = config['telegram']['allowed_users']
 
-        # База данных
-        self.db = Database(config['database']['path'])
+        # Общие сервисы процесса (агент и пулы поднимаются в post_init)
+        self.services = get_services(config)
+        self.db = self.services.db
 
-        # Обработчики
-        self.message_handler = MessageHandlerBot(config, self.db)
-        self.voice_handler = VoiceHandlerBot(config, self.db)
+        # Обработчики (создаются в post_init, когда готов общий агент)
+        self.message_handler = None
+        self.voice_handler = None
 
         # Application
         self.application = None
@@ -142,24 +144,17 @@ class TelegramBot:
         """
         user_id = str(update.effective_user.id)
 
-        # Получить статистику за последние 30 дней
-        stats = await self.db.get_usage_stats(user_id, days=30)
+        # Сводка за последние 30 дней (по дневным агрегатам)
+        summary = await self.db.get_usage_summary(user_id, days=30)
 
-        if not stats:
+        if not summary['total_requests']:
             await update.message.reply_text(
                 "📊 Статистика использования пока отсутствует."
             )
             return
 
-        # Подсчитать статистику
-        total_requests = len(stats)
-        total_tokens = sum(s.get('tokens_used', 0) for s in stats)
-
-        # Подсчитать по типам действий
-        action_counts = {}
-        for stat in stats:
-            action_type = stat.get('action_type', 'unknown')
-            action_counts[action_type] = action_counts.get(action_type, 0) + 1
+        total_requests = summary['total_requests']
+        total_tokens = summary['total_tokens']
 
         stats_message = f"""
 📊 **Статистика использования (30 дней)**
@@ -170,8 +165,22 @@ class TelegramBot:
 **По типам действий:**
 """
 
-        for action, count in sorted(action_counts.items(), key=lambda x: x[1], reverse=True):
-            stats_message += f"• {action}: {count}\n"
+        for action in summary['action_counts']:
+            stats_message += f"• {action['action_type']}: {action['count']}\n"
+
+        # Эффективность prompt caching (по тем же дневным агрегатам)
+        if summary['cache_read_tokens'] or summary['input_tokens'] or summary['cache_creation_tokens']:
+            stats_message += (
+                f"\n**Кэш промпта:** {summary['cache_hit_ratio']:.0%} входных токенов из кэша\n"
+            )
+
+        response_cache = self.message_handler.agent.response_cache
+        if response_cache:
+            response_stats = response_cache.stats()
+            stats_message += (
+                f"**Кэш ответов:** {response_stats['hit_ratio']:.0%} попаданий "
+                f"({response_stats['hits']}/{response_stats['hits'] + response_stats['misses']})\n"
+            )
 
         await update.message.reply_text(stats_message, parse_mode='Markdown')
 
@@ -186,6 +195,9 @@ class TelegramBot:
         # Очистить контекст пользователя
         context.user_data.clear()
 
+        # Отклонить неподтверждённые действия (кнопки в старых сообщениях)
+        await self.db.reject_pending_confirmations(str(update.effective_user.id))
+
         await update.message.reply_text(
             "❌ Текущее действие отменено."
         )
@@ -270,10 +282,15 @@ class TelegramBot:
         Args:
             application: Telegram Application
         """
-        # Инициализация базы данных
-        await self.db.init_db()
+        # Инициализация базы данных и общих сервисов
+        await self.services.start()
         logger.info("База данных инициализирована")
 
+        self.message_handler = MessageHandlerBot(self.config, self.db, agent=self.services.agent)
+        self.voice_handler = VoiceHandlerBot(
+            self.config, self.db, transcription=self.services.transcription
+        )
+
         # Установить команды бота в меню
         await application.bot.set_my_commands([
             ("start", "Начать работу с ботом"),
@@ -284,6 +301,15 @@ class TelegramBot:
 
         logger.info("Telegram бот готов к работе")
 
+    async def post_shutdown(self, application: Application):
+        """
+        Действия после остановки бота
+
+        Args:
+            application: Telegram Application
+        """
+        await self.services.stop()
+
     async def start(self):
         """Запуск бота"""
 
@@ -292,15 +318,19 @@ class TelegramBot:
             Application.builder()
             .token(self.bot_token)
             .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
             .build()
         )
 
+        # Запустить бота (post_init/post_shutdown вызываются вручную:
+        # Application сам вызывает их только в run_polling)
+        logger.info("Запуск Telegram бота...")
+        await self.application.initialize()
+        await self.post_init(self.application)
+
         # Настроить обработчики
         self.setup_handlers()
 
-        # Запустить бота
-        logger.info("Запуск Telegram бота...")
-        await self.application.initialize()
         await self.application.start()
         await self.application.updater.start_polling(
             allowed_updates=Update.ALL_TYPES,
@@ -309,13 +339,27 @@ class TelegramBot:
 
         logger.info("✅ Telegram бот запущен")
 
-        # Держать бота запущенным
+        # Держать бота запущенным до SIGINT/SIGTERM (main.py останавливает
+        # процесс через terminate), затем корректно остановиться: буфер
+        # записи в БД сбрасывается в post_shutdown
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                pass  # Windows
+
         try:
-            await asyncio.Event().wait()
-        except (KeyboardInterrupt, SystemExit):
+            await stop_event.wait()
+        except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
+            pass
+        finally:
             logger.info("Остановка Telegram бота...")
+            await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
+            await self.post_shutdown(self.application)
             logger.info("Telegram бот остановлен")
 
 
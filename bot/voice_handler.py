@@ -8,6 +8,7 @@ from telegram import Update
 from telegram.ext import ContextTypes
 from typing import Dict, Any
 
+from integrations.transcription import TranscriptionBusy, TranscriptionService
 from utils.logger import get_logger
 from utils.database import Database
 
@@ -17,16 +18,18 @@ logger = get_logger(__name__)
 class VoiceHandlerBot:
     """Класс для обработки голосовых сообщений"""
 
-    def __init__(self, config: Dict[str, Any], db: Database):
+    def __init__(self, config: Dict[str, Any], db: Database, transcription: TranscriptionService = None):
         """
         Инициализация обработчика
 
         Args:
             config: Конфигурация
             db: База данных
+            transcription: Сервис распознавания речи (если None, создаётся свой)
         """
         self.config = config
         self.db = db
+        self.transcription = transcription or TranscriptionService(config)
         self.temp_dir = "data/temp"
         self._ensure_temp_directory()
 
@@ -45,6 +48,7 @@ class VoiceHandlerBot:
             context: Callback context
         """
         user_id = str(update.effective_user.id)
+        temp_filepath = None
 
         logger.info(f"Получено голосовое сообщение от {user_id}")
 
@@ -66,8 +70,15 @@ class VoiceHandlerBot:
             # Показать индикатор "печатает..."
             await update.message.chat.send_action("typing")
 
-            # 2. Распознать речь через Whisper API
-            transcribed_text = await self._transcribe_audio(temp_filepath)
+            # 2. Распознать речь через Whisper (в пуле сервиса распознавания)
+            try:
+                transcribed_text = await self._transcribe_audio(temp_filepath)
+            except TranscriptionBusy as e:
+                await update.message.reply_text(
+                    f"⏳ Сейчас распознаётся много голосовых сообщений. "
+                    f"Попробуйте через {e.retry_after} с или напишите текстом."
+                )
+                return
 
             if not transcribed_text:
                 await update.message.reply_text(
@@ -111,7 +122,8 @@ class VoiceHandlerBot:
                 user_id=user_id,
                 interface="telegram_voice",
                 action_type=response.get('action_type', 'voice_message'),
-                tokens_used=response.get('tokens_used', 0)
+                tokens_used=response.get('tokens_used', 0),
+                usage=response.get('usage')
             )
 
         except Exception as e:
@@ -123,7 +135,7 @@ class VoiceHandlerBot:
 
         finally:
             # Удалить временный файл
-            if os.path.exists(temp_filepath):
+            if temp_filepath and os.path.exists(temp_filepath):
                 try:
                     os.remove(temp_filepath)
                     logger.debug(f"Удален временный файл: {temp_filepath}")
@@ -132,21 +144,22 @@ class VoiceHandlerBot:
 
     async def _transcribe_audio(self, audio_filepath: str) -> str:
         """
-        Распознать аудио в текст через Whisper API
+        Распознать аудио в текст через Whisper
 
         Args:
             audio_filepath: Путь к аудио-файлу
 
         Returns:
-            Распознанный текст
+            Распознанный текст (пустая строка при ошибке)
+
+        Raises:
+            TranscriptionBusy: Очередь распознавания заполнена
         """
         try:
-            from integrations.whisper import transcribe_audio
-
-            # Распознать через Whisper API
-            text = transcribe_audio(audio_filepath, language="ru")
-            return text
+            return await self.transcription.transcribe(audio_filepath, language="ru")
 
+        except TranscriptionBusy:
+            raise
         except Exception as e:
             logger.error(f"Ошибка при распознавании аудио: {e}", exc_info=True)
             return ""
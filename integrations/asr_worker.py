@@ -0,0 +1,571 @@
+"""
+ASR worker: отдельный процесс с загруженной моделью faster-whisper
+
+Модель загружается один раз на машину, а не в каждом процессе бота,
+API и воркере uvicorn. Worker прогревает её при запуске (первое
+распознавание не платит за загрузку и инициализацию) и только потом
+открывает Unix сокет. Клиенты (ASRWorkerClient в TranscriptionService)
+держат к нему одно соединение на процесс.
+
+Запросы, пришедшие в течение batch_window_ms, декодируются одной
+пачкой: короткие записи (до 30 с, обычное голосовое сообщение) проходят
+encoder и decoder модели как один батч, длинные - обычным transcribe.
+
+Ответы на подтверждение ("да" / "нет") распознаёт здесь же маленькая
+модель словаря подтверждений (integrations/confirmation_asr.py) в
+своём потоке - короткий ответ не ждёт пачку полного распознавания.
+
+Протокол: строка JSON-заголовка, за ней size байт аудио.
+    -> {"id": 1, "op": "transcribe", "language": "ru", "size": 12345}
+    <- {"id": 1, "text": "...", "decode_ms": 412.5, "batch": 3}
+    <- {"id": 1, "error": "..."}
+    -> {"id": 2, "op": "confirm", "size": 4321}
+    <- {"id": 2, "intent": "yes", "confidence": 0.93, "text": "Да.",
+        "no_speech_prob": 0.01, "confident": true, "decode_ms": 48.2}
+    <- {"id": 2, "disabled": true}  (модель подтверждений выключена)
+    -> {"id": 3, "op": "ping"}
+    <- {"id": 3, "ready": true, "stats": {...}}
+
+Запуск:
+    python -m integrations.asr_worker
+"""
+
+import asyncio
+import dataclasses
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from integrations.confirmation_asr import ConfirmationRecognizer, ConfirmationResult
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+# Окно Whisper: записи до 30 с декодируются одним проходом и батчуются
+CHUNK_SECONDS = 30
+CHUNK_SAMPLES = SAMPLE_RATE * CHUNK_SECONDS
+MAX_NEW_TOKENS = 448
+
+# Предел строки заголовка и размера аудио в запросе
+_HEADER_LIMIT = 64 * 1024
+MAX_AUDIO_BYTES = 50 * 1024 * 1024
+
+
+class ASRWorker:
+    """Сервер распознавания с тёплой моделью и пакетным декодированием"""
+
+    def __init__(
+        self,
+        socket_path: str,
+        model_size: str = None,
+        device: str = None,
+        compute_type: str = None,
+        batch_window_ms: int = 30,
+        max_batch: int = 8,
+        beam_size: int = 5,
+        confirmation: Optional[ConfirmationRecognizer] = None
+    ):
+        """
+        Инициализация worker
+
+        Args:
+            socket_path: Путь к Unix сокету
+            model_size: Размер модели (по умолчанию из whisper.model_size)
+            device: cpu или cuda
+            compute_type: int8, float16, float32
+            batch_window_ms: Сколько ждать попутных запросов после первого
+            max_batch: Максимум записей в пачке
+            beam_size: Ширина beam search
+            confirmation: Распознаватель подтверждений (None - op "confirm"
+                отвечает disabled)
+        """
+        self.socket_path = socket_path
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.beam_size = beam_size
+        self.confirmation = confirmation
+
+        self.model = None
+        self.requests = 0
+        self.confirmations = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+        self.warmup_ms: Optional[float] = None
+
+        self._queue: Optional[asyncio.Queue] = None
+        # Модель одна, декодирование последовательное: пачки не конкурируют за ядра
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-decode")
+        self._confirmation_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr-confirm")
+
+    # --- Модель ---
+
+    def load(self) -> None:
+        """Загружает модель и прогревает её распознаванием тишины"""
+        from integrations.whisper import load_faster_whisper_model
+
+        self.model = load_faster_whisper_model(self.model_size, self.device, self.compute_type)
+
+        import numpy as np
+
+        start = time.perf_counter()
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        self._transcribe_short([silence, silence], "ru", check_speech=False)
+        self.warmup_ms = (time.perf_counter() - start) * 1000
+        logger.info(f"Модель прогрета за {self.warmup_ms:.0f} мс")
+
+        if self.confirmation is not None:
+            try:
+                self.confirmation.load()
+            except Exception as e:
+                logger.warning(f"Не удалось загрузить модель подтверждений, op confirm выключен: {e}")
+                self.confirmation = None
+
+    def _has_speech(self, audio) -> bool:
+        """Есть ли речь в записи (VAD faster-whisper; без него - считаем, что есть)"""
+        try:
+            from faster_whisper.vad import get_speech_timestamps
+        except ImportError:
+            return True
+        return bool(get_speech_timestamps(audio))
+
+    def _transcribe_short(self, audios: List[Any], language: str, check_speech: bool = True) -> List[str]:
+        """
+        Распознаёт записи до 30 с одним батчем encoder/decoder
+
+        Как WhisperModel.transcribe без временных меток для одного окна:
+        запись дополняется тишиной до 30 с, признаки всех записей
+        складываются в один тензор. Записи без речи (VAD) не декодируются -
+        на тишине Whisper склонен выдумывать текст.
+        """
+        import ctranslate2
+        import numpy as np
+        from faster_whisper.tokenizer import Tokenizer
+
+        texts = [""] * len(audios)
+        indices = [i for i, audio in enumerate(audios) if not check_speech or self._has_speech(audio)]
+        if not indices:
+            return texts
+
+        extractor = self.model.feature_extractor
+        features = []
+        for i in indices:
+            padded = np.pad(audios[i], (0, CHUNK_SAMPLES - len(audios[i])))
+            features.append(extractor(padded)[:, :extractor.nb_max_frames])
+
+        batch = ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(features), dtype=np.float32))
+        encoder_output = self.model.model.encode(batch, to_cpu=False)
+
+        tokenizer = Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task="transcribe",
+            language=language
+        )
+        prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+
+        results = self.model.model.generate(
+            encoder_output,
+            [prompt] * len(indices),
+            beam_size=self.beam_size,
+            max_length=MAX_NEW_TOKENS,
+            suppress_blank=True,
+            suppress_tokens=[-1]
+        )
+
+        for i, result in zip(indices, results):
+            texts[i] = tokenizer.decode(result.sequences_ids[0]).strip()
+        return texts
+
+    def _transcribe_long(self, audio, language: str) -> str:
+        """Запись длиннее 30 с - обычный transcribe с VAD"""
+        segments, _ = self.model.transcribe(audio, language=language, beam_size=self.beam_size, vad_filter=True)
+        return " ".join(segment.text.strip() for segment in segments)
+
+    def decode_batch(self, items: List[Tuple[str, bytes]]) -> List[Dict[str, Any]]:
+        """
+        Декодирует пачку запросов (выполняется в потоке декодирования)
+
+        Args:
+            items: (язык, байты аудио)
+
+        Returns:
+            {"text": ...} или {"error": ...} для каждого запроса
+        """
+        from faster_whisper.audio import decode_audio
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        short: Dict[str, List[Tuple[int, Any]]] = {}
+
+        for i, (language, data) in enumerate(items):
+            try:
+                audio = decode_audio(io.BytesIO(data), sampling_rate=SAMPLE_RATE)
+            except Exception as e:
+                results[i] = {'error': f"Не удалось прочитать аудио: {e}"}
+                continue
+
+            if len(audio) <= CHUNK_SAMPLES:
+                short.setdefault(language, []).append((i, audio))
+            else:
+                try:
+                    results[i] = {'text': self._transcribe_long(audio, language)}
+                except Exception as e:
+                    results[i] = {'error': str(e)}
+
+        for language, group in short.items():
+            try:
+                texts = self._transcribe_short([audio for _, audio in group], language)
+                for (i, _), text in zip(group, texts):
+                    results[i] = {'text': text}
+            except Exception as e:
+                # Несовместимая версия faster-whisper и т.п. - по одной записи
+                logger.warning(f"Пакетное декодирование не удалось ({e}), распознаю по одной")
+                for i, audio in group:
+                    try:
+                        results[i] = {'text': self._transcribe_long(audio, language)}
+                    except Exception as item_error:
+                        results[i] = {'error': str(item_error)}
+
+        return results
+
+    # --- Сервер ---
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики worker"""
+        return {
+            'model': self.model_size,
+            'requests': self.requests,
+            'batches': self.batches,
+            'avg_batch': round(self.requests / self.batches, 2) if self.batches else None,
+            'max_batch': self.max_batch_seen,
+            'queued': self._queue.qsize() if self._queue else 0,
+            'confirmation_model': self.confirmation.name if self.confirmation else None,
+            'confirmations': self.confirmations,
+            'warmup_ms': round(self.warmup_ms, 1) if self.warmup_ms is not None else None
+        }
+
+    async def serve(self) -> None:
+        """Принимает запросы, пока процесс не остановят"""
+        self._queue = asyncio.Queue()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=_HEADER_LIMIT
+        )
+        os.chmod(self.socket_path, 0o660)
+
+        batcher = asyncio.create_task(self._batch_loop())
+        logger.info(f"ASR worker слушает {self.socket_path}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Читает запросы клиента; ответы отправляются по мере готовности"""
+        loop = asyncio.get_running_loop()
+        write_lock = asyncio.Lock()
+        replies = set()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                header = json.loads(line)
+                request_id = header.get('id')
+
+                if header.get('op') == 'ping':
+                    await self._send(writer, write_lock, {'id': request_id, 'ready': True, 'stats': self.stats()})
+                    continue
+
+                size = int(header.get('size', 0))
+                if not 0 < size <= MAX_AUDIO_BYTES:
+                    await self._send(writer, write_lock, {'id': request_id, 'error': f"Недопустимый размер аудио: {size}"})
+                    break
+                data = await reader.readexactly(size)
+
+                if header.get('op') == 'confirm':
+                    future = asyncio.ensure_future(self._confirm(data))
+                else:
+                    future = loop.create_future()
+                    self._queue.put_nowait((header.get('language', 'ru'), data, future))
+                reply = asyncio.create_task(self._reply(writer, write_lock, request_id, future))
+                replies.add(reply)
+                reply.add_done_callback(replies.discard)
+
+        except (asyncio.IncompleteReadError, ConnectionError, json.JSONDecodeError, ValueError) as e:
+            logger.warning(f"Соединение клиента ASR закрыто: {e!r}")
+        finally:
+            if replies:
+                await asyncio.gather(*replies, return_exceptions=True)
+            writer.close()
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, write_lock: asyncio.Lock, message: Dict[str, Any]) -> None:
+        async with write_lock:
+            writer.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def _reply(self, writer, write_lock, request_id, future: asyncio.Future) -> None:
+        """Отправляет результат запроса, когда пачка декодирована"""
+        result = await future
+        try:
+            await self._send(writer, write_lock, {'id': request_id, **result})
+        except ConnectionError:
+            pass
+
+    async def _confirm(self, data: bytes) -> Dict[str, Any]:
+        """Распознаёт ответ на подтверждение в своём потоке"""
+        if self.confirmation is None:
+            return {'disabled': True}
+
+        start = time.perf_counter()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                self._confirmation_executor, self.confirmation.recognize, io.BytesIO(data)
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка распознавания подтверждения: {e}")
+            return {'error': str(e)}
+
+        self.confirmations += 1
+        return {**dataclasses.asdict(result), 'decode_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+    async def _batch_loop(self) -> None:
+        """Собирает запросы в пачки и декодирует их по очереди"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.decode_batch, [(language, data) for language, data, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"Ошибка декодирования пачки: {e}", exc_info=True)
+                results = [{'error': str(e)}] * len(batch)
+            decode_ms = (time.perf_counter() - start) * 1000
+
+            self.requests += len(batch)
+            self.batches += 1
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result({**result, 'decode_ms': round(decode_ms, 1), 'batch': len(batch)})
+
+
+class ASRWorkerClient:
+    """Асинхронный клиент ASR worker (одно соединение на процесс)"""
+
+    def __init__(self, socket_path: str, connect_timeout: float = 60.0, request_timeout: float = 120.0):
+        """
+        Args:
+            socket_path: Путь к Unix сокету worker
+            connect_timeout: Сколько ждать worker (он мог ещё прогреваться)
+            request_timeout: Таймаут одного распознавания, секунды
+        """
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    async def _connect(self) -> None:
+        """Подключается к worker, повторяя попытки до connect_timeout"""
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+            self._write_lock = asyncio.Lock()
+
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+
+            deadline = time.monotonic() + self.connect_timeout
+            while True:
+                try:
+                    self._reader, self._writer = await asyncio.open_unix_connection(
+                        self.socket_path, limit=_HEADER_LIMIT
+                    )
+                    break
+                except (FileNotFoundError, ConnectionRefusedError) as e:
+                    if time.monotonic() >= deadline:
+                        raise ConnectionError(f"ASR worker недоступен ({self.socket_path}): {e}")
+                    await asyncio.sleep(0.5)
+
+            self._read_task = asyncio.create_task(self._read_loop(self._reader))
+            logger.info(f"Подключено к ASR worker: {self.socket_path}")
+
+    async def _read_loop(self, reader: asyncio.StreamReader) -> None:
+        """Раздаёт ответы worker ожидающим запросам"""
+        error: Exception = ConnectionError("ASR worker закрыл соединение")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = self._pending.pop(message.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, json.JSONDecodeError) as e:
+            error = ConnectionError(f"Соединение с ASR worker прервано: {e}")
+        finally:
+            if self._reader is reader:
+                self._reset()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    def _reset(self) -> None:
+        """Забывает соединение (следующий запрос подключится заново)"""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _request(self, header: Dict[str, Any], data: bytes = b'') -> Dict[str, Any]:
+        await self._connect()
+
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        try:
+            async with self._write_lock:
+                self._writer.write(json.dumps({'id': request_id, **header}).encode('utf-8') + b'\n' + data)
+                await self._writer.drain()
+            return await asyncio.wait_for(future, self.request_timeout)
+        except (ConnectionError, OSError):
+            self._reset()
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def transcribe(self, audio_file_path: str, language: str = "ru") -> Tuple[str, float]:
+        """
+        Распознаёт запись в worker
+
+        Args:
+            audio_file_path: Путь к аудио-файлу (читается здесь, worker
+                получает байты - ему не нужен доступ к файлу)
+            language: Язык аудио
+
+        Returns:
+            (текст, время декодирования пачки в секундах)
+
+        Raises:
+            ConnectionError: Worker недоступен
+            Exception: Ошибка распознавания в worker
+        """
+        with open(audio_file_path, 'rb') as f:
+            data = f.read()
+
+        response = await self._request({'op': 'transcribe', 'language': language, 'size': len(data)}, data)
+        if 'error' in response:
+            raise Exception(f"ASR worker: {response['error']}")
+        return response['text'], response.get('decode_ms', 0) / 1000
+
+    async def confirm(self, audio_file_path: str) -> Optional[Tuple[ConfirmationResult, float]]:
+        """
+        Распознаёт ответ на подтверждение моделью словаря в worker
+
+        Args:
+            audio_file_path: Путь к аудио-файлу
+
+        Returns:
+            (ConfirmationResult, время распознавания в секундах) или None,
+            если модель подтверждений в worker выключена
+
+        Raises:
+            ConnectionError: Worker недоступен
+            Exception: Ошибка распознавания в worker
+        """
+        with open(audio_file_path, 'rb') as f:
+            data = f.read()
+
+        response = await self._request({'op': 'confirm', 'size': len(data)}, data)
+        if response.get('disabled'):
+            return None
+        if 'error' in response:
+            raise Exception(f"ASR worker: {response['error']}")
+
+        result = ConfirmationResult(**{
+            field.name: response[field.name] for field in dataclasses.fields(ConfirmationResult)
+        })
+        return result, response.get('decode_ms', 0) / 1000
+
+    async def ping(self) -> Dict[str, Any]:
+        """Проверяет worker; возвращает его счётчики"""
+        return (await self._request({'op': 'ping'}))['stats']
+
+    async def close(self) -> None:
+        """Закрывает соединение"""
+        if self._read_task is not None:
+            self._read_task.cancel()
+            self._read_task = None
+        self._reset()
+
+
+def main():
+    """Запуск worker с настройками из config.yaml (секция whisper)"""
+    from integrations.confirmation_asr import get_confirmation_recognizer
+    from utils.config import load_config
+
+    config = load_config()
+    whisper_config = config.get('whisper', {})
+    worker_config = whisper_config.get('worker', {})
+
+    worker = ASRWorker(
+        worker_config.get('socket', 'data/asr.sock'),
+        model_size=whisper_config.get('model_size', 'base'),
+        device=whisper_config.get('device', 'cpu'),
+        compute_type=whisper_config.get('compute_type', 'int8'),
+        batch_window_ms=worker_config.get('batch_window_ms', 30),
+        max_batch=worker_config.get('max_batch', 8),
+        beam_size=worker_config.get('beam_size', 5),
+        confirmation=get_confirmation_recognizer(config)
+    )
+    worker.load()
+
+    try:
+        asyncio.run(worker.serve())
+    except KeyboardInterrupt:
+        logger.info("ASR worker остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Быстрое распознавание голосового подтверждения ("да" / "нет" / "отмена")
+
+Ответ на подтверждение - одно-два слова, и полный Whisper (OpenAI API
+или beam search локальной модели) для него избыточен. Здесь маленькая
+модель faster-whisper (tiny) декодирует жадно и только токенами
+словаря подтверждений: остальные токены подавлены, поэтому декодер
+останавливается через пару шагов.
+
+Ограниченное декодирование всегда выдаёт какое-то слово словаря,
+поэтому уверенность считается отдельно: выбранная фраза
+принудительно прогоняется через декодер без ограничений (align), и
+берётся средняя вероятность её токенов. Если уверенность низкая, в
+записи нет речи или она длинная (похоже на фразу, а не ответ) -
+результат помечается неуверенным, и вызывающий код распознаёт запись
+полностью.
+"""
+
+import importlib.util
+import math
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+
+# Намерение -> фразы. Пересекаться по словам фразы разных намерений не должны
+CONFIRMATION_VOCABULARY: Dict[str, List[str]] = {
+    'yes': [
+        'да', 'ага', 'давай', 'конечно', 'хорошо', 'ок', 'окей', 'верно',
+        'подтверждаю', 'согласен', 'согласна', 'yes'
+    ],
+    'no': ['нет', 'неа', 'не надо', 'не нужно', 'no'],
+    'cancel': ['отмена', 'отмени', 'стоп', 'cancel']
+}
+
+# Знаки, которые Whisper ставит после слов
+_PUNCTUATION = ['.', ',', '!', '?', '...', ' -']
+
+# Сколько токенов декодировать максимум ("да, да, конечно." и т.п.)
+_MAX_NEW_TOKENS = 12
+
+
+def is_available() -> bool:
+    """Установлен ли faster-whisper (без импорта - он тянет CTranslate2)"""
+    return importlib.util.find_spec('faster_whisper') is not None
+
+
+def _normalize(text: str) -> str:
+    """Нижний регистр, ё -> е, без знаков препинания и лишних пробелов"""
+    text = re.sub(r'[^\w\s]', ' ', text.lower().replace('ё', 'е'))
+    return ' '.join(text.split())
+
+
+_PHRASE_INTENTS = {
+    _normalize(phrase): intent
+    for intent, phrases in CONFIRMATION_VOCABULARY.items()
+    for phrase in phrases
+}
+
+
+def match_intent(text: str) -> Optional[str]:
+    """
+    Намерение текста, целиком составленного из фраз словаря
+
+    "Да", "да, да", "нет, не надо" - намерение; "да нет",
+    "давай завтра" - None (разные намерения или слово не из словаря).
+
+    Args:
+        text: Распознанный текст
+
+    Returns:
+        'yes', 'no', 'cancel' или None
+    """
+    words = _normalize(text).split()
+    if not words:
+        return None
+
+    intents = set()
+    i = 0
+    while i < len(words):
+        # Самая длинная фраза словаря, начинающаяся с этого слова
+        for length in (3, 2, 1):
+            intent = _PHRASE_INTENTS.get(' '.join(words[i:i + length]))
+            if intent is not None:
+                intents.add(intent)
+                i += length
+                break
+        else:
+            return None
+
+    return intents.pop() if len(intents) == 1 else None
+
+
+@dataclass
+class ConfirmationResult:
+    """Результат быстрого распознавания подтверждения"""
+    intent: Optional[str]
+    confidence: float
+    text: str
+    no_speech_prob: float
+    confident: bool
+
+
+class ConfirmationRecognizer:
+    """Распознавание ответа из словаря подтверждений маленькой моделью"""
+
+    def __init__(
+        self,
+        model_size: str = 'tiny',
+        device: str = 'cpu',
+        compute_type: str = 'int8',
+        min_confidence: float = 0.5,
+        max_no_speech_prob: float = 0.5,
+        max_seconds: float = 4.0,
+        language: str = 'ru'
+    ):
+        """
+        Инициализация (модель загружается при первом распознавании)
+
+        Args:
+            model_size: Модель faster-whisper (tiny достаточно для одного слова)
+            device: cpu или cuda
+            compute_type: int8, float16, float32
+            min_confidence: Минимальная средняя вероятность токенов ответа
+            max_no_speech_prob: Максимальная вероятность "нет речи"
+            max_seconds: Записи длиннее - сразу неуверенные (это фраза, не ответ)
+            language: Язык ответа
+
+        Raises:
+            ImportError: faster-whisper не установлен
+        """
+        if not is_available():
+            raise ImportError("Для быстрого распознавания подтверждений нужен faster-whisper")
+
+        self.model_size = model_size
+        self.device = device
+        self.compute_type = compute_type
+        self.min_confidence = min_confidence
+        self.max_no_speech_prob = max_no_speech_prob
+        self.max_seconds = max_seconds
+        self.language = language
+
+        self.model = None
+        self._tokenizer = None
+        self._prompt: List[int] = []
+        self._suppress_tokens: List[int] = []
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """Имя модели для очереди и метрик распознавания"""
+        return f"confirm:{self.model_size}"
+
+    def load(self) -> None:
+        """Загружает модель и строит список подавляемых токенов"""
+        with self._lock:
+            if self.model is not None:
+                return
+
+            from faster_whisper import WhisperModel
+            from faster_whisper.tokenizer import Tokenizer
+
+            logger.info(f"Загрузка модели подтверждений ({self.model_size}, {self.device})")
+            model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type)
+            tokenizer = Tokenizer(
+                model.hf_tokenizer, model.model.is_multilingual,
+                task='transcribe', language=self.language
+            )
+
+            allowed = {tokenizer.eot}
+            for phrases in CONFIRMATION_VOCABULARY.values():
+                for phrase in phrases:
+                    for variant in (phrase, phrase.capitalize()):
+                        allowed.update(tokenizer.encode(variant))
+                        allowed.update(tokenizer.encode(' ' + variant))
+            for mark in _PUNCTUATION:
+                allowed.update(tokenizer.encode(mark))
+
+            vocab_size = model.hf_tokenizer.get_vocab_size()
+            self._suppress_tokens = [token for token in range(vocab_size) if token not in allowed]
+            self._prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+            self._tokenizer = tokenizer
+            self.model = model
+
+            logger.info(f"Модель подтверждений готова: словарь из {len(allowed)} токенов")
+
+    def recognize(self, audio_file_path: Union[str, BinaryIO]) -> ConfirmationResult:
+        """
+        Распознаёт ответ на подтверждение (блокирующий вызов)
+
+        Args:
+            audio_file_path: Путь к аудио-файлу или файловый объект (ASR worker)
+
+        Returns:
+            ConfirmationResult; confident=False - нужно полное распознавание
+        """
+        import ctranslate2
+        import numpy as np
+        from faster_whisper.audio import decode_audio
+
+        if self.model is None:
+            self.load()
+
+        audio = decode_audio(audio_file_path, sampling_rate=SAMPLE_RATE)
+        if len(audio) > self.max_seconds * SAMPLE_RATE:
+            return ConfirmationResult(None, 0.0, '', 0.0, False)
+
+        extractor = self.model.feature_extractor
+        frames = min(len(audio) // extractor.hop_length, extractor.nb_max_frames)
+        padded = np.pad(audio, (0, extractor.n_samples - len(audio)))
+        features = extractor(padded)[:, :extractor.nb_max_frames]
+        features = ctranslate2.StorageView.from_array(np.ascontiguousarray(features[np.newaxis], dtype=np.float32))
+
+        whisper = self.model.model
+        encoder_output = whisper.encode(features, to_cpu=False)
+
+        result = whisper.generate(
+            encoder_output,
+            [self._prompt],
+            beam_size=1,
+            max_length=len(self._prompt) + _MAX_NEW_TOKENS,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=False,
+            suppress_tokens=self._suppress_tokens
+        )[0]
+
+        tokens = [token for token in result.sequences_ids[0] if token < self._tokenizer.eot]
+        text = self._tokenizer.decode(tokens).strip()
+        intent = match_intent(text)
+        confidence = self._confidence(encoder_output, tokens, frames, result.scores[0]) if tokens else 0.0
+
+        confident = (
+            intent is not None
+            and confidence >= self.min_confidence
+            and result.no_speech_prob <= self.max_no_speech_prob
+        )
+        return ConfirmationResult(intent, confidence, text, result.no_speech_prob, confident)
+
+    def _confidence(self, encoder_output: Any, tokens: List[int], frames: int, constrained_score: float) -> float:
+        """
+        Средняя вероятность токенов ответа по модели без ограничений
+
+        Вероятности при ограниченном декодировании нормированы по
+        словарю и завышены, поэтому выбранная фраза прогоняется через
+        декодер принудительно (align) и оценивается по полному словарю.
+        """
+        try:
+            alignment = self.model.model.align(
+                encoder_output, self._tokenizer.sot_sequence, [tokens], max(frames, 1)
+            )[0]
+            probs = [p for p in alignment.text_token_probs if p > 0]
+            if not probs:
+                return 0.0
+            return math.exp(sum(math.log(p) for p in probs) / len(probs))
+        except Exception as e:
+            logger.warning(f"Не удалось оценить уверенность ответа: {e}")
+            return math.exp(constrained_score)
+
+
+# Глобальный экземпляр (модель загружается один раз на процесс)
+_recognizer_instance: Optional[ConfirmationRecognizer] = None
+_recognizer_lock = threading.Lock()
+
+
+def get_confirmation_recognizer(config: Dict[str, Any]) -> Optional[ConfirmationRecognizer]:
+    """
+    Распознаватель подтверждений из конфигурации (whisper.confirmation)
+
+    Args:
+        config: Полная конфигурация
+
+    Returns:
+        ConfirmationRecognizer или None (выключен или нет faster-whisper)
+    """
+    global _recognizer_instance
+
+    whisper_config = config.get('whisper', {})
+    confirmation_config = whisper_config.get('confirmation', {})
+    if not confirmation_config.get('enabled', True) or not is_available():
+        return None
+
+    with _recognizer_lock:
+        if _recognizer_instance is None:
+            _recognizer_instance = ConfirmationRecognizer(
+                model_size=confirmation_config.get('model_size', 'tiny'),
+                device=whisper_config.get('device', 'cpu'),
+                compute_type=whisper_config.get('compute_type', 'int8'),
+                min_confidence=confirmation_config.get('min_confidence', 0.5),
+                max_no_speech_prob=confirmation_config.get('max_no_speech_prob', 0.5),
+                max_seconds=confirmation_config.get('max_seconds', 4.0)
+            )
+    return _recognizer_instance
@@ -5,12 +5,22 @@
 - rest_api (Obsidian Local REST API плагин)
 """
 
+import asyncio
+import httpx
 import os
+import random
+import time
 import requests
+import requests.adapters
+import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+from urllib.parse import quote
 
+from integrations import obsidian_semantic
+from integrations.obsidian_index import VaultSearchIndex
+from integrations.obsidian_watcher import VaultWatcher
 from utils.config import load_config
 from utils.logger import get_logger
 
@@ -38,20 +48,36 @@ NOTES_FOLDER = config['obsidian'].get('notes_folder', 'Notes')
 METHOD = config['obsidian'].get('method', 'filesystem')
 REST_API_URL = config['obsidian'].get('rest_api_url', 'http://localhost:27123')
 REST_API_KEY = config['obsidian'].get('rest_api_key', '')
+SEARCH_INDEX_CONFIG = config['obsidian'].get('search_index', {})
+WATCHER_CONFIG = config['obsidian'].get('watcher', {})
+SEMANTIC_CONFIG = config['obsidian'].get('semantic_search', {})
+REST_CLIENT_CONFIG = config['obsidian'].get('rest_client', {})
+
+# Ответы REST API, после которых запрос повторяется
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
 
 
 class ObsidianRESTAPI:
-    """Класс для работы с Obsidian через Local REST API плагин"""
+    """
+    Класс для работы с Obsidian через Local REST API плагин
+
+    Синхронные методы используют requests.Session, асинхронные
+    (create_note_async, search_notes_async) - общий httpx.AsyncClient;
+    оба держат keep-alive соединения с плагином вместо нового TCP
+    соединения на каждый запрос. Запросы повторяются при сетевых ошибках
+    и ответах 429/5xx с экспоненциальной паузой со случайным разбросом.
+    """
 
-    def __init__(self, api_url: str = None, api_key: str = None):
+    def __init__(self, api_url: str = None, api_key: str = None, client_config: Dict[str, Any] = None):
         """
         Инициализация Obsidian REST API клиента
 
         Args:
             api_url: URL Obsidian REST API
             api_key: API ключ
+            client_config: Параметры HTTP клиента (obsidian.rest_client)
         """
-        self.api_url = api_url or REST_API_URL
+        self.api_url = (api_url or REST_API_URL).rstrip('/')
         self.api_key = api_key or REST_API_KEY
         self.notes_folder = NOTES_FOLDER
         self.headers = {
@@ -59,8 +85,195 @@ class ObsidianRESTAPI:
             'Content-Type': 'application/json'
         }
 
+        client_config = REST_CLIENT_CONFIG if client_config is None else client_config
+        self.timeout = float(client_config.get('timeout', 10))
+        self.connect_timeout = float(client_config.get('connect_timeout', 3))
+        self.max_connections = int(client_config.get('max_connections', 10))
+        self.max_concurrency = int(client_config.get('max_concurrency', 4))
+        self.retries = int(client_config.get('retries', 3))
+        self.retry_backoff = float(client_config.get('retry_backoff', 0.3))
+        self.retry_max_delay = float(client_config.get('retry_max_delay', 5))
+
+        self._session = requests.Session()
+        self._session.headers.update(self.headers)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.max_connections
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        # Асинхронный клиент и семафор привязаны к event loop: по паре на
+        # каждый loop (бот и API могут работать в разных), создаются при
+        # первом запросе, закрываются в aclose()
+        self._async_clients: Dict[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, asyncio.Semaphore]] = {}
+
         logger.info(f"Obsidian REST API клиент инициализирован (URL: {self.api_url})")
 
+    # --- HTTP ---
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Пауза перед повтором запроса
+
+        Экспоненциальная пауза с полным случайным разбросом: параллельные
+        запросы, получившие ошибку одновременно, не повторяются разом.
+
+        Args:
+            attempt: Номер неудачной попытки (с 0)
+            retry_after: Заголовок Retry-After ответа (секунды), если есть
+
+        Returns:
+            Пауза в секундах
+        """
+        if retry_after:
+            try:
+                return min(float(retry_after), self.retry_max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.retry_max_delay, self.retry_backoff * (2 ** attempt)))
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Синхронный запрос к плагину с повторами
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно api_url ("/vault/...")
+            **kwargs: Аргументы requests (data, json)
+
+        Returns:
+            Успешный ответ
+
+        Raises:
+            requests.RequestException: Ошибка после всех повторов
+        """
+        url = f"{self.api_url}{path}"
+        timeout = (self.connect_timeout, self.timeout)
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = self._session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"REST API {method} {path}: {e}, повтор через {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                logger.warning(f"REST API {method} {path}: HTTP {response.status_code}, повтор через {delay:.2f}s")
+            time.sleep(delay)
+
+    def _get_async_client(self):
+        """
+        Общий асинхронный клиент и семафор для текущего event loop
+
+        Returns:
+            (httpx.AsyncClient, asyncio.Semaphore)
+        """
+        loop = asyncio.get_running_loop()
+
+        entry = self._async_clients.get(loop)
+        if entry is None:
+            # Клиенты закрытых loop закрыть уже нельзя - только забыть
+            for stale in [stale for stale in self._async_clients if stale.is_closed()]:
+                del self._async_clients[stale]
+
+            client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+            entry = self._async_clients[loop] = (client, asyncio.Semaphore(self.max_concurrency))
+            logger.info(
+                f"Создан асинхронный клиент Obsidian REST API "
+                f"(пул: {self.max_connections}, параллельно: {self.max_concurrency})"
+            )
+
+        return entry
+
+    async def _request_async(self, method: str, path: str, **kwargs):
+        """
+        Асинхронный запрос к плагину с повторами
+
+        Одновременно выполняется не больше max_concurrency запросов;
+        пауза перед повтором ждёт вне семафора.
+
+        Args:
+            method: HTTP метод
+            path: Путь относительно api_url ("/vault/...")
+            **kwargs: Аргументы httpx (content, json)
+
+        Returns:
+            Успешный httpx.Response
+
+        Raises:
+            httpx.HTTPError: Ошибка после всех повторов
+        """
+        client, semaphore = self._get_async_client()
+        url = f"{self.api_url}{path}"
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise
+                delay = self._retry_delay(attempt)
+                logger.warning(f"REST API {method} {path}: {e!r}, повтор через {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+                delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                logger.warning(f"REST API {method} {path}: HTTP {response.status_code}, повтор через {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def close(self):
+        """Закрывает синхронную сессию"""
+        self._session.close()
+
+    async def aclose(self):
+        """Закрывает асинхронные клиенты всех event loop и синхронную сессию"""
+        current = asyncio.get_running_loop()
+        clients, self._async_clients = self._async_clients, {}
+
+        for loop, (client, _) in clients.items():
+            try:
+                if loop is current:
+                    await client.aclose()
+                elif loop.is_running():
+                    # Клиент другого loop закрывается в своём loop
+                    await asyncio.wait_for(
+                        asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop)),
+                        timeout=5
+                    )
+            except Exception as e:
+                logger.warning(f"Ошибка при закрытии клиента Obsidian REST API: {e}")
+
+        self.close()
+
+    # --- Заметки ---
+
+    def _note_request(self, title: str, content: str, tags: List[str], folder: str):
+        """Путь и тело новой заметки"""
+        folder = folder or self.notes_folder
+        full_content = self._prepare_content(title, content, tags)
+        file_path = f"{folder}/{self._sanitize_filename(title)}.md"
+        return file_path, full_content.encode('utf-8')
+
+    @staticmethod
+    def _vault_path(file_path: str) -> str:
+        """Путь запроса к файлу vault (имя экранируется)"""
+        return f"/vault/{quote(file_path)}"
+
     def create_note(
         self,
         title: str,
@@ -69,25 +282,40 @@ class ObsidianRESTAPI:
         folder: str = None
     ) -> Dict[str, Any]:
         """Создаёт заметку через REST API"""
-        folder = folder or self.notes_folder
-
         try:
-            # Подготовить содержимое с frontmatter
-            full_content = self._prepare_content(title, content, tags)
+            file_path, body = self._note_request(title, content, tags, folder)
+            self._request(
+                'PUT', self._vault_path(file_path),
+                data=body, headers={'Content-Type': 'text/markdown'}
+            )
 
-            # Безопасное имя файла
-            safe_filename = self._sanitize_filename(title)
-            file_path = f"{folder}/{safe_filename}.md"
+            logger.info(f"Заметка создана через REST API: {file_path}")
 
-            # Отправить запрос
-            response = requests.put(
-                f"{self.api_url}/vault/{file_path}",
-                headers=self.headers,
-                data=full_content.encode('utf-8'),
-                timeout=10
-            )
+            return {
+                'success': True,
+                'title': title,
+                'file_path': file_path,
+                'relative_path': file_path
+            }
 
-            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Ошибка при создании заметки через REST API: {e}", exc_info=True)
+            raise Exception(f"Failed to create note: {str(e)}")
+
+    async def create_note_async(
+        self,
+        title: str,
+        content: str,
+        tags: List[str] = None,
+        folder: str = None
+    ) -> Dict[str, Any]:
+        """Асинхронная версия create_note (не блокирует event loop)"""
+        try:
+            file_path, body = self._note_request(title, content, tags, folder)
+            await self._request_async(
+                'PUT', self._vault_path(file_path),
+                content=body, headers={'Content-Type': 'text/markdown'}
+            )
 
             logger.info(f"Заметка создана через REST API: {file_path}")
 
@@ -102,28 +330,40 @@ class ObsidianRESTAPI:
             logger.error(f"Ошибка при создании заметки через REST API: {e}", exc_info=True)
             raise Exception(f"Failed to create note: {str(e)}")
 
+    @staticmethod
+    def _format_search_results(results: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Приводит ответ /search/simple к формату search_notes"""
+        formatted_results = []
+        for item in results[:limit]:
+            filename = item.get('filename', '')
+            matches = item.get('matches') or []
+            context = matches[0].get('context', '') if matches else ''
+            formatted_results.append({
+                'title': os.path.splitext(os.path.basename(filename))[0],
+                'file_path': filename,
+                'relative_path': filename,
+                'excerpt': item.get('excerpt') or context.strip()
+            })
+        return formatted_results
+
     def search_notes(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Ищет заметки через REST API"""
         try:
-            response = requests.post(
-                f"{self.api_url}/search/simple",
-                headers=self.headers,
-                json={'query': query},
-                timeout=10
-            )
+            response = self._request('POST', '/search/simple/', params={'query': query})
+            formatted_results = self._format_search_results(response.json(), limit)
 
-            response.raise_for_status()
-            results = response.json()
+            logger.info(f"Найдено {len(formatted_results)} заметок через REST API")
+            return formatted_results
 
-            # Форматировать результаты
-            formatted_results = []
-            for item in results[:limit]:
-                formatted_results.append({
-                    'title': item.get('filename', '').replace('.md', ''),
-                    'file_path': item.get('filename', ''),
-                    'relative_path': item.get('filename', ''),
-                    'excerpt': item.get('excerpt', '')
-                })
+        except Exception as e:
+            logger.error(f"Ошибка поиска через REST API: {e}", exc_info=True)
+            raise Exception(f"Failed to search notes: {str(e)}")
+
+    async def search_notes_async(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Асинхронная версия search_notes (не блокирует event loop)"""
+        try:
+            response = await self._request_async('POST', '/search/simple/', params={'query': query})
+            formatted_results = self._format_search_results(response.json(), limit)
 
             logger.info(f"Найдено {len(formatted_results)} заметок через REST API")
             return formatted_results
@@ -132,17 +372,20 @@ class ObsidianRESTAPI:
             logger.error(f"Ошибка поиска через REST API: {e}", exc_info=True)
             raise Exception(f"Failed to search notes: {str(e)}")
 
+    def find_notes_by_tag(self, tag: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Поиск по тегам требует индекса vault (method: filesystem)"""
+        raise Exception("Поиск по тегам доступен только для obsidian.method: filesystem")
+
+    def get_note_links(self, note: str) -> Dict[str, Any]:
+        """Граф ссылок требует индекса vault (method: filesystem)"""
+        raise Exception("Ссылки между заметками доступны только для obsidian.method: filesystem")
+
     def read_note(self, file_path: str) -> Dict[str, Any]:
         """Читает заметку через REST API"""
         try:
-            response = requests.get(
-                f"{self.api_url}/vault/{file_path}",
-                headers=self.headers,
-                timeout=10
-            )
-
-            response.raise_for_status()
-            content = response.text
+            response = self._request('GET', self._vault_path(file_path))
+            # Заметки vault всегда в UTF-8, даже если ответ без charset
+            content = response.content.decode('utf-8')
 
             logger.info(f"Заметка прочитана через REST API: {file_path}")
 
@@ -159,15 +402,11 @@ class ObsidianRESTAPI:
     def update_note(self, file_path: str, content: str) -> Dict[str, Any]:
         """Обновляет заметку через REST API"""
         try:
-            response = requests.put(
-                f"{self.api_url}/vault/{file_path}",
-                headers=self.headers,
-                data=content.encode('utf-8'),
-                timeout=10
+            self._request(
+                'PUT', self._vault_path(file_path),
+                data=content.encode('utf-8'), headers={'Content-Type': 'text/markdown'}
             )
 
-            response.raise_for_status()
-
             logger.info(f"Заметка обновлена через REST API: {file_path}")
 
             return {
@@ -229,6 +468,57 @@ class ObsidianVault:
         self.notes_folder = NOTES_FOLDER
         self._validate_vault()
 
+        # Полнотекстовый индекс для search_notes
+        self.search_index = VaultSearchIndex(
+            self.vault_path,
+            SEARCH_INDEX_CONFIG.get('path', 'data/vault_index.db'),
+            refresh_interval=SEARCH_INDEX_CONFIG.get('refresh_interval', 30),
+            parse_workers=SEARCH_INDEX_CONFIG.get('parse_workers')
+        )
+
+        # Наблюдатель применяет изменения файлов к индексу по событиям
+        # (правки из Obsidian, git pull), поиск тогда не проверяет mtime
+        self.watcher = None
+        if WATCHER_CONFIG.get('enabled', True):
+            self.watcher = VaultWatcher(
+                self.search_index,
+                backend=WATCHER_CONFIG.get('backend', 'auto'),
+                debounce_ms=WATCHER_CONFIG.get('debounce_ms', 500),
+                max_delay_ms=WATCHER_CONFIG.get('max_delay_ms', 5000),
+                poll_interval=WATCHER_CONFIG.get('poll_interval', 30)
+            )
+            self.watcher.start()
+
+        # Семантический поиск (опционально): строится в фоне, до готовности
+        # search_notes работает только по полнотекстовому индексу
+        self.semantic_index = None
+        if SEMANTIC_CONFIG.get('enabled', False):
+            if obsidian_semantic.is_available():
+                self.semantic_index = obsidian_semantic.SemanticIndex(
+                    self.search_index,
+                    SEMANTIC_CONFIG.get('path', 'data/vault_semantic'),
+                    backend=SEMANTIC_CONFIG.get('backend', 'auto'),
+                    model_name=SEMANTIC_CONFIG.get('model', obsidian_semantic.DEFAULT_MODEL),
+                    model_cache_dir=SEMANTIC_CONFIG.get('model_cache_dir'),
+                    dim=SEMANTIC_CONFIG.get('dim', obsidian_semantic.LSA_DIM),
+                    hybrid_weight=SEMANTIC_CONFIG.get('hybrid_weight', 0.5)
+                )
+                self.semantic_index.start_background_build()
+            else:
+                logger.warning("Семантический поиск включён, но numpy не установлен")
+
+        # Фоновая Git синхронизация: первый pull и периодические pull
+        # начинаются сразу, а не при первой записи
+        _get_git_sync()
+
+    def close(self):
+        """Останавливает наблюдатель и закрывает индексы"""
+        if self.watcher:
+            self.watcher.stop()
+        if self.semantic_index:
+            self.semantic_index.close()
+        self.search_index.close()
+
     def _validate_vault(self):
         """Проверяет существование хранилища"""
         if not os.path.exists(self.vault_path):
@@ -272,11 +562,6 @@ class ObsidianVault:
 
         folder = folder or self.notes_folder
 
-        # Git pull перед операцией
-        git_sync = _get_git_sync()
-        if git_sync:
-            git_sync.sync_before_operation()
-
         try:
             # Создать путь к папке
             folder_path = os.path.join(self.vault_path, folder)
@@ -298,6 +583,8 @@ class ObsidianVault:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(full_content)
 
+            self.search_index.update_file(file_path)
+
             logger.info(f"Заметка создана: {file_path}")
 
             result = {
@@ -307,9 +594,10 @@ class ObsidianVault:
                 'relative_path': os.path.relpath(file_path, self.vault_path)
             }
 
-            # Git commit + push после операции
+            # Коммит и push выполнит фоновый поток Git синхронизации
+            git_sync = _get_git_sync()
             if git_sync:
-                git_sync.sync_after_operation(f"Создана заметка: {title}")
+                git_sync.sync_after_operation(f"Создана заметка: {title}", paths=[file_path])
 
             return result
 
@@ -384,12 +672,17 @@ class ObsidianVault:
         """
         Ищет заметки по ключевым словам
 
+        Поиск идёт по полнотекстовому индексу (integrations/obsidian_index.py),
+        который поддерживает наблюдатель за файлами (или, без него,
+        проверка mtime перед запросом). При включённом семантическом поиске
+        результаты ранжируются по BM25 и близости по смыслу вместе.
+
         Args:
             query: Поисковый запрос
             limit: Максимальное количество результатов
 
         Returns:
-            Список найденных заметок
+            Список найденных заметок по убыванию релевантности
 
         Example:
             >>> vault = ObsidianVault()
@@ -397,47 +690,11 @@ class ObsidianVault:
         """
 
         try:
-            results = []
-            query_lower = query.lower()
-
-            # Рекурсивно обойти все .md файлы
-            for root, dirs, files in os.walk(self.vault_path):
-                for file in files:
-                    if not file.endswith('.md'):
-                        continue
-
-                    file_path = os.path.join(root, file)
-
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-
-                        # Поиск по содержимому
-                        if query_lower in content.lower():
-                            # Извлечь заголовок (первая строка с #)
-                            title = file.replace('.md', '')
-                            for line in content.split('\n'):
-                                if line.startswith('# '):
-                                    title = line.replace('# ', '').strip()
-                                    break
-
-                            results.append({
-                                'title': title,
-                                'file_path': file_path,
-                                'relative_path': os.path.relpath(file_path, self.vault_path),
-                                'excerpt': self._get_excerpt(content, query_lower)
-                            })
-
-                            # Лимит результатов
-                            if len(results) >= limit:
-                                break
-
-                    except Exception as e:
-                        logger.warning(f"Ошибка при чтении {file_path}: {e}")
-                        continue
-
-                if len(results) >= limit:
-                    break
+            results = None
+            if self.semantic_index:
+                results = self.semantic_index.search(query, limit=limit)
+            if results is None:
+                results = self.search_index.search(query, limit=limit)
 
             logger.info(f"Найдено {len(results)} заметок по запросу: {query}")
 
@@ -447,41 +704,64 @@ class ObsidianVault:
             logger.error(f"Ошибка при поиске заметок: {e}", exc_info=True)
             raise Exception(f"Failed to search notes: {str(e)}")
 
-    def _get_excerpt(self, content: str, query: str, context_chars: int = 100) -> str:
+    def find_notes_by_tag(self, tag: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
-        Извлекает фрагмент текста вокруг найденного запроса
+        Ищет заметки с тегом (включая вложенные теги)
 
         Args:
-            content: Содержимое заметки
-            query: Поисковый запрос
-            context_chars: Количество символов контекста
+            tag: Тег, с # или без
+            limit: Максимальное количество результатов
 
         Returns:
-            Фрагмент текста
+            Список {title, relative_path}, отсортированный по пути
+
+        Example:
+            >>> vault = ObsidianVault()
+            >>> vault.find_notes_by_tag("проект")
         """
 
-        content_lower = content.lower()
-        query_lower = query.lower()
+        try:
+            if not self.search_index.watched:
+                self.search_index.refresh()
+
+            results = self.search_index.notes_by_tag(tag)
+
+            logger.info(f"Найдено {len(results)} заметок с тегом: {tag}")
+
+            return results[:limit]
+
+        except Exception as e:
+            logger.error(f"Ошибка при поиске по тегу: {e}", exc_info=True)
+            raise Exception(f"Failed to find notes by tag: {str(e)}")
+
+    def get_note_links(self, note: str) -> Dict[str, Any]:
+        """
+        Возвращает метаданные заметки, её исходящие ссылки и обратные ссылки
 
-        # Найти позицию запроса
-        pos = content_lower.find(query_lower)
-        if pos == -1:
-            # Если не нашли, вернуть начало
-            return content[:context_chars] + "..."
+        Args:
+            note: Название, имя файла, алиас или путь заметки
 
-        # Извлечь контекст
-        start = max(0, pos - context_chars)
-        end = min(len(content), pos + len(query) + context_chars)
+        Returns:
+            title, relative_path, tags, aliases, created, links, backlinks
 
-        excerpt = content[start:end]
+        Example:
+            >>> vault = ObsidianVault()
+            >>> vault.get_note_links("Проект Альфа")["backlinks"]
+        """
 
-        # Добавить многоточия
-        if start > 0:
-            excerpt = "..." + excerpt
-        if end < len(content):
-            excerpt = excerpt + "..."
+        if not self.search_index.watched:
+            self.search_index.refresh()
 
-        return excerpt
+        info = self.search_index.get_note_info(note)
+        if info is None:
+            raise Exception(f"Note not found: {note}")
+
+        logger.info(
+            f"Ссылки заметки {info['relative_path']}: {len(info['links'])} исходящих, "
+            f"{len(info['backlinks'])} входящих"
+        )
+
+        return info
 
     def read_note(self, file_path: str) -> Dict[str, Any]:
         """
@@ -536,6 +816,14 @@ class ObsidianVault:
             with open(file_path, 'w', encoding='utf-8') as f:
                 f.write(content)
 
+            self.search_index.update_file(file_path)
+
+            git_sync = _get_git_sync()
+            if git_sync:
+                git_sync.sync_after_operation(
+                    f"Обновлена заметка: {os.path.basename(file_path)}", paths=[file_path]
+                )
+
             logger.info(f"Заметка обновлена: {file_path}")
 
             return {
@@ -551,6 +839,8 @@ class ObsidianVault:
 # Глобальные экземпляры (lazy init)
 _vault_instance = None
 _rest_api_instance = None
+# get_vault вызывается из пула потоков агента: создание - один раз
+_instance_lock = threading.Lock()
 
 
 def get_vault():
@@ -562,11 +852,39 @@ def get_vault():
     """
     global _vault_instance, _rest_api_instance
 
-    if METHOD == 'rest_api':
-        if _rest_api_instance is None:
-            _rest_api_instance = ObsidianRESTAPI()
-        return _rest_api_instance
-    else:
-        if _vault_instance is None:
-            _vault_instance = ObsidianVault()
-        return _vault_instance
+    with _instance_lock:
+        if METHOD == 'rest_api':
+            if _rest_api_instance is None:
+                _rest_api_instance = ObsidianRESTAPI()
+            return _rest_api_instance
+        else:
+            if _vault_instance is None:
+                _vault_instance = ObsidianVault()
+            return _vault_instance
+
+
+def close_vault():
+    """
+    Останавливает наблюдатель и закрывает индекс vault, если он создавался
+
+    Очередь Git синхронизации перед этим коммитится и отправляется.
+    """
+    global _vault_instance, _git_sync
+
+    if _git_sync:
+        from integrations.obsidian_git import close_git_sync
+        close_git_sync()
+    _git_sync = None
+
+    if _vault_instance is not None:
+        _vault_instance.close()
+        _vault_instance = None
+
+
+async def close_rest_api_client():
+    """Закрывает пул соединений REST API клиента (вызывается при остановке)"""
+    global _rest_api_instance
+
+    if _rest_api_instance is not None:
+        await _rest_api_instance.aclose()
+        _rest_api_instance = None
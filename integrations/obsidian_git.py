@@ -1,12 +1,24 @@
 """
 Git синхронизация для Obsidian хранилища
+
+Коммиты пишутся в процессе через pygit2 (integrations/obsidian_git_repo.py),
+без него - через git CLI; pull и push всегда через git CLI.
+
+Коммиты, push и pull выполняет фоновый поток (GitSyncWorker): запись
+заметки только ставит путь в очередь и сразу возвращается. Изменения,
+пришедшие в течение commit_delay_ms, попадают в один коммит, push
+выполняется не чаще раза в push_delay_ms, pull - раз в pull_interval
+и по запросу (request_pull), а не перед каждой записью.
 """
 
 import os
 import subprocess
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, List
 from pathlib import Path
 
+from integrations.obsidian_git_repo import InProcessGitRepo
 from utils.config import load_config
 from utils.logger import get_logger
 
@@ -19,6 +31,13 @@ VAULT_PATH = obsidian_config.get('vault_path', '')
 GIT_ENABLED = obsidian_config.get('git_sync', {}).get('enabled', False)
 GIT_AUTO_COMMIT = obsidian_config.get('git_sync', {}).get('auto_commit', True)
 GIT_AUTO_PUSH = obsidian_config.get('git_sync', {}).get('auto_push', False)
+GIT_SYNC_CONFIG = obsidian_config.get('git_sync', {})
+
+# Окружение git: пути из очереди - буквальные имена файлов, а не шаблоны
+_GIT_ENV = {**os.environ, 'GIT_LITERAL_PATHSPECS': '1', 'GIT_TERMINAL_PROMPT': '0'}
+
+# Сколько изменений перечислять в сообщении коммита
+_COMMIT_MESSAGE_ITEMS = 20
 
 
 class ObsidianGitSync:
@@ -34,9 +53,36 @@ class ObsidianGitSync:
         self.vault_path = vault_path or VAULT_PATH
         self.auto_commit = GIT_AUTO_COMMIT
         self.auto_push = GIT_AUTO_PUSH
+        self.backend = GIT_SYNC_CONFIG.get('backend', 'auto')
+        self.worker: Optional["GitSyncWorker"] = None
+        self._repo = None
 
         logger.info(f"ObsidianGitSync инициализирован (путь: {self.vault_path})")
 
+    def start_worker(self) -> None:
+        """Запускает фоновый поток коммитов, push и pull (настройки из git_sync)"""
+        if self.worker is None:
+            self.worker = GitSyncWorker(
+                self,
+                commit_delay_ms=GIT_SYNC_CONFIG.get('commit_delay_ms', 2000),
+                max_commit_delay_ms=GIT_SYNC_CONFIG.get('max_commit_delay_ms', 30000),
+                push_delay_ms=GIT_SYNC_CONFIG.get('push_delay_ms', 30000),
+                pull_interval=GIT_SYNC_CONFIG.get('pull_interval', 300)
+            )
+        self.worker.start()
+
+    def request_pull(self) -> None:
+        """Запрашивает git pull в фоне (без фонового потока - сразу)"""
+        if self.worker and self.worker.running:
+            self.worker.request_pull()
+        else:
+            self.git_pull()
+
+    def close(self, timeout: float = 60.0) -> None:
+        """Применяет очередь изменений и останавливает фоновый поток"""
+        if self.worker:
+            self.worker.stop(timeout)
+
     def is_git_repo(self) -> bool:
         """
         Проверяет, является ли хранилище Git репозиторием
@@ -184,6 +230,132 @@ class ObsidianGitSync:
             logger.error(f"Ошибка git операции: {e}", exc_info=True)
             return {'success': False, 'message': f'Ошибка: {str(e)}'}
 
+    def _git(self, *args: str, timeout: float = 10, stdin: str = None) -> subprocess.CompletedProcess:
+        """Запускает git в хранилище"""
+        return subprocess.run(
+            ['git', *args],
+            cwd=self.vault_path,
+            input=stdin,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env=_GIT_ENV
+        )
+
+    def _get_repo(self) -> Optional[InProcessGitRepo]:
+        """Репозиторий, открытый в процессе (None - коммиты через git CLI)"""
+        if self._repo is None:
+            self._repo = False
+            if self.backend != 'cli':
+                try:
+                    self._repo = InProcessGitRepo(self.vault_path)
+                    logger.info("Git коммиты выполняются в процессе (pygit2)")
+                except ImportError:
+                    if self.backend == 'pygit2':
+                        logger.error("git_sync.backend: pygit2, но pygit2 не установлен - коммиты через git CLI")
+                    else:
+                        logger.info("pygit2 не установлен, Git коммиты через git CLI")
+                except Exception as e:
+                    logger.warning(f"Не удалось открыть репозиторий через pygit2 ({e}), коммиты через git CLI")
+        return self._repo or None
+
+    def commit_paths(self, paths: Iterable[str], message: str) -> Dict[str, Any]:
+        """
+        Коммитит изменения указанных файлов
+
+        В отличие от git_commit_and_push индексируются только переданные
+        пути (новые, изменённые и удалённые), а не всё дерево. Если
+        установлен pygit2, коммит пишется в процессе, без запуска git
+        (во время незавершённого merge/rebase - всё равно через git CLI).
+
+        Args:
+            paths: Пути относительно хранилища
+            message: Сообщение коммита
+
+        Returns:
+            Результат операции; 'committed' - создан ли коммит
+        """
+        if not self.is_git_repo():
+            return {'success': False, 'committed': False, 'message': 'Не является Git репозиторием'}
+
+        paths = list(paths)
+        repo = self._get_repo()
+        if repo is not None and repo.is_clean_state():
+            try:
+                return repo.commit_paths(paths, message)
+            except Exception as e:
+                logger.error(f"Ошибка коммита через pygit2: {e}", exc_info=True)
+                return {'success': False, 'committed': False, 'message': f'Ошибка: {str(e)}'}
+
+        return self._commit_paths_cli(paths, message)
+
+    def _commit_paths_cli(self, paths: List[str], message: str) -> Dict[str, Any]:
+        """commit_paths через git CLI: add/rm, diff --cached, commit"""
+        existing: List[str] = []
+        missing: List[str] = []
+        for path in paths:
+            (existing if os.path.lexists(os.path.join(self.vault_path, path)) else missing).append(path)
+
+        try:
+            if existing:
+                result = self._git('add', '-A', '--pathspec-from-file=-', '--pathspec-file-nul',
+                                   stdin='\0'.join(existing))
+                if result.returncode != 0:
+                    logger.error(f"Git add ошибка: {result.stderr}")
+                    return {'success': False, 'committed': False, 'message': f'Git add ошибка: {result.stderr}'}
+
+            if missing:
+                result = self._git('rm', '--cached', '--ignore-unmatch', '-q', '--pathspec-from-file=-',
+                                   '--pathspec-file-nul', stdin='\0'.join(missing))
+                if result.returncode != 0:
+                    logger.error(f"Git rm ошибка: {result.stderr}")
+                    return {'success': False, 'committed': False, 'message': f'Git rm ошибка: {result.stderr}'}
+
+            if self._git('diff', '--cached', '--quiet').returncode == 0:
+                logger.debug("Нет изменений для коммита")
+                return {'success': True, 'committed': False, 'message': 'Нет изменений'}
+
+            result = self._git('commit', '-q', '-m', message)
+            if result.returncode != 0:
+                logger.error(f"Git commit ошибка: {result.stderr}")
+                return {'success': False, 'committed': False, 'message': f'Git commit ошибка: {result.stderr}'}
+
+            return {'success': True, 'committed': True, 'message': 'Коммит создан успешно'}
+
+        except subprocess.TimeoutExpired:
+            logger.error("Git операция timeout")
+            return {'success': False, 'committed': False, 'message': 'Git timeout'}
+
+        except Exception as e:
+            logger.error(f"Ошибка git операции: {e}", exc_info=True)
+            return {'success': False, 'committed': False, 'message': f'Ошибка: {str(e)}'}
+
+    def git_push(self) -> Dict[str, Any]:
+        """
+        Выполняет git push
+
+        Returns:
+            Результат операции
+        """
+        try:
+            logger.info("Выполнение git push...")
+            result = self._git('push', timeout=30)
+
+            if result.returncode == 0:
+                logger.info("Git push успешно")
+                return {'success': True, 'message': 'Git push выполнен успешно'}
+
+            logger.warning(f"Git push ошибка: {result.stderr}")
+            return {'success': False, 'message': f'Git push ошибка: {result.stderr}'}
+
+        except subprocess.TimeoutExpired:
+            logger.error("Git push timeout")
+            return {'success': False, 'message': 'Git push timeout'}
+
+        except Exception as e:
+            logger.error(f"Ошибка git push: {e}", exc_info=True)
+            return {'success': False, 'message': f'Ошибка: {str(e)}'}
+
     def sync_before_operation(self) -> bool:
         """
         Синхронизация перед операцией (pull)
@@ -197,24 +369,286 @@ class ObsidianGitSync:
         result = self.git_pull()
         return result.get('success', False)
 
-    def sync_after_operation(self, operation_description: str = "AI Assistant operation") -> bool:
+    def sync_after_operation(
+        self,
+        operation_description: str = "AI Assistant operation",
+        paths: Iterable[str] = None
+    ) -> bool:
         """
         Синхронизация после операции (commit + push)
 
+        Если запущен фоновый поток и известны изменённые файлы, они только
+        ставятся в очередь: коммит и push выполнит GitSyncWorker.
+
         Args:
             operation_description: Описание операции для сообщения коммита
+            paths: Изменённые файлы (абсолютные или относительно хранилища)
 
         Returns:
-            True если синхронизация успешна или не требуется
+            True если синхронизация успешна, поставлена в очередь или не требуется
         """
         if not GIT_ENABLED or not self.auto_commit:
             return True
 
+        if paths is not None and self.worker and self.worker.running:
+            for path in paths:
+                self.worker.notify(path, operation_description)
+            return True
+
         message = f"Auto-commit: {operation_description}"
         result = self.git_commit_and_push(message)
         return result.get('success', False)
 
 
+class GitSyncWorker:
+    """
+    Фоновый поток Git синхронизации с очередью изменений
+
+    Все git команды хранилища выполняются в этом потоке последовательно:
+    коммит накопленных изменений, затем pull (по расписанию или запросу),
+    затем push. Push после неудачи повторяется после следующего pull.
+    """
+
+    def __init__(
+        self,
+        git_sync: ObsidianGitSync,
+        commit_delay_ms: int = 2000,
+        max_commit_delay_ms: int = 30000,
+        push_delay_ms: int = 30000,
+        pull_interval: float = 300
+    ):
+        """
+        Инициализация потока синхронизации
+
+        Args:
+            git_sync: Git синхронизация хранилища
+            commit_delay_ms: Коммитить после такой паузы в изменениях
+            max_commit_delay_ms: Коммитить не позже, чем через столько после
+                первого изменения пачки (и повторять неудачный коммит)
+            push_delay_ms: Push не чаще, чем раз в столько
+            pull_interval: Интервал pull в секундах (0 - только по запросу)
+        """
+        self.git_sync = git_sync
+        self.commit_delay = commit_delay_ms / 1000
+        self.max_commit_delay = max_commit_delay_ms / 1000
+        self.push_delay = push_delay_ms / 1000
+        self.pull_interval = pull_interval
+
+        self.commits = 0
+        self.pushes = 0
+        self.pulls = 0
+
+        self._condition = threading.Condition()
+        # Путь относительно хранилища -> описание изменения (в порядке поступления)
+        self._pending: Dict[str, str] = {}
+        self._first_change = self._last_change = 0.0
+        self._retry_at = 0.0
+        self._push_at: Optional[float] = None
+        self._next_pull: Optional[float] = None
+        self._pull_requested = False
+        self._flush_requested = False
+        self._busy = False
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        """Работает ли поток"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Запускает поток; первый pull - сразу (догнать удалённые изменения)"""
+        if self.running:
+            return
+
+        with self._condition:
+            self._stopping = False
+            self._next_pull = time.monotonic() if self.pull_interval else None
+
+        self._thread = threading.Thread(target=self._run, name="vault-git-sync", daemon=True)
+        self._thread.start()
+        logger.info("Фоновая Git синхронизация запущена")
+
+    def stop(self, timeout: float = 60.0) -> None:
+        """
+        Коммитит и отправляет накопленное и останавливает поток
+
+        Args:
+            timeout: Сколько ждать завершения git команд, секунды
+        """
+        if not self.running:
+            return
+
+        self.flush(timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def notify(self, path: str, description: str) -> None:
+        """
+        Ставит изменённый файл в очередь (не блокирует)
+
+        Args:
+            path: Путь к файлу (абсолютный или относительно хранилища)
+            description: Описание изменения для сообщения коммита
+        """
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.git_sync.vault_path)
+
+        with self._condition:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_change = now
+            self._last_change = now
+            self._pending.pop(path, None)
+            self._pending[path] = description
+            self._condition.notify_all()
+
+    def request_pull(self) -> None:
+        """Запрашивает pull как можно скорее (после коммита очереди)"""
+        with self._condition:
+            self._pull_requested = True
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = 60.0) -> bool:
+        """
+        Коммитит очередь и выполняет запланированный push немедленно
+
+        Args:
+            timeout: Сколько ждать, секунды
+
+        Returns:
+            True если всё применено за timeout
+        """
+        if not self.running:
+            return not self._pending
+
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not (self._flush_requested or self._busy),
+                timeout
+            )
+
+    def _due(self, now: float):
+        """Какие действия пора выполнить: (коммит, pull, push)"""
+        flush = self._flush_requested
+        commit = bool(self._pending) and now >= self._retry_at and (
+            flush
+            or now >= self._last_change + self.commit_delay
+            or now >= self._first_change + self.max_commit_delay
+        )
+        pull = self._pull_requested or (self._next_pull is not None and now >= self._next_pull)
+        push = self._push_at is not None and (flush or now >= self._push_at)
+        return commit, pull, push
+
+    def _wait_timeout(self, now: float) -> Optional[float]:
+        """Сколько ждать до ближайшего запланированного действия"""
+        deadlines = []
+        if self._pending:
+            deadlines.append(max(
+                self._retry_at,
+                min(self._last_change + self.commit_delay, self._first_change + self.max_commit_delay)
+            ))
+        if self._next_pull is not None:
+            deadlines.append(self._next_pull)
+        if self._push_at is not None:
+            deadlines.append(self._push_at)
+        return max(0.0, min(deadlines) - now) if deadlines else None
+
+    def _run(self) -> None:
+        """Цикл потока"""
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    commit, pull, push = self._due(now)
+                    if commit or pull or push:
+                        break
+                    if self._flush_requested:
+                        # Нечего применять (или коммит ждёт повтора)
+                        self._flush_requested = False
+                        self._condition.notify_all()
+                    if self._stopping:
+                        return
+                    self._condition.wait(self._wait_timeout(now))
+
+                pending = self._pending if commit else {}
+                if commit:
+                    self._pending = {}
+                if pull:
+                    self._pull_requested = False
+                    self._next_pull = now + self.pull_interval if self.pull_interval else None
+                if push:
+                    self._push_at = None
+                self._busy = True
+
+            try:
+                if pending:
+                    self._commit(pending)
+                if pull:
+                    self._pull()
+                if push:
+                    self._push()
+            except Exception as e:
+                logger.error(f"Ошибка фоновой Git синхронизации: {e}", exc_info=True)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _commit(self, pending: Dict[str, str]) -> None:
+        """Один коммит для всех накопленных изменений"""
+        descriptions = list(dict.fromkeys(pending.values()))
+        if len(descriptions) == 1:
+            message = f"Auto-commit: {descriptions[0]}"
+        else:
+            lines = [f"- {description}" for description in descriptions[:_COMMIT_MESSAGE_ITEMS]]
+            if len(descriptions) > _COMMIT_MESSAGE_ITEMS:
+                lines.append(f"- ... и ещё {len(descriptions) - _COMMIT_MESSAGE_ITEMS}")
+            message = f"Auto-commit: {len(descriptions)} изменений\n\n" + "\n".join(lines)
+
+        start = time.perf_counter()
+        result = self.git_sync.commit_paths(list(pending), message)
+
+        with self._condition:
+            if not result['success']:
+                # Вернуть в очередь (не вытесняя новые изменения) и повторить позже
+                now = time.monotonic()
+                self._pending = {**pending, **self._pending}
+                self._first_change = self._last_change = now
+                self._retry_at = now + self.max_commit_delay
+                return
+
+            self._retry_at = 0.0
+            if result['committed']:
+                self.commits += 1
+                if self.git_sync.auto_push and self._push_at is None:
+                    self._push_at = time.monotonic() + self.push_delay
+
+        if result['committed']:
+            logger.info(f"Коммит {len(pending)} файлов за {time.perf_counter() - start:.2f}s")
+
+    def _pull(self) -> None:
+        """git pull (изменения файлов подхватит наблюдатель индекса)"""
+        if self.git_sync.git_pull().get('success'):
+            self.pulls += 1
+
+    def _push(self) -> None:
+        """git push; при ошибке - pull и повтор через push_delay"""
+        if self.git_sync.git_push().get('success'):
+            self.pushes += 1
+            return
+
+        with self._condition:
+            self._pull_requested = True
+            if self._push_at is None:
+                self._push_at = time.monotonic() + self.push_delay
+
+
 # Глобальный экземпляр
 _git_sync_instance = None
 
@@ -233,5 +667,15 @@ def get_git_sync() -> Optional[ObsidianGitSync]:
 
     if _git_sync_instance is None:
         _git_sync_instance = ObsidianGitSync()
+        _git_sync_instance.start_worker()
 
     return _git_sync_instance
+
+
+def close_git_sync() -> None:
+    """Применяет очередь изменений и останавливает фоновую синхронизацию"""
+    global _git_sync_instance
+
+    if _git_sync_instance is not None:
+        _git_sync_instance.close()
+        _git_sync_instance = None
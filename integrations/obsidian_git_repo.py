@@ -0,0 +1,161 @@
+"""
+Коммиты в Git репозиторий vault без запуска git (pygit2 / libgit2)
+
+InProcessGitRepo индексирует ровно переданные пути и пишет дерево и
+коммит прямо в репозиторий: без fork процесса git на каждую команду и
+без обхода всего дерева, как у "git add .". Репозиторий и индекс
+открываются один раз и переиспользуются; изменения индекса, сделанные
+снаружи (git CLI, Obsidian Git), перечитываются по mtime файла индекса.
+
+Сетевые операции (pull, push) остаются за git CLI: ему нужны настройки
+пользователя - ssh ключи, credential helper. Хуки (pre-commit и т.п.)
+при коммите через libgit2 не выполняются.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from utils.logger import get_logger
+
+try:
+    import pygit2
+except ImportError:
+    pygit2 = None
+
+logger = get_logger(__name__)
+
+
+def is_available() -> bool:
+    """Установлен ли pygit2"""
+    return pygit2 is not None
+
+
+class InProcessGitRepo:
+    """Git репозиторий vault, открытый в процессе (pygit2)"""
+
+    def __init__(self, vault_path: str):
+        """
+        Открывает репозиторий
+
+        Args:
+            vault_path: Путь к хранилищу (рабочее дерево репозитория)
+
+        Raises:
+            ImportError: pygit2 не установлен
+            pygit2.GitError: Не Git репозиторий
+        """
+        if pygit2 is None:
+            raise ImportError("Для Git без запуска процессов нужен pygit2")
+
+        self.vault_path = vault_path
+        self.repo = pygit2.Repository(vault_path)
+        self._lock = threading.Lock()
+
+    def is_clean_state(self) -> bool:
+        """Нет незавершённого merge/rebase/cherry-pick (иначе коммит делает git CLI)"""
+        return self.repo.state() == pygit2.enums.RepositoryState.NONE
+
+    def commit_paths(self, paths: Iterable[str], message: str) -> Dict[str, Any]:
+        """
+        Индексирует пути и создаёт коммит
+
+        Существующие файлы добавляются в индекс (libgit2 сохраняет их stat,
+        поэтому git status потом не перечитывает их), отсутствующие -
+        удаляются из него. Игнорируемые (.gitignore) и не отслеживаемые
+        файлы пропускаются, как git add -A -- <путь> без --force.
+
+        Дерево коммита - дерево HEAD с заменой только этих путей: без
+        пересчёта деревьев всего индекса, и в коммит не попадает то, что
+        пользователь проиндексировал сам.
+
+        Args:
+            paths: Пути относительно хранилища
+            message: Сообщение коммита
+
+        Returns:
+            Результат операции; 'committed' - создан ли коммит
+        """
+        with self._lock:
+            repo = self.repo
+            index = repo.index
+            # Перечитывает индекс с диска, только если его изменили снаружи
+            index.read(False)
+
+            # Путь -> (blob, режим) или None для удалённых
+            changes: Dict[str, Optional[Tuple[Any, int]]] = {}
+            for path in paths:
+                path = path.replace(os.sep, '/')
+                full_path = os.path.join(self.vault_path, path)
+
+                if os.path.isfile(full_path):
+                    if path in index or not repo.path_is_ignored(path):
+                        index.add(path)
+                        entry = index[path]
+                        changes[path] = (entry.id, entry.mode)
+                else:
+                    if path in index:
+                        index.remove(path)
+                    changes[path] = None
+
+            index.write()
+
+            if repo.head_is_unborn:
+                tree = index.write_tree()
+                parents = []
+            else:
+                head = repo.head.peel(pygit2.Commit)
+                tree = self._update_tree(head.tree, changes) or repo.TreeBuilder().write()
+                if head.tree_id == tree:
+                    return {'success': True, 'committed': False, 'message': 'Нет изменений'}
+                parents = [head.id]
+
+            signature = repo.default_signature
+            commit_id = repo.create_commit('HEAD', signature, signature, message, tree, parents)
+
+        logger.debug(f"Коммит {str(commit_id)[:7]} создан без запуска git")
+        return {
+            'success': True,
+            'committed': True,
+            'message': 'Коммит создан успешно',
+            'commit': str(commit_id)
+        }
+
+    def _update_tree(self, tree: Optional[Any], changes: Dict[str, Optional[Tuple[Any, int]]]):
+        """
+        Записывает копию дерева с изменёнными путями
+
+        Перезаписываются только деревья каталогов на пути к изменённым
+        файлам; опустевшие каталоги убираются (в git их не бывает).
+
+        Args:
+            tree: Исходное дерево (None - пустое)
+            changes: Путь относительно дерева -> (blob, режим) или None
+
+        Returns:
+            Oid нового дерева или None, если оно пустое
+        """
+        builder = self.repo.TreeBuilder(tree) if tree is not None else self.repo.TreeBuilder()
+        subdirs: Dict[str, Dict[str, Optional[Tuple[Any, int]]]] = {}
+
+        for path, entry in changes.items():
+            name, separator, rest = path.partition('/')
+            if separator:
+                subdirs.setdefault(name, {})[rest] = entry
+            elif entry is None:
+                if builder.get(name) is not None:
+                    builder.remove(name)
+            else:
+                builder.insert(name, entry[0], entry[1])
+
+        for name, sub_changes in subdirs.items():
+            current = builder.get(name)
+            subtree = current if isinstance(current, pygit2.Tree) else None
+            subtree_id = self._update_tree(subtree, sub_changes)
+
+            if subtree_id is not None:
+                builder.insert(name, subtree_id, pygit2.enums.FileMode.TREE)
+            elif current is not None:
+                builder.remove(name)
+
+        return builder.write() if len(builder) else None
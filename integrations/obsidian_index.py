@@ -0,0 +1,685 @@
+"""
+Полнотекстовый индекс Obsidian vault (SQLite FTS5)
+
+Заменяет обход всех .md файлов на каждый поиск: заметки индексируются
+один раз, дальше переиндексируются только файлы с изменившимися
+mtime/размером. Поиск ранжируется по BM25 (заголовок весомее текста),
+фрагменты с подсветкой строит snippet() FTS5.
+
+Для изменённых файлов разбираются метаданные (integrations/obsidian_metadata.py):
+они хранятся в таблице notes и в памяти (index.metadata). Первое построение
+читает и разбирает файлы в пуле процессов. Индекс обновляется наблюдателем (integrations/obsidian_watcher.py) или,
+без него, проверкой mtime перед поиском.
+
+Русская морфология: слова запроса приводятся к основе стеммером Snowball
+и ищутся как префиксы ("молоко" находит "молока", "молоком"). Явный
+префиксный запрос - слово со звёздочкой ("прое*").
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from integrations.obsidian_metadata import NoteMeta, VaultMetadata, read_and_parse
+from utils.logger import get_logger
+from utils.text_normalizer import snowball_stem
+
+logger = get_logger(__name__)
+
+# Веса колонок для bm25(): title, body
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# Файлы переиндексируются пачками, каждая пачка - своя транзакция
+INDEX_BATCH_SIZE = 500
+
+# Короткие основы дают слишком широкий префиксный поиск
+MIN_STEM_LENGTH = 3
+
+# Версия схемы индекса: при изменении индекс строится заново
+INDEX_VERSION = "3"
+
+# С какого числа изменённых файлов они читаются и разбираются в пуле
+# процессов (первое построение, большой git pull)
+PARALLEL_PARSE_MIN_FILES = 1000
+
+_QUERY_TOKEN_PATTERN = re.compile(r"[\w-]+\*?")
+
+_NOTE_COLUMNS = "path, title, tags, aliases, created, links, mtime, size"
+
+# Параметров в одном запросе IN (...) (лимит SQLite - 999 в старых версиях)
+_SQL_BATCH = 500
+
+# Слушатель изменений индекса: (обновлённые пути, удалённые пути)
+ChangeListener = Callable[[List[str], List[str]], None]
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)",
+    """
+    CREATE TABLE IF NOT EXISTS notes (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL,
+        tags TEXT NOT NULL DEFAULT '[]',
+        aliases TEXT NOT NULL DEFAULT '[]',
+        created TEXT,
+        links TEXT NOT NULL DEFAULT '[]',
+        mtime REAL NOT NULL,
+        size INTEGER NOT NULL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        title, body,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+]
+
+
+def _fold(text: str) -> str:
+    """Приводит ё к е (unicode61 их не отождествляет)"""
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Преобразует пользовательский запрос в выражение MATCH FTS5
+
+    Каждое слово - префикс его основы (все слова обязательны),
+    слово со звёздочкой - явный префикс.
+
+    Args:
+        query: Поисковый запрос
+
+    Returns:
+        Выражение MATCH или None, если в запросе нет слов
+    """
+    terms = []
+    for token in _QUERY_TOKEN_PATTERN.findall(_fold(query.lower())):
+        if token.endswith('*'):
+            prefix = token[:-1]
+        else:
+            stem = snowball_stem(token)
+            prefix = stem if len(stem) >= MIN_STEM_LENGTH else token
+
+        prefix = prefix.strip('-')
+        if prefix:
+            terms.append(f'"{prefix}"*')
+
+    return " AND ".join(terms) if terms else None
+
+
+class VaultSearchIndex:
+    """
+    Персистентный полнотекстовый индекс заметок vault
+
+    Потокобезопасен: методы вызываются из пула потоков агента и потока
+    наблюдателя, доступ к соединению сериализуется блокировкой.
+    """
+
+    def __init__(
+        self,
+        vault_path: str,
+        index_path: str,
+        refresh_interval: float = 30.0,
+        parse_workers: Optional[int] = None
+    ):
+        """
+        Инициализация индекса
+
+        Args:
+            vault_path: Путь к хранилищу Obsidian
+            index_path: Путь к файлу индекса SQLite
+            refresh_interval: Не сканировать vault чаще, чем раз в N секунд
+                (0 - сканировать перед каждым поиском)
+            parse_workers: Процессов для разбора больших пачек файлов
+                (None - по числу CPU, 1 - без пула)
+        """
+        self.vault_path = os.path.abspath(vault_path)
+        self.index_path = index_path
+        self.refresh_interval = refresh_interval
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        # Выставляется наблюдателем: изменения приходят от него, и поиск
+        # не проверяет mtime файлов
+        self.watched = False
+        self._lock = threading.RLock()
+        self._last_refresh = 0.0
+        self._listeners: List[ChangeListener] = []
+
+        # Версии заметок, отражённые в памяти этого процесса: путь ->
+        # (mtime, размер). Файл индекса общий для бота и API, поэтому
+        # изменения ищутся относительно них, а не строк таблицы notes -
+        # другой процесс мог уже обновить строку, но не наш self.metadata
+        self._versions: Dict[str, Tuple[float, int]] = {}
+
+        # Метаданные всех заметок в памяти (на диске - таблица notes)
+        self.metadata = VaultMetadata()
+
+        index_dir = os.path.dirname(index_path)
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._init_schema()
+        self._load_metadata()
+
+    def _init_schema(self) -> None:
+        """Создаёт таблицы; индекс другого vault или старой версии пересоздаётся"""
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+            meta = dict(self._conn.execute("SELECT key, value FROM index_meta"))
+
+            if meta and meta.get('version') != INDEX_VERSION:
+                logger.info(f"Версия индекса vault {meta.get('version', '1')} устарела, пересоздание")
+                self._conn.execute("DROP TABLE IF EXISTS notes")
+                self._conn.execute("DROP TABLE IF EXISTS notes_fts")
+
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+            if meta.get('vault_path') not in (None, self.vault_path):
+                logger.info(f"Индекс построен для другого vault ({meta['vault_path']}), пересоздание")
+                self._conn.execute("DELETE FROM notes")
+                self._conn.execute("DELETE FROM notes_fts")
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES (?, ?)",
+                [('vault_path', self.vault_path), ('version', INDEX_VERSION)]
+            )
+
+    def _load_metadata(self) -> None:
+        """Загружает метаданные всех заметок в память"""
+        with self._lock:
+            for row in self._conn.execute(f"SELECT {_NOTE_COLUMNS} FROM notes"):
+                self._set_from_row(*row)
+
+    def _set_from_row(
+        self,
+        path: str,
+        title: str,
+        tags: str,
+        aliases: str,
+        created: Optional[str],
+        links: str,
+        mtime: float,
+        size: int
+    ) -> None:
+        """Кладёт в память метаданные заметки из строки таблицы notes"""
+        self.metadata.set(path, NoteMeta(
+            title, tuple(json.loads(tags)), tuple(json.loads(aliases)),
+            created, tuple(json.loads(links))
+        ))
+        self._versions[path] = (mtime, size)
+
+    def close(self) -> None:
+        """Закрывает соединение с индексом"""
+        with self._lock:
+            self._conn.close()
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """
+        Подписывает на изменения индекса (для инвалидации производных кэшей)
+
+        Слушатель вызывается под блокировкой индекса и должен быть быстрым.
+
+        Args:
+            listener: Функция (обновлённые пути, удалённые пути)
+        """
+        self._listeners.append(listener)
+
+    # --- Обновление ---
+
+    def _scan(self, relative_dir: str = "") -> Dict[str, Tuple[float, int]]:
+        """
+        Собирает mtime и размер всех .md файлов (без чтения содержимого)
+
+        Args:
+            relative_dir: Каталог относительно vault ("" - весь vault)
+
+        Returns:
+            Относительный путь -> (mtime, размер)
+        """
+        files = {}
+        # (абсолютный путь, путь относительно vault) - без os.path.relpath,
+        # который на больших vault занимает большую часть обхода
+        stack = [(os.path.join(self.vault_path, relative_dir), relative_dir)]
+
+        while stack:
+            directory, relative_dir = stack.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.warning(f"Не удалось прочитать каталог {directory}: {e}")
+                continue
+
+            for entry in entries:
+                # Служебные каталоги (.obsidian, .git, .trash)
+                if entry.name.startswith('.'):
+                    continue
+
+                relative_path = os.path.join(relative_dir, entry.name) if relative_dir else entry.name
+
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, relative_path))
+                elif entry.name.endswith('.md'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files[relative_path] = (stat.st_mtime, stat.st_size)
+
+        return files
+
+    def _indexed(self, relative_dir: Optional[str] = None) -> Dict[str, Tuple[float, int]]:
+        """
+        Заметки, отражённые в памяти этого процесса
+
+        Args:
+            relative_dir: Только заметки из этого каталога (None - все)
+
+        Returns:
+            Относительный путь -> (mtime, размер)
+        """
+        if relative_dir is None:
+            return dict(self._versions)
+
+        prefix = relative_dir.rstrip(os.sep) + os.sep
+        return {path: version for path, version in self._versions.items() if path.startswith(prefix)}
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """
+        Синхронизирует индекс с файлами vault по mtime и размеру
+
+        Args:
+            force: Сканировать, даже если refresh_interval не истёк
+
+        Returns:
+            Количество добавленных/обновлённых и удалённых заметок
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return {"updated": 0, "deleted": 0}
+
+            start = time.perf_counter()
+            result = self._sync(self._scan(), self._indexed())
+            self._last_refresh = time.monotonic()
+
+            if result["updated"] or result["deleted"]:
+                logger.info(
+                    f"Индекс vault обновлён: {result['updated']} изменено, {result['deleted']} удалено "
+                    f"за {time.perf_counter() - start:.2f}s"
+                )
+
+            return result
+
+    def apply_changes(self, paths: Iterable[str] = (), directories: Iterable[str] = ()) -> Dict[str, int]:
+        """
+        Синхронизирует только указанные файлы и каталоги (события наблюдателя)
+
+        Файлы, у которых mtime и размер не изменились, не перечитываются.
+
+        Args:
+            paths: Изменённые или удалённые файлы относительно vault
+            directories: Созданные, перемещённые или удалённые каталоги
+
+        Returns:
+            Количество добавленных/обновлённых и удалённых заметок
+        """
+        with self._lock:
+            files: Dict[str, Tuple[float, int]] = {}
+            indexed: Dict[str, Tuple[float, int]] = {}
+
+            for directory in directories:
+                files.update(self._scan(directory))
+                indexed.update(self._indexed(directory))
+
+            for path in paths:
+                if path in files or path in indexed:
+                    continue
+                if path in self._versions:
+                    indexed[path] = self._versions[path]
+                try:
+                    stat = os.stat(os.path.join(self.vault_path, path))
+                    files[path] = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    pass
+
+            return self._sync(files, indexed)
+
+    def update_file(self, file_path: str) -> None:
+        """
+        Переиндексирует один файл (после создания/изменения заметки)
+
+        Args:
+            file_path: Абсолютный или относительный путь к заметке
+        """
+        if os.path.isabs(file_path):
+            file_path = os.path.relpath(file_path, self.vault_path)
+
+        with self._lock:
+            try:
+                stat = os.stat(os.path.join(self.vault_path, file_path))
+                files = {file_path: (stat.st_mtime, stat.st_size)}
+            except FileNotFoundError:
+                files = {}
+
+            version = self._versions.get(file_path)
+
+            # Запись могла уложиться в ту же отметку mtime - перечитать всегда
+            self._sync(files, {file_path: version} if version else {}, force=True)
+
+    def _sync(
+        self,
+        files: Dict[str, Tuple[float, int]],
+        indexed: Dict[str, Tuple[float, int]],
+        force: bool = False
+    ) -> Dict[str, int]:
+        """
+        Приводит индекс и память процесса к состоянию файлов (под блокировкой)
+
+        Заметки, которые другой процесс уже переиндексировал (строка в
+        notes с той же версией), не перечитываются: метаданные берутся
+        из строки.
+
+        Args:
+            files: Файлы на диске: путь -> (mtime, размер)
+            indexed: Те же пути в памяти процесса: путь -> (mtime, размер)
+            force: Переиндексировать файлы даже без изменения mtime/размера
+
+        Returns:
+            Количество добавленных/обновлённых и удалённых заметок
+        """
+        changed = [
+            path for path, version in files.items()
+            if force or indexed.get(path) != version
+        ]
+        deleted = [path for path in indexed if path not in files]
+
+        if deleted:
+            with self._conn:
+                for path in deleted:
+                    self._delete_path(path)
+
+        to_parse = changed if force else self._adopt_indexed(changed, files)
+
+        batch = []
+        for parsed in self._parse_files(to_parse):
+            batch.append(parsed)
+            if len(batch) >= INDEX_BATCH_SIZE:
+                self._write_batch(batch, files)
+                batch = []
+        if batch:
+            self._write_batch(batch, files)
+
+        if (changed or deleted) and self._listeners:
+            for listener in self._listeners:
+                try:
+                    listener(changed, deleted)
+                except Exception as e:
+                    logger.error(f"Ошибка слушателя индекса vault: {e}", exc_info=True)
+
+        return {"updated": len(changed), "deleted": len(deleted)}
+
+    def _adopt_indexed(self, paths: List[str], files: Dict[str, Tuple[float, int]]) -> List[str]:
+        """
+        Берёт из таблицы notes заметки, уже проиндексированные в этой версии
+
+        Args:
+            paths: Изменившиеся для этого процесса заметки
+            files: Версии файлов на диске
+
+        Returns:
+            Заметки, которые нужно прочитать и переиндексировать
+        """
+        adopted = set()
+        for start in range(0, len(paths), _SQL_BATCH):
+            chunk = paths[start:start + _SQL_BATCH]
+            rows = self._conn.execute(
+                f"SELECT {_NOTE_COLUMNS} FROM notes WHERE path IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for row in rows:
+                path, mtime, size = row[0], row[6], row[7]
+                if files[path] == (mtime, size):
+                    self._set_from_row(*row)
+                    adopted.add(path)
+
+        return [path for path in paths if path not in adopted]
+
+    def _write_batch(
+        self,
+        batch: List[Tuple[str, Optional[NoteMeta], Optional[str]]],
+        files: Dict[str, Tuple[float, int]]
+    ) -> None:
+        """Записывает пачку разобранных заметок одной транзакцией"""
+        with self._conn:
+            for path, meta, content in batch:
+                if meta is None:
+                    logger.warning(f"Ошибка при чтении {path}: {content}")
+                    self._delete_path(path)
+                else:
+                    self._write_note(path, *files[path], meta, content)
+
+    def _parse_files(self, paths: List[str]) -> Iterator[Tuple[str, Optional[NoteMeta], Optional[str]]]:
+        """
+        Читает и разбирает файлы; большие пачки - в пуле процессов
+
+        Результаты идут в порядке paths, запись в индекс идёт параллельно
+        с разбором следующих файлов.
+
+        Yields:
+            (путь, метаданные, содержимое) - см. read_and_parse
+        """
+        done = 0
+
+        if len(paths) >= PARALLEL_PARSE_MIN_FILES and self.parse_workers > 1:
+            start = time.perf_counter()
+            try:
+                # spawn: индекс живёт в процессе с потоками (наблюдатель, executor)
+                with ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                ) as pool:
+                    chunksize = max(1, min(256, len(paths) // (self.parse_workers * 4)))
+                    for result in pool.map(
+                        read_and_parse, repeat(self.vault_path), paths, chunksize=chunksize
+                    ):
+                        done += 1
+                        yield result
+
+                logger.info(
+                    f"Разобрано {len(paths)} заметок в {self.parse_workers} процессах "
+                    f"за {time.perf_counter() - start:.2f}s"
+                )
+                return
+            except Exception as e:
+                logger.warning(f"Пул процессов недоступен ({e}), разбор в текущем процессе")
+
+        for path in paths[done:]:
+            yield read_and_parse(self.vault_path, path)
+
+    def _delete_path(self, relative_path: str) -> None:
+        """Удаляет заметку из индекса (внутри транзакции)"""
+        row = self._conn.execute("SELECT id FROM notes WHERE path = ?", (relative_path,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM notes WHERE id = ?", (row[0],))
+            self._conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (row[0],))
+        self.metadata.remove(relative_path)
+        self._versions.pop(relative_path, None)
+
+    def _write_note(
+        self,
+        relative_path: str,
+        mtime: float,
+        size: int,
+        meta: NoteMeta,
+        content: str
+    ) -> None:
+        """
+        Записывает разобранную заметку в индекс (внутри транзакции)
+
+        Args:
+            relative_path: Путь относительно vault
+            mtime: Время изменения файла
+            size: Размер файла
+            meta: Метаданные заметки
+            content: Содержимое заметки
+        """
+        self._conn.execute(
+            """
+            INSERT INTO notes (path, title, tags, aliases, created, links, mtime, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET
+                title = excluded.title, tags = excluded.tags, aliases = excluded.aliases,
+                created = excluded.created, links = excluded.links,
+                mtime = excluded.mtime, size = excluded.size
+            """,
+            (
+                relative_path, meta.title,
+                json.dumps(meta.tags, ensure_ascii=False),
+                json.dumps(meta.aliases, ensure_ascii=False),
+                meta.created,
+                json.dumps(meta.links, ensure_ascii=False),
+                mtime, size
+            )
+        )
+        note_id = self._conn.execute(
+            "SELECT id FROM notes WHERE path = ?", (relative_path,)
+        ).fetchone()[0]
+
+        self._conn.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+        self._conn.execute(
+            "INSERT INTO notes_fts (rowid, title, body) VALUES (?, ?, ?)",
+            (note_id, _fold(meta.title), _fold(content))
+        )
+        self.metadata.set(relative_path, meta)
+        self._versions[relative_path] = (mtime, size)
+
+    # --- Поиск ---
+
+    def search(self, query: str, limit: int = 5, snippet_tokens: int = 24) -> List[Dict[str, Any]]:
+        """
+        Ищет заметки по запросу
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное количество результатов
+            snippet_tokens: Длина фрагмента в словах
+
+        Returns:
+            Список заметок по убыванию релевантности: title, file_path,
+            relative_path, excerpt (совпадения выделены **), score
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        if not self.watched:
+            self.refresh()
+
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT notes.path, notes.title,
+                       snippet(notes_fts, 1, '**', '**', '...', ?) AS excerpt,
+                       bm25(notes_fts, ?, ?) AS rank
+                FROM notes_fts
+                JOIN notes ON notes.id = notes_fts.rowid
+                WHERE notes_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (snippet_tokens, TITLE_WEIGHT, BODY_WEIGHT, match, limit)
+            ).fetchall()
+
+        return [
+            {
+                'title': title,
+                'file_path': os.path.join(self.vault_path, path),
+                'relative_path': path,
+                'excerpt': excerpt,
+                'score': round(-rank, 4)
+            }
+            for path, title, excerpt, rank in rows
+        ]
+
+    def note_versions(self) -> Dict[str, Tuple[float, int]]:
+        """
+        Версии всех заметок в индексе (для производных индексов)
+
+        Returns:
+            Относительный путь -> (mtime, размер)
+        """
+        with self._lock:
+            return dict(self._versions)
+
+    def notes_by_tag(self, tag: str, include_nested: bool = True) -> List[Dict[str, str]]:
+        """
+        Заметки с тегом (из памяти, без обхода vault)
+
+        Args:
+            tag: Тег, с # или без
+            include_nested: Учитывать вложенные теги ("проект" найдёт "проект/альфа")
+
+        Returns:
+            Список {title, relative_path}, отсортированный по пути
+        """
+        with self._lock:
+            return self.metadata.notes_by_tag(tag, include_nested)
+
+    def get_tags(self) -> Dict[str, int]:
+        """Все теги vault с количеством заметок, по убыванию"""
+        with self._lock:
+            return self.metadata.get_tags()
+
+    def get_note_info(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Метаданные заметки со ссылками в обе стороны
+
+        Args:
+            name: Путь, имя файла, алиас или заголовок заметки
+
+        Returns:
+            title, relative_path, tags, aliases, created, links (исходящие),
+            backlinks (входящие) или None, если заметка не найдена
+        """
+        with self._lock:
+            path = self.metadata.resolve(name)
+            if path is None:
+                return None
+
+            meta = self.metadata.get(path)
+            return {
+                'title': meta.title,
+                'relative_path': path,
+                'tags': list(meta.tags),
+                'aliases': list(meta.aliases),
+                'created': meta.created,
+                'links': self.metadata.outgoing_links(path),
+                'backlinks': self.metadata.backlinks(path)
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Количество заметок, тегов и ссылок в индексе и размер файла индекса"""
+        with self._lock:
+            notes = self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+            metadata = self.metadata.stats()
+
+        return {
+            "notes": notes,
+            "tags": metadata["tags"],
+            "links": metadata["links"],
+            "index_size_mb": round(os.path.getsize(self.index_path) / (1024 * 1024), 2)
+        }
@@ -0,0 +1,364 @@
+"""
+Метаданные заметок Obsidian: разбор и граф тегов/ссылок в памяти
+
+parse_note извлекает из заметки заголовок, теги (frontmatter и #теги),
+алиасы, дату создания и исходящие ссылки [[...]]. VaultMetadata держит
+эти данные для всего vault в памяти вместе с обратными индексами
+(тег -> заметки, имя -> заметки, цель ссылки -> ссылающиеся заметки),
+поэтому "заметки с тегом X" и "заметки со ссылкой на Y" - это поиск
+по словарю, а не обход файлов.
+
+На диске метаданные хранит индекс vault (integrations/obsidian_index.py).
+"""
+
+import os
+import re
+import sys
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import yaml
+
+_CODE_PATTERN = re.compile(r"```.*?```|`[^`\n]*`", re.DOTALL)
+_TAG_PATTERN = re.compile(r"(?<![\w#/&])#([\w][\w/-]*)")
+_LINK_PATTERN = re.compile(r"\[\[([^\]\[|#^]+)[^\]\[]*\]\]")
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class NoteMeta(NamedTuple):
+    """Разобранные метаданные заметки"""
+    title: str
+    tags: Tuple[str, ...]
+    aliases: Tuple[str, ...]
+    created: Optional[str]
+    links: Tuple[str, ...]
+
+
+def _unique(items: Iterable[str]) -> Tuple[str, ...]:
+    """Убирает повторы, сохраняя порядок; строки интернируются"""
+    return tuple(sys.intern(item) for item in dict.fromkeys(item for item in items if item))
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Значение frontmatter как список ("a, b", ["a", "b"] или одно значение)"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item for item in re.split(r"[,\s]+", value) if item]
+    if isinstance(value, list):
+        return [item for item in value if item is not None]
+    return [value]
+
+
+def normalize_tag(tag: Any) -> str:
+    """Тег без # в нижнем регистре (теги Obsidian не различают регистр)"""
+    return str(tag).strip().lstrip('#').lower()
+
+
+def link_key(name: str) -> str:
+    """
+    Ключ, по которому ссылка сопоставляется заметке
+
+    Как в Obsidian: имя файла без папки и .md, без учёта регистра.
+
+    Args:
+        name: Цель ссылки, имя файла или путь
+
+    Returns:
+        Ключ
+    """
+    name = name.strip().rsplit('/', 1)[-1]
+    if name.lower().endswith('.md'):
+        name = name[:-3]
+    return name.lower()
+
+
+def split_frontmatter(content: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Отделяет YAML frontmatter от текста заметки
+
+    Args:
+        content: Содержимое заметки
+
+    Returns:
+        (frontmatter, текст без frontmatter); некорректный YAML
+        считается пустым frontmatter
+    """
+    if not content.startswith('---'):
+        return {}, content
+
+    end = content.find('\n---', 3)
+    if end == -1:
+        return {}, content
+
+    body_start = content.find('\n', end + 4)
+    body = content[body_start + 1:] if body_start != -1 else ''
+
+    try:
+        data = yaml.load(content[3:end], Loader=_YAML_LOADER)
+    except yaml.YAMLError:
+        return {}, body
+
+    return (data if isinstance(data, dict) else {}), body
+
+
+def extract_title(content: str, default: str) -> str:
+    """
+    Заголовок заметки: первая строка "# ..." или имя файла
+
+    Args:
+        content: Содержимое заметки
+        default: Заголовок по умолчанию
+
+    Returns:
+        Заголовок
+    """
+    for line in content.split('\n'):
+        if line.startswith('# '):
+            return line[2:].strip()
+    return default
+
+
+def parse_note(content: str, default_title: str) -> NoteMeta:
+    """
+    Разбирает заметку: заголовок, теги, алиасы, дату создания и ссылки
+
+    Args:
+        content: Содержимое заметки
+        default_title: Заголовок, если его нет в заметке (имя файла)
+
+    Returns:
+        NoteMeta
+    """
+    frontmatter, body = split_frontmatter(content)
+
+    title = extract_title(body, '') or str(frontmatter.get('title') or default_title)
+
+    created = frontmatter.get('created', frontmatter.get('date'))
+    if isinstance(created, (datetime, date)):
+        created = created.isoformat()
+    elif created is not None:
+        created = str(created)
+
+    aliases = [str(alias).strip() for alias in _as_list(frontmatter.get('aliases', frontmatter.get('alias')))]
+
+    # Теги и ссылки внутри кода не считаются
+    text = _CODE_PATTERN.sub(' ', body)
+    tags = [normalize_tag(tag) for tag in _as_list(frontmatter.get('tags', frontmatter.get('tag')))]
+    tags += [
+        tag.lower() for tag in _TAG_PATTERN.findall(text)
+        if not tag.replace('/', '').isdigit()
+    ]
+    links = [link.strip() for link in _LINK_PATTERN.findall(text)]
+
+    return NoteMeta(title, _unique(tags), _unique(aliases), created, _unique(links))
+
+
+def read_and_parse(vault_path: str, relative_path: str) -> Tuple[str, Optional[NoteMeta], Optional[str]]:
+    """
+    Читает и разбирает заметку (выполняется и в процессах пула)
+
+    Args:
+        vault_path: Путь к vault
+        relative_path: Путь заметки относительно vault
+
+    Returns:
+        (путь, метаданные, содержимое); при ошибке чтения -
+        (путь, None, текст ошибки)
+    """
+    try:
+        with open(os.path.join(vault_path, relative_path), 'r', encoding='utf-8') as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return relative_path, None, str(e)
+
+    default_title = os.path.splitext(os.path.basename(relative_path))[0]
+    return relative_path, parse_note(content, default_title), content
+
+
+class VaultMetadata:
+    """
+    Метаданные всех заметок vault в памяти
+
+    Не потокобезопасен сам по себе: изменения и чтения сериализует
+    владелец (VaultSearchIndex) своей блокировкой.
+    """
+
+    def __init__(self):
+        self._notes: Dict[str, NoteMeta] = {}
+        # Обратные индексы: тег / ключ имени / ключ цели ссылки -> пути заметок
+        self._tags: Dict[str, Set[str]] = {}
+        self._names: Dict[str, Set[str]] = {}
+        self._backlinks: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._notes
+
+    def get(self, path: str) -> Optional[NoteMeta]:
+        """Метаданные заметки (None, если её нет)"""
+        return self._notes.get(path)
+
+    @staticmethod
+    def _name_keys(path: str, meta: NoteMeta) -> Set[str]:
+        """Ключи, по которым на заметку можно сослаться: имя файла и алиасы"""
+        return {link_key(path)} | {alias.lower() for alias in meta.aliases}
+
+    @staticmethod
+    def _add(index: Dict[str, Set[str]], keys: Iterable[str], path: str) -> None:
+        for key in keys:
+            index.setdefault(sys.intern(key), set()).add(path)
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], keys: Iterable[str], path: str) -> None:
+        for key in keys:
+            paths = index.get(key)
+            if paths:
+                paths.discard(path)
+                if not paths:
+                    del index[key]
+
+    def set(self, path: str, meta: NoteMeta) -> None:
+        """
+        Добавляет или заменяет метаданные заметки
+
+        Args:
+            path: Путь относительно vault
+            meta: Метаданные
+        """
+        self.remove(path)
+        path = sys.intern(path)
+        self._notes[path] = meta
+        self._add(self._tags, meta.tags, path)
+        self._add(self._names, self._name_keys(path, meta), path)
+        self._add(self._backlinks, {link_key(link) for link in meta.links}, path)
+
+    def remove(self, path: str) -> None:
+        """Удаляет заметку (если она есть)"""
+        meta = self._notes.pop(path, None)
+        if meta is None:
+            return
+        self._discard(self._tags, meta.tags, path)
+        self._discard(self._names, self._name_keys(path, meta), path)
+        self._discard(self._backlinks, {link_key(link) for link in meta.links}, path)
+
+    def _describe(self, paths: Iterable[str]) -> List[Dict[str, str]]:
+        """Список {title, relative_path}, отсортированный по пути"""
+        return [
+            {'title': self._notes[path].title, 'relative_path': path}
+            for path in sorted(paths)
+        ]
+
+    def notes_by_tag(self, tag: str, include_nested: bool = True) -> List[Dict[str, str]]:
+        """
+        Заметки с тегом
+
+        Args:
+            tag: Тег, с # или без
+            include_nested: Учитывать вложенные теги ("проект" найдёт "проект/альфа")
+
+        Returns:
+            Список {title, relative_path}, отсортированный по пути
+        """
+        tag = normalize_tag(tag)
+        paths = set(self._tags.get(tag, ()))
+
+        if include_nested:
+            nested_prefix = tag + '/'
+            for name, tagged in self._tags.items():
+                if name.startswith(nested_prefix):
+                    paths.update(tagged)
+
+        return self._describe(paths)
+
+    def get_tags(self) -> Dict[str, int]:
+        """Все теги vault с количеством заметок, по убыванию"""
+        counts = {tag: len(paths) for tag, paths in self._tags.items()}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Находит заметку по пути, имени файла, алиасу или заголовку
+
+        Args:
+            name: Путь относительно vault, имя (с .md или без), алиас
+                или заголовок
+
+        Returns:
+            Путь заметки или None; из одноимённых заметок - с самым
+            коротким путём (как в Obsidian)
+        """
+        name = name.strip()
+        for candidate in (name, name + '.md'):
+            if candidate in self._notes:
+                return candidate
+
+        paths = self._names.get(link_key(name))
+        if paths:
+            return min(paths, key=lambda path: (path.count('/'), path))
+
+        lowered = name.lower()
+        titled = [path for path, meta in self._notes.items() if meta.title.lower() == lowered]
+        return min(titled, key=lambda path: (path.count('/'), path)) if titled else None
+
+    def outgoing_links(self, path: str) -> List[Dict[str, Optional[str]]]:
+        """
+        Исходящие ссылки заметки
+
+        Args:
+            path: Путь заметки
+
+        Returns:
+            Список {link, title, relative_path}; для ссылок на
+            несуществующие заметки title и relative_path - None
+        """
+        meta = self._notes.get(path)
+        if meta is None:
+            return []
+
+        links = []
+        for link in meta.links:
+            target = self._names.get(link_key(link))
+            target_path = min(target, key=lambda p: (p.count('/'), p)) if target else None
+            links.append({
+                'link': link,
+                'title': self._notes[target_path].title if target_path else None,
+                'relative_path': target_path
+            })
+        return links
+
+    def backlinks(self, path: str) -> List[Dict[str, str]]:
+        """
+        Заметки, ссылающиеся на заметку (по имени файла или алиасу)
+
+        Одноимённые заметки в разных папках не различаются: ссылка
+        [[Имя]] считается ссылкой на каждую из них.
+
+        Args:
+            path: Путь заметки
+
+        Returns:
+            Список {title, relative_path}, отсортированный по пути
+        """
+        meta = self._notes.get(path)
+        if meta is None:
+            return []
+
+        sources = set()
+        for key in self._name_keys(path, meta):
+            sources.update(self._backlinks.get(key, ()))
+        sources.discard(path)
+
+        return self._describe(sources)
+
+    def stats(self) -> Dict[str, int]:
+        """Размеры индексов метаданных"""
+        return {
+            "notes": len(self._notes),
+            "tags": len(self._tags),
+            "link_targets": len(self._backlinks),
+            "links": sum(len(meta.links) for meta in self._notes.values())
+        }
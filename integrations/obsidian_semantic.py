@@ -0,0 +1,797 @@
+"""
+Семантический поиск по Obsidian vault (опционально, только CPU, офлайн)
+
+Полнотекстовый индекс находит заметки только по словам запроса;
+семантический дополняет его близостью по смыслу ("встреча с врачом" ->
+"визит к терапевту"). Заметки режутся на фрагменты, фрагменты
+кодируются в векторы, векторы лежат в матрице float32, отображённой в
+память (np.memmap): поиск - одно матричное умножение, ОС держит в
+памяти только нужные страницы.
+
+Кодировщики:
+- "model": локальная модель sentence-transformers (если установлена и
+  модель уже скачана - сеть не используется)
+- "lsa": хэшированный TF-IDF по нормальным формам слов с проекцией LSA,
+  обученной на самом vault (numpy, без внешних моделей). Синонимы
+  сближаются, если встречаются в похожем окружении в заметках.
+
+Итоговый порядок - смесь нормированного BM25 и косинусной близости.
+Индекс обновляется по изменениям mtime/размера в индексе vault, для
+изменённых заметок пересчитываются только их фрагменты.
+
+Требует numpy (requirements.txt: опциональная зависимость).
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from integrations.obsidian_index import VaultSearchIndex
+from integrations.obsidian_metadata import read_and_parse, split_frontmatter
+from utils.logger import get_logger
+from utils.text_normalizer import STOP_WORDS, get_normalizer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: без блокировки, один процесс на каталог
+    fcntl = None
+
+logger = get_logger(__name__)
+
+# Размер фрагмента заметки в словах
+CHUNK_WORDS = 120
+
+# Размерность хэшированного пространства TF-IDF и проекции LSA
+HASH_DIM = 4096
+LSA_DIM = 256
+
+# LSA обучается на выборке не больше стольких фрагментов
+LSA_FIT_SAMPLE = 4000
+
+# Фрагментов кодируется за раз
+ENCODE_BATCH_SIZE = 256
+
+DEFAULT_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Сколько процессов (бот, API, воркеры uvicorn) могут держать свой индекс
+MAX_INDEX_SLOTS = 8
+
+_PARAGRAPH_PATTERN = re.compile(r"\n\s*\n|\n(?=#)")
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS semantic_meta (key TEXT PRIMARY KEY, value TEXT)",
+    """
+    CREATE TABLE IF NOT EXISTS chunks (
+        row INTEGER PRIMARY KEY,
+        path TEXT NOT NULL,
+        text TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks (path)",
+    """
+    CREATE TABLE IF NOT EXISTS notes (
+        path TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        mtime REAL NOT NULL,
+        size INTEGER NOT NULL
+    )
+    """,
+]
+
+
+def is_available() -> bool:
+    """Установлен ли numpy (без него семантический поиск недоступен)"""
+    return np is not None
+
+
+def chunk_text(text: str, max_words: int = CHUNK_WORDS) -> List[str]:
+    """
+    Режет текст на фрагменты по абзацам и заголовкам
+
+    Соседние короткие абзацы объединяются, длинные режутся по словам.
+
+    Args:
+        text: Текст заметки без frontmatter
+        max_words: Максимум слов во фрагменте
+
+    Returns:
+        Фрагменты (пустой список для пустого текста)
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    count = 0
+
+    for paragraph in _PARAGRAPH_PATTERN.split(text):
+        words = paragraph.split()
+        while words:
+            if count + len(words) <= max_words:
+                current.append(" ".join(words))
+                count += len(words)
+                break
+
+            if count:
+                chunks.append("\n".join(current))
+                current, count = [], 0
+                continue
+
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+
+    if current:
+        chunks.append("\n".join(current))
+
+    return chunks
+
+
+def claim_directory(base: str) -> Tuple[str, Any]:
+    """
+    Занимает каталог индекса для этого процесса
+
+    Бот и API открывают один путь из конфигурации, а строки матрицы
+    векторов каждый процесс распределяет сам - общий каталог портил бы
+    векторы и фрагменты. Поэтому у каталога один владелец: процесс
+    держит flock на его файле .lock, следующий берёт base/1, base/2 и
+    т.д. Блокировка снимается при завершении процесса, после
+    перезапуска каталог (и построенный индекс) переиспользуется.
+
+    Args:
+        base: Каталог индекса из конфигурации
+
+    Returns:
+        (каталог, открытый файл блокировки - держать до close())
+
+    Raises:
+        Exception: Все каталоги заняты другими процессами
+    """
+    for slot in range(MAX_INDEX_SLOTS):
+        directory = base if slot == 0 else os.path.join(base, str(slot))
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(os.path.join(directory, ".lock"), "a")
+        if fcntl is None:
+            return directory, lock_file
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+
+        if slot:
+            logger.info(f"Каталог {base} занят другим процессом, семантический индекс: {directory}")
+        return directory, lock_file
+
+    raise Exception(f"Все {MAX_INDEX_SLOTS} каталогов семантического индекса в {base} заняты")
+
+
+class LsaEmbedder:
+    """Хэшированный TF-IDF по нормальным формам слов + проекция LSA"""
+
+    name = "lsa"
+
+    def __init__(self, dim: int = LSA_DIM, hash_dim: int = HASH_DIM):
+        """
+        Args:
+            dim: Размерность векторов после проекции
+            hash_dim: Размерность хэшированного пространства слов
+        """
+        # dim - фактическая размерность: на маленьком vault ранг меньше max_dim
+        self.max_dim = dim
+        self.dim = dim
+        self.hash_dim = hash_dim
+        self.normalizer = get_normalizer()
+        self.idf = None
+        self.components = None
+        self.fit_chunks = 0
+
+    @property
+    def fitted(self) -> bool:
+        return self.components is not None
+
+    def _features(self, texts: List[str]) -> "np.ndarray":
+        """Сублинейные TF по хэшированным нормальным формам слов"""
+        matrix = np.zeros((len(texts), self.hash_dim), dtype=np.float32)
+        normalize = self.normalizer.normalize
+
+        for i, text in enumerate(texts):
+            counts: Dict[int, int] = {}
+            for word in self.normalizer.tokenize(text):
+                if len(word) < 3 or word in STOP_WORDS:
+                    continue
+                bucket = zlib.crc32(normalize(word).encode()) % self.hash_dim
+                counts[bucket] = counts.get(bucket, 0) + 1
+            if counts:
+                matrix[i, list(counts)] = list(counts.values())
+
+        np.log1p(matrix, out=matrix)
+        return matrix
+
+    def fit(self, texts: List[str], seed: int = 0) -> None:
+        """
+        Обучает IDF и проекцию LSA (рандомизированный SVD)
+
+        Args:
+            texts: Фрагменты для обучения (выборка vault)
+            seed: Зерно генератора случайных чисел
+        """
+        features = self._features(texts)
+        document_frequency = np.count_nonzero(features, axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        features *= self.idf
+        features /= np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-9)
+
+        rank = max(1, min(self.max_dim, len(texts) - 1, self.hash_dim))
+        rng = np.random.default_rng(seed)
+        basis = features @ rng.standard_normal((self.hash_dim, rank + 10), dtype=np.float32)
+        for _ in range(2):
+            basis, _ = np.linalg.qr(basis)
+            basis = features @ (features.T @ basis)
+        basis, _ = np.linalg.qr(basis)
+
+        _, _, vt = np.linalg.svd(basis.T @ features, full_matrices=False)
+        self.components = np.ascontiguousarray(vt[:rank].T, dtype=np.float32)
+        self.dim = rank
+        self.fit_chunks = len(texts)
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        """
+        Векторы фрагментов
+
+        Returns:
+            Матрица (len(texts), dim), строки нормированы
+        """
+        vectors = (self._features(texts) * self.idf) @ self.components
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        return vectors.astype(np.float32, copy=False)
+
+    def save(self, path: str) -> None:
+        """Сохраняет IDF и проекцию"""
+        np.savez(path, idf=self.idf, components=self.components, fit_chunks=self.fit_chunks)
+
+    def load(self, path: str) -> bool:
+        """Загружает IDF и проекцию (False, если файла нет или он не подходит)"""
+        try:
+            with np.load(path) as data:
+                idf, components = data["idf"], data["components"]
+                fit_chunks = int(data["fit_chunks"])
+        except (OSError, KeyError, ValueError):
+            return False
+
+        if components.shape[0] != self.hash_dim:
+            return False
+
+        self.idf, self.components, self.fit_chunks = idf, components, fit_chunks
+        self.dim = components.shape[1]
+        return True
+
+
+class ModelEmbedder:
+    """Локальная модель sentence-transformers на CPU"""
+
+    name = "model"
+    fitted = True
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, cache_dir: Optional[str] = None):
+        """
+        Args:
+            model_name: Имя или путь модели (должна быть уже скачана)
+            cache_dir: Каталог кэша моделей
+
+        Raises:
+            ImportError: sentence-transformers не установлен
+            OSError: Модели нет локально
+        """
+        from sentence_transformers import SentenceTransformer
+
+        self.model_name = model_name
+        self.model = SentenceTransformer(
+            model_name, device="cpu", cache_folder=cache_dir, local_files_only=True
+        )
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> "np.ndarray":
+        """Нормированные векторы фрагментов"""
+        return self.model.encode(
+            texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32, copy=False)
+
+
+class SemanticIndex:
+    """
+    Векторный индекс фрагментов заметок с гибридным поиском
+
+    Метаданные фрагментов - в SQLite (chunks.db), векторы - в
+    vectors.f32 (строка матрицы = фрагмент, освобождённые строки
+    переиспользуются). Каталог принадлежит одному процессу, см.
+    claim_directory.
+    """
+
+    def __init__(
+        self,
+        search_index: VaultSearchIndex,
+        directory: str,
+        backend: str = "auto",
+        model_name: str = DEFAULT_MODEL,
+        model_cache_dir: Optional[str] = None,
+        dim: int = LSA_DIM,
+        hybrid_weight: float = 0.5
+    ):
+        """
+        Инициализация индекса
+
+        Args:
+            search_index: Полнотекстовый индекс vault (источник версий
+                заметок и оценок BM25)
+            directory: Каталог файлов индекса (занятый другим процессом
+                заменяется подкаталогом, см. claim_directory)
+            backend: "auto" (модель, если доступна, иначе LSA), "model" или "lsa"
+            model_name: Модель sentence-transformers
+            model_cache_dir: Каталог кэша моделей
+            dim: Размерность векторов LSA
+            hybrid_weight: Вес векторной близости в итоговой оценке (0..1)
+
+        Raises:
+            ImportError: numpy не установлен (или модель для backend="model")
+            Exception: Все каталоги индекса заняты другими процессами
+        """
+        if np is None:
+            raise ImportError("Для семантического поиска нужен numpy")
+
+        self.search_index = search_index
+        self.hybrid_weight = hybrid_weight
+        self._lock = threading.RLock()
+        self._dirty = True
+        self._ready = threading.Event()
+
+        self.embedder = self._create_embedder(backend, model_name, model_cache_dir, dim)
+
+        self.directory, self._lock_file = claim_directory(directory)
+        directory = self.directory
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._lsa_path = os.path.join(directory, "lsa.npz")
+
+        self._conn = sqlite3.connect(os.path.join(directory, "chunks.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        with self._conn:
+            for statement in SCHEMA:
+                self._conn.execute(statement)
+
+        self._vectors = None
+        self._capacity = 0
+        self._fit_notes = 0
+        self._load()
+
+        # Изменения индекса vault только помечают индекс устаревшим -
+        # пересчёт при следующем поиске или sync()
+        search_index.add_listener(self._on_vault_change)
+
+    @staticmethod
+    def _create_embedder(backend: str, model_name: str, cache_dir: Optional[str], dim: int):
+        """Создаёт кодировщик по настройке backend"""
+        if backend not in ("auto", "model", "lsa"):
+            raise ValueError(f"Неизвестный backend семантического поиска: {backend}")
+
+        if backend in ("auto", "model"):
+            try:
+                embedder = ModelEmbedder(model_name, cache_dir)
+                logger.info(f"Семантический поиск: модель {model_name} (dim={embedder.dim})")
+                return embedder
+            except Exception as e:
+                if backend == "model":
+                    raise
+                logger.info(f"Модель {model_name} недоступна ({e}), семантический поиск: LSA")
+
+        return LsaEmbedder(dim)
+
+    # --- Хранилище ---
+
+    def _signature(self) -> str:
+        """Описание кодировщика: при смене индекс строится заново"""
+        if isinstance(self.embedder, ModelEmbedder):
+            return f"model:{self.embedder.model_name}"
+        return f"lsa:{self.embedder.hash_dim}"
+
+    def _load(self) -> None:
+        """Открывает сохранённый индекс; несовместимый сбрасывается"""
+        meta = dict(self._conn.execute("SELECT key, value FROM semantic_meta"))
+
+        if isinstance(self.embedder, LsaEmbedder):
+            self.embedder.load(self._lsa_path)
+
+        compatible = (
+            meta.get("signature") == self._signature()
+            and self.embedder.fitted
+            and int(meta.get("dim", 0)) == self.embedder.dim
+            and os.path.exists(self._vectors_path)
+        )
+        if not compatible:
+            self._reset()
+            return
+
+        self._fit_notes = int(meta.get("fit_notes", 0))
+        self._open_vectors(int(meta.get("capacity", 0)))
+        rows = self._conn.execute("SELECT row, path FROM chunks").fetchall()
+        self._rows_loaded(rows)
+
+    def _reset(self) -> None:
+        """Очищает индекс (векторы и фрагменты)"""
+        with self._conn:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM notes")
+            self._conn.execute("DELETE FROM semantic_meta")
+        self._vectors = None
+        self._capacity = 0
+        if os.path.exists(self._vectors_path):
+            os.remove(self._vectors_path)
+        self._rows_loaded([])
+
+    def _rows_loaded(self, rows: List[Tuple[int, str]]) -> None:
+        """Строит отображения строк матрицы по списку (строка, путь)"""
+        self._row_count = max((row for row, _ in rows), default=-1) + 1
+        self._alive = np.zeros(max(self._capacity, self._row_count), dtype=bool)
+        self._row_paths: List[Optional[str]] = [None] * self._row_count
+        self._path_rows: Dict[str, List[int]] = {}
+
+        for row, path in rows:
+            self._alive[row] = True
+            self._row_paths[row] = path
+            self._path_rows.setdefault(path, []).append(row)
+
+        self._free_rows = [row for row in range(self._row_count) if self._row_paths[row] is None]
+
+    def _open_vectors(self, capacity: int) -> None:
+        """Открывает (и при необходимости расширяет) файл векторов"""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+
+        dim = self.embedder.dim
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(capacity * dim * 4)
+
+        self._capacity = capacity
+        self._vectors = (
+            np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dim))
+            if capacity else None
+        )
+
+    def _allocate_rows(self, count: int) -> List[int]:
+        """Выделяет строки матрицы: сначала освобождённые, потом новые"""
+        rows = self._free_rows[:count]
+        del self._free_rows[:count]
+
+        new_rows = count - len(rows)
+        if new_rows:
+            rows += range(self._row_count, self._row_count + new_rows)
+            self._row_count += new_rows
+            self._row_paths.extend([None] * new_rows)
+
+            if self._row_count > self._capacity:
+                self._open_vectors(max(1024, self._capacity * 2, self._row_count))
+                alive = np.zeros(self._capacity, dtype=bool)
+                alive[:len(self._alive)] = self._alive
+                self._alive = alive
+
+        return rows
+
+    def _release_path(self, path: str) -> None:
+        """Освобождает строки фрагментов заметки"""
+        for row in self._path_rows.pop(path, ()):
+            self._alive[row] = False
+            self._row_paths[row] = None
+            self._free_rows.append(row)
+        self._conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+        self._conn.execute("DELETE FROM notes WHERE path = ?", (path,))
+
+    # --- Обновление ---
+
+    def _on_vault_change(self, updated: List[str], deleted: List[str]) -> None:
+        """Слушатель индекса vault"""
+        self._dirty = True
+
+    def _read_chunks(self, paths: List[str]) -> List[Tuple[str, str, List[str]]]:
+        """
+        Читает заметки и режет на фрагменты
+
+        Returns:
+            Список (путь, заголовок, тексты фрагментов для кодирования)
+        """
+        notes = []
+        for path in paths:
+            _, meta, content = read_and_parse(self.search_index.vault_path, path)
+            if meta is None:
+                continue
+            _, body = split_frontmatter(content)
+            # Заголовок входит в каждый фрагмент: он задаёт тему заметки
+            chunks = [f"{meta.title}\n{chunk}" for chunk in chunk_text(body)] or [meta.title]
+            notes.append((path, meta.title, chunks))
+        return notes
+
+    def sync(self, force: bool = False) -> Dict[str, int]:
+        """
+        Догоняет индекс vault: пересчитывает фрагменты изменённых заметок
+
+        Проекция LSA обучается заново, когда vault вырос вдвое с момента
+        обучения (пока выборка меньше LSA_FIT_SAMPLE), - тогда индекс
+        строится целиком.
+
+        Args:
+            force: Проверить версии заметок, даже если изменений не было
+
+        Returns:
+            Количество обновлённых и удалённых заметок
+        """
+        with self._lock:
+            if not (self._dirty or force):
+                return {"updated": 0, "deleted": 0}
+            self._dirty = False
+
+            start = time.perf_counter()
+            versions = self.search_index.note_versions()
+            indexed = {
+                path: (mtime, size)
+                for path, mtime, size in self._conn.execute("SELECT path, mtime, size FROM notes")
+            }
+
+            if self._needs_rebuild(len(versions)):
+                result = self._rebuild(versions)
+            else:
+                changed = [path for path, version in versions.items() if indexed.get(path) != version]
+                deleted = [path for path in indexed if path not in versions]
+                self._apply(changed, deleted, versions)
+                result = {"updated": len(changed), "deleted": len(deleted)}
+
+            if result["updated"] or result["deleted"]:
+                logger.info(
+                    f"Семантический индекс обновлён: {result['updated']} изменено, "
+                    f"{result['deleted']} удалено за {time.perf_counter() - start:.2f}s"
+                )
+
+            self._ready.set()
+            return result
+
+    def _needs_rebuild(self, notes: int) -> bool:
+        """Нужно ли обучить LSA заново и перестроить индекс"""
+        embedder = self.embedder
+        if not isinstance(embedder, LsaEmbedder):
+            return False
+        if not embedder.fitted:
+            return notes > 0
+        # Проекция, обученная на малой части vault, плохо описывает остальное
+        return embedder.fit_chunks < LSA_FIT_SAMPLE and notes > 2 * self._fit_notes
+
+    def _apply(self, changed: List[str], deleted: List[str], versions: Dict[str, Tuple[float, int]]) -> None:
+        """Пересчитывает фрагменты изменённых заметок и удаляет удалённые"""
+        with self._conn:
+            for path in deleted:
+                self._release_path(path)
+
+            for batch_start in range(0, len(changed), ENCODE_BATCH_SIZE):
+                batch = changed[batch_start:batch_start + ENCODE_BATCH_SIZE]
+                for path in batch:
+                    self._release_path(path)
+                self._write(self._read_chunks(batch), versions)
+
+        self._save_meta()
+
+    def _write(self, notes: List[Tuple[str, str, List[str]]], versions: Dict[str, Tuple[float, int]]) -> None:
+        """Кодирует и записывает фрагменты заметок (внутри транзакции)"""
+        texts = [chunk for _, _, chunks in notes for chunk in chunks]
+        if not texts:
+            return
+
+        vectors = np.concatenate([
+            self.embedder.encode(texts[i:i + ENCODE_BATCH_SIZE])
+            for i in range(0, len(texts), ENCODE_BATCH_SIZE)
+        ])
+        rows = self._allocate_rows(len(texts))
+        # Строки не обязательно подряд - запись по индексам
+        self._vectors[rows] = vectors
+
+        position = 0
+        for path, title, chunks in notes:
+            note_rows = rows[position:position + len(chunks)]
+            position += len(chunks)
+
+            self._path_rows[path] = note_rows
+            for row in note_rows:
+                self._alive[row] = True
+                self._row_paths[row] = path
+
+            self._conn.executemany(
+                "INSERT INTO chunks (row, path, text) VALUES (?, ?, ?)",
+                [(row, path, chunk) for row, chunk in zip(note_rows, chunks)]
+            )
+            mtime, size = versions[path]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO notes (path, title, mtime, size) VALUES (?, ?, ?, ?)",
+                (path, title, mtime, size)
+            )
+
+    def _rebuild(self, versions: Dict[str, Tuple[float, int]]) -> Dict[str, int]:
+        """Обучает LSA на выборке vault и строит индекс заново"""
+        notes = self._read_chunks(list(versions))
+        texts = [chunk for _, _, chunks in notes for chunk in chunks]
+
+        if isinstance(self.embedder, LsaEmbedder):
+            rng = np.random.default_rng(0)
+            sample = (
+                [texts[i] for i in rng.choice(len(texts), LSA_FIT_SAMPLE, replace=False)]
+                if len(texts) > LSA_FIT_SAMPLE else texts
+            )
+            start = time.perf_counter()
+            self.embedder.fit(sample)
+            self.embedder.save(self._lsa_path)
+            self._fit_notes = len(notes)
+            logger.info(
+                f"LSA обучена на {len(sample)} фрагментах (dim={self.embedder.dim}) "
+                f"за {time.perf_counter() - start:.2f}s"
+            )
+
+        self._reset()
+        with self._conn:
+            for batch_start in range(0, len(notes), ENCODE_BATCH_SIZE):
+                self._write(notes[batch_start:batch_start + ENCODE_BATCH_SIZE], versions)
+        self._save_meta()
+
+        return {"updated": len(notes), "deleted": 0}
+
+    def _save_meta(self) -> None:
+        """Сбрасывает векторы на диск и сохраняет параметры индекса"""
+        if self._vectors is not None:
+            self._vectors.flush()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO semantic_meta (key, value) VALUES (?, ?)",
+                [
+                    ("signature", self._signature()),
+                    ("dim", str(self.embedder.dim)),
+                    ("capacity", str(self._capacity)),
+                    ("fit_notes", str(self._fit_notes)),
+                ]
+            )
+
+    def start_background_build(self) -> threading.Thread:
+        """
+        Строит индекс в фоновом потоке (первое построение моделью может
+        идти минуты); до готовности search() возвращает None
+
+        Returns:
+            Поток построения
+        """
+        def build():
+            try:
+                self.sync(force=True)
+            except Exception as e:
+                logger.error(f"Ошибка построения семантического индекса: {e}", exc_info=True)
+
+        thread = threading.Thread(target=build, name="semantic-index", daemon=True)
+        thread.start()
+        return thread
+
+    # --- Поиск ---
+
+    def search(self, query: str, limit: int = 5, candidates: int = 50) -> Optional[List[Dict[str, Any]]]:
+        """
+        Гибридный поиск: BM25 + косинусная близость фрагментов
+
+        Кандидаты - лучшие по каждому из способов; итоговая оценка -
+        hybrid_weight * близость + (1 - hybrid_weight) * BM25 / max(BM25).
+
+        Args:
+            query: Поисковый запрос
+            limit: Максимальное количество результатов
+            candidates: Кандидатов от каждого способа
+
+        Returns:
+            Результаты в формате VaultSearchIndex.search (плюс semantic и
+            bm25) или None, если индекс ещё строится
+        """
+        if not self._ready.is_set():
+            return None
+
+        # Без наблюдателя изменения файлов видны только после проверки mtime
+        if not self.search_index.watched:
+            self.search_index.refresh()
+
+        with self._lock:
+            self.sync()
+            lexical = {result['relative_path']: result for result in self.search_index.search(query, limit=candidates)}
+
+            if self._row_count == 0:
+                return list(lexical.values())[:limit]
+
+            query_vector = self.embedder.encode([query])[0]
+            scores = np.asarray(self._vectors[:self._row_count] @ query_vector)
+            scores[~self._alive[:self._row_count]] = -np.inf
+
+            # Лучший фрагмент каждой заметки среди top фрагментов
+            top_count = min(len(scores), candidates * 4)
+            top_rows = np.argpartition(-scores, top_count - 1)[:top_count]
+            semantic: Dict[str, Tuple[float, int]] = {}
+            for row in top_rows[np.argsort(-scores[top_rows])]:
+                path = self._row_paths[row]
+                if path is not None and path not in semantic and np.isfinite(scores[row]):
+                    semantic[path] = (float(scores[row]), int(row))
+                    if len(semantic) >= candidates:
+                        break
+
+            # Близость для заметок, найденных только BM25
+            for path in lexical:
+                if path not in semantic and path in self._path_rows:
+                    rows = self._path_rows[path]
+                    best = int(np.argmax(scores[rows]))
+                    semantic[path] = (float(scores[rows[best]]), rows[best])
+
+            max_bm25 = max((result['score'] for result in lexical.values()), default=0) or 1.0
+            ranked = sorted(
+                (
+                    self.hybrid_weight * max(semantic.get(path, (0.0, -1))[0], 0.0)
+                    + (1 - self.hybrid_weight) * (lexical[path]['score'] / max_bm25 if path in lexical else 0.0),
+                    path
+                )
+                for path in set(semantic) | set(lexical)
+            )
+            ranked.reverse()
+
+            return [self._result(path, score, lexical.get(path), semantic.get(path)) for score, path in ranked[:limit]]
+
+    def _result(
+        self,
+        path: str,
+        score: float,
+        lexical: Optional[Dict[str, Any]],
+        semantic: Optional[Tuple[float, int]]
+    ) -> Dict[str, Any]:
+        """Результат поиска: фрагмент BM25 или лучший по смыслу фрагмент"""
+        if lexical:
+            title, excerpt = lexical['title'], lexical['excerpt']
+        else:
+            title = self._conn.execute("SELECT title FROM notes WHERE path = ?", (path,)).fetchone()[0]
+            text = self._conn.execute("SELECT text FROM chunks WHERE row = ?", (semantic[1],)).fetchone()[0]
+            # Без строки заголовка, добавленной для кодирования, и "# Заголовок"
+            text = text.split("\n", 1)[-1]
+            if text.startswith(f"# {title}"):
+                text = text[len(title) + 2:].lstrip()
+            excerpt = text[:200] + ("..." if len(text) > 200 else "")
+
+        return {
+            'title': title,
+            'file_path': os.path.join(self.search_index.vault_path, path),
+            'relative_path': path,
+            'excerpt': excerpt,
+            'score': round(score, 4),
+            'semantic': round(semantic[0], 4) if semantic else 0.0,
+            'bm25': lexical['score'] if lexical else 0.0
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер индекса: заметки, фрагменты, размерность, файл векторов"""
+        with self._lock:
+            notes = self._conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+            return {
+                "backend": self.embedder.name,
+                "notes": notes,
+                "chunks": self._row_count - len(self._free_rows),
+                "dim": self.embedder.dim,
+                "vectors_mb": round(self._capacity * self.embedder.dim * 4 / (1024 * 1024), 2)
+            }
+
+    def close(self) -> None:
+        """Сбрасывает векторы, закрывает соединение и освобождает каталог"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._conn.close()
+            self._lock_file.close()
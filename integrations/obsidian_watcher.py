@@ -0,0 +1,389 @@
+"""
+Наблюдатель за файлами Obsidian vault
+
+Держит индекс vault (integrations/obsidian_index.py) актуальным без
+обхода файлов перед каждым поиском: изменения приходят событиями
+inotify (Linux, через ctypes - без внешних зависимостей), а там, где
+inotify недоступен (другая ОС, исчерпан лимит max_user_watches), -
+периодической проверкой mtime.
+
+События копятся и применяются пачкой, когда поток событий затихает на
+debounce_ms (но не реже, чем раз в max_delay_ms), - git pull на сотни
+файлов даёт одно обновление индекса, а не сотни.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from integrations.obsidian_index import VaultSearchIndex
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Маски событий inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+    | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+# Как часто поток проверяет флаг остановки, секунды
+_STOP_CHECK_INTERVAL = 0.5
+
+
+class InotifyUnavailable(Exception):
+    """inotify не поддерживается или не может следить за всем vault"""
+
+
+class _Inotify:
+    """Рекурсивное наблюдение за каталогами через inotify (ctypes)"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Абсолютный путь к корню наблюдения
+
+        Raises:
+            InotifyUnavailable: Не Linux или inotify_init1 завершился ошибкой
+        """
+        if not sys.platform.startswith('linux'):
+            raise InotifyUnavailable(f"inotify не поддерживается на {sys.platform}")
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            self._add_watch = libc.inotify_add_watch
+            self._rm_watch = libc.inotify_rm_watch
+            init = libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise InotifyUnavailable(f"libc без inotify: {e}")
+
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise InotifyUnavailable(f"inotify_init1: {os.strerror(ctypes.get_errno())}")
+
+        self.root = root
+        # Дескриптор наблюдения -> каталог относительно root ("" - корень)
+        self._watches: Dict[int, str] = {}
+
+    def close(self) -> None:
+        """Закрывает дескриптор inotify (все наблюдения снимаются)"""
+        os.close(self.fd)
+
+    def add_tree(self, relative_dir: str) -> None:
+        """
+        Ставит наблюдение на каталог и все вложенные (кроме скрытых)
+
+        Args:
+            relative_dir: Каталог относительно root
+
+        Raises:
+            InotifyUnavailable: Исчерпан лимит наблюдений
+        """
+        stack = [relative_dir]
+
+        while stack:
+            relative_dir = stack.pop()
+            path = os.path.join(self.root, relative_dir)
+
+            wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise InotifyUnavailable(
+                        "исчерпан лимит inotify (fs.inotify.max_user_watches)"
+                    )
+                # Каталог успели удалить или это уже не каталог
+                continue
+            self._watches[wd] = relative_dir
+
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if not entry.name.startswith('.') and entry.is_dir(follow_symlinks=False):
+                            stack.append(os.path.join(relative_dir, entry.name) if relative_dir else entry.name)
+            except OSError:
+                continue
+
+    def remove_tree(self, relative_dir: str) -> None:
+        """
+        Снимает наблюдение с каталога и вложенных (каталог перемещён)
+
+        Args:
+            relative_dir: Каталог относительно root
+        """
+        prefix = relative_dir + os.sep
+        for wd, path in list(self._watches.items()):
+            if path == relative_dir or path.startswith(prefix):
+                self._rm_watch(self.fd, wd)
+                del self._watches[wd]
+
+    def read(self, timeout: float):
+        """
+        Ждёт события не дольше timeout секунд
+
+        Yields:
+            (маска, путь относительно root)
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_length].rstrip(b'\0'))
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                yield mask, ''
+                continue
+
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+
+            if mask & IN_IGNORED:
+                # Наблюдение снято ядром (каталог удалён)
+                del self._watches[wd]
+                continue
+
+            yield mask, os.path.join(directory, name) if name else directory
+
+
+class VaultWatcher:
+    """
+    Фоновый поток, применяющий изменения файлов vault к индексу
+
+    Пока наблюдатель работает, index.watched = True и поиск не
+    проверяет mtime файлов сам.
+    """
+
+    def __init__(
+        self,
+        index: VaultSearchIndex,
+        backend: str = "auto",
+        debounce_ms: int = 500,
+        max_delay_ms: int = 5000,
+        poll_interval: float = 30.0
+    ):
+        """
+        Инициализация наблюдателя
+
+        Args:
+            index: Индекс vault
+            backend: "auto" (inotify, при недоступности - опрос),
+                "inotify" или "polling"
+            debounce_ms: Применять изменения после такой паузы в событиях
+            max_delay_ms: Применять изменения не позже, чем через столько
+                после первого события пачки
+            poll_interval: Интервал проверки mtime в режиме опроса, секунды
+        """
+        if backend not in ("auto", "inotify", "polling"):
+            raise ValueError(f"Неизвестный backend наблюдателя: {backend}")
+
+        self.index = index
+        self.backend = backend
+        self.debounce = debounce_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self.poll_interval = poll_interval
+
+        self.mode: Optional[str] = None
+        self.batches = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+
+    @property
+    def running(self) -> bool:
+        """Работает ли поток наблюдателя"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Запускает наблюдение в фоновом потоке
+
+        Не ждёт обхода vault: наблюдение за каталогами и начальная
+        синхронизация выполняются в потоке. Наблюдение ставится до
+        синхронизации, поэтому изменения, сделанные во время неё, не
+        теряются; index.watched выставляется только после неё - до этого
+        поиск проверяет mtime сам.
+        """
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vault-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает наблюдение; поиск снова проверяет mtime сам"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=_STOP_CHECK_INTERVAL * 4)
+            self._thread = None
+        self.index.watched = False
+
+    def _run(self) -> None:
+        """Поток наблюдателя: настройка, начальная синхронизация, цикл событий"""
+        self.mode = "polling"
+        if self.backend != "polling":
+            try:
+                self._inotify = _Inotify(self.index.vault_path)
+                self._inotify.add_tree("")
+                self.mode = "inotify"
+            except InotifyUnavailable as e:
+                if self._inotify:
+                    self._inotify.close()
+                    self._inotify = None
+                if self.backend == "inotify":
+                    logger.error(f"inotify недоступен ({e}), наблюдение за vault не запущено")
+                    return
+                logger.warning(f"inotify недоступен ({e}), изменения vault проверяются опросом")
+
+        try:
+            # Догнать изменения, сделанные пока процесс не работал
+            try:
+                self.index.refresh(force=True)
+            except Exception as e:
+                logger.error(f"Ошибка начальной синхронизации индекса vault: {e}", exc_info=True)
+            else:
+                if not self._stop.is_set():
+                    self.index.watched = True
+
+            if self._stop.is_set():
+                return
+
+            logger.info(f"Наблюдение за vault запущено ({self.mode})")
+            if self.mode == "inotify":
+                self._run_inotify()
+            else:
+                self._run_polling()
+        finally:
+            # Дескриптор inotify принадлежит потоку: stop() мог не дождаться
+            # начальной синхронизации
+            if self._inotify:
+                self._inotify.close()
+                self._inotify = None
+
+    def _run_polling(self) -> None:
+        """Цикл опроса: синхронизация индекса по mtime раз в poll_interval"""
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.index.refresh(force=True)
+            except Exception as e:
+                logger.error(f"Ошибка синхронизации индекса vault: {e}", exc_info=True)
+
+    def _run_inotify(self) -> None:
+        """Цикл событий inotify с накоплением изменений"""
+        files: Set[str] = set()
+        directories: Set[str] = set()
+        overflow = False
+        first_event = last_event = 0.0
+
+        while not self._stop.is_set():
+            if files or directories or overflow:
+                now = time.monotonic()
+                timeout = max(0.0, min(last_event + self.debounce, first_event + self.max_delay) - now)
+            else:
+                timeout = _STOP_CHECK_INTERVAL
+
+            try:
+                for mask, path in self._inotify.read(timeout):
+                    if not (files or directories or overflow):
+                        first_event = time.monotonic()
+                    last_event = time.monotonic()
+
+                    if mask & IN_Q_OVERFLOW:
+                        logger.warning("Очередь inotify переполнена, полная синхронизация vault")
+                        overflow = True
+                    elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        if path == "":
+                            logger.warning("Каталог vault удалён или перемещён")
+                    else:
+                        self._collect(mask, path, files, directories)
+            except OSError as e:
+                logger.error(f"Ошибка чтения событий inotify: {e}", exc_info=True)
+                self._stop.wait(_STOP_CHECK_INTERVAL)
+                continue
+
+            if not (files or directories or overflow):
+                continue
+
+            now = time.monotonic()
+            if now - last_event < self.debounce and now - first_event < self.max_delay:
+                continue
+
+            self._apply(files, directories, overflow)
+            files, directories, overflow = set(), set(), False
+
+    def _collect(self, mask: int, path: str, files: Set[str], directories: Set[str]) -> None:
+        """Относит событие к изменённым файлам или каталогам"""
+        # Служебные каталоги (.git, .obsidian) не индексируются
+        if any(part.startswith('.') for part in path.split(os.sep)):
+            return
+
+        if mask & IN_ISDIR:
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                # Файлы могли появиться в каталоге раньше наблюдения за ним -
+                # apply_changes просканирует каталог целиком
+                try:
+                    self._inotify.add_tree(path)
+                except InotifyUnavailable as e:
+                    logger.warning(f"Не удалось наблюдать за {path}: {e}")
+            elif mask & IN_MOVED_FROM:
+                self._inotify.remove_tree(path)
+            directories.add(path)
+        elif path.endswith('.md'):
+            files.add(path)
+
+    def _apply(self, files: Set[str], directories: Set[str], overflow: bool) -> None:
+        """Применяет накопленные изменения к индексу"""
+        self.batches += 1
+        try:
+            if overflow:
+                self.index.refresh(force=True)
+                return
+
+            start = time.perf_counter()
+            result = self.index.apply_changes(files, directories)
+            if result["updated"] or result["deleted"]:
+                logger.info(
+                    f"Изменения vault применены: {result['updated']} обновлено, "
+                    f"{result['deleted']} удалено за {time.perf_counter() - start:.2f}s"
+                )
+        except Exception as e:
+            logger.error(f"Ошибка обновления индекса vault: {e}", exc_info=True)
@@ -0,0 +1,459 @@
+"""
+Асинхронный сервис распознавания речи
+
+Вызов Whisper (integrations/whisper.py) блокирующий: локальный
+faster-whisper декодирует секундами, OpenAI API ждёт сеть. Сервис
+выполняет его в отдельном пуле потоков или процессов, не занимая
+event loop, и ограничивает нагрузку:
+- одновременно декодирует не больше concurrency запросов на модель;
+- в очереди к модели ждёт не больше max_queue запросов, остальные
+  сразу получают TranscriptionBusy (API отвечает 429, бот - "занят").
+
+recognize_confirmation() - быстрый путь для ответов "да" / "нет":
+маленькая модель со словарём подтверждений (integrations/confirmation_asr.py)
+в своей очереди; неуверенный результат распознаётся полностью.
+
+С executor "worker" декодирует общий для бота и API процесс
+integrations/asr_worker.py с уже загруженной моделью; сервис только
+отправляет ему запись и ограничивает очередь. Модель подтверждений
+тогда тоже живёт в worker, а не в каждом процессе.
+
+Для каждого запроса измеряются ожидание в очереди и время
+декодирования; stats() возвращает счётчики и перцентили.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from integrations.confirmation_asr import (
+    ConfirmationRecognizer,
+    ConfirmationResult,
+    get_confirmation_recognizer
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Сколько последних измерений хранить для перцентилей
+METRICS_WINDOW = 500
+
+# Одновременных распознаваний по умолчанию: локальная модель сама
+# использует все ядра, OpenAI API ограничен только сетью; ASR worker
+# декодирует пачками - чем больше запросов он видит сразу, тем лучше
+DEFAULT_CONCURRENCY = {'local': 1, 'openai': 4, 'worker': 8}
+
+
+class TranscriptionBusy(Exception):
+    """Очередь распознавания переполнена, запрос не принят"""
+
+    def __init__(self, model: str, retry_after: int):
+        super().__init__(f"Очередь распознавания ({model}) переполнена")
+        self.model = model
+        self.retry_after = retry_after
+
+
+def _transcribe_timed(
+    audio_file_path: str,
+    language: str,
+    transcribe_func: Optional[Callable[..., str]] = None
+) -> Tuple[str, float]:
+    """
+    Распознаёт речь и измеряет время (выполняется в пуле)
+
+    Returns:
+        (текст, время декодирования в секундах)
+    """
+    if transcribe_func is None:
+        from integrations.whisper import transcribe_audio as transcribe_func
+
+    start = time.perf_counter()
+    text = transcribe_func(audio_file_path, language=language)
+    return text, time.perf_counter() - start
+
+
+def _recognize_confirmation_timed(
+    recognizer: ConfirmationRecognizer,
+    audio_file_path: str
+) -> Tuple[ConfirmationResult, float]:
+    """Распознаёт ответ на подтверждение и измеряет время (выполняется в пуле)"""
+    start = time.perf_counter()
+    result = recognizer.recognize(audio_file_path)
+    return result, time.perf_counter() - start
+
+
+class _ModelQueue:
+    """Очередь к одной модели: семафор, счётчики и измерения"""
+
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_wait: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self.decode: Deque[float] = deque(maxlen=METRICS_WINDOW)
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/max выборки в миллисекундах"""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    ordered = sorted(samples)
+    return {
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 1),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+        'max_ms': round(ordered[-1] * 1000, 1)
+    }
+
+
+class TranscriptionService:
+    """Распознавание речи в пуле с ограничением очереди"""
+
+    def __init__(self, config: Dict[str, Any], transcribe_func: Optional[Callable[..., str]] = None):
+        """
+        Инициализация сервиса
+
+        Args:
+            config: Полная конфигурация (секция whisper, подсекция service)
+            transcribe_func: Функция распознавания (audio_file_path, language=...)
+                -> текст; по умолчанию whisper.transcribe_audio. Для
+                executor "process" - функция уровня модуля
+        """
+        whisper_config = config.get('whisper', {})
+        service_config = whisper_config.get('service', {})
+
+        self.provider = whisper_config.get('provider', 'openai')
+        self.executor_type = service_config.get('executor', 'thread')
+
+        if self.executor_type not in ('thread', 'process', 'worker'):
+            raise ValueError(f"Неизвестный executor распознавания: {self.executor_type}")
+        if self.executor_type == 'worker' and self.provider != 'local':
+            # Worker держит локальную модель; OpenAI API ему не нужен
+            self.executor_type = 'thread'
+
+        self.model = (
+            f"local:{whisper_config.get('model_size', 'base')}"
+            if self.provider == 'local' else "openai:whisper-1"
+        )
+
+        concurrency = {**DEFAULT_CONCURRENCY, **(service_config.get('concurrency') or {})}
+        concurrency_key = 'worker' if self.executor_type == 'worker' else self.provider
+        self.concurrency = int(concurrency.get(concurrency_key, 1))
+        self.max_queue = int(service_config.get('max_queue', 8))
+
+        self.transcribe_func = transcribe_func
+        self._executor: Optional[Executor] = None
+        self._worker_client = None
+        self._queues: Dict[str, _ModelQueue] = {}
+
+        # Быстрое распознавание ответов на подтверждение: своя модель
+        # (None - выключено) или модель ASR worker
+        self._confirmation: Optional[ConfirmationRecognizer] = None
+        self._confirmation_executor: Optional[Executor] = None
+        confirmation_config = whisper_config.get('confirmation', {})
+        self._worker_confirmation = False
+        self._worker_confirmation_model = f"confirm:{confirmation_config.get('model_size', 'tiny')}"
+
+        if self.executor_type == 'worker':
+            from integrations.asr_worker import ASRWorkerClient
+
+            worker_config = whisper_config.get('worker', {})
+            self._worker_client = ASRWorkerClient(
+                worker_config.get('socket', 'data/asr.sock'),
+                connect_timeout=worker_config.get('connect_timeout', 60),
+                request_timeout=worker_config.get('request_timeout', 120)
+            )
+            self._worker_confirmation = confirmation_config.get('enabled', True)
+        else:
+            self._confirmation = get_confirmation_recognizer(config)
+
+    def _get_executor(self) -> Executor:
+        """Пул создаётся при первом запросе (процессам нужно время на загрузку модели)"""
+        if self._executor is None:
+            if self.executor_type == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.concurrency,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.concurrency,
+                    thread_name_prefix="transcription"
+                )
+            logger.info(
+                f"Пул распознавания: {self.executor_type}, {self.concurrency} одновременно, "
+                f"очередь до {self.max_queue} ({self.model})"
+            )
+        return self._executor
+
+    def _get_queue(self, model: str, concurrency: Optional[int] = None) -> _ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            queue = self._queues[model] = _ModelQueue(concurrency or self.concurrency)
+        return queue
+
+    async def transcribe(self, audio_file_path: str, language: str = "ru") -> str:
+        """
+        Распознаёт речь в пуле, не блокируя event loop
+
+        Args:
+            audio_file_path: Путь к аудио-файлу
+            language: Язык аудио
+
+        Returns:
+            Распознанный текст
+
+        Raises:
+            TranscriptionBusy: Очередь к модели заполнена
+            Exception: Ошибка распознавания (как у transcribe_audio)
+        """
+        queue = self._get_queue(self.model)
+        wait = await self._acquire(self.model, queue)
+
+        if self._worker_client is not None:
+            try:
+                text, decode = await self._worker_client.transcribe(audio_file_path, language)
+            except Exception:
+                queue.failed += 1
+                raise
+            finally:
+                self._release(queue)
+        else:
+            text, decode = await self._run_in_executor(
+                self._get_executor(), queue,
+                _transcribe_timed, audio_file_path, language, self.transcribe_func
+            )
+
+        self._record(self.model, queue, wait, decode)
+        return text
+
+    async def recognize_confirmation(self, audio_file_path: str) -> Optional[ConfirmationResult]:
+        """
+        Быстро распознаёт ответ "да" / "нет" / "отмена" (маленькая модель, словарь)
+
+        Args:
+            audio_file_path: Путь к аудио-файлу
+
+        Returns:
+            ConfirmationResult или None, если быстрое распознавание недоступно
+            (тогда, как и при confident=False, нужен transcribe)
+
+        Raises:
+            TranscriptionBusy: Очередь к модели подтверждений заполнена
+        """
+        if self._worker_client is not None:
+            return await self._recognize_confirmation_in_worker(audio_file_path)
+
+        recognizer = self._confirmation
+        if recognizer is None:
+            return None
+
+        queue = self._get_queue(recognizer.name, concurrency=1)
+        wait = await self._acquire(recognizer.name, queue)
+
+        try:
+            result, decode = await self._run_in_executor(
+                self._get_confirmation_executor(), queue, _recognize_confirmation_timed, recognizer, audio_file_path
+            )
+        except Exception as e:
+            # Быстрый путь - оптимизация: при ошибке распознаём полностью
+            logger.warning(f"Быстрое распознавание подтверждения не удалось: {e}")
+            if recognizer.model is None:
+                # Модель не загрузилась - не пытаться на каждом запросе
+                logger.warning("Быстрое распознавание подтверждений отключено")
+                self._confirmation = None
+            return None
+
+        self._record(recognizer.name, queue, wait, decode)
+        self._log_confirmation(result)
+        return result
+
+    async def _recognize_confirmation_in_worker(self, audio_file_path: str) -> Optional[ConfirmationResult]:
+        """Быстрое распознавание подтверждения моделью ASR worker"""
+        if not self._worker_confirmation:
+            return None
+
+        model = self._worker_confirmation_model
+        queue = self._get_queue(model, concurrency=1)
+        wait = await self._acquire(model, queue)
+
+        try:
+            response = await self._worker_client.confirm(audio_file_path)
+        except Exception as e:
+            queue.failed += 1
+            logger.warning(f"Быстрое распознавание подтверждения в ASR worker не удалось: {e}")
+            return None
+        finally:
+            self._release(queue)
+
+        if response is None:
+            logger.warning("В ASR worker нет модели подтверждений, быстрое распознавание отключено")
+            self._worker_confirmation = False
+            return None
+
+        result, decode = response
+        self._record(model, queue, wait, decode)
+        self._log_confirmation(result)
+        return result
+
+    @staticmethod
+    def _log_confirmation(result: ConfirmationResult) -> None:
+        logger.info(
+            f"Подтверждение: '{result.text}' -> {result.intent} "
+            f"(уверенность {result.confidence:.2f}, нет речи {result.no_speech_prob:.2f})"
+        )
+
+    @property
+    def confirmation_available(self) -> bool:
+        """Включено ли быстрое распознавание подтверждений"""
+        return self._confirmation is not None or self._worker_confirmation
+
+    def preload_confirmation(self) -> None:
+        """
+        Загружает модель подтверждений в фоне: первый ответ не ждёт загрузки
+
+        С executor "worker" ничего не делает - модель загружает worker
+        при запуске.
+        """
+        if self._confirmation is None:
+            return
+
+        def log_error(future):
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning(f"Не удалось загрузить модель подтверждений: {future.exception()}")
+
+        self._get_confirmation_executor().submit(self._confirmation.load).add_done_callback(log_error)
+
+    def _get_confirmation_executor(self) -> Executor:
+        if self._confirmation_executor is None:
+            self._confirmation_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="confirmation"
+            )
+        return self._confirmation_executor
+
+    async def _acquire(self, model: str, queue: _ModelQueue) -> float:
+        """
+        Занимает слот модели или отклоняет запрос
+
+        Returns:
+            Ожидание в очереди, секунды
+
+        Raises:
+            TranscriptionBusy: Очередь заполнена
+        """
+        if queue.running >= queue.concurrency and queue.waiting >= self.max_queue:
+            queue.rejected += 1
+            # Примерно столько освобождается место в очереди
+            decode = _percentiles(queue.decode)['p50_ms'] or 5000
+            retry_after = max(1, round(decode / 1000 * (queue.waiting + 1) / queue.concurrency))
+            logger.warning(
+                f"Распознавание отклонено: очередь {model} заполнена "
+                f"({queue.running} выполняется, {queue.waiting} ждёт)"
+            )
+            raise TranscriptionBusy(model, retry_after)
+
+        queued_at = time.perf_counter()
+        queue.waiting += 1
+        try:
+            await queue.semaphore.acquire()
+        finally:
+            queue.waiting -= 1
+
+        queue.running += 1
+        return time.perf_counter() - queued_at
+
+    async def _run_in_executor(self, executor: Executor, queue: _ModelQueue, func: Callable, *args) -> Any:
+        """Выполняет func в пуле; слот модели освобождается по завершении"""
+        loop = asyncio.get_running_loop()
+
+        try:
+            future = executor.submit(func, *args)
+        except Exception:
+            self._release(queue)
+            raise
+
+        # Слот освобождается, когда декодирование действительно закончилось:
+        # отменённый запрос (клиент отключился) не даёт превысить concurrency
+        future.add_done_callback(lambda _: self._release_threadsafe(loop, queue))
+
+        try:
+            return await asyncio.wrap_future(future)
+        except Exception:
+            queue.failed += 1
+            raise
+
+    @staticmethod
+    def _record(model: str, queue: _ModelQueue, wait: float, decode: float) -> None:
+        """Учитывает успешное распознавание в метриках"""
+        queue.completed += 1
+        queue.queue_wait.append(wait)
+        queue.decode.append(decode)
+        logger.info(
+            f"Распознавание ({model}): ожидание {wait * 1000:.0f} мс, "
+            f"декодирование {decode * 1000:.0f} мс"
+        )
+
+    @staticmethod
+    def _release(queue: _ModelQueue) -> None:
+        queue.running -= 1
+        queue.semaphore.release()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop, queue: _ModelQueue) -> None:
+        """Освобождает слот модели из потока пула"""
+        try:
+            loop.call_soon_threadsafe(self._release, queue)
+        except RuntimeError:
+            # Event loop уже закрыт (остановка приложения)
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Метрики распознавания по моделям
+
+        Returns:
+            {модель: счётчики, queue_wait и decode (p50/p95/max, мс)}
+        """
+        return {
+            model: {
+                'concurrency': queue.concurrency,
+                'max_queue': self.max_queue,
+                'running': queue.running,
+                'waiting': queue.waiting,
+                'completed': queue.completed,
+                'failed': queue.failed,
+                'rejected': queue.rejected,
+                'queue_wait': _percentiles(queue.queue_wait),
+                'decode': _percentiles(queue.decode)
+            }
+            for model, queue in self._queues.items()
+        }
+
+    async def worker_stats(self) -> Optional[Dict[str, Any]]:
+        """Счётчики ASR worker (размер пачек и т.п.); None без worker"""
+        if self._worker_client is None:
+            return None
+        try:
+            return await self._worker_client.ping()
+        except Exception as e:
+            return {'error': str(e)}
+
+    def shutdown(self) -> None:
+        """Останавливает пулы (текущие распознавания не ждём)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._confirmation_executor is not None:
+            self._confirmation_executor.shutdown(wait=False, cancel_futures=True)
+            self._confirmation_executor = None
+
+    async def close(self) -> None:
+        """Останавливает пул и закрывает соединение с ASR worker"""
+        self.shutdown()
+        if self._worker_client is not None:
+            await self._worker_client.close()
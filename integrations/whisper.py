@@ -6,6 +6,7 @@
 """
 
 import os
+import threading
 from typing import Optional
 from openai import OpenAI
 from utils.config import load_config
@@ -20,30 +21,50 @@ whisper_provider = config.get('whisper', {}).get('provider', 'openai')
 # Инициализация OpenAI client (новый API)
 client = OpenAI(api_key=config.get('openai', {}).get('api_key', ''))
 
-# Инициализация faster-whisper (если выбран)
+# Модель faster-whisper загружается при первом локальном распознавании,
+# а не при импорте: процессы, которые распознают через ASR worker
+# (integrations/asr_worker.py) или OpenAI, не держат её в памяти
 _faster_whisper_model = None
+_faster_whisper_lock = threading.Lock()
 
-if whisper_provider == 'local':
-    try:
-        from faster_whisper import WhisperModel
 
-        model_size = config.get('whisper', {}).get('model_size', 'base')
-        device = config.get('whisper', {}).get('device', 'cpu')
-        compute_type = config.get('whisper', {}).get('compute_type', 'int8')
+def load_faster_whisper_model(model_size: str = None, device: str = None, compute_type: str = None):
+    """
+    Загружает модель faster-whisper (параметры по умолчанию - из конфигурации)
 
-        logger.info(f"Инициализация faster-whisper (модель: {model_size}, устройство: {device})")
-        _faster_whisper_model = WhisperModel(
-            model_size,
-            device=device,
-            compute_type=compute_type
-        )
-        logger.info("faster-whisper инициализирован успешно")
-    except ImportError:
-        logger.warning("faster-whisper не установлен, используем OpenAI API")
-        whisper_provider = 'openai'
-    except Exception as e:
-        logger.error(f"Ошибка при инициализации faster-whisper: {e}")
-        whisper_provider = 'openai'
+    Args:
+        model_size: Размер модели (tiny, base, small, medium, large)
+        device: cpu или cuda
+        compute_type: int8, float16, float32
+
+    Returns:
+        WhisperModel
+
+    Raises:
+        ImportError: faster-whisper не установлен
+    """
+    from faster_whisper import WhisperModel
+
+    whisper_config = config.get('whisper', {})
+    model_size = model_size or whisper_config.get('model_size', 'base')
+    device = device or whisper_config.get('device', 'cpu')
+    compute_type = compute_type or whisper_config.get('compute_type', 'int8')
+
+    logger.info(f"Инициализация faster-whisper (модель: {model_size}, устройство: {device})")
+    model = WhisperModel(model_size, device=device, compute_type=compute_type)
+    logger.info("faster-whisper инициализирован успешно")
+    return model
+
+
+def _get_faster_whisper_model():
+    """Модель faster-whisper процесса (загружается один раз)"""
+    global _faster_whisper_model
+
+    if _faster_whisper_model is None:
+        with _faster_whisper_lock:
+            if _faster_whisper_model is None:
+                _faster_whisper_model = load_faster_whisper_model()
+    return _faster_whisper_model
 
 
 def _transcribe_with_faster_whisper(audio_file_path: str, language: str = "ru") -> str:
@@ -57,12 +78,11 @@ def _transcribe_with_faster_whisper(audio_file_path: str, language: str = "ru")
     Returns:
         Распознанный текст
     """
-    if _faster_whisper_model is None:
-        raise Exception("faster-whisper не инициализирован")
+    model = _get_faster_whisper_model()
 
     logger.info(f"Распознавание через faster-whisper: {audio_file_path}")
 
-    segments, info = _faster_whisper_model.transcribe(
+    segments, info = model.transcribe(
         audio_file_path,
         language=language,
         beam_size=5,
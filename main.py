@@ -30,6 +30,27 @@ def run_telegram_bot():
         sys.exit(1)
 
 
+def run_asr_worker():
+    """Запускает ASR worker (модель faster-whisper) в отдельном процессе"""
+    try:
+        from integrations.asr_worker import main as asr_worker_main
+
+        asr_worker_main()
+
+    except Exception as e:
+        logger.error(f"Критическая ошибка в ASR worker: {e}", exc_info=True)
+        sys.exit(1)
+
+
+def uses_asr_worker(config: dict) -> bool:
+    """Нужен ли отдельный ASR worker (локальный Whisper, executor worker)"""
+    whisper_config = config.get('whisper', {})
+    return (
+        whisper_config.get('provider') == 'local'
+        and whisper_config.get('service', {}).get('executor') == 'worker'
+    )
+
+
 def run_api_server():
     """Запускает REST API сервер в отдельном процессе"""
     try:
@@ -89,8 +110,20 @@ def main():
         name="APIServer"
     )
 
+    # Модель загружается один раз и используется ботом и API
+    asr_process = None
+    if uses_asr_worker(config):
+        asr_process = multiprocessing.Process(
+            target=run_asr_worker,
+            name="ASRWorker"
+        )
+
     try:
         # Запустить процессы
+        if asr_process:
+            logger.info("Запуск ASR worker...")
+            asr_process.start()
+
         logger.info("Запуск Telegram бота...")
         telegram_process.start()
 
@@ -101,6 +134,8 @@ def main():
         logger.info("✅ Все сервисы запущены")
         logger.info(f"📱 Telegram бот: работает (PID: {telegram_process.pid})")
         logger.info(f"🌐 REST API: http://{config['api']['host']}:{config['api']['port']}")
+        if asr_process:
+            logger.info(f"🎙️ ASR worker: работает (PID: {asr_process.pid})")
         logger.info("=" * 60)
         logger.info("Нажмите Ctrl+C для остановки")
         logger.info("=" * 60)
@@ -109,6 +144,10 @@ def main():
         telegram_process.join()
         api_process.join()
 
+        if asr_process and asr_process.is_alive():
+            asr_process.terminate()
+            asr_process.join(timeout=10)
+
     except KeyboardInterrupt:
         logger.info("\n" + "=" * 60)
         logger.info("⏸️  Получен сигнал остановки...")
@@ -125,6 +164,11 @@ def main():
             api_process.terminate()
             api_process.join(timeout=10)
 
+        if asr_process and asr_process.is_alive():
+            logger.info("Остановка ASR worker...")
+            asr_process.terminate()
+            asr_process.join(timeout=10)
+
         logger.info("=" * 60)
         logger.info("✅ Все сервисы остановлены")
         logger.info("=" * 60)
@@ -137,6 +181,8 @@ def main():
             telegram_process.kill()
         if api_process.is_alive():
             api_process.kill()
+        if asr_process and asr_process.is_alive():
+            asr_process.kill()
 
         sys.exit(1)
 
@@ -0,0 +1,145 @@
+"""
+Бенчмарк ASR worker: пакетное декодирование через Unix сокет
+
+Поднимает ASRWorker на временном сокете и отправляет пачку голосовых
+сообщений через TranscriptionService (executor "worker"), как делают
+бот и API. Сравнивает max_batch 1 (по одному запросу, как пул
+потоков) и пачки по --max-batch: общее время, задержка запроса
+p50/p95, средний размер пачки.
+
+Без --model декодирование моделируется: пачка из n записей занимает
+--decode-ms + --per-item-ms * n (encoder и decoder обрабатывают пачку
+одним проходом). С --model (нужен faster-whisper) worker загружает и
+прогревает настоящую модель, а запросы отправляют файлы --audio.
+
+Пример:
+    python scripts/bench_asr_worker.py --requests 16 --decode-ms 300 --per-item-ms 40
+    python scripts/bench_asr_worker.py --model tiny --audio voice.ogg --requests 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.asr_worker import ASRWorker  # noqa: E402
+from integrations.transcription import TranscriptionService  # noqa: E402
+
+
+class SyntheticWorker(ASRWorker):
+    """Worker с моделированной стоимостью декодирования пачки"""
+
+    def __init__(self, *args, decode_ms: int, per_item_ms: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.decode_ms = decode_ms
+        self.per_item_ms = per_item_ms
+
+    def decode_batch(self, items):
+        time.sleep((self.decode_ms + self.per_item_ms * len(items)) / 1000)
+        return [{'text': f"текст {len(data)} байт"} for _, data in items]
+
+
+def start_worker(worker: ASRWorker) -> None:
+    """Запускает worker в фоновом потоке со своим event loop"""
+    thread = threading.Thread(target=lambda: asyncio.run(worker.serve()), daemon=True)
+    thread.start()
+
+
+async def run_requests(socket_path: str, audio_files: list, requests: int) -> dict:
+    """Пачка одновременных запросов через TranscriptionService"""
+    config = {"whisper": {"provider": "local", "service": {
+        "executor": "worker",
+        "concurrency": {"worker": requests},
+        "max_queue": requests
+    }, "worker": {"socket": socket_path, "connect_timeout": 30}}}
+    service = TranscriptionService(config)
+
+    latencies = []
+
+    async def handler(i: int) -> None:
+        start = time.perf_counter()
+        await service.transcribe(audio_files[i % len(audio_files)])
+        latencies.append(time.perf_counter() - start)
+
+    # Подключение (worker мог ещё открывать сокет); модель уже прогрета
+    await service.worker_stats()
+    start = time.perf_counter()
+    await service.transcribe(audio_files[0])
+    first_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(requests)))
+    seconds = time.perf_counter() - start
+
+    worker = await service.worker_stats()
+    await service.close()
+
+    latencies.sort()
+    return {
+        "first_ms": first_ms,
+        "seconds": seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "worker": worker
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк ASR worker")
+    parser.add_argument("--requests", type=int, default=16, help="Одновременных голосовых сообщений")
+    parser.add_argument("--max-batch", type=int, default=8, help="Записей в пачке")
+    parser.add_argument("--batch-window-ms", type=int, default=30, help="Окно сбора пачки")
+    parser.add_argument("--decode-ms", type=int, default=300, help="Фиксированная стоимость пачки (модель)")
+    parser.add_argument("--per-item-ms", type=int, default=40, help="Стоимость записи в пачке (модель)")
+    parser.add_argument("--model", help="Размер модели faster-whisper вместо модели стоимости")
+    parser.add_argument("--audio", nargs="+", help="Аудио-файлы для --model")
+    args = parser.parse_args()
+
+    # Лог каждого распознавания не нужен
+    logging.disable(logging.INFO)
+
+    if args.model and not args.audio:
+        parser.error("--model требует --audio")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audio_files = args.audio
+        if not audio_files:
+            audio_files = [os.path.join(tmp_dir, "voice.ogg")]
+            with open(audio_files[0], "wb") as f:
+                f.write(os.urandom(16 * 1024))
+
+        print(f"{args.requests} сообщений одновременно"
+              + (f", модель {args.model}" if args.model else
+                 f", пачка стоит {args.decode_ms} + {args.per_item_ms}·n мс") + "\n")
+        print(f"  {'max_batch':10} {'первый, мс':>11} {'пачка, s':>9} {'p50, мс':>8} "
+              f"{'p95, мс':>8} {'ср. пачка':>10}")
+
+        for max_batch in (1, args.max_batch):
+            socket_path = os.path.join(tmp_dir, f"asr_{max_batch}.sock")
+            kwargs = dict(batch_window_ms=args.batch_window_ms, max_batch=max_batch)
+            if args.model:
+                worker = ASRWorker(socket_path, model_size=args.model, **kwargs)
+                worker.load()
+            else:
+                worker = SyntheticWorker(
+                    socket_path, decode_ms=args.decode_ms, per_item_ms=args.per_item_ms, **kwargs
+                )
+            start_worker(worker)
+
+            result = asyncio.run(run_requests(socket_path, audio_files, args.requests))
+            print(f"  {max_batch:<10} {result['first_ms']:>11.0f} {result['seconds']:>9.2f} "
+                  f"{result['p50_ms']:>8.0f} {result['p95_ms']:>8.0f} "
+                  f"{result['worker']['avg_batch']:>10}")
+
+        if args.model:
+            print(f"\n  прогрев модели при запуске: {worker.warmup_ms:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
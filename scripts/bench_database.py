@@ -0,0 +1,136 @@
+"""
+Микробенчмарк записи в SQLite: соединение на каждый вызов против пула
+
+Сравнивает вставку сообщений:
+- per-call: aiosqlite.connect + INSERT + commit + close на каждую запись
+  (как работал Database до пула соединений)
+- pooled: Database.save_message через долгоживущее соединение (WAL,
+  synchronous=NORMAL, кэш подготовленных выражений)
+- write-behind: то же с буфером отложенной записи (задержка вызова без
+  commit; время включает финальный сброс буфера)
+
+Все варианты прогоняются последовательно и с параллельными задачами,
+печатаются вставки/сек и задержки p50/p99. Каждый вариант пишет в свою
+временную базу.
+
+Пример:
+    python scripts/bench_database.py -n 2000 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import aiosqlite
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database  # noqa: E402
+
+INSERT_MESSAGE = """
+    INSERT INTO messages (user_id, role, content, session_id)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+async def _per_call_insert(db_path: str, index: int) -> None:
+    """Вставка с открытием соединения на каждый вызов"""
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute(INSERT_MESSAGE, (f"user_{index % 10}", "user", f"Сообщение {index}", None))
+        await db.commit()
+
+
+async def _measure(
+    insert: Callable[[int], Awaitable[None]],
+    n: int,
+    concurrency: int,
+    finish: Optional[Callable[[], Awaitable]] = None
+) -> dict:
+    """Выполняет n вставок в concurrency параллельных задачах"""
+    latencies: List[float] = []
+    counter = iter(range(n))
+
+    async def worker():
+        for index in counter:
+            start = time.perf_counter()
+            await insert(index)
+            latencies.append(time.perf_counter() - start)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    if finish:
+        await finish()
+    wall_time = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "rate": n / wall_time,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def run_benchmark(n: int, concurrency: int) -> None:
+    """Прогоняет все варианты и печатает сводку"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for workers in sorted({1, concurrency}):
+            # Соединение на каждый вызов (схема создаётся тем же init_db)
+            per_call_path = os.path.join(tmp_dir, f"per_call_{workers}.db")
+            schema_db = Database(per_call_path)
+            await schema_db.init_db()
+            await schema_db.close()
+
+            # Вернуть режим журнала по умолчанию, как у баз без пула
+            async with aiosqlite.connect(per_call_path) as db:
+                await db.execute("PRAGMA journal_mode = DELETE")
+
+            per_call = await _measure(
+                lambda index: _per_call_insert(per_call_path, index), n, workers
+            )
+
+            # Пул соединений
+            pooled_db = Database(os.path.join(tmp_dir, f"pooled_{workers}.db"))
+            await pooled_db.init_db()
+            pooled = await _measure(
+                lambda index: pooled_db.save_message(f"user_{index % 10}", "user", f"Сообщение {index}"),
+                n,
+                workers
+            )
+            await pooled_db.close()
+
+            # Буфер отложенной записи
+            buffered_db = Database(os.path.join(tmp_dir, f"buffered_{workers}.db"), write_behind=True)
+            await buffered_db.init_db()
+            buffered = await _measure(
+                lambda index: buffered_db.save_message(f"user_{index % 10}", "user", f"Сообщение {index}"),
+                n,
+                workers,
+                finish=buffered_db.flush
+            )
+            await buffered_db.close()
+
+            print(f"Вставок: {n}, параллельных задач: {workers}")
+            print(f"  {'':12} {'вставок/с':>10} {'p50, мс':>9} {'p99, мс':>9}")
+            for name, stats in (("per-call", per_call), ("pooled", pooled), ("write-behind", buffered)):
+                print(f"  {name:12} {stats['rate']:>10.0f} {stats['p50']:>9.2f} {stats['p99']:>9.2f}")
+            print(
+                f"  Ускорение: pooled {pooled['rate'] / per_call['rate']:.1f}x, "
+                f"write-behind {buffered['rate'] / per_call['rate']:.1f}x\n"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пула соединений SQLite")
+    parser.add_argument("-n", type=int, default=2000, help="Количество вставок")
+    parser.add_argument("--concurrency", type=int, default=8, help="Параллельных задач")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.n, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
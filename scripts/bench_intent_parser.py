@@ -0,0 +1,108 @@
+"""
+Бенчмарк локального разбора команд (fast path) на размеченном корпусе
+
+Для каждой фразы корпуса сравнивает результат FastIntentParser.match с разметкой:
+- hit rate: доля команд с разметкой, обработанных без LLM
+- accuracy: доля верных разборов среди обработанных
+- false positives: фразы без разметки (должны уйти в LLM), перехваченные парсером
+- время разбора одной фразы
+
+Формат корпуса (JSON Lines):
+    {"text": "...", "tool": "get_tasks" | null, "input": {...} | null}
+Строковые значения в input сравниваются по префиксу (даты - "2026-01-15"),
+списки - как множества без учёта регистра.
+
+Пример:
+    python scripts/bench_intent_parser.py --corpus scripts/intent_corpus.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.intent_parser import FastIntentParser  # noqa: E402
+
+# Фиксированное "сейчас", относительно которого размечен корпус (среда)
+CORPUS_NOW = datetime(2026, 1, 14, 10, 0)
+
+
+def _input_matches(expected: dict, actual: dict) -> bool:
+    """Проверяет, что разобранные параметры совпадают с разметкой"""
+    for key, value in expected.items():
+        got = actual.get(key)
+        if isinstance(value, list):
+            if not isinstance(got, list) or {v.lower() for v in value} != {g.lower() for g in got}:
+                return False
+        elif isinstance(value, str):
+            if not isinstance(got, str) or not got.startswith(value):
+                return False
+        elif got != value:
+            return False
+    return True
+
+
+def run_benchmark(corpus_path: str, min_confidence: float, verbose: bool) -> None:
+    """Прогоняет корпус через парсер и печатает метрики"""
+    with open(corpus_path, encoding='utf-8') as f:
+        samples = [json.loads(line) for line in f if line.strip()]
+
+    parser = FastIntentParser(min_confidence=min_confidence)
+
+    positives = [s for s in samples if s['tool']]
+    negatives = [s for s in samples if not s['tool']]
+    hits = correct = false_positives = 0
+    timings = []
+
+    for sample in samples:
+        start = time.perf_counter()
+        intent = parser.match(sample['text'], now=CORPUS_NOW)
+        timings.append(time.perf_counter() - start)
+
+        if not sample['tool']:
+            if intent:
+                false_positives += 1
+                if verbose:
+                    print(f"FP   {sample['text']!r} -> {intent.tool_name} {intent.tool_input}")
+            continue
+
+        if intent is None:
+            if verbose:
+                print(f"MISS {sample['text']!r}")
+            continue
+
+        hits += 1
+        if intent.tool_name == sample['tool'] and _input_matches(sample['input'], intent.tool_input):
+            correct += 1
+        elif verbose:
+            print(f"BAD  {sample['text']!r} -> {intent.tool_name} {intent.tool_input}")
+
+    timings.sort()
+    print(f"Фраз в корпусе:       {len(samples)} ({len(positives)} размечено, {len(negatives)} для LLM)")
+    print(f"Hit rate:             {hits / len(positives):.1%} ({hits}/{len(positives)})")
+    print(f"Accuracy (из hits):   {correct / hits if hits else 0:.1%} ({correct}/{hits})")
+    print(f"False positives:      {false_positives}/{len(negatives)}")
+    print(f"Разбор, медиана:      {timings[len(timings) // 2] * 1e6:.0f} мкс")
+    print(f"Разбор, p99:          {timings[int(len(timings) * 0.99)] * 1e6:.0f} мкс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк FastIntentParser")
+    parser.add_argument(
+        "--corpus",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.jsonl"),
+        help="Путь к размеченному корпусу (JSON Lines)"
+    )
+    parser.add_argument("--min-confidence", type=float, default=0.9, help="Порог уверенности")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Печатать ошибки разбора")
+    args = parser.parse_args()
+
+    run_benchmark(args.corpus, args.min_confidence, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Бенчмарк контекста памяти: пересчёт по истории против профиля пользователя
+
+Заполняет временную базу синтетической историей (сообщения и
+статистика за 30 дней) через save_message/save_usage_stats, чтобы
+профиль обновлялся хуком записи, и сравнивает:
+- recompute: сводка как до профиля - get_usage_summary, 50 сообщений для
+  ключевых слов и 200 сообщений для покупок на каждый вызов
+- profile: UserMemory.get_context_prompt - чтение одной строки
+  user_profiles
+- cached: MemoryManager.get_context_prompt - текст из кэша контекста
+
+Дополнительно печатает стоимость хука: время вставки истории с
+MemoryManager и без него.
+
+Пример:
+    python scripts/bench_memory_profile.py --messages-per-day 40 --repeat 50
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent.memory import MemoryManager  # noqa: E402
+from utils.database import Database  # noqa: E402
+from utils.text_normalizer import TERM_KEYWORD, TERM_SHOPPING, get_normalizer  # noqa: E402
+
+PHRASES = [
+    "добавь молоко в покупки",
+    "купи хлеб и сыр",
+    "покажи задачи на сегодня",
+    "создай заметку про проект отчёт",
+    "какие встречи завтра в календаре",
+    "напомни позвонить врачу",
+    "запиши идею для проекта презентация",
+]
+ACTION_TYPES = ["general", "get_calendar_events", "get_tasks", "add_task", "add_shopping_item", "create_note"]
+
+
+async def _fill(db: Database, users: int, messages_per_day: int, days: int) -> float:
+    """Сохраняет синтетическую историю, возвращает время вставки в секундах"""
+    rng = random.Random(7)
+    start = time.perf_counter()
+
+    # Запись идёт через обычные методы (timestamp - момент вызова), поэтому
+    # история "за days дней" сжата во времени - для затрат чтения это
+    # не важно, важен объём
+    for _ in range(days * messages_per_day):
+        for user in range(users):
+            user_id = f"user_{user}"
+            await db.save_message(user_id, "user", rng.choice(PHRASES))
+            await db.save_message(user_id, "assistant", "Готово")
+            await db.save_usage_stats(user_id, "telegram", rng.choice(ACTION_TYPES), tokens_used=500)
+
+    await db.flush()
+    return time.perf_counter() - start
+
+
+async def _recompute_context(db: Database, user_id: str) -> dict:
+    """Сводка контекста, как её считал UserMemory до профиля"""
+    usage = await db.get_usage_summary(user_id, days=30)
+
+    normalizer = get_normalizer()
+
+    recent = await db.get_message_history(user_id, limit=50)
+    keywords = Counter(
+        surface
+        for msg in recent if msg['role'] == 'user'
+        for kind, _, surface in normalizer.extract_terms(msg['content']) if kind == TERM_KEYWORD
+    )
+
+    history = await db.get_message_history(user_id, limit=200)
+    shopping = Counter(
+        surface
+        for msg in history if msg['role'] == 'user'
+        for kind, _, surface in normalizer.extract_terms(msg['content']) if kind == TERM_SHOPPING
+    )
+
+    return {
+        "total_interactions": usage['total_requests'],
+        "frequent_actions": usage['action_counts'][:5],
+        "frequent_keywords": [word for word, _ in keywords.most_common(10)],
+        "frequent_items": [item for item, _ in shopping.most_common(5)],
+    }
+
+
+async def _timed(coro_factory, repeat: int) -> float:
+    """Медианное время вызова в мс"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+async def run_benchmark(users: int, messages_per_day: int, repeat: int) -> None:
+    """Заполняет базы и печатает сравнение"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain_db = Database(os.path.join(tmp_dir, "plain.db"), write_behind=True)
+        await plain_db.init_db()
+        plain_seconds = await _fill(plain_db, users, messages_per_day, days=30)
+        await plain_db.close()
+
+        db = Database(os.path.join(tmp_dir, "profile.db"), write_behind=True)
+        await db.init_db()
+        manager = MemoryManager(db)
+        # Профиль строится по истории до первой записи, дальше - хуком
+        await manager.get_user_memory("user_0").rebuild_profile()
+        profile_seconds = await _fill(db, users, messages_per_day, days=30)
+
+        total = 30 * messages_per_day * users
+        print(f"История: {total} запросов ({3 * total} вставок), {users} польз.")
+        print(f"  вставка без профиля: {plain_seconds:.2f}s, с хуком профиля: {profile_seconds:.2f}s "
+              f"(+{(profile_seconds / plain_seconds - 1) * 100:.0f}%)\n")
+
+        memory = manager.get_user_memory("user_0")
+        recompute_ms = await _timed(lambda: _recompute_context(db, "user_0"), repeat)
+        profile_ms = await _timed(memory.get_context_prompt, repeat)
+        cached_ms = await _timed(lambda: manager.get_context_prompt("user_0"), repeat)
+
+        print(f"{'':10} {'мс/вызов':>9}")
+        print(f"{'recompute':10} {recompute_ms:>9.3f}")
+        print(f"{'profile':10} {profile_ms:>9.3f}")
+        print(f"{'cached':10} {cached_ms:>9.3f}")
+        print(f"Ускорение профиля: {recompute_ms / profile_ms:.1f}x\n")
+
+        shopping_ms = await _timed(lambda: memory.get_frequent_shopping_items(limit=10), repeat)
+        print(f"Частые покупки по user_terms: {shopping_ms:.2f} мс/вызов")
+        print(f"Контекст: {await manager.get_context_prompt('user_0')}")
+
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк профиля пользователя")
+    parser.add_argument("--users", type=int, default=2, help="Количество пользователей")
+    parser.add_argument("--messages-per-day", type=int, default=40, help="Запросов на пользователя в день")
+    parser.add_argument("--repeat", type=int, default=50, help="Повторов каждого вызова")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.users, args.messages_per_day, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
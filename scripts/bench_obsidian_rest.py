@@ -0,0 +1,252 @@
+"""
+Проверка и бенчмарк клиента Obsidian Local REST API на локальной заглушке
+
+Заглушка повторяет нужную часть API плагина: PUT/GET /vault/{путь},
+POST /search/simple/?query=..., авторизация Bearer. Она считает TCP
+соединения и одновременные запросы, может отвечать с задержкой и
+сбоями (503 и разрыв соединения) каждые N запросов.
+
+Сравниваются:
+- голые requests.put/post (как было) и ObsidianRESTAPI на
+  requests.Session - число соединений и время на запрос;
+- create_note_async / search_notes_async пачкой через asyncio.gather -
+  соединения, максимум одновременных запросов (не больше
+  max_concurrency) и задержка event loop во время пачки;
+- повторы: со сбоями все запросы должны завершиться успешно.
+
+Пример:
+    python scripts/bench_obsidian_rest.py --requests 200 --latency-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+API_KEY = "stub-key"
+
+
+class StubState:
+    """Состояние заглушки: файлы vault и счётчики"""
+
+    def __init__(self, latency: float = 0.0, fail_every: int = 0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.files = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures = 0
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.requests = self.connections = self.max_in_flight = self.failures = 0
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Обработчик, повторяющий ответы Local REST API"""
+
+    protocol_version = "HTTP/1.1"
+    state: StubState = None
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self) -> None:
+        state = self.state
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        with state.lock:
+            state.requests += 1
+            number = state.requests
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+
+        try:
+            if state.latency:
+                time.sleep(state.latency)
+
+            if state.fail_every and number % state.fail_every == 0:
+                with state.lock:
+                    state.failures += 1
+                if number % (state.fail_every * 2) == 0:
+                    # Разрыв соединения без ответа
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                self._send(503, b'{"message": "busy"}')
+                return
+
+            if self.headers.get("Authorization") != f"Bearer {API_KEY}":
+                self._send(401, b'{"errorCode": 40101, "message": "Authorization required"}')
+                return
+
+            url = urlsplit(self.path)
+            if url.path.startswith("/vault/"):
+                path = unquote(url.path[len("/vault/"):])
+                if self.command == "PUT":
+                    with state.lock:
+                        state.files[path] = body.decode("utf-8")
+                    self._send(204)
+                elif path in state.files:
+                    self._send(200, state.files[path].encode("utf-8"), "text/markdown")
+                else:
+                    self._send(404, b'{"errorCode": 40400, "message": "Not Found"}')
+            elif url.path.rstrip("/") == "/search/simple" and self.command == "POST":
+                query = parse_qs(url.query).get("query", [""])[0].lower()
+                with state.lock:
+                    found = [
+                        {"filename": path, "score": -1.0,
+                         "matches": [{"match": {"start": 0, "end": len(query)}, "context": text[:100]}]}
+                        for path, text in state.files.items() if query in text.lower()
+                    ]
+                self._send(200, json.dumps(found, ensure_ascii=False).encode("utf-8"))
+            else:
+                self._send(404, b'{"errorCode": 40400, "message": "Not Found"}')
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    do_GET = do_PUT = do_POST = _handle
+
+
+def start_stub(state: StubState) -> ThreadingHTTPServer:
+    """Запускает заглушку на свободном порту"""
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def _loop_lag(stop: asyncio.Event) -> float:
+    """Максимальная задержка event loop (тик каждые 5 мс), мс"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        worst = max(worst, time.perf_counter() - start - 0.005)
+    return worst * 1000
+
+
+async def run_async(client, count: int) -> dict:
+    """Пачка создания и поиска заметок через асинхронный клиент"""
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client.create_note_async(f"Async {i}", f"асинхронная заметка {i}", tags=["stub"], folder="Async")
+        for i in range(count)
+    ))
+    results = await asyncio.gather(*(client.search_notes_async("асинхронная", limit=5) for _ in range(count)))
+    seconds = time.perf_counter() - start
+
+    stop.set()
+    lag_ms = await lag
+    await client.aclose()
+    return {"seconds": seconds, "lag_ms": lag_ms, "found": min(len(r) for r in results)}
+
+
+def run_benchmark(count: int, latency_ms: float, fail_every: int, max_concurrency: int) -> None:
+    """Запускает заглушку и печатает результаты"""
+    from integrations.obsidian import ObsidianRESTAPI
+
+    state = StubState(latency=latency_ms / 1000)
+    server = start_stub(state)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    client_config = {"max_concurrency": max_concurrency, "retries": 3, "retry_backoff": 0.05}
+    headers = {"Authorization": f"Bearer {API_KEY}"}
+
+    print(f"Заглушка {url}, задержка ответа {latency_ms:.0f} мс, {count} заметок\n")
+    print(f"  {'способ':28} {'соединений':>10} {'мс/запрос':>10} {'параллельно':>12}")
+
+    # Как было: новое соединение на каждый запрос
+    state.reset_counters()
+    start = time.perf_counter()
+    for i in range(count):
+        requests.put(f"{url}/vault/Bare/{i}.md", headers=headers, data=f"заметка {i}".encode("utf-8"), timeout=10)
+    seconds = time.perf_counter() - start
+    print(f"  {'requests.put без Session':28} {state.connections:>10} {seconds / count * 1000:>10.2f} "
+          f"{state.max_in_flight:>12}")
+
+    state.reset_counters()
+    client = ObsidianRESTAPI(url, API_KEY, client_config)
+    start = time.perf_counter()
+    for i in range(count):
+        client.create_note(f"Sync {i}", f"синхронная заметка {i}", folder="Sync")
+    seconds = time.perf_counter() - start
+    assert client.read_note("Sync/Sync 0.md")["content"].endswith("синхронная заметка 0")
+    assert len(client.search_notes("синхронная", limit=5)) == 5
+    client.close()
+    print(f"  {'create_note (Session)':28} {state.connections:>10} {seconds / count * 1000:>10.2f} "
+          f"{state.max_in_flight:>12}")
+
+    state.reset_counters()
+    client = ObsidianRESTAPI(url, API_KEY, client_config)
+    result = asyncio.run(run_async(client, count))
+    assert result["found"] == 5
+    assert state.max_in_flight <= max_concurrency
+    print(f"  {'create/search_notes_async':28} {state.connections:>10} "
+          f"{result['seconds'] / (count * 2) * 1000:>10.2f} {state.max_in_flight:>12}")
+    print(f"  задержка event loop во время пачки: до {result['lag_ms']:.1f} мс")
+
+    # Сбои: каждый fail_every-й запрос - 503 или разрыв соединения
+    state.reset_counters()
+    state.fail_every = fail_every
+    client = ObsidianRESTAPI(url, API_KEY, client_config)
+    result = asyncio.run(run_async(client, count))
+    assert result["found"] == 5
+    state.fail_every = 0
+    print(f"  со сбоями (каждый {fail_every}-й): {state.failures} сбоев, все {count * 2} запросов успешны")
+
+    # Неверный ключ: 401 не повторяется, ошибка доходит до вызывающего
+    client = ObsidianRESTAPI(url, "wrong-key", client_config)
+    state.reset_counters()
+    try:
+        client.create_note("Denied", "текст")
+    except Exception as e:
+        assert "401" in str(e) and state.requests == 1
+        print(f"  неверный ключ: {e} (запросов: {state.requests})")
+    client.close()
+
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк клиента Obsidian Local REST API")
+    parser.add_argument("--requests", type=int, default=200, help="Заметок в пачке")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Задержка ответа заглушки")
+    parser.add_argument("--fail-every", type=int, default=7, help="Сбой каждые N запросов")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="Одновременных запросов клиента")
+    args = parser.parse_args()
+
+    run_benchmark(args.requests, args.latency_ms, args.fail_every, args.max_concurrency)
+
+
+if __name__ == "__main__":
+    main()
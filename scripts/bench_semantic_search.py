@@ -0,0 +1,200 @@
+"""
+Бенчмарк семантического поиска по vault: полнота и задержка
+
+Генерирует временный vault из N заметок на 8 тем. В каждой теме есть
+частые слова и редкие синонимы (встречаются в ~5% заметок темы).
+Запросы составлены из редких синонимов ("визит к терапевту" для темы
+"здоровье"), то есть это перефразирования: большинство заметок темы
+не содержит ни одного слова запроса.
+
+Сравниваются BM25 (VaultSearchIndex.search), только векторы
+(SemanticIndex, hybrid_weight=1) и гибрид. Релевантные заметки - все
+заметки темы запроса; recall@10 = доля релевантных в первых 10.
+
+Печатает время построения (FTS5 и векторов), размер матрицы,
+время инкрементального обновления и медианную задержку запросов.
+
+Пример:
+    python scripts/bench_semantic_search.py --notes 5000 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.obsidian_index import VaultSearchIndex  # noqa: E402
+from integrations.obsidian_semantic import SemanticIndex  # noqa: E402
+
+TOPICS = {
+    "здоровье": (
+        "врач врача врачом поликлиника анализы давление таблетки лечение больница "
+        "рецепт симптомы температура здоровье приём обследование",
+        "терапевт терапевту визит доктор доктора медосмотр",
+    ),
+    "финансы": (
+        "бюджет расходы доходы зарплата кредит ипотека банк счёт налог платёж "
+        "накопления инвестиции вклад проценты карта",
+        "траты сбережения депозит",
+    ),
+    "путешествия": (
+        "поездка билеты отель самолёт поезд чемодан виза паспорт маршрут экскурсия "
+        "гостиница аэропорт бронь отпуск море",
+        "путешествие перелёт турпоездка",
+    ),
+    "работа": (
+        "проект задача дедлайн отчёт встреча совещание коллеги руководитель "
+        "презентация клиент релиз команда план спринт договор",
+        "созвон планёрка митинг",
+    ),
+    "дом": (
+        "ремонт кухня мебель диван краска обои сантехник кран уборка стирка посуда "
+        "ванная плитка полка лампа",
+        "жильё квартира хозяйство",
+    ),
+    "спорт": (
+        "тренировка бег зал пробежка штанга растяжка бассейн плавание велосипед "
+        "пульс километры гантели йога разминка марафон",
+        "фитнес кардио нагрузка",
+    ),
+    "учёба": (
+        "курс лекция экзамен конспект домашка преподаватель семинар учебник оценка "
+        "зачёт тема урок практика диплом сессия",
+        "обучение вебинар занятие",
+    ),
+    "кулинария": (
+        "суп тесто духовка соль сахар мука сковорода салат курица овощи фарш соус "
+        "пирог ужин завтрак",
+        "блюдо готовка выпечка",
+    ),
+}
+
+FILLER = (
+    "сегодня завтра вчера нужно важно решил подумать обсудить посмотреть сделать "
+    "утром вечером неделя месяц потом снова быстро хорошо плохо новый старый "
+    "большой маленький первый второй несколько немного очень также ещё уже"
+).split()
+
+QUERIES = [
+    ("здоровье", "визит к терапевту"),
+    ("здоровье", "медосмотр у доктора"),
+    ("финансы", "сбережения и траты"),
+    ("финансы", "депозит"),
+    ("путешествия", "перелёт в турпоездку"),
+    ("работа", "планёрка митинг"),
+    ("дом", "квартира и хозяйство"),
+    ("спорт", "кардио фитнес"),
+    ("учёба", "вебинар обучение"),
+    ("кулинария", "выпечка блюдо"),
+]
+
+
+def generate_vault(path: str, notes: int) -> dict:
+    """Создаёт vault, возвращает тема -> множество путей заметок"""
+    rng = random.Random(5)
+    topics = list(TOPICS)
+    by_topic = {topic: set() for topic in topics}
+
+    for i in range(notes):
+        topic = topics[i % len(topics)]
+        common, rare = (words.split() for words in TOPICS[topic])
+
+        body = [rng.choice(common) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(80)]
+        for word in rare:
+            if rng.random() < 0.05:
+                body.insert(rng.randrange(len(body)), word)
+
+        folder = os.path.join(path, f"Папка {i % 20}")
+        os.makedirs(folder, exist_ok=True)
+        relative_path = os.path.join(f"Папка {i % 20}", f"Заметка {i}.md")
+        with open(os.path.join(path, relative_path), "w", encoding="utf-8") as f:
+            f.write(f"# Заметка {i}\n\n{' '.join(body)}\n")
+        by_topic[topic].add(relative_path)
+
+    return by_topic
+
+
+def _median_ms(func, repeat: int) -> float:
+    """Медианное время вызова в мс"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def _recall(results: list, relevant: set, k: int = 10) -> float:
+    """Доля релевантных среди первых k результатов"""
+    return sum(result['relative_path'] in relevant for result in results[:k]) / min(k, len(relevant))
+
+
+def run_benchmark(notes: int, repeat: int) -> None:
+    """Генерирует vault и печатает результаты"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vault_path = os.path.join(tmp_dir, "vault")
+        by_topic = generate_vault(vault_path, notes)
+
+        index = VaultSearchIndex(vault_path, os.path.join(tmp_dir, "index.db"), refresh_interval=3600)
+        start = time.perf_counter()
+        index.refresh(force=True)
+        fts_seconds = time.perf_counter() - start
+
+        semantic = SemanticIndex(index, os.path.join(tmp_dir, "semantic"), backend="lsa")
+        start = time.perf_counter()
+        semantic.sync(force=True)
+        vector_seconds = time.perf_counter() - start
+        stats = semantic.stats()
+
+        print(f"Vault: {notes} заметок, {stats['chunks']} фрагментов")
+        print(f"  построение: FTS5 {fts_seconds:.1f}s, векторы ({stats['backend']}, dim={stats['dim']}) "
+              f"{vector_seconds:.1f}s, матрица {stats['vectors_mb']} МБ")
+
+        # Инкрементальное обновление: 1% заметок изменено
+        changed = sorted(by_topic["работа"])[:max(1, notes // 100)]
+        for relative_path in changed:
+            with open(os.path.join(vault_path, relative_path), "a", encoding="utf-8") as f:
+                f.write("созвон по проекту\n")
+        index.refresh(force=True)
+        start = time.perf_counter()
+        semantic.sync()
+        print(f"  обновление {len(changed)} изменённых заметок: {(time.perf_counter() - start) * 1000:.0f} мс\n")
+
+        modes = [
+            ("BM25", lambda query: index.search(query, limit=10)),
+            ("векторы", lambda query: semantic.search(query, limit=10)),
+            ("гибрид", lambda query: semantic.search(query, limit=10)),
+        ]
+        weights = {"векторы": 1.0, "гибрид": 0.5}
+
+        print(f"  {'способ':8} {'recall@10':>10} {'мс/запрос':>10}")
+        for name, search in modes:
+            semantic.hybrid_weight = weights.get(name, 0.5)
+            recall = sum(_recall(search(query), by_topic[topic]) for topic, query in QUERIES) / len(QUERIES)
+            latency = sorted(
+                _median_ms(lambda: search(query), repeat) for _, query in QUERIES
+            )[len(QUERIES) // 2]
+            print(f"  {name:8} {recall:>10.2f} {latency:>10.2f}")
+
+        semantic.close()
+        index.close()
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк семантического поиска по vault")
+    parser.add_argument("--notes", type=int, nargs="+", default=[5000], help="Размеры vault")
+    parser.add_argument("--repeat", type=int, default=10, help="Повторов каждого запроса")
+    args = parser.parse_args()
+
+    for notes in args.notes:
+        run_benchmark(notes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк параллельной обработки текстовых команд
+
+Отправляет N одновременных запросов на /api/v1/text-command и сравнивает
+общее время с суммой и максимумом задержек отдельных запросов.
+При неблокирующем LLM клиенте общее время ≈ max(latency), а не sum(latency).
+
+Пример:
+    python scripts/bench_text_concurrency.py --url http://localhost:8000 --token TOKEN -n 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def _send_command(client: httpx.AsyncClient, url: str, text: str, index: int) -> float:
+    """Отправляет одну команду и возвращает задержку в секундах"""
+    start = time.perf_counter()
+    response = await client.post(
+        f"{url}/api/v1/text-command",
+        json={"text": text, "user_id": f"bench_user_{index}"}
+    )
+    latency = time.perf_counter() - start
+    response.raise_for_status()
+    return latency
+
+
+async def run_benchmark(url: str, token: str, n: int, text: str) -> None:
+    """Запускает N параллельных запросов и печатает сводку"""
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=n, max_keepalive_connections=n)
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=120) as client:
+        # Прогрев: одно соединение и первый запрос к модели
+        await _send_command(client, url, text, 0)
+
+        wall_start = time.perf_counter()
+        latencies = await asyncio.gather(*[
+            _send_command(client, url, text, i) for i in range(n)
+        ])
+        wall_time = time.perf_counter() - wall_start
+
+    total = sum(latencies)
+    longest = max(latencies)
+
+    print(f"Запросов:             {n}")
+    print(f"Общее время:          {wall_time:.2f}s")
+    print(f"max(latency):         {longest:.2f}s")
+    print(f"sum(latency):         {total:.2f}s")
+    print(f"median(latency):      {statistics.median(latencies):.2f}s")
+    print(f"Параллельность:       {total / wall_time:.1f}x")
+    print(f"Общее / max(latency): {wall_time / longest:.2f} (≈1.0 — запросы перекрываются)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк параллельных /text-command запросов")
+    parser.add_argument("--url", default="http://localhost:8000", help="Базовый URL API")
+    parser.add_argument("--token", required=True, help="API токен")
+    parser.add_argument("-n", type=int, default=8, help="Количество параллельных запросов")
+    parser.add_argument("--text", default="Объясни, как лучше спланировать неделю", help="Текст команды")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.url, args.token, args.n, args.text))
+
+
+if __name__ == "__main__":
+    main()
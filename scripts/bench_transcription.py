@@ -0,0 +1,124 @@
+"""
+Бенчмарк сервиса распознавания: event loop, очередь и отказ при перегрузке
+
+Декодирование моделируется функцией, которая держит поток (или процесс)
+--decode-ms миллисекунд, отпуская GIL, как CTranslate2 в faster-whisper;
+модель Whisper для бенчмарка не нужна. Сравниваются:
+- вызов transcribe_audio прямо в обработчике (как было) - event loop
+  стоит всё время декодирования;
+- TranscriptionService (пул потоков и процессов) - задержка event loop,
+  общее время пачки, ожидание в очереди против декодирования, число
+  отказов (429) при пачке больше concurrency + max_queue.
+
+Пример:
+    python scripts/bench_transcription.py --requests 20 --decode-ms 300 --concurrency 2 --max-queue 6
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.transcription import TranscriptionBusy, TranscriptionService  # noqa: E402
+
+DECODE_SECONDS = 0.3
+
+
+def synthetic_decode(audio_file_path: str, language: str = "ru") -> str:
+    """Декодирование длительностью DECODE_SECONDS (без GIL, как нативный код)"""
+    time.sleep(float(os.environ.get("BENCH_DECODE_SECONDS", DECODE_SECONDS)))
+    return f"текст {os.path.basename(audio_file_path)}"
+
+
+async def _loop_lag(stop: asyncio.Event) -> float:
+    """Максимальная задержка event loop (тик каждые 10 мс), мс"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst * 1000
+
+
+async def run_inline(requests: int) -> dict:
+    """Как было: блокирующий вызов в async обработчике"""
+    async def handler(i: int) -> str:
+        return synthetic_decode(f"voice_{i}.ogg")
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(requests)))
+    seconds = time.perf_counter() - start
+    stop.set()
+    return {"seconds": seconds, "lag_ms": await lag}
+
+
+async def run_service(service: TranscriptionService, requests: int) -> dict:
+    """Пачка запросов через сервис"""
+    async def handler(i: int) -> bool:
+        try:
+            await service.transcribe(f"voice_{i}.ogg")
+            return True
+        except TranscriptionBusy:
+            return False
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(_loop_lag(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    accepted = await asyncio.gather(*(handler(i) for i in range(requests)))
+    seconds = time.perf_counter() - start
+    stop.set()
+    return {"seconds": seconds, "lag_ms": await lag, "accepted": sum(accepted)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сервиса распознавания речи")
+    parser.add_argument("--requests", type=int, default=20, help="Голосовых сообщений в пачке")
+    parser.add_argument("--decode-ms", type=int, default=300, help="Время декодирования одного")
+    parser.add_argument("--concurrency", type=int, default=2, help="Одновременных декодирований")
+    parser.add_argument("--max-queue", type=int, default=6, help="Длина очереди")
+    args = parser.parse_args()
+
+    os.environ["BENCH_DECODE_SECONDS"] = str(args.decode_ms / 1000)
+
+    print(f"{args.requests} сообщений, декодирование {args.decode_ms} мс, "
+          f"concurrency {args.concurrency}, очередь {args.max_queue}\n")
+    print(f"  {'способ':18} {'принято':>8} {'пачка, s':>9} {'лаг loop, мс':>13} "
+          f"{'ожидание p50/p95, мс':>21} {'декодирование p50, мс':>22}")
+
+    result = asyncio.run(run_inline(args.requests))
+    print(f"  {'inline':18} {args.requests:>8} {result['seconds']:>9.2f} {result['lag_ms']:>13.0f}")
+
+    for executor in ("thread", "process"):
+        config = {"whisper": {"provider": "local", "service": {
+            "executor": executor,
+            "concurrency": {"local": args.concurrency},
+            "max_queue": args.max_queue
+        }}}
+        service = TranscriptionService(config, transcribe_func=synthetic_decode)
+        # Прогрев пула (процессам нужно время на запуск)
+        asyncio.run(run_service(service, args.concurrency))
+        service._queues.clear()
+
+        result = asyncio.run(run_service(service, args.requests))
+        stats = service.stats()[service.model]
+        service.shutdown()
+
+        assert result["accepted"] == min(args.requests, args.concurrency + args.max_queue)
+        assert stats["rejected"] == args.requests - result["accepted"]
+        wait, decode = stats["queue_wait"], stats["decode"]
+        print(f"  {'сервис, ' + executor:18} {result['accepted']:>8} {result['seconds']:>9.2f} "
+              f"{result['lag_ms']:>13.0f} {wait['p50_ms']:>10.0f}/{wait['p95_ms']:<10.0f} "
+              f"{decode['p50_ms']:>22.0f}")
+
+    print(f"\n  отказано (429 / \"занят\"): {args.requests - result['accepted']} из {args.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Бенчмарк сводки статистики: сырые usage_stats против дневных агрегатов
+
+Заполняет временную базу синтетической историей за год (события
+вставляются в usage_stats, агрегаты поддерживает триггер) и сравнивает:
+- raw: get_usage_stats + подсчёт в Python (как /stats и память до агрегатов)
+- rollup: get_usage_summary по usage_daily/usage_hourly
+
+Проверяет, что оба способа дают одинаковые итоги, и печатает время
+для окон 30 и 365 дней.
+
+Пример:
+    python scripts/bench_usage_rollups.py --events-per-day 200 --users 3
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import Database, INSERT_USAGE_SQL  # noqa: E402
+
+ACTION_TYPES = ["general", "get_calendar_events", "get_tasks", "add_task", "add_shopping_item", "create_note"]
+INTERFACES = ["telegram", "api_text", "api_voice"]
+
+
+async def _fill_history(db: Database, users: int, events_per_day: int, days: int) -> int:
+    """Вставляет синтетическую историю за days дней"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    rows = []
+
+    for user in range(users):
+        for day in range(days):
+            for _ in range(events_per_day):
+                timestamp = now - timedelta(days=day, seconds=rng.randint(0, 86399))
+                rows.append((
+                    f"user_{user}", rng.choice(INTERFACES), rng.choice(ACTION_TYPES),
+                    rng.randint(200, 3000), rng.randint(100, 2000), rng.randint(50, 800),
+                    rng.randint(0, 1500), 0, rng.randint(300, 4000),
+                    timestamp.strftime("%Y-%m-%d %H:%M:%S")
+                ))
+
+    async with db._write() as connection:
+        await connection.executemany(INSERT_USAGE_SQL, rows)
+
+    return len(rows)
+
+
+def _raw_summary(stats: list) -> dict:
+    """Подсчёт в Python, как в stats_command до агрегатов"""
+    cache_read = sum(s['cache_read_tokens'] for s in stats)
+    total_input = cache_read + sum(s['input_tokens'] + s['cache_creation_tokens'] for s in stats)
+    return {
+        "total_requests": len(stats),
+        "total_tokens": sum(s.get('tokens_used', 0) for s in stats),
+        "action_counts": Counter(s['action_type'] for s in stats),
+        "cache_hit_ratio": cache_read / total_input if total_input else 0.0,
+    }
+
+
+async def _timed(coro_factory, repeat: int) -> tuple:
+    """Возвращает (результат, медианное время в мс)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await coro_factory()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return result, timings[len(timings) // 2] * 1000
+
+
+async def run_benchmark(users: int, events_per_day: int, repeat: int) -> None:
+    """Заполняет базу и печатает сравнение"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "usage.db"))
+        await db.init_db()
+
+        start = time.perf_counter()
+        total = await _fill_history(db, users, events_per_day, days=365)
+        print(f"Синтетическая история: {total} событий, {users} польз., "
+              f"вставка с триггером {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'окно':>6} {'строк raw':>10} {'raw, мс':>9} {'rollup, мс':>11} {'ускорение':>10}")
+        for days in (30, 365):
+            # Окно агрегатов - календарные дни, поэтому сырые данные
+            # берутся с начала первого дня окна
+            raw_stats, raw_ms = await _timed(lambda: db.get_usage_stats("user_0", days=days), repeat)
+            first_day = (datetime.utcnow() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+            raw = _raw_summary([s for s in raw_stats if s['timestamp'] >= first_day])
+
+            summary, rollup_ms = await _timed(lambda: db.get_usage_summary("user_0", days=days), repeat)
+
+            rollup_actions = {a['action_type']: a['count'] for a in summary['action_counts']}
+            if (
+                raw['total_requests'] != summary['total_requests']
+                or raw['total_tokens'] != summary['total_tokens']
+                or dict(raw['action_counts']) != rollup_actions
+                or abs(raw['cache_hit_ratio'] - summary['cache_hit_ratio']) > 1e-9
+            ):
+                print(f"  ⚠ итоги различаются: raw={raw['total_requests']}, rollup={summary['total_requests']}")
+
+            print(f"{days:>6} {len(raw_stats):>10} {raw_ms:>9.1f} {rollup_ms:>11.2f} {raw_ms / rollup_ms:>9.0f}x")
+
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк агрегатов статистики")
+    parser.add_argument("--users", type=int, default=3, help="Количество пользователей")
+    parser.add_argument("--events-per-day", type=int, default=200, help="Событий на пользователя в день")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов каждого запроса")
+    args = parser.parse_args()
+
+    asyncio.run(run_benchmark(args.users, args.events_per_day, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Бенчмарк коммита в vault: цепочка процессов git против pygit2
+
+Создаёт временный vault из N файлов (клон локального bare репозитория
+вместо удалённого) и много раз изменяет K заметок и коммитит их:
+- "status + add . + commit" - как git_commit_and_push (три процесса
+  git, add . обходит всё дерево);
+- "add/diff/commit по путям" - commit_paths через git CLI;
+- "pygit2" - commit_paths в процессе (InProcessGitRepo).
+
+После всех коммитов проверяет, что рабочее дерево чистое (stat в
+индексе верный), git fsck проходит, а push в bare репозиторий
+доставляет последний коммит.
+
+Пример:
+    python scripts/bench_vault_git_commit.py --files 20000 --changed 1 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_vault_git_sync import _git, make_vault  # noqa: E402
+from integrations.obsidian_git import ObsidianGitSync  # noqa: E402
+from integrations.obsidian_git_repo import InProcessGitRepo  # noqa: E402
+
+
+def _median_ms(timings: list) -> float:
+    timings = sorted(timings)
+    return timings[len(timings) // 2] * 1000
+
+
+def run_benchmark(files: int, changed_counts: list, repeat: int) -> None:
+    """Генерирует vault и печатает результаты"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vault = make_vault(tmp_dir, files)
+        remote = os.path.join(tmp_dir, "remote.git")
+
+        git_sync = ObsidianGitSync(vault)
+        git_sync.auto_push = False
+        repo = InProcessGitRepo(vault)
+
+        methods = [
+            ("status + add . + commit", lambda paths, message: git_sync.git_commit_and_push(message)),
+            ("add/diff/commit по путям", git_sync._commit_paths_cli),
+            ("pygit2", repo.commit_paths),
+        ]
+
+        print(f"Vault: {files} файлов")
+        print(f"  {'способ':26} " + " ".join(f"{f'{count} файл.':>12}" for count in changed_counts))
+
+        version = 0
+        for name, commit in methods:
+            cells = []
+            for count in changed_counts:
+                timings = []
+                for _ in range(repeat):
+                    version += 1
+                    paths = [f"Папка {i % 50}/Заметка {i}.md" for i in range(version, version + count)]
+                    for path in paths:
+                        with open(os.path.join(vault, path), "a", encoding="utf-8") as f:
+                            f.write(f"правка {version}\n")
+
+                    start = time.perf_counter()
+                    result = commit(paths, f"Auto-commit: правка {version}")
+                    timings.append(time.perf_counter() - start)
+                    assert result["success"], result
+                cells.append(f"{_median_ms(timings):>9.1f} мс")
+            print(f"  {name:26} " + " ".join(cells))
+
+        start = time.perf_counter()
+        status = _git(vault, "status", "--porcelain")
+        status_ms = (time.perf_counter() - start) * 1000
+        assert not status, status
+        _git(vault, "fsck", "--no-progress")
+        assert git_sync.git_push()["success"]
+        assert _git(vault, "rev-parse", "HEAD") == _git(remote, "rev-parse", "main")
+        commits = _git(vault, "rev-list", "--count", "HEAD").strip()
+        print(f"  git status после коммитов: чисто за {status_ms:.0f} мс; fsck без ошибок; "
+              f"push доставил все {commits} коммитов\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк коммита в vault")
+    parser.add_argument("--files", type=int, nargs="+", default=[20000], help="Размеры vault")
+    parser.add_argument("--changed", type=int, nargs="+", default=[1, 10], help="Изменённых заметок на коммит")
+    parser.add_argument("--repeat", type=int, default=15, help="Коммитов на измерение")
+    args = parser.parse_args()
+
+    for files in args.files:
+        run_benchmark(files, args.changed, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
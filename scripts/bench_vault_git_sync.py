@@ -0,0 +1,137 @@
+"""
+Бенчмарк Git синхронизации vault: запись заметки с git inline и в фоне
+
+Создаёт временный vault из N файлов (git репозиторий, клон локального
+bare репозитория вместо удалённого) и записывает пачку из M заметок:
+- inline (как было в create_note): git pull перед записью, status,
+  add ., commit и push после неё - в пути запроса;
+- GitSyncWorker: запись ставит путь в очередь и сразу возвращается.
+
+Печатает задержку записи (медиана и максимум), число коммитов и push,
+время до того, как всё закоммичено и отправлено, и проверяет, что
+удалённый репозиторий получил все заметки.
+
+Пример:
+    python scripts/bench_vault_git_sync.py --files 5000 --notes 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.obsidian_git import GitSyncWorker, ObsidianGitSync  # noqa: E402
+
+
+def _git(cwd: str, *args: str) -> str:
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def make_vault(tmp_dir: str, files: int) -> str:
+    """Bare "удалённый" репозиторий с N заметками и его клон - vault"""
+    seed = os.path.join(tmp_dir, "seed")
+    for i in range(files):
+        folder = os.path.join(seed, f"Папка {i % 50}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"Заметка {i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Заметка {i}\n\nтекст заметки {i}\n")
+
+    _git(seed, "init", "-q", "-b", "main")
+    _git(seed, "add", ".")
+    _git(seed, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "-q", "-m", "init")
+
+    remote = os.path.join(tmp_dir, "remote.git")
+    _git(tmp_dir, "clone", "-q", "--bare", seed, remote)
+
+    vault = os.path.join(tmp_dir, "vault")
+    _git(tmp_dir, "clone", "-q", remote, vault)
+    _git(vault, "config", "user.name", "bench")
+    _git(vault, "config", "user.email", "bench@localhost")
+    return vault
+
+
+def write_note(vault: str, name: str) -> str:
+    """Записывает заметку, возвращает путь"""
+    path = os.path.join(vault, "Notes", f"{name}.md")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# {name}\n\nновая заметка\n")
+    return path
+
+
+def _summary(latencies: list) -> str:
+    latencies = sorted(latencies)
+    return f"медиана {latencies[len(latencies) // 2] * 1000:.1f} мс, максимум {latencies[-1] * 1000:.1f} мс"
+
+
+def run_benchmark(files: int, notes: int, commit_delay_ms: int) -> None:
+    """Генерирует vault и печатает результаты"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vault = make_vault(tmp_dir, files)
+        remote = os.path.join(tmp_dir, "remote.git")
+        git_sync = ObsidianGitSync(vault)
+        git_sync.auto_push = True
+        print(f"Vault: {files} файлов, пачка из {notes} заметок")
+
+        commits_before = int(_git(vault, "rev-list", "--count", "HEAD"))
+        latencies = []
+        start = time.perf_counter()
+        for i in range(notes):
+            begin = time.perf_counter()
+            git_sync.git_pull()
+            write_note(vault, f"Inline {i}")
+            git_sync.git_commit_and_push(f"Auto-commit: Создана заметка: Inline {i}")
+            latencies.append(time.perf_counter() - begin)
+        total = time.perf_counter() - start
+        commits = int(_git(vault, "rev-list", "--count", "HEAD")) - commits_before
+        print(f"  inline:  запись {_summary(latencies)}; {commits} коммитов, {notes} push, "
+              f"всего {total:.1f}s")
+
+        worker = GitSyncWorker(git_sync, commit_delay_ms=commit_delay_ms, push_delay_ms=1000, pull_interval=0)
+        git_sync.worker = worker
+        worker.start()
+
+        commits_before = int(_git(vault, "rev-list", "--count", "HEAD"))
+        latencies = []
+        start = time.perf_counter()
+        for i in range(notes):
+            begin = time.perf_counter()
+            path = write_note(vault, f"Worker {i}")
+            worker.notify(path, f"Создана заметка: Worker {i}")
+            latencies.append(time.perf_counter() - begin)
+        written = time.perf_counter()
+
+        while worker.pushes == 0:
+            time.sleep(0.01)
+        synced = time.perf_counter()
+        worker.stop()
+
+        commits = int(_git(vault, "rev-list", "--count", "HEAD")) - commits_before
+        print(f"  в фоне:  запись {_summary(latencies)}; {commits} коммитов, {worker.pushes} push, "
+              f"закоммичено и отправлено через {synced - written:.1f}s после последней записи "
+              f"(пачка записана за {(written - start) * 1000:.0f} мс)")
+
+        tree = _git(remote, "ls-tree", "-r", "--name-only", "main", "--", "Notes")
+        pushed = len(tree.splitlines())
+        assert pushed == notes * 2, f"в удалённом репозитории {pushed} заметок из {notes * 2}"
+        assert not _git(vault, "status", "--porcelain")
+        print(f"  удалённый репозиторий: {pushed} заметок, рабочее дерево чистое\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк Git синхронизации vault")
+    parser.add_argument("--files", type=int, nargs="+", default=[5000], help="Размеры vault")
+    parser.add_argument("--notes", type=int, default=50, help="Заметок в пачке")
+    parser.add_argument("--commit-delay-ms", type=int, default=500, help="Пауза перед коммитом")
+    args = parser.parse_args()
+
+    for files in args.files:
+        run_benchmark(files, args.notes, args.commit_delay_ms)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Бенчмарк поиска по Obsidian vault: обход файлов против индекса FTS5
+
+Генерирует временный vault из N заметок (русский текст в разных
+словоформах, вложенные папки) и сравнивает:
+- scan: обход всех .md и поиск подстроки (как search_notes до индекса)
+- index: VaultSearchIndex.search - BM25 по FTS5; отдельно с проверкой
+  mtime перед каждым запросом (refresh_interval=0) и без неё
+
+Печатает время построения индекса, повторной синхронизации без
+изменений и медианную задержку запросов.
+
+Пример:
+    python scripts/bench_vault_search.py --notes 10000 50000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.obsidian_index import VaultSearchIndex  # noqa: E402
+
+WORDS = [
+    "проект", "проекта", "проекту", "отчёт", "отчёта", "встреча", "встречи",
+    "задача", "задачи", "идея", "идеи", "бюджет", "бюджета", "команда",
+    "команды", "клиент", "клиента", "релиз", "релиза", "план", "планы",
+    "молоко", "молока", "хлеб", "путешествие", "книга", "книги", "заметка",
+    "сегодня", "завтра", "обсудили", "решили", "нужно", "важно", "срочно",
+    "архитектура", "база", "данных", "сервер", "тесты", "дизайн", "рынок",
+]
+RARE_WORD = "квантование"
+
+QUERIES = [
+    ("частое слово", "проект"),
+    ("словоформа", "отчёты"),
+    ("два слова", "бюджет клиента"),
+    ("редкое слово", RARE_WORD),
+    ("нет совпадений", "фотосинтез"),
+]
+
+
+def generate_vault(path: str, notes: int, words_per_note: int = 150) -> None:
+    """Создаёт vault с notes заметками"""
+    rng = random.Random(1)
+
+    for i in range(notes):
+        folder = os.path.join(path, f"Folder {i % 50}", f"Sub {i % 7}")
+        os.makedirs(folder, exist_ok=True)
+
+        body = [rng.choice(WORDS) for _ in range(words_per_note)]
+        if i % 1000 == 0:
+            body.insert(rng.randrange(len(body)), RARE_WORD)
+
+        title = f"Заметка {i} {rng.choice(WORDS)}"
+        with open(os.path.join(folder, f"note_{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"---\ntitle: {title}\n---\n\n# {title}\n\n{' '.join(body)}\n")
+
+
+def scan_search(vault_path: str, query: str, limit: int = 5) -> list:
+    """Поиск обходом файлов, как ObsidianVault.search_notes до индекса"""
+    results = []
+    query_lower = query.lower()
+
+    for root, _, files in os.walk(vault_path):
+        for file in files:
+            if not file.endswith('.md'):
+                continue
+            with open(os.path.join(root, file), 'r', encoding='utf-8') as f:
+                content = f.read()
+            if query_lower in content.lower():
+                results.append(file)
+                if len(results) >= limit:
+                    return results
+
+    return results
+
+
+def _timed(func, repeat: int) -> tuple:
+    """Возвращает (результат, медианное время в мс)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return result, timings[len(timings) // 2] * 1000
+
+
+def run_benchmark(notes: int, repeat: int) -> None:
+    """Генерирует vault и печатает сравнение"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vault_path = os.path.join(tmp_dir, "vault")
+
+        start = time.perf_counter()
+        generate_vault(vault_path, notes)
+        print(f"Vault: {notes} заметок, генерация {time.perf_counter() - start:.1f}s")
+
+        index = VaultSearchIndex(vault_path, os.path.join(tmp_dir, "index.db"), refresh_interval=0)
+
+        start = time.perf_counter()
+        index.refresh(force=True)
+        build_seconds = time.perf_counter() - start
+
+        _, resync_ms = _timed(lambda: index.refresh(force=True), 3)
+        print(f"  построение индекса: {build_seconds:.1f}s, {index.stats()['index_size_mb']} МБ")
+        print(f"  синхронизация без изменений (обход mtime): {resync_ms:.0f} мс\n")
+
+        print(f"  {'запрос':16} {'scan, мс':>9} {'index+mtime, мс':>16} {'index, мс':>10} {'найдено':>8}")
+        for name, query in QUERIES:
+            _, scan_ms = _timed(lambda: scan_search(vault_path, query), max(1, repeat // 5))
+
+            index.refresh_interval = 0
+            _, mtime_ms = _timed(lambda: index.search(query), max(1, repeat // 5))
+
+            index.refresh_interval = 3600
+            results, index_ms = _timed(lambda: index.search(query), repeat)
+
+            print(f"  {name:16} {scan_ms:>9.1f} {mtime_ms:>16.1f} {index_ms:>10.2f} {len(results):>8}")
+
+        index.close()
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска по Obsidian vault")
+    parser.add_argument("--notes", type=int, nargs="+", default=[10000], help="Размеры vault")
+    parser.add_argument("--repeat", type=int, default=20, help="Повторов каждого запроса")
+    args = parser.parse_args()
+
+    for notes in args.notes:
+        run_benchmark(notes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
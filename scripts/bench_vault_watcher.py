@@ -0,0 +1,167 @@
+"""
+Бенчмарк наблюдателя vault: пачка изменений (как git pull) и поиск по тегу
+
+Генерирует временный vault из N заметок с тегами, запускает
+VaultWatcher и измеряет:
+- сколько проходит от последней записи пачки из M файлов до того, как
+  изменения видны в индексе, и сколькими обновлениями индекса они
+  применены (debounce);
+- поиск заметок по тегу и обратных ссылок: обход и разбор всех файлов
+  против VaultSearchIndex.notes_by_tag / get_note_info (метаданные в памяти);
+- первое построение индекса последовательно и в пуле процессов;
+- синхронизацию по mtime, которую наблюдатель заменяет.
+
+Пример:
+    python scripts/bench_vault_watcher.py --notes 10000 --burst 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from integrations.obsidian_index import VaultSearchIndex  # noqa: E402
+from integrations.obsidian_metadata import parse_note  # noqa: E402
+from integrations.obsidian_watcher import VaultWatcher  # noqa: E402
+
+TAGS = ["проект", "идея", "работа", "покупки", "здоровье", "книги", "путешествия", "финансы"]
+WORDS = ["встреча", "отчёт", "задача", "бюджет", "клиент", "релиз", "план", "заметка", "сегодня"]
+
+
+def write_note(path: str, i: int, rng: random.Random, marker: str = "") -> None:
+    """Записывает заметку с frontmatter, тегами и ссылками"""
+    tags = rng.sample(TAGS, 2)
+    body = " ".join(rng.choice(WORDS) for _ in range(100))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            f"---\ntitle: Заметка {i}\ntags: [{', '.join(tags)}]\n---\n\n"
+            f"# Заметка {i}\n\n{body} #{marker or rng.choice(TAGS)} [[Заметка {rng.randrange(i + 1)}]]\n"
+        )
+
+
+def scan_by_tag(vault_path: str, tag: str) -> list:
+    """Поиск по тегу обходом и разбором всех файлов"""
+    found = []
+    for root, dirs, files in os.walk(vault_path):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for file in files:
+            if file.endswith('.md'):
+                with open(os.path.join(root, file), encoding="utf-8") as f:
+                    if tag in parse_note(f.read(), file).tags:
+                        found.append(file)
+    return found
+
+
+def scan_backlinks(vault_path: str, name: str) -> list:
+    """Поиск обратных ссылок обходом и разбором всех файлов"""
+    found = []
+    for root, dirs, files in os.walk(vault_path):
+        dirs[:] = [d for d in dirs if not d.startswith('.')]
+        for file in files:
+            if file.endswith('.md'):
+                with open(os.path.join(root, file), encoding="utf-8") as f:
+                    if name in parse_note(f.read(), file).links:
+                        found.append(file)
+    return found
+
+
+def _median_ms(func, repeat: int) -> float:
+    """Медианное время вызова в мс"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1000
+
+
+def run_benchmark(notes: int, burst: int, debounce_ms: int, parse_workers: int) -> None:
+    """Генерирует vault и печатает результаты"""
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        vault_path = os.path.join(tmp_dir, "vault")
+        for i in range(notes):
+            folder = os.path.join(vault_path, f"Folder {i % 40}")
+            os.makedirs(folder, exist_ok=True)
+            write_note(os.path.join(folder, f"note_{i}.md"), i, rng)
+
+        for workers in (1, parse_workers):
+            build_index = VaultSearchIndex(
+                vault_path, os.path.join(tmp_dir, f"build_{workers}.db"), parse_workers=workers
+            )
+            start = time.perf_counter()
+            build_index.refresh(force=True)
+            print(f"Построение индекса, процессов {build_index.parse_workers}: "
+                  f"{time.perf_counter() - start:.1f}s")
+            build_index.close()
+
+        index = VaultSearchIndex(vault_path, os.path.join(tmp_dir, "index.db"), parse_workers=parse_workers)
+        watcher = VaultWatcher(index, debounce_ms=debounce_ms)
+
+        start = time.perf_counter()
+        watcher.start()
+        started = time.perf_counter()
+        # Начальная синхронизация идёт в потоке наблюдателя
+        while not index.watched:
+            time.sleep(0.01)
+        print(f"Vault: {notes} заметок, start() {(started - start) * 1000:.1f} мс, "
+              f"начальная индексация в фоне {time.perf_counter() - start:.1f}s ({watcher.mode})")
+
+        # Пачка как при git pull: изменённые заметки и новая папка
+        batches_before = watcher.batches
+        pulled = os.path.join(vault_path, "Pulled")
+        os.makedirs(pulled)
+        start = time.perf_counter()
+        for i in range(burst):
+            if i % 2:
+                write_note(os.path.join(pulled, f"new_{i}.md"), i, rng, marker="пачка")
+            else:
+                write_note(os.path.join(vault_path, f"Folder {i % 40}", f"note_{i}.md"), i, rng, marker="пачка")
+        written = time.perf_counter()
+
+        while len(index.notes_by_tag("пачка")) < burst:
+            time.sleep(0.01)
+        visible = time.perf_counter()
+
+        print(f"  пачка из {burst} файлов: запись {written - start:.2f}s, видна в индексе через "
+              f"{(visible - written) * 1000:.0f} мс после последней записи, "
+              f"обновлений индекса: {watcher.batches - batches_before}")
+
+        scan_ms = _median_ms(lambda: scan_by_tag(vault_path, "проект"), 3)
+        tag_ms = _median_ms(lambda: index.notes_by_tag("проект"), 50)
+        resync_ms = _median_ms(lambda: index.refresh(force=True), 3)
+
+        print(f"  поиск по тегу: обход {scan_ms:.0f} мс, notes_by_tag {tag_ms:.2f} мс "
+              f"({len(index.notes_by_tag('проект'))} заметок)")
+
+        target = "Заметка 10"
+        scan_ms = _median_ms(lambda: scan_backlinks(vault_path, target), 3)
+        links_ms = _median_ms(lambda: index.get_note_info("note_10"), 50)
+        print(f"  обратные ссылки: обход {scan_ms:.0f} мс, get_note_info {links_ms:.3f} мс "
+              f"({len(scan_backlinks(vault_path, target))} ссылок)")
+        print(f"  синхронизация по mtime (без наблюдателя - перед поиском): {resync_ms:.0f} мс\n")
+
+        watcher.stop()
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк наблюдателя vault")
+    parser.add_argument("--notes", type=int, nargs="+", default=[10000], help="Размеры vault")
+    parser.add_argument("--burst", type=int, default=1000, help="Файлов в пачке изменений")
+    parser.add_argument("--debounce-ms", type=int, default=500, help="Пауза накопления событий")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Процессов для разбора")
+    args = parser.parse_args()
+
+    for notes in args.notes:
+        run_benchmark(notes, args.burst, args.debounce_ms, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Бенчмарк голосовых подтверждений: быстрый путь против полного Whisper
+
+Прогоняет записанные ответы через распознавание, как /voice-confirm:
+- "полный Whisper" - transcribe + поиск ключевых слов (как было);
+- "быстрый путь" - маленькая модель со словарём подтверждений,
+  при неуверенности - полный Whisper (как сейчас).
+
+Записи лежат в подкаталогах по ожидаемому ответу:
+    fixtures/yes/*.ogg     - "да", "ага", "конечно" ...
+    fixtures/no/*.ogg      - "нет", "не надо" ...
+    fixtures/cancel/*.ogg  - "отмена", "стоп" ...
+    fixtures/other/*.ogg   - не ответ ("давай завтра в пять") - ждём
+                             переспрашивания или отказа, но не "да"
+
+Печатает точность, долю уверенных быстрых ответов и задержку
+p50/p95 каждого способа. Нужны faster-whisper и config.yaml (секция
+whisper; полное распознавание - как настроено в provider).
+
+Пример:
+    python scripts/bench_voice_confirm.py --fixtures tests_audio/confirm --repeat 3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.routes.voice_confirm import _detect_confirmation_intent  # noqa: E402
+from integrations.transcription import TranscriptionService  # noqa: E402
+from utils.config import load_config  # noqa: E402
+
+# Ожидаемый ответ endpoint по каталогу: True - выполнить, False - отменить
+EXPECTED = {'yes': True, 'no': False, 'cancel': False, 'other': None}
+AUDIO_EXTENSIONS = ('.ogg', '.oga', '.opus', '.mp3', '.wav', '.m4a', '.webm')
+
+
+def load_fixtures(fixtures_dir: str) -> list:
+    """(путь, метка) всех записей"""
+    fixtures = []
+    for label in EXPECTED:
+        label_dir = os.path.join(fixtures_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                fixtures.append((os.path.join(label_dir, name), label))
+    return fixtures
+
+
+def _is_correct(label: str, confirmed) -> bool:
+    """Для "other" ошибка - только выполнить действие"""
+    if label == 'other':
+        return confirmed is not True
+    return confirmed == EXPECTED[label]
+
+
+def _percentile_ms(timings: list, q: float) -> float:
+    timings = sorted(timings)
+    return timings[min(len(timings) - 1, int(len(timings) * q))] * 1000
+
+
+async def run_full(service: TranscriptionService, path: str):
+    text = await service.transcribe(path, language="ru")
+    return _detect_confirmation_intent(text), False
+
+
+async def run_fast(service: TranscriptionService, path: str):
+    result = await service.recognize_confirmation(path)
+    if result is not None and result.confident:
+        return result.intent == 'yes', True
+    return (await run_full(service, path))[0], False
+
+
+async def run_benchmark(fixtures: list, repeat: int) -> None:
+    service = TranscriptionService(load_config())
+    if not service.confirmation_available:
+        print("Быстрый путь недоступен: нужен faster-whisper и whisper.confirmation.enabled")
+        return
+
+    # Загрузка моделей не входит в замеры
+    service.preload_confirmation()
+    await service.recognize_confirmation(fixtures[0][0])
+    await service.transcribe(fixtures[0][0], language="ru")
+
+    print(f"  {'способ':16} {'точность':>9} {'быстро':>7} {'p50, мс':>8} {'p95, мс':>8}")
+    for name, run in (("полный Whisper", run_full), ("быстрый путь", run_fast)):
+        timings, correct, fast, errors = [], 0, 0, []
+        for _ in range(repeat):
+            for path, label in fixtures:
+                start = time.perf_counter()
+                confirmed, was_fast = await run(service, path)
+                timings.append(time.perf_counter() - start)
+                fast += was_fast
+                if _is_correct(label, confirmed):
+                    correct += 1
+                elif (path, confirmed) not in errors:
+                    errors.append((path, confirmed))
+
+        total = len(fixtures) * repeat
+        print(f"  {name:16} {correct / total:>9.1%} {fast / total:>7.0%} "
+              f"{_percentile_ms(timings, 0.5):>8.0f} {_percentile_ms(timings, 0.95):>8.0f}")
+        for path, confirmed in errors:
+            print(f"      ошибка: {os.path.relpath(path)} -> {confirmed}")
+
+    service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк голосовых подтверждений")
+    parser.add_argument("--fixtures", required=True, help="Каталог с yes/ no/ cancel/ other/")
+    parser.add_argument("--repeat", type=int, default=3, help="Прогонов каждой записи")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error(f"В {args.fixtures} нет записей (ожидаются подкаталоги {', '.join(EXPECTED)})")
+
+    counts = {label: sum(1 for _, fixture_label in fixtures if fixture_label == label) for label in EXPECTED}
+    print(f"{len(fixtures)} записей: " + ", ".join(f"{label} {count}" for label, count in counts.items()) + "\n")
+
+    asyncio.run(run_benchmark(fixtures, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
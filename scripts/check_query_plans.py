@@ -0,0 +1,152 @@
+"""
+Проверка планов запросов Database (EXPLAIN QUERY PLAN)
+
+Создаёт временную базу через Database.init_db, наполняет её данными,
+выполняет ANALYZE и проверяет, что горячие запросы используют ожидаемые
+индексы: без полного сканирования таблицы и без временного B-дерева для
+ORDER BY. Завершается с кодом 1, если какой-либо план деградировал -
+запускать после любых изменений схемы.
+
+Пример:
+    python scripts/check_query_plans.py -v
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import (  # noqa: E402
+    CLEANUP_CONFIRMATIONS_SQL,
+    CLEANUP_MESSAGES_SQL,
+    FREQUENT_TERMS_SQL,
+    GET_CONFIRMATION_SQL,
+    INSERT_MESSAGE_SQL,
+    INSERT_USAGE_SQL,
+    MESSAGE_HISTORY_SQL,
+    REJECT_PENDING_CONFIRMATIONS_SQL,
+    SESSION_HISTORY_SQL,
+    USAGE_DAILY_SUMMARY_SQL,
+    USAGE_HOURLY_SUMMARY_SQL,
+    USAGE_STATS_SQL,
+    Database,
+)
+
+# (название, SQL, параметры, ожидаемый индекс)
+# SQL - те же константы, что выполняет Database
+QUERIES = [
+    ("get_message_history", MESSAGE_HISTORY_SQL, ("user_1", 10), "idx_messages_user_timestamp"),
+    (
+        "get_message_history (session)",
+        SESSION_HISTORY_SQL,
+        ("user_1", "session_1", 5),
+        "idx_messages_user_session_timestamp",
+    ),
+    ("get_usage_stats", USAGE_STATS_SQL, ("user_1", 30), "idx_usage_stats_user_timestamp"),
+    ("cleanup_old_data (messages)", CLEANUP_MESSAGES_SQL, (30,), "idx_messages_timestamp"),
+    ("cleanup_old_data (confirmations)", CLEANUP_CONFIRMATIONS_SQL, (30,), "idx_confirmations_created_at"),
+    ("reject_pending_confirmations", REJECT_PENDING_CONFIRMATIONS_SQL, ("user_1",), "idx_confirmations_pending"),
+    ("get_confirmation", GET_CONFIRMATION_SQL, ("confirmation_1",), "sqlite_autoindex_confirmations_1"),
+    (
+        "get_frequent_terms",
+        FREQUENT_TERMS_SQL,
+        ("user_1", "keyword", None, None, 10),
+        "idx_user_terms_top",
+    ),
+    ("get_usage_summary (daily)", USAGE_DAILY_SUMMARY_SQL, ("user_1", 29), "PRIMARY KEY"),
+    ("get_usage_summary (hourly)", USAGE_HOURLY_SUMMARY_SQL, ("user_1", 29), "PRIMARY KEY"),
+]
+
+
+async def _fill(db: Database, users: int, rows_per_user: int) -> None:
+    """Наполняет базу, чтобы ANALYZE собрал реалистичную статистику"""
+    now = datetime.utcnow()
+    messages, usage, confirmations = [], [], []
+
+    for user in range(users):
+        for i in range(rows_per_user):
+            timestamp = (now - timedelta(minutes=i * 17)).strftime("%Y-%m-%d %H:%M:%S")
+            terms = f'[["keyword", "слов{i % 40}", "слово{i % 40}"]]'
+            messages.append((f"user_{user}", "user", f"Сообщение {i}", f"session_{i % 20}", terms, timestamp))
+            usage.append((f"user_{user}", "telegram", "general", 100, 50, 50, 0, 0, 200, timestamp))
+            status = "pending" if i % 50 == 0 else "confirmed"
+            confirmations.append((f"c_{user}_{i}", f"user_{user}", "add_task", "{}", "?", status, timestamp))
+
+    async with db._write() as connection:
+        await connection.executemany(INSERT_MESSAGE_SQL, messages)
+        await connection.executemany(INSERT_USAGE_SQL, usage)
+        await connection.executemany(
+            """
+            INSERT INTO confirmations
+            (id, user_id, action_type, action_data, confirmation_text, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            confirmations
+        )
+        await connection.execute("ANALYZE")
+
+
+def _check_plan(plan: list, expected_index: str) -> list:
+    """Возвращает список проблем плана"""
+    problems = []
+    text = "\n".join(plan)
+
+    if expected_index not in text:
+        problems.append(f"не используется {expected_index}")
+
+    for line in plan:
+        if line.startswith("SCAN ") and "USING" not in line:
+            problems.append(f"полное сканирование: {line}")
+        if "USE TEMP B-TREE FOR ORDER BY" in line:
+            problems.append("сортировка во временном B-дереве")
+
+    return problems
+
+
+async def run_checks(verbose: bool) -> int:
+    """Проверяет все запросы, возвращает количество деградаций"""
+    failures = 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "plans.db"))
+        await db.init_db()
+        await _fill(db, users=20, rows_per_user=500)
+
+        for name, sql, params, expected_index in QUERIES:
+            plan = await db.explain_query_plan(sql, params)
+            problems = _check_plan(plan, expected_index)
+
+            status = "FAIL" if problems else "ok"
+            print(f"[{status:4}] {name}")
+            if problems or verbose:
+                for line in plan:
+                    print(f"         {line}")
+            for problem in problems:
+                print(f"         ! {problem}")
+
+            failures += bool(problems)
+
+        await db.close()
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка планов запросов SQLite")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Печатать все планы")
+    args = parser.parse_args()
+
+    failures = asyncio.run(run_checks(args.verbose))
+    if failures:
+        print(f"\nДеградировало планов: {failures}")
+        sys.exit(1)
+
+    print("\nВсе планы используют ожидаемые индексы")
+
+
+if __name__ == "__main__":
+    main()
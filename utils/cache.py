@@ -1,11 +1,13 @@
 """
-Модуль кэширования TTS файлов
+Модуль кэширования: TTS файлы и ограниченный in-memory кэш (LRU + TTL)
 """
 
+import asyncio
 import os
 import time
 import hashlib
-from typing import Optional
+from collections import OrderedDict
+from typing import Optional, Any, Awaitable, Callable, Dict, Hashable, Set
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -191,6 +193,275 @@ class TTSCache:
         }
 
 
+class TTLCache:
+    """
+    In-memory кэш с ограничением размера (LRU) и временем жизни записей (TTL)
+
+    Не потокобезопасен: рассчитан на использование из одного event loop.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300.0):
+        """
+        Инициализация кэша
+
+        Args:
+            max_entries: Максимальное количество записей (старые вытесняются)
+            ttl: Время жизни записи в секундах
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Получает значение по ключу
+
+        Args:
+            key: Ключ
+            default: Значение, если записи нет или она устарела
+
+        Returns:
+            Значение из кэша или default
+        """
+        entry = self._data.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение
+
+        Args:
+            key: Ключ
+            value: Значение
+            ttl: Время жизни (по умолчанию - общий TTL кэша)
+        """
+        self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """
+        Удаляет запись
+
+        Args:
+            key: Ключ
+
+        Returns:
+            True если запись была в кэше
+        """
+        if self._data.pop(key, None) is None:
+            return False
+
+        self.invalidations += 1
+        return True
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Удаляет все записи, ключи которых удовлетворяют условию
+
+        Args:
+            predicate: Функция key -> bool
+
+        Returns:
+            Количество удалённых записей
+        """
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def invalidate_items(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Удаляет все записи, для которых условие от ключа и значения истинно
+
+        Args:
+            predicate: Функция (key, value) -> bool
+
+        Returns:
+            Количество удалённых записей
+        """
+        keys = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+        for key in keys:
+            del self._data[key]
+
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Получает метрики кэша
+
+        Returns:
+            Словарь с размером, попаданиями, промахами и долей попаданий
+        """
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+
+_MISSING = object()
+
+
+class AsyncTTLCache(TTLCache):
+    """
+    TTLCache для результатов асинхронных вычислений
+
+    Одновременные запросы одного ключа ждут одно вычисление, а не
+    запускают каждый своё. Если ключ инвалидирован во время вычисления,
+    результат отдаётся ожидающим, но в кэш не попадает.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 300.0):
+        """
+        Инициализация кэша
+
+        Args:
+            max_entries: Максимальное количество записей (старые вытесняются)
+            ttl: Время жизни записи в секундах
+        """
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._invalidated: Set[Hashable] = set()
+        self.coalesced = 0
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Получает значение из кэша или вычисляет его один раз
+
+        Args:
+            key: Ключ
+            factory: Асинхронная функция без аргументов, вычисляющая значение
+            ttl: Время жизни записи (по умолчанию - общий TTL кэша)
+
+        Returns:
+            Значение
+        """
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            future = self._inflight.get(key)
+            if future is None:
+                break
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Отменили вычисляющую задачу, а не нас - вычислить заново
+                if future.cancelled():
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+
+        try:
+            value = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение получат ожидающие; без них не предупреждать
+            future.exception()
+            raise
+        else:
+            if key not in self._invalidated:
+                self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
+            self._invalidated.discard(key)
+
+    def delete(self, key: Hashable) -> bool:
+        """
+        Удаляет запись и отменяет сохранение идущего вычисления
+
+        Args:
+            key: Ключ
+
+        Returns:
+            True если запись была в кэше
+        """
+        if key in self._inflight:
+            self._invalidated.add(key)
+        return super().delete(key)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Удаляет записи по условию и отменяет сохранение идущих вычислений
+
+        Args:
+            predicate: Функция key -> bool
+
+        Returns:
+            Количество удалённых записей
+        """
+        self._invalidated.update(key for key in self._inflight if predicate(key))
+        return super().invalidate(predicate)
+
+    def clear(self) -> None:
+        """Очищает кэш"""
+        self._invalidated.update(self._inflight)
+        super().clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Получает метрики кэша
+
+        Returns:
+            Метрики TTLCache и количество объединённых запросов
+        """
+        stats = super().stats()
+        stats['coalesced'] = self.coalesced
+        stats['inflight'] = len(self._inflight)
+        return stats
+
+
 def get_or_create_tts(text: str, base_url: str, cache_dir: str = "data/tts_cache") -> str:
     """
     Вспомогательная функция для получения URL TTS файла
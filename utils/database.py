@@ -3,25 +3,197 @@
 """
 
 import aiosqlite
+import asyncio
+import json
 import os
-from typing import Optional, List, Dict, Any
+from contextlib import asynccontextmanager
+from itertools import groupby
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 from datetime import datetime
 from utils.logger import get_logger
+from utils.migrations import MigrationRunner, rebuild_usage_rollups, rebuild_user_terms
+from utils.text_normalizer import get_normalizer
 
 logger = get_logger(__name__)
 
+# Вставки, которые могут идти через буфер отложенной записи.
+# timestamp задаётся явно - в момент вызова, а не в момент сброса буфера
+INSERT_MESSAGE_SQL = """
+    INSERT INTO messages (user_id, role, content, session_id, terms, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_USAGE_SQL = """
+    INSERT INTO usage_stats (
+        user_id, interface, action_type, tokens_used,
+        input_tokens, output_tokens, cache_read_tokens,
+        cache_creation_tokens, latency_ms, timestamp
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_SQL = {
+    "messages": INSERT_MESSAGE_SQL,
+    "usage_stats": INSERT_USAGE_SQL,
+}
+
+# Имена параметров вставок - в таком виде записи получают хуки записи
+INSERT_COLUMNS = {
+    "messages": ("user_id", "role", "content", "session_id", "terms", "timestamp"),
+    "usage_stats": (
+        "user_id", "interface", "action_type", "tokens_used",
+        "input_tokens", "output_tokens", "cache_read_tokens",
+        "cache_creation_tokens", "latency_ms", "timestamp"
+    ),
+}
+
+# Горячие запросы. Вынесены в константы, чтобы scripts/check_query_plans.py
+# проверял планы именно тех запросов, которые выполняет Database
+MESSAGE_HISTORY_SQL = """
+    SELECT * FROM messages
+    WHERE user_id = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+SESSION_HISTORY_SQL = """
+    SELECT * FROM messages
+    WHERE user_id = ? AND session_id = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+
+GET_CONFIRMATION_SQL = "SELECT * FROM confirmations WHERE id = ?"
+
+REJECT_PENDING_CONFIRMATIONS_SQL = """
+    UPDATE confirmations
+    SET status = 'rejected', confirmed_at = CURRENT_TIMESTAMP
+    WHERE user_id = ? AND status = 'pending'
+"""
+
+USAGE_STATS_SQL = """
+    SELECT * FROM usage_stats
+    WHERE user_id = ?
+    AND timestamp >= datetime('now', '-' || ? || ' days')
+    ORDER BY timestamp DESC
+"""
+
+USAGE_DAILY_SUMMARY_SQL = """
+    SELECT action_type, interface,
+           SUM(requests) AS requests, SUM(tokens_used) AS tokens,
+           SUM(input_tokens) AS input_tokens,
+           SUM(cache_read_tokens) AS cache_read_tokens,
+           SUM(cache_creation_tokens) AS cache_creation_tokens
+    FROM usage_daily
+    WHERE user_id = ?
+    AND day >= date('now', '-' || ? || ' days')
+    GROUP BY action_type, interface
+"""
+
+USAGE_HOURLY_SUMMARY_SQL = """
+    SELECT hour, SUM(requests) AS requests
+    FROM usage_hourly
+    WHERE user_id = ?
+    AND day >= date('now', '-' || ? || ' days')
+    GROUP BY hour
+"""
+
+FREQUENT_TERMS_SQL = """
+    SELECT term, surface, count, last_seen FROM user_terms
+    WHERE user_id = ? AND kind = ?
+    AND (? IS NULL OR last_seen >= datetime('now', '-' || ? || ' days'))
+    ORDER BY count DESC
+    LIMIT ?
+"""
+
+CLEANUP_MESSAGES_SQL = """
+    DELETE FROM messages
+    WHERE timestamp < datetime('now', '-' || ? || ' days')
+"""
+
+CLEANUP_CONFIRMATIONS_SQL = """
+    DELETE FROM confirmations
+    WHERE created_at < datetime('now', '-' || ? || ' days')
+"""
+
+# Хук записи: (соединение записи, [(таблица, запись)]) в той же транзакции
+WriteHook = Callable[[aiosqlite.Connection, List[Tuple[str, Dict[str, Any]]]], Awaitable[None]]
+
+
+def _utc_timestamp() -> str:
+    """Текущее время в формате CURRENT_TIMESTAMP SQLite (UTC)"""
+    return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
 
 class Database:
-    """Класс для работы с SQLite базой данных"""
+    """
+    Класс для работы с SQLite базой данных
+
+    Соединения долгоживущие и открываются при первом обращении:
+    одно соединение для записи (запись сериализуется через asyncio.Lock)
+    и пул соединений для чтения. База работает в режиме WAL, поэтому
+    чтение не блокируется записью.
+
+    При write_behind=True сообщения и статистика не пишутся сразу, а
+    копятся в буфере и сбрасываются одной транзакцией раз в
+    flush_interval_ms или при накоплении flush_max_rows записей. Чтение
+    истории и статистики сначала сбрасывает буфер, close() - тоже.
 
-    def __init__(self, db_path: str = "data/assistant.db"):
+    Хуки записи (add_write_hook) получают записанные сообщения и
+    статистику в той же транзакции - так поддерживаются производные
+    данные, например профили пользователей.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/assistant.db",
+        pool_size: int = 4,
+        cache_size_mb: int = 16,
+        busy_timeout_ms: int = 5000,
+        cached_statements: int = 256,
+        write_behind: bool = False,
+        flush_interval_ms: int = 200,
+        flush_max_rows: int = 100
+    ):
         """
         Инициализация базы данных
 
         Args:
             db_path: Путь к файлу базы данных
+            pool_size: Количество соединений для чтения
+            cache_size_mb: Размер кэша страниц на соединение (МБ)
+            busy_timeout_ms: Ожидание блокировки БД другим процессом (мс)
+            cached_statements: Размер кэша подготовленных выражений на соединение
+            write_behind: Буферизовать save_message/save_usage_stats
+            flush_interval_ms: Максимальная задержка сброса буфера (мс)
+            flush_max_rows: Размер буфера, при котором он сбрасывается сразу
         """
         self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self.cache_size_mb = cache_size_mb
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+
+        # Буфер отложенной записи: (таблица, параметры) в порядке вызовов
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_rows = max(1, flush_max_rows)
+        self._pending_writes: List[Tuple[str, tuple]] = []
+        self._has_pending = asyncio.Event()
+        self._buffer_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        self._write_hooks: List[WriteHook] = []
+        # Функции, вызываемые после коммита текущей транзакции записи
+        self._after_commit: List[Callable[[], None]] = []
+
         self._ensure_db_directory()
 
     def _ensure_db_directory(self):
@@ -31,65 +203,289 @@ class Database:
             os.makedirs(db_dir, exist_ok=True)
             logger.info(f"Создана директория для БД: {db_dir}")
 
+    async def _connect(self, read_only: bool = False) -> aiosqlite.Connection:
+        """
+        Открывает соединение и настраивает PRAGMA
+
+        Args:
+            read_only: Соединение только для чтения
+
+        Returns:
+            Открытое соединение
+        """
+        db = await aiosqlite.connect(self.db_path, cached_statements=self.cached_statements)
+        db.row_factory = aiosqlite.Row
+
+        await db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        await db.execute("PRAGMA journal_mode = WAL")
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute(f"PRAGMA cache_size = {-int(self.cache_size_mb) * 1024}")
+        await db.execute("PRAGMA temp_store = MEMORY")
+
+        if read_only:
+            await db.execute("PRAGMA query_only = ON")
+
+        return db
+
+    async def _open(self) -> None:
+        """Открывает соединения при первом обращении"""
+        if self._writer is not None:
+            return
+
+        async with self._open_lock:
+            if self._writer is not None:
+                return
+
+            # Соединение записи первым: оно создаёт файл и включает WAL
+            writer = await self._connect()
+
+            readers: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.pool_size):
+                connection = await self._connect(read_only=True)
+                self._reader_connections.append(connection)
+                readers.put_nowait(connection)
+
+            self._readers = readers
+            self._writer = writer
+            logger.debug(f"Открыты соединения с БД: 1 запись, {self.pool_size} чтение")
+
+    @asynccontextmanager
+    async def _write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Соединение для записи: одна транзакция, commit при выходе
+
+        Yields:
+            Соединение записи
+        """
+        await self._open()
+
+        async with self._write_lock:
+            self._after_commit = []
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                self._after_commit = []
+                await self._writer.rollback()
+                raise
+
+            callbacks, self._after_commit = self._after_commit, []
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Ошибка обработчика после коммита: {e}", exc_info=True)
+
+    @asynccontextmanager
+    async def _read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Соединение для чтения из пула
+
+        Yields:
+            Соединение чтения
+        """
+        await self._open()
+
+        connection = await self._readers.get()
+        try:
+            yield connection
+        finally:
+            self._readers.put_nowait(connection)
+
+    def add_write_hook(self, hook: WriteHook) -> None:
+        """
+        Регистрирует хук записи сообщений и статистики
+
+        Хук вызывается после вставки (сразу или при сбросе буфера) в той
+        же транзакции и получает соединение записи и список
+        (таблица, запись), где запись - словарь по INSERT_COLUMNS. Ошибка
+        хука откатывает только его изменения и не теряет сами записи.
+
+        Args:
+            hook: Асинхронная функция (соединение, записи)
+        """
+        self._write_hooks.append(hook)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        Откладывает вызов до коммита текущей транзакции записи
+
+        Для побочных эффектов вне БД (например, сброса кэшей), которые
+        нельзя выполнять до коммита: иначе параллельное чтение успеет
+        закэшировать старые данные. При откате транзакции (или отмене
+        изменений хука записи) вызов отбрасывается. Вызывать только
+        внутри _write().
+
+        Args:
+            callback: Синхронная функция без аргументов
+        """
+        self._after_commit.append(callback)
+
+    async def _run_write_hooks(
+        self,
+        db: aiosqlite.Connection,
+        batch: List[Tuple[str, tuple]]
+    ) -> None:
+        """
+        Вызывает хуки записи для пакета вставок
+
+        Args:
+            db: Соединение записи (внутри транзакции)
+            batch: Список (таблица, параметры)
+        """
+        if not self._write_hooks:
+            return
+
+        records = [
+            (table, dict(zip(INSERT_COLUMNS[table], params)))
+            for table, params in batch
+        ]
+
+        for hook in self._write_hooks:
+            await db.execute("SAVEPOINT write_hook")
+            pending_callbacks = len(self._after_commit)
+            try:
+                await hook(db, records)
+            except Exception as e:
+                await db.execute("ROLLBACK TO write_hook")
+                del self._after_commit[pending_callbacks:]
+                logger.error(f"Ошибка хука записи {getattr(hook, '__qualname__', hook)}: {e}", exc_info=True)
+            await db.execute("RELEASE write_hook")
+
+    async def _insert(self, table: str, params: tuple) -> Optional[int]:
+        """
+        Выполняет вставку сразу или ставит её в буфер отложенной записи
+
+        Args:
+            table: Таблица из INSERT_SQL
+            params: Параметры в порядке INSERT_COLUMNS
+
+        Returns:
+            ID созданной записи или None, если запись отложена
+        """
+        if not self.write_behind:
+            async with self._write() as db:
+                cursor = await db.execute(INSERT_SQL[table], params)
+                await self._run_write_hooks(db, [(table, params)])
+                return cursor.lastrowid
+
+        self._pending_writes.append((table, params))
+        self._has_pending.set()
+
+        if len(self._pending_writes) >= self.flush_max_rows:
+            self._buffer_full.set()
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+        return None
+
+    async def _flush_loop(self) -> None:
+        """Фоновый сброс буфера по времени или по размеру"""
+        while True:
+            await self._has_pending.wait()
+
+            try:
+                await asyncio.wait_for(self._buffer_full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Ошибка фонового сброса буфера записи: {e}", exc_info=True)
+
+    async def flush(self) -> int:
+        """
+        Сбрасывает буфер отложенной записи одной транзакцией
+
+        Если пакет не записался целиком, записи повторяются по одной,
+        чтобы одна некорректная запись не потеряла остальные.
+
+        Returns:
+            Количество записанных строк
+        """
+        # Блокировка: чтение, пришедшее во время сброса, дождётся его конца
+        async with self._flush_lock:
+            if not self._pending_writes:
+                return 0
+
+            batch = self._pending_writes
+            self._pending_writes = []
+            self._has_pending.clear()
+            self._buffer_full.clear()
+
+            try:
+                async with self._write() as db:
+                    for table, group in groupby(batch, key=lambda item: item[0]):
+                        await db.executemany(INSERT_SQL[table], [params for _, params in group])
+                    await self._run_write_hooks(db, batch)
+
+                logger.debug(f"Сброшен буфер записи: {len(batch)} строк")
+                return len(batch)
+
+            except Exception as e:
+                logger.error(f"Ошибка пакетной записи ({len(batch)} строк), запись по одной: {e}")
+
+            written = 0
+            for table, params in batch:
+                try:
+                    async with self._write() as db:
+                        await db.execute(INSERT_SQL[table], params)
+                        await self._run_write_hooks(db, [(table, params)])
+                    written += 1
+                except Exception as e:
+                    logger.error(f"Запись потеряна: {e}; параметры: {params}")
+
+            return written
+
+    async def _flush_pending(self) -> None:
+        """Сбрасывает буфер перед чтением (чтение видит свои записи)"""
+        if self._pending_writes or self._flush_lock.locked():
+            await self.flush()
+
+    async def close(self) -> None:
+        """Сбрасывает буфер записи и закрывает все соединения"""
+        if self._flush_task is not None:
+            # Остановить фоновый сброс не посреди записи пакета
+            async with self._flush_lock:
+                self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        await self.flush()
+
+        async with self._open_lock:
+            if self._writer is None:
+                return
+
+            async with self._write_lock:
+                await self._writer.close()
+                self._writer = None
+
+            for connection in self._reader_connections:
+                await connection.close()
+
+            self._reader_connections = []
+            self._readers = None
+            logger.debug("Соединения с БД закрыты")
+
     async def init_db(self):
-        """Инициализирует таблицы в базе данных"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Таблица для хранения истории сообщений
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    role TEXT NOT NULL,
-                    content TEXT NOT NULL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    session_id TEXT
-                )
-            """)
-
-            # Таблица для подтверждений действий
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS confirmations (
-                    id TEXT PRIMARY KEY,
-                    user_id TEXT NOT NULL,
-                    action_type TEXT NOT NULL,
-                    action_data TEXT NOT NULL,
-                    confirmation_text TEXT NOT NULL,
-                    status TEXT DEFAULT 'pending',
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    confirmed_at DATETIME
-                )
-            """)
-
-            # Таблица для статистики использования
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS usage_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    interface TEXT NOT NULL,
-                    action_type TEXT NOT NULL,
-                    tokens_used INTEGER,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-
-            # Индексы для оптимизации запросов
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_user_id
-                ON messages(user_id)
-            """)
-
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_messages_timestamp
-                ON messages(timestamp)
-            """)
-
-            await db.execute("""
-                CREATE INDEX IF NOT EXISTS idx_confirmations_user_id
-                ON confirmations(user_id)
-            """)
-
-            await db.commit()
-            logger.info("База данных инициализирована")
+        """
+        Инициализирует схему базы данных
+
+        Применяет неприменённые миграции из utils/migrations.py
+        (с блокировкой между процессами бота и API).
+        """
+        applied = await MigrationRunner(self).run()
+
+        if applied:
+            logger.info(f"Применены миграции схемы: {applied}")
+
+        logger.info("База данных инициализирована")
 
     async def save_message(
         self,
@@ -97,10 +493,14 @@ class Database:
         role: str,
         content: str,
         session_id: Optional[str] = None
-    ) -> int:
+    ) -> Optional[int]:
         """
         Сохраняет сообщение в историю
 
+        Для сообщений пользователя сразу сохраняются нормализованные
+        термины (ключевые слова и товары), агрегаты по ним обновляет
+        триггер.
+
         Args:
             user_id: ID пользователя
             role: Роль (user/assistant)
@@ -108,18 +508,18 @@ class Database:
             session_id: ID сессии (опционально)
 
         Returns:
-            ID созданной записи
+            ID созданной записи (None при отложенной записи)
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                """
-                INSERT INTO messages (user_id, role, content, session_id)
-                VALUES (?, ?, ?, ?)
-                """,
-                (user_id, role, content, session_id)
-            )
-            await db.commit()
-            return cursor.lastrowid
+        terms = None
+        if role == 'user':
+            extracted = get_normalizer().extract_terms(content)
+            if extracted:
+                terms = json.dumps(extracted, ensure_ascii=False)
+
+        return await self._insert(
+            "messages",
+            (user_id, role, content, session_id, terms, _utc_timestamp())
+        )
 
     async def get_message_history(
         self,
@@ -138,29 +538,14 @@ class Database:
         Returns:
             Список сообщений
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        await self._flush_pending()
+
+        async with self._read() as db:
 
             if session_id:
-                cursor = await db.execute(
-                    """
-                    SELECT * FROM messages
-                    WHERE user_id = ? AND session_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                    """,
-                    (user_id, session_id, limit)
-                )
+                cursor = await db.execute(SESSION_HISTORY_SQL, (user_id, session_id, limit))
             else:
-                cursor = await db.execute(
-                    """
-                    SELECT * FROM messages
-                    WHERE user_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                    """,
-                    (user_id, limit)
-                )
+                cursor = await db.execute(MESSAGE_HISTORY_SQL, (user_id, limit))
 
             rows = await cursor.fetchall()
             return [dict(row) for row in reversed(rows)]
@@ -183,7 +568,7 @@ class Database:
             action_data: Данные действия (JSON)
             confirmation_text: Текст подтверждения
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             await db.execute(
                 """
                 INSERT INTO confirmations
@@ -192,7 +577,6 @@ class Database:
                 """,
                 (confirmation_id, user_id, action_type, action_data, confirmation_text)
             )
-            await db.commit()
             logger.info(f"Сохранен запрос на подтверждение: {confirmation_id}")
 
     async def get_confirmation(self, confirmation_id: str) -> Optional[Dict[str, Any]]:
@@ -205,12 +589,8 @@ class Database:
         Returns:
             Данные подтверждения или None
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            cursor = await db.execute(
-                "SELECT * FROM confirmations WHERE id = ?",
-                (confirmation_id,)
-            )
+        async with self._read() as db:
+            cursor = await db.execute(GET_CONFIRMATION_SQL, (confirmation_id,))
             row = await cursor.fetchone()
             return dict(row) if row else None
 
@@ -226,7 +606,7 @@ class Database:
             confirmation_id: ID подтверждения
             status: Новый статус (confirmed/rejected)
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             await db.execute(
                 """
                 UPDATE confirmations
@@ -235,15 +615,50 @@ class Database:
                 """,
                 (status, confirmation_id)
             )
-            await db.commit()
             logger.info(f"Обновлен статус подтверждения {confirmation_id}: {status}")
 
+    async def reject_pending_confirmations(self, user_id: str) -> int:
+        """
+        Отклоняет все ожидающие подтверждения пользователя
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Количество отклонённых подтверждений
+        """
+        async with self._write() as db:
+            cursor = await db.execute(REJECT_PENDING_CONFIRMATIONS_SQL, (user_id,))
+
+        if cursor.rowcount:
+            logger.info(f"Отклонено ожидающих подтверждений для {user_id}: {cursor.rowcount}")
+
+        return cursor.rowcount
+
+    async def explain_query_plan(self, sql: str, params: tuple = ()) -> List[str]:
+        """
+        Возвращает план выполнения запроса (EXPLAIN QUERY PLAN)
+
+        Args:
+            sql: SQL запрос
+            params: Параметры запроса
+
+        Returns:
+            Строки плана, например "SEARCH messages USING INDEX ..."
+        """
+        async with self._read() as db:
+            cursor = await db.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            rows = await cursor.fetchall()
+
+        return [row['detail'] for row in rows]
+
     async def save_usage_stats(
         self,
         user_id: str,
         interface: str,
         action_type: str,
-        tokens_used: int = 0
+        tokens_used: int = 0,
+        usage: Optional[Dict[str, int]] = None
     ) -> None:
         """
         Сохраняет статистику использования
@@ -253,21 +668,29 @@ class Database:
             interface: Интерфейс (telegram/api)
             action_type: Тип действия
             tokens_used: Количество использованных токенов
+            usage: Детализация токенов от агента (input/output/cache_read/
+                cache_creation токены и latency_ms), опционально
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """
-                INSERT INTO usage_stats (user_id, interface, action_type, tokens_used)
-                VALUES (?, ?, ?, ?)
-                """,
-                (user_id, interface, action_type, tokens_used)
+        usage = usage or {}
+
+        await self._insert(
+            "usage_stats",
+            (
+                user_id, interface, action_type, tokens_used,
+                usage.get('input_tokens', 0),
+                usage.get('output_tokens', 0),
+                usage.get('cache_read_tokens', 0),
+                usage.get('cache_creation_tokens', 0),
+                usage.get('latency_ms'),
+                _utc_timestamp()
             )
-            await db.commit()
+        )
 
     async def get_usage_stats(
         self,
         user_id: str,
-        days: int = 30
+        days: int = 30,
+        conn: Optional[aiosqlite.Connection] = None
     ) -> List[Dict[str, Any]]:
         """
         Получает статистику использования за период
@@ -275,24 +698,247 @@ class Database:
         Args:
             user_id: ID пользователя
             days: Количество дней
+            conn: Соединение записи, чтобы читать в текущей транзакции
+                (буфер записи при этом не сбрасывается)
 
         Returns:
             Список записей статистики
         """
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        if conn is not None:
+            cursor = await conn.execute(USAGE_STATS_SQL, (user_id, days))
+            return [dict(row) for row in await cursor.fetchall()]
+
+        await self._flush_pending()
+
+        async with self._read() as db:
+            cursor = await db.execute(USAGE_STATS_SQL, (user_id, days))
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+
+    async def rebuild_usage_rollups(self) -> None:
+        """
+        Пересчитывает агрегаты статистики (задача обслуживания)
+
+        Агрегаты поддерживаются триггером, пересчёт нужен только после
+        ручной правки usage_stats. Дни, сырые записи которых уже удалены,
+        после пересчёта пропадут и из агрегатов.
+        """
+        await self._flush_pending()
+
+        runner = MigrationRunner(self)
+        async with runner.lease():
+            await rebuild_usage_rollups(runner)
+
+    async def get_usage_summary(
+        self,
+        user_id: str,
+        days: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Получает сводку использования за период по дневным агрегатам
+
+        Args:
+            user_id: ID пользователя
+            days: Количество дней (включая сегодняшний, по UTC)
+
+        Returns:
+            Словарь с полями:
+            - total_requests, total_tokens: итоги за период
+            - action_counts: [{"action_type", "count", "tokens"}] по убыванию
+            - interface_counts: интерфейс -> количество запросов
+            - hour_histogram: 24 значения - запросы по часам суток (UTC)
+            - last_day: последний день с активностью или None
+            - input_tokens, cache_read_tokens, cache_creation_tokens: входные
+              токены без кэша, из кэша и записанные в кэш
+            - cache_hit_ratio: доля входных токенов из кэша промпта
+        """
+        await self._flush_pending()
+
+        async with self._read() as db:
+            cursor = await db.execute(USAGE_DAILY_SUMMARY_SQL, (user_id, days - 1))
+            daily_rows = await cursor.fetchall()
+
+            cursor = await db.execute(USAGE_HOURLY_SUMMARY_SQL, (user_id, days - 1))
+            hourly_rows = await cursor.fetchall()
+
             cursor = await db.execute(
-                """
-                SELECT * FROM usage_stats
-                WHERE user_id = ?
-                AND timestamp >= datetime('now', '-' || ? || ' days')
-                ORDER BY timestamp DESC
-                """,
-                (user_id, days)
+                "SELECT MAX(day) FROM usage_daily WHERE user_id = ?",
+                (user_id,)
             )
+            last_day = (await cursor.fetchone())[0]
+
+        actions: Dict[str, Dict[str, int]] = {}
+        interface_counts: Dict[str, int] = {}
+        prompt_tokens = {"input_tokens": 0, "cache_read_tokens": 0, "cache_creation_tokens": 0}
+        for row in daily_rows:
+            action = actions.setdefault(row['action_type'], {"count": 0, "tokens": 0})
+            action["count"] += row['requests']
+            action["tokens"] += row['tokens']
+            interface_counts[row['interface']] = interface_counts.get(row['interface'], 0) + row['requests']
+            for key in prompt_tokens:
+                prompt_tokens[key] += row[key]
+
+        total_input = sum(prompt_tokens.values())
+
+        hour_histogram = [0] * 24
+        for row in hourly_rows:
+            hour_histogram[row['hour']] = row['requests']
+
+        return {
+            "total_requests": sum(a["count"] for a in actions.values()),
+            "total_tokens": sum(a["tokens"] for a in actions.values()),
+            "action_counts": sorted(
+                (
+                    {"action_type": name, "count": a["count"], "tokens": a["tokens"]}
+                    for name, a in actions.items()
+                ),
+                key=lambda a: a["count"],
+                reverse=True
+            ),
+            "interface_counts": interface_counts,
+            "hour_histogram": hour_histogram,
+            "last_day": last_day,
+            **prompt_tokens,
+            "cache_hit_ratio": prompt_tokens["cache_read_tokens"] / total_input if total_input else 0.0
+        }
+
+    async def get_frequent_terms(
+        self,
+        user_id: str,
+        kind: str,
+        limit: int = 10,
+        days: Optional[int] = None,
+        conn: Optional[aiosqlite.Connection] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Получает самые частые термины пользователя из агрегатов user_terms
+
+        Счётчики накопительные (не уменьшаются при очистке старых
+        сообщений), last_seen - время последнего упоминания.
+
+        Args:
+            user_id: ID пользователя
+            kind: Вид термина (keyword/shopping, см. utils/text_normalizer.py)
+            limit: Максимальное количество терминов
+            days: Только термины, упомянутые за последние N дней
+            conn: Соединение записи, чтобы читать в текущей транзакции
+                (буфер записи при этом не сбрасывается)
+
+        Returns:
+            Список {"term", "surface", "count", "last_seen"} по убыванию count
+        """
+        if conn is not None:
+            cursor = await conn.execute(FREQUENT_TERMS_SQL, (user_id, kind, days, days, limit))
+            return [dict(row) for row in await cursor.fetchall()]
+
+        await self._flush_pending()
+
+        async with self._read() as db:
+            cursor = await db.execute(FREQUENT_TERMS_SQL, (user_id, kind, days, days, limit))
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
 
+    async def rebuild_user_terms(self, recompute: bool = False) -> None:
+        """
+        Пересчитывает термины сообщений и user_terms (задача обслуживания)
+
+        Нужен после смены нормализатора (например, установки pymorphy3):
+        иначе старые и новые сообщения хранят разные нормальные формы.
+
+        Args:
+            recompute: Пересчитать термины всех сообщений, а не только
+                ещё не размеченных
+        """
+        await self._flush_pending()
+
+        runner = MigrationRunner(self)
+        async with runner.lease():
+            await rebuild_user_terms(runner, recompute=recompute)
+
+    async def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает сохранённый профиль пользователя (одна строка)
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Данные профиля или None, если профиля нет
+        """
+        await self._flush_pending()
+
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT data FROM user_profiles WHERE user_id = ?",
+                (user_id,)
+            )
+            row = await cursor.fetchone()
+
+        return json.loads(row['data']) if row else None
+
+    async def save_user_profile(self, user_id: str, data: Dict[str, Any]) -> None:
+        """
+        Сохраняет профиль пользователя целиком
+
+        Args:
+            user_id: ID пользователя
+            data: Данные профиля (JSON-сериализуемые)
+        """
+        async with self._write() as db:
+            await self.store_user_profiles(db, {user_id: data})
+
+    async def load_user_profiles(
+        self,
+        db: aiosqlite.Connection,
+        user_ids: List[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Читает профили в текущей транзакции (для хуков записи)
+
+        Args:
+            db: Соединение записи
+            user_ids: ID пользователей
+
+        Returns:
+            user_id -> данные профиля (только существующие профили)
+        """
+        if not user_ids:
+            return {}
+
+        placeholders = ", ".join("?" * len(user_ids))
+        cursor = await db.execute(
+            f"SELECT user_id, data FROM user_profiles WHERE user_id IN ({placeholders})",
+            tuple(user_ids)
+        )
+        rows = await cursor.fetchall()
+        return {row['user_id']: json.loads(row['data']) for row in rows}
+
+    async def store_user_profiles(
+        self,
+        db: aiosqlite.Connection,
+        profiles: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """
+        Записывает профили в текущей транзакции (для хуков записи)
+
+        Args:
+            db: Соединение записи
+            profiles: user_id -> данные профиля
+        """
+        await db.executemany(
+            """
+            INSERT INTO user_profiles (user_id, data, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (user_id) DO UPDATE SET
+                data = excluded.data,
+                updated_at = excluded.updated_at
+            """,
+            [
+                (user_id, json.dumps(data, ensure_ascii=False))
+                for user_id, data in profiles.items()
+            ]
+        )
+
     async def cleanup_old_data(self, days: int = 30) -> None:
         """
         Очищает старые данные из базы
@@ -300,24 +946,13 @@ class Database:
         Args:
             days: Удалить данные старше указанного количества дней
         """
-        async with aiosqlite.connect(self.db_path) as db:
+        await self._flush_pending()
+
+        async with self._write() as db:
             # Удалить старые сообщения
-            await db.execute(
-                """
-                DELETE FROM messages
-                WHERE timestamp < datetime('now', '-' || ? || ' days')
-                """,
-                (days,)
-            )
+            await db.execute(CLEANUP_MESSAGES_SQL, (days,))
 
             # Удалить старые подтверждения
-            await db.execute(
-                """
-                DELETE FROM confirmations
-                WHERE created_at < datetime('now', '-' || ? || ' days')
-                """,
-                (days,)
-            )
+            await db.execute(CLEANUP_CONFIRMATIONS_SQL, (days,))
 
-            await db.commit()
             logger.info(f"Удалены данные старше {days} дней")
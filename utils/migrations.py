@@ -0,0 +1,781 @@
+"""
+Версионные миграции схемы SQLite
+
+Миграции нумеруются и применяются по порядку при старте (Database.init_db)
+в обоих процессах - боте и REST API. Применённые версии записываются в
+таблицу schema_version. Одновременный запуск разграничивается арендой
+(lease) в таблице schema_migration_lock: второй процесс ждёт, пока первый
+закончит, и затем видит, что миграции уже применены.
+
+Долгие шаги не держат блокировку записи целиком: backfill_in_chunks
+обрабатывает таблицу диапазонами id, rebuild_table_in_batches копирует
+таблицу пачками и переключает её короткой финальной транзакцией.
+Каждая миграция должна быть идемпотентной - если процесс упал посреди
+миграции, она будет выполнена заново при следующем старте.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TYPE_CHECKING
+
+from utils.logger import get_logger
+
+if TYPE_CHECKING:
+    from utils.database import Database
+
+logger = get_logger(__name__)
+
+# Аренда блокировки миграций (продлевается между шагами)
+LEASE_SECONDS = 60
+# Сколько ждать чужую миграцию, прежде чем сдаться
+LOCK_WAIT_TIMEOUT = 600
+LOCK_POLL_INTERVAL = 0.5
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+@dataclass
+class Migration:
+    """Одна миграция схемы"""
+
+    version: int
+    name: str
+    apply: Callable[["MigrationRunner"], Awaitable[None]]
+
+
+class MigrationRunner:
+    """Применяет миграции к базе данных"""
+
+    def __init__(self, db: "Database", migrations: Optional[List[Migration]] = None):
+        """
+        Инициализация
+
+        Args:
+            db: База данных
+            migrations: Список миграций (по умолчанию - MIGRATIONS)
+        """
+        self.db = db
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda m: m.version)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def run(self) -> List[int]:
+        """
+        Применяет все неприменённые миграции
+
+        Returns:
+            Список применённых в этом вызове версий
+        """
+        await self._ensure_service_tables()
+
+        if not await self._pending():
+            return []
+
+        applied = []
+        async with self.lease():
+            # Пока ждали аренду, миграции мог применить другой процесс
+            for migration in await self._pending():
+                logger.info(f"Применение миграции {migration.version}: {migration.name}")
+                await self.renew_lease()
+                started = time.perf_counter()
+
+                await migration.apply(self)
+
+                duration_ms = int((time.perf_counter() - started) * 1000)
+                async with self.db._write() as conn:
+                    await self._renew_in(conn)
+                    await conn.execute(
+                        "INSERT INTO schema_version (version, name, duration_ms) VALUES (?, ?, ?)",
+                        (migration.version, migration.name, duration_ms)
+                    )
+
+                logger.info(f"Миграция {migration.version} применена за {duration_ms} мс")
+                applied.append(migration.version)
+
+        return applied
+
+    async def current_version(self) -> int:
+        """
+        Возвращает последнюю применённую версию схемы
+
+        Returns:
+            Номер версии (0 - миграции не применялись)
+        """
+        await self._ensure_service_tables()
+
+        async with self.db._write() as conn:
+            cursor = await conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            return (await cursor.fetchone())[0]
+
+    async def _pending(self) -> List[Migration]:
+        """Миграции, которых нет в schema_version"""
+        async with self.db._write() as conn:
+            cursor = await conn.execute("SELECT version FROM schema_version")
+            applied = {row[0] for row in await cursor.fetchall()}
+
+        return [m for m in self.migrations if m.version not in applied]
+
+    async def _ensure_service_tables(self) -> None:
+        """Создаёт таблицы версий и блокировки"""
+        async with self.db._write() as conn:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    duration_ms INTEGER
+                )
+            """)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migration_lock (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    # --- Блокировка ---
+
+    async def _try_acquire(self) -> bool:
+        """Пытается взять или продлить аренду"""
+        now = time.time()
+        async with self.db._write() as conn:
+            cursor = await conn.execute(
+                """
+                INSERT INTO schema_migration_lock (id, owner, expires_at)
+                VALUES (1, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE schema_migration_lock.expires_at < ?
+                OR schema_migration_lock.owner = excluded.owner
+                """,
+                (self.owner, now + LEASE_SECONDS, now)
+            )
+            return cursor.rowcount == 1
+
+    async def renew_lease(self) -> None:
+        """
+        Продлевает аренду (вызывать между долгими шагами)
+
+        Raises:
+            Exception: Если аренду перехватил другой процесс
+        """
+        async with self.db._write() as conn:
+            await self._renew_in(conn)
+
+    async def _renew_in(self, conn) -> None:
+        """
+        Продлевает аренду внутри транзакции шага
+
+        UPDATE берёт блокировку записи SQLite до конца транзакции, поэтому
+        шаг фиксируется только если аренда всё ещё принадлежит этому
+        процессу, и перехватить её до коммита нельзя.
+
+        Args:
+            conn: Соединение с открытой транзакцией (из db._write())
+
+        Raises:
+            Exception: Если аренду перехватил другой процесс
+        """
+        cursor = await conn.execute(
+            "UPDATE schema_migration_lock SET expires_at = ? WHERE id = 1 AND owner = ?",
+            (time.time() + LEASE_SECONDS, self.owner)
+        )
+        if cursor.rowcount != 1:
+            raise Exception("Аренда блокировки миграций потеряна")
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Удерживает блокировку миграций
+
+        Raises:
+            Exception: Если блокировку не удалось получить за LOCK_WAIT_TIMEOUT
+        """
+        await self._ensure_service_tables()
+
+        deadline = time.monotonic() + LOCK_WAIT_TIMEOUT
+        logged = False
+        while not await self._try_acquire():
+            if time.monotonic() > deadline:
+                raise Exception("Не удалось получить блокировку миграций: её держит другой процесс")
+            if not logged:
+                logger.info("Миграции выполняет другой процесс, ожидание...")
+                logged = True
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+        try:
+            yield self
+        finally:
+            async with self.db._write() as conn:
+                await conn.execute(
+                    "DELETE FROM schema_migration_lock WHERE id = 1 AND owner = ?",
+                    (self.owner,)
+                )
+
+    # --- Шаги миграций ---
+
+    async def execute_all(self, statements: List[str]) -> None:
+        """
+        Выполняет выражения в одной транзакции
+
+        Args:
+            statements: SQL выражения без параметров
+        """
+        async with self.db._write() as conn:
+            for statement in statements:
+                await conn.execute(statement)
+
+    async def add_columns(self, table: str, columns: Dict[str, str]) -> None:
+        """
+        Добавляет отсутствующие колонки в таблицу
+
+        Args:
+            table: Имя таблицы
+            columns: Имя колонки -> SQL определение
+        """
+        async with self.db._write() as conn:
+            cursor = await conn.execute(f"PRAGMA table_info({table})")
+            existing = {row[1] for row in await cursor.fetchall()}
+
+            for name, definition in columns.items():
+                if name not in existing:
+                    await conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                    logger.info(f"Добавлена колонка {table}.{name}")
+
+    async def backfill_in_chunks(
+        self,
+        table: str,
+        statements: List[str],
+        max_id: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> int:
+        """
+        Выполняет выражения по диапазонам id, каждый диапазон - своя транзакция
+
+        Каждое выражение получает параметры (id_from, id_to) и должно
+        ограничивать выборку условием "id > ? AND id <= ?". Аренда
+        продлевается в транзакции каждого диапазона, между диапазонами
+        блокировка записи отпускается.
+
+        Args:
+            table: Таблица с целочисленным id
+            statements: SQL выражения с двумя параметрами
+            max_id: Верхняя граница id (по умолчанию - текущий MAX(id))
+            chunk_size: Размер диапазона id
+
+        Returns:
+            Количество обработанных диапазонов
+        """
+        if max_id is None:
+            async with self.db._write() as conn:
+                cursor = await conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                max_id = (await cursor.fetchone())[0]
+
+        chunks = 0
+        for id_from in range(0, max_id, chunk_size):
+            id_to = min(id_from + chunk_size, max_id)
+            async with self.db._write() as conn:
+                await self._renew_in(conn)
+                for statement in statements:
+                    await conn.execute(statement, (id_from, id_to))
+
+            chunks += 1
+            # Дать выполниться запросам приложения между диапазонами
+            await asyncio.sleep(0)
+
+        if chunks:
+            logger.info(f"{table}: обработано {chunks} диапазонов по {chunk_size} id")
+
+        return chunks
+
+    async def transform_in_chunks(
+        self,
+        table: str,
+        select_sql: str,
+        transform: Callable[[Any], Optional[tuple]],
+        update_sql: str,
+        post_statements: Optional[List[str]] = None,
+        max_id: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> int:
+        """
+        Пересчитывает значения в Python по диапазонам id
+
+        Для каждого диапазона в одной транзакции: select_sql (id_from,
+        id_to) выбирает строки, transform превращает строку в параметры
+        update_sql (None - пропустить строку), затем выполняются
+        post_statements с параметрами (id_from, id_to).
+
+        Args:
+            table: Таблица с целочисленным id
+            select_sql: SELECT с условием "id > ? AND id <= ?"
+            transform: Строка -> параметры update_sql или None
+            update_sql: UPDATE для одной строки
+            post_statements: SQL выражения для диапазона после обновления
+            max_id: Верхняя граница id (по умолчанию - текущий MAX(id))
+            chunk_size: Размер диапазона id
+
+        Returns:
+            Количество обновлённых строк
+        """
+        if max_id is None:
+            async with self.db._write() as conn:
+                cursor = await conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                max_id = (await cursor.fetchone())[0]
+
+        updated = 0
+        for id_from in range(0, max_id, chunk_size):
+            id_to = min(id_from + chunk_size, max_id)
+            async with self.db._write() as conn:
+                await self._renew_in(conn)
+                cursor = await conn.execute(select_sql, (id_from, id_to))
+                params = [transform(row) for row in await cursor.fetchall()]
+                params = [p for p in params if p is not None]
+
+                if params:
+                    await conn.executemany(update_sql, params)
+                for statement in post_statements or []:
+                    await conn.execute(statement, (id_from, id_to))
+
+            updated += len(params)
+            await asyncio.sleep(0)
+
+        if updated:
+            logger.info(f"{table}: пересчитано {updated} строк")
+
+        return updated
+
+    async def rebuild_table_in_batches(
+        self,
+        table: str,
+        create_sql: str,
+        columns: List[str],
+        post_statements: Optional[List[str]] = None,
+        batch_size: int = DEFAULT_CHUNK_SIZE
+    ) -> None:
+        """
+        Перестраивает таблицу (новая схема) без долгой блокировки записи
+
+        Строки копируются пачками по id в {table}__new, затем короткая
+        финальная транзакция докопирует новые строки, удалит старую
+        таблицу и переименует новую. Подходит для таблиц, в которые
+        только добавляют строки (messages, usage_stats): изменения уже
+        скопированных строк во время перестройки не переносятся.
+
+        Args:
+            table: Имя таблицы
+            create_sql: CREATE TABLE для новой схемы с именем {table}__new
+            columns: Колонки, копируемые из старой таблицы (включая id)
+            post_statements: Индексы и триггеры для новой таблицы
+                (выполняются в финальной транзакции)
+            batch_size: Размер пачки
+        """
+        new_table = f"{table}__new"
+        column_list = ", ".join(columns)
+        copy_sql = (
+            f"INSERT INTO {new_table} ({column_list}) "
+            f"SELECT {column_list} FROM {table} WHERE id > ? AND id <= ?"
+        )
+
+        await self.execute_all([f"DROP TABLE IF EXISTS {new_table}", create_sql])
+
+        async with self.db._write() as conn:
+            cursor = await conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+            copied_to = (await cursor.fetchone())[0]
+
+        await self.backfill_in_chunks(table, [copy_sql], max_id=copied_to, chunk_size=batch_size)
+
+        async with self.db._write() as conn:
+            await self._renew_in(conn)
+            await conn.execute(
+                f"INSERT INTO {new_table} ({column_list}) "
+                f"SELECT {column_list} FROM {table} WHERE id > ?",
+                (copied_to,)
+            )
+            await conn.execute(f"DROP TABLE {table}")
+            await conn.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+            for statement in post_statements or []:
+                await conn.execute(statement)
+
+        logger.info(f"Таблица {table} перестроена")
+
+
+# --- Схема ---
+
+# Детализация токенов в usage_stats (prompt caching)
+USAGE_DETAIL_COLUMNS = {
+    "input_tokens": "INTEGER DEFAULT 0",
+    "output_tokens": "INTEGER DEFAULT 0",
+    "cache_read_tokens": "INTEGER DEFAULT 0",
+    "cache_creation_tokens": "INTEGER DEFAULT 0",
+    "latency_ms": "INTEGER",
+}
+
+# Агрегаты usage_stats по дням (UTC) поддерживаются триггером при вставке,
+# чтобы /stats и контекст памяти читали O(дней) строк, а не все события
+USAGE_ROLLUP_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS usage_daily (
+        user_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        action_type TEXT NOT NULL,
+        interface TEXT NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 0,
+        tokens_used INTEGER NOT NULL DEFAULT 0,
+        input_tokens INTEGER NOT NULL DEFAULT 0,
+        output_tokens INTEGER NOT NULL DEFAULT 0,
+        cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+        cache_creation_tokens INTEGER NOT NULL DEFAULT 0,
+        latency_ms_sum INTEGER NOT NULL DEFAULT 0,
+        latency_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, action_type, interface)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS usage_hourly (
+        user_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        hour INTEGER NOT NULL,
+        requests INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, hour)
+    ) WITHOUT ROWID
+    """,
+]
+
+USAGE_ROLLUP_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS trg_usage_stats_rollup
+    AFTER INSERT ON usage_stats
+    BEGIN
+        INSERT INTO usage_daily (
+            user_id, day, action_type, interface, requests, tokens_used,
+            input_tokens, output_tokens, cache_read_tokens, cache_creation_tokens,
+            latency_ms_sum, latency_count
+        )
+        VALUES (
+            NEW.user_id, date(NEW.timestamp), NEW.action_type, NEW.interface, 1,
+            COALESCE(NEW.tokens_used, 0), COALESCE(NEW.input_tokens, 0),
+            COALESCE(NEW.output_tokens, 0), COALESCE(NEW.cache_read_tokens, 0),
+            COALESCE(NEW.cache_creation_tokens, 0), COALESCE(NEW.latency_ms, 0),
+            NEW.latency_ms IS NOT NULL
+        )
+        ON CONFLICT (user_id, day, action_type, interface) DO UPDATE SET
+            requests = requests + 1,
+            tokens_used = tokens_used + excluded.tokens_used,
+            input_tokens = input_tokens + excluded.input_tokens,
+            output_tokens = output_tokens + excluded.output_tokens,
+            cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens,
+            cache_creation_tokens = cache_creation_tokens + excluded.cache_creation_tokens,
+            latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum,
+            latency_count = latency_count + excluded.latency_count;
+
+        INSERT INTO usage_hourly (user_id, day, hour, requests)
+        VALUES (
+            NEW.user_id, date(NEW.timestamp),
+            CAST(strftime('%H', NEW.timestamp) AS INTEGER), 1
+        )
+        ON CONFLICT (user_id, day, hour) DO UPDATE SET
+            requests = requests + 1;
+    END
+"""
+
+# Добавление диапазона usage_stats (id > ? AND id <= ?) к агрегатам
+USAGE_ROLLUP_BACKFILL = [
+    """
+    INSERT INTO usage_daily (
+        user_id, day, action_type, interface, requests, tokens_used,
+        input_tokens, output_tokens, cache_read_tokens, cache_creation_tokens,
+        latency_ms_sum, latency_count
+    )
+    SELECT
+        user_id, date(timestamp), action_type, interface, COUNT(*),
+        COALESCE(SUM(tokens_used), 0), COALESCE(SUM(input_tokens), 0),
+        COALESCE(SUM(output_tokens), 0), COALESCE(SUM(cache_read_tokens), 0),
+        COALESCE(SUM(cache_creation_tokens), 0), COALESCE(SUM(latency_ms), 0),
+        COUNT(latency_ms)
+    FROM usage_stats
+    WHERE id > ? AND id <= ?
+    GROUP BY user_id, date(timestamp), action_type, interface
+    ON CONFLICT (user_id, day, action_type, interface) DO UPDATE SET
+        requests = requests + excluded.requests,
+        tokens_used = tokens_used + excluded.tokens_used,
+        input_tokens = input_tokens + excluded.input_tokens,
+        output_tokens = output_tokens + excluded.output_tokens,
+        cache_read_tokens = cache_read_tokens + excluded.cache_read_tokens,
+        cache_creation_tokens = cache_creation_tokens + excluded.cache_creation_tokens,
+        latency_ms_sum = latency_ms_sum + excluded.latency_ms_sum,
+        latency_count = latency_count + excluded.latency_count
+    """,
+    """
+    INSERT INTO usage_hourly (user_id, day, hour, requests)
+    SELECT user_id, date(timestamp), CAST(strftime('%H', timestamp) AS INTEGER), COUNT(*)
+    FROM usage_stats
+    WHERE id > ? AND id <= ?
+    GROUP BY user_id, date(timestamp), strftime('%H', timestamp)
+    ON CONFLICT (user_id, day, hour) DO UPDATE SET
+        requests = requests + excluded.requests
+    """,
+]
+
+# Индексы под запросы Database (проверяются scripts/check_query_plans.py)
+QUERY_INDEXES = [
+    # История пользователя: WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?
+    """
+    CREATE INDEX IF NOT EXISTS idx_messages_user_timestamp
+    ON messages(user_id, timestamp)
+    """,
+    # История сессии: WHERE user_id = ? AND session_id = ? ORDER BY timestamp
+    """
+    CREATE INDEX IF NOT EXISTS idx_messages_user_session_timestamp
+    ON messages(user_id, session_id, timestamp)
+    """,
+    # Статистика пользователя за период
+    """
+    CREATE INDEX IF NOT EXISTS idx_usage_stats_user_timestamp
+    ON usage_stats(user_id, timestamp)
+    """,
+    # Ожидающие подтверждения пользователя (малая доля таблицы)
+    """
+    CREATE INDEX IF NOT EXISTS idx_confirmations_pending
+    ON confirmations(user_id, created_at)
+    WHERE status = 'pending'
+    """,
+    # Очистка старых подтверждений
+    """
+    CREATE INDEX IF NOT EXISTS idx_confirmations_created_at
+    ON confirmations(created_at)
+    """,
+    # Покрывается префиксом idx_messages_user_timestamp
+    "DROP INDEX IF EXISTS idx_messages_user_id",
+]
+
+
+async def rebuild_usage_rollups(runner: MigrationRunner) -> None:
+    """
+    Пересчитывает агрегаты статистики по usage_stats диапазонами id
+
+    Триггер пересоздаётся в одной транзакции с очисткой агрегатов, поэтому
+    строки, вставленные во время пересчёта, учитываются триггером, а
+    строки до зафиксированного max_id - пересчётом. Повторный запуск
+    безопасен.
+
+    Args:
+        runner: MigrationRunner, удерживающий аренду
+    """
+    async with runner.db._write() as conn:
+        await conn.execute("DROP TRIGGER IF EXISTS trg_usage_stats_rollup")
+        for statement in USAGE_ROLLUP_TABLES:
+            await conn.execute(statement)
+        await conn.execute("DELETE FROM usage_daily")
+        await conn.execute("DELETE FROM usage_hourly")
+        await conn.execute(USAGE_ROLLUP_TRIGGER)
+
+        cursor = await conn.execute("SELECT COALESCE(MAX(id), 0) FROM usage_stats")
+        max_id = (await cursor.fetchone())[0]
+
+    await runner.backfill_in_chunks("usage_stats", USAGE_ROLLUP_BACKFILL, max_id=max_id)
+
+
+# Термины сообщений (ключевые слова и товары в нормальной форме,
+# utils/text_normalizer.py) и их агрегаты по пользователям
+MESSAGE_TERMS_COLUMNS = {
+    # JSON: [[вид, нормальная форма, слово как в тексте], ...]
+    "terms": "TEXT",
+}
+
+USER_TERMS_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS user_terms (
+        user_id TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        term TEXT NOT NULL,
+        surface TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        last_seen DATETIME,
+        PRIMARY KEY (user_id, kind, term)
+    )
+    """,
+    # Самые частые термины пользователя: ORDER BY count DESC LIMIT ?
+    """
+    CREATE INDEX IF NOT EXISTS idx_user_terms_top
+    ON user_terms(user_id, kind, count)
+    """,
+]
+
+USER_TERMS_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS trg_messages_terms
+    AFTER INSERT ON messages
+    WHEN NEW.terms IS NOT NULL
+    BEGIN
+        INSERT INTO user_terms (user_id, kind, term, surface, count, last_seen)
+        SELECT
+            NEW.user_id, json_extract(value, '$[0]'), json_extract(value, '$[1]'),
+            json_extract(value, '$[2]'), 1, NEW.timestamp
+        FROM json_each(NEW.terms)
+        WHERE true
+        ON CONFLICT (user_id, kind, term) DO UPDATE SET
+            count = count + 1,
+            last_seen = MAX(last_seen, excluded.last_seen);
+    END
+"""
+
+# Добавление терминов диапазона messages (id > ? AND id <= ?) к агрегатам
+USER_TERMS_BACKFILL = """
+    INSERT INTO user_terms (user_id, kind, term, surface, count, last_seen)
+    SELECT user_id, kind, term, surface, count, last_seen
+    FROM (
+        -- surface берётся из строки с MIN(m.id): слово из первого упоминания
+        SELECT
+            m.user_id AS user_id, json_extract(t.value, '$[0]') AS kind,
+            json_extract(t.value, '$[1]') AS term, json_extract(t.value, '$[2]') AS surface,
+            MIN(m.id), COUNT(*) AS count, MAX(m.timestamp) AS last_seen
+        FROM messages AS m, json_each(m.terms) AS t
+        WHERE m.id > ? AND m.id <= ? AND m.terms IS NOT NULL
+        GROUP BY m.user_id, kind, term
+    )
+    WHERE true
+    ON CONFLICT (user_id, kind, term) DO UPDATE SET
+        count = count + excluded.count,
+        last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+async def rebuild_user_terms(runner: MigrationRunner, recompute: bool = False) -> None:
+    """
+    Заполняет messages.terms и пересчитывает user_terms по диапазонам id
+
+    Как и rebuild_usage_rollups: триггер пересоздаётся в одной транзакции
+    с очисткой агрегатов, строки до зафиксированного max_id учитывает
+    пересчёт. Профили пользователей сбрасываются и строятся заново при
+    первом чтении. Повторный запуск безопасен.
+
+    Args:
+        runner: MigrationRunner, удерживающий аренду
+        recompute: Пересчитать термины всех сообщений (после смены
+            нормализатора), а не только ещё не размеченных
+    """
+    from utils.text_normalizer import get_normalizer
+
+    normalizer = get_normalizer()
+
+    async with runner.db._write() as conn:
+        await conn.execute("DROP TRIGGER IF EXISTS trg_messages_terms")
+        for statement in USER_TERMS_TABLES:
+            await conn.execute(statement)
+        await conn.execute("DELETE FROM user_terms")
+        await conn.execute("DELETE FROM user_profiles")
+        await conn.execute(USER_TERMS_TRIGGER)
+
+        cursor = await conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages")
+        max_id = (await cursor.fetchone())[0]
+
+    def extract(row) -> Optional[tuple]:
+        terms = normalizer.extract_terms(row[1])
+        return (json.dumps(terms, ensure_ascii=False) if terms else None, row[0])
+
+    condition = "" if recompute else "AND terms IS NULL"
+    await runner.transform_in_chunks(
+        "messages",
+        f"SELECT id, content FROM messages WHERE id > ? AND id <= ? AND role = 'user' {condition}",
+        extract,
+        "UPDATE messages SET terms = ? WHERE id = ?",
+        post_statements=[USER_TERMS_BACKFILL],
+        max_id=max_id
+    )
+    logger.info(f"Термины сообщений пересчитаны (нормализация: {normalizer.backend})")
+
+
+# --- Миграции ---
+
+async def _initial_schema(runner: MigrationRunner) -> None:
+    """Исходные таблицы (для существующих баз ничего не меняет)"""
+    await runner.execute_all([
+        # История сообщений
+        """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            session_id TEXT
+        )
+        """,
+        # Подтверждения действий
+        """
+        CREATE TABLE IF NOT EXISTS confirmations (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            action_type TEXT NOT NULL,
+            action_data TEXT NOT NULL,
+            confirmation_text TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            confirmed_at DATETIME
+        )
+        """,
+        # Статистика использования
+        """
+        CREATE TABLE IF NOT EXISTS usage_stats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            interface TEXT NOT NULL,
+            action_type TEXT NOT NULL,
+            tokens_used INTEGER,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_messages_user_id ON messages(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_confirmations_user_id ON confirmations(user_id)",
+    ])
+
+
+async def _usage_detail_columns(runner: MigrationRunner) -> None:
+    """Детализация токенов и задержки в usage_stats"""
+    await runner.add_columns("usage_stats", USAGE_DETAIL_COLUMNS)
+
+
+async def _usage_rollups(runner: MigrationRunner) -> None:
+    """Дневные агрегаты статистики с заполнением по истории"""
+    await rebuild_usage_rollups(runner)
+
+
+async def _query_indexes(runner: MigrationRunner) -> None:
+    """Составные и частичные индексы под запросы Database"""
+    await runner.execute_all(QUERY_INDEXES)
+
+
+async def _user_profiles(runner: MigrationRunner) -> None:
+    """Профили пользователей для памяти (заполняются при первом чтении)"""
+    await runner.execute_all([
+        """
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            user_id TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ])
+
+
+async def _message_terms(runner: MigrationRunner) -> None:
+    """Нормализованные термины сообщений и их агрегаты user_terms"""
+    await runner.add_columns("messages", MESSAGE_TERMS_COLUMNS)
+    await rebuild_user_terms(runner)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial_schema", _initial_schema),
+    Migration(2, "usage_detail_columns", _usage_detail_columns),
+    Migration(3, "usage_rollups", _usage_rollups),
+    Migration(4, "query_indexes", _query_indexes),
+    Migration(5, "user_profiles", _user_profiles),
+    Migration(6, "message_terms", _message_terms),
+]
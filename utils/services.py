@@ -0,0 +1,144 @@
+"""
+Контейнер общих сервисов приложения
+
+Один экземпляр на процесс: база данных, Claude Agent (с единым пулом
+соединений к Anthropic), MemoryManager, executor для блокирующих вызовов
+и сервис распознавания речи.
+REST API поднимает контейнер в lifespan, Telegram бот - в post_init.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from utils.config import load_config
+from utils.database import Database
+from utils.logger import get_logger
+from utils.text_normalizer import get_normalizer
+
+logger = get_logger(__name__)
+
+
+class ServiceContainer:
+    """Владелец общих сервисов процесса"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Инициализация контейнера
+
+        Тяжёлые сервисы (агент, executor) создаются в start().
+
+        Args:
+            config: Конфигурация (если None, загружается автоматически)
+        """
+        if config is None:
+            config = load_config()
+
+        self.config = config
+        database_config = config['database']
+        self.db = Database(
+            database_config['path'],
+            pool_size=database_config.get('pool_size', 4),
+            cache_size_mb=database_config.get('cache_size_mb', 16),
+            write_behind=database_config.get('write_behind', True),
+            flush_interval_ms=database_config.get('flush_interval_ms', 200),
+            flush_max_rows=database_config.get('flush_max_rows', 100)
+        )
+        self.agent = None
+        self.memory_manager = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.transcription = None
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        """Запущен ли контейнер"""
+        return self._started
+
+    async def start(self) -> None:
+        """
+        Инициализирует сервисы (повторный вызов ничего не делает)
+
+        Создаёт схему БД, executor, MemoryManager и единственный Claude Agent.
+        """
+        if self._started:
+            return
+
+        # Импорт здесь: агент тянет интеграции, которые не нужны при импорте модуля
+        from agent.claude_agent import ClaudeAgent
+        from integrations.transcription import TranscriptionService
+
+        services_config = self.config.get('services', {})
+
+        # Нормализатор нужен уже миграциям (разметка терминов сообщений)
+        get_normalizer(self.config.get('memory', {}).get('normalizer'))
+
+        await self.db.init_db()
+
+        self.executor = ThreadPoolExecutor(
+            max_workers=services_config.get('executor_workers', 8),
+            thread_name_prefix="assistant-io"
+        )
+
+        if self.config.get('memory', {}).get('enabled', False):
+            from agent.memory import get_memory_manager
+            self.memory_manager = get_memory_manager(self.db, self.config)
+
+        self.agent = ClaudeAgent(self.config, memory_manager=self.memory_manager)
+        self.agent.executor = self.executor
+
+        # Отдельный пул: долгое распознавание не занимает executor интеграций
+        self.transcription = TranscriptionService(self.config)
+
+        self._started = True
+        logger.info("Общие сервисы запущены")
+
+    async def stop(self) -> None:
+        """
+        Освобождает ресурсы: пулы соединений, executor и соединения с БД
+
+        Буфер отложенной записи сбрасывается при закрытии БД.
+        """
+        if not self._started:
+            return
+
+        from agent.llm_provider import close_async_anthropic_clients
+        from integrations.obsidian import close_rest_api_client, close_vault
+
+        await close_async_anthropic_clients()
+        await close_rest_api_client()
+        close_vault()
+
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+        if self.transcription:
+            await self.transcription.close()
+            self.transcription = None
+
+        await self.db.close()
+
+        self._started = False
+        logger.info("Общие сервисы остановлены")
+
+
+# Глобальный экземпляр
+_services_instance: Optional[ServiceContainer] = None
+
+
+def get_services(config: Optional[Dict[str, Any]] = None) -> ServiceContainer:
+    """
+    Получает глобальный контейнер сервисов
+
+    Args:
+        config: Конфигурация (используется при первом создании)
+
+    Returns:
+        ServiceContainer
+    """
+    global _services_instance
+
+    if _services_instance is None:
+        _services_instance = ServiceContainer(config)
+
+    return _services_instance
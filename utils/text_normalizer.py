@@ -0,0 +1,314 @@
+"""
+Нормализация русских слов для памяти ассистента
+
+Слова приводятся к лемме через pymorphy3 (словарь поставляется с пакетом,
+работает офлайн), а если он не установлен - к основе стеммером Snowball
+для русского языка (реализация ниже, без зависимостей). Так "молоко",
+"молока" и "молоко," считаются одним словом.
+
+Термины (ключевые слова и товары) извлекаются при записи сообщения и
+хранятся в messages.terms, агрегаты по ним - в user_terms.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Вид термина: ключевое слово или товар из списка покупок
+TERM_KEYWORD = "keyword"
+TERM_SHOPPING = "shopping"
+
+STOP_WORDS = {
+    'в', 'на', 'и', 'с', 'по', 'для', 'не', 'что', 'это', 'как',
+    'а', 'я', 'у', 'из', 'за', 'к', 'до', 'о', 'об', 'от', 'про',
+    'добавь', 'покажи', 'создай', 'запиши', 'напомни'
+}
+
+# Признаки сообщения о покупках и глаголы перед названием товара
+SHOPPING_MARKERS = ['молоко', 'хлеб', 'яйца', 'сыр', 'масло', 'покупки']
+SHOPPING_VERBS = {'добавь', 'купить', 'купи'}
+
+_WORD_PATTERN = re.compile(r"[а-яёa-z0-9]+(?:-[а-яёa-z0-9]+)*")
+
+
+# --- Snowball (русский) ---
+
+_VOWELS = set("аеиоуыэюя")
+
+_PERFECTIVE_GERUND_1 = ("в", "вши", "вшись")
+_PERFECTIVE_GERUND_2 = ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись")
+_ADJECTIVE = (
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им",
+    "ым", "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая",
+    "яя", "ою", "ею"
+)
+_PARTICIPLE_1 = ("ем", "нн", "вш", "ющ", "щ")
+_PARTICIPLE_2 = ("ивш", "ывш", "ующ")
+_REFLEXIVE = ("ся", "сь")
+_VERB_1 = (
+    "ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет",
+    "ют", "ны", "ть", "ешь", "нно"
+)
+_VERB_2 = (
+    "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй",
+    "ил", "ыл", "им", "ым", "ен", "ило", "ыло", "ено", "ят", "ует", "уют",
+    "ит", "ыт", "ены", "ить", "ыть", "ишь", "ую", "ю"
+)
+_NOUN = (
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и",
+    "ией", "ей", "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам", "ом", "о",
+    "у", "ах", "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия", "ья", "я"
+)
+_SUPERLATIVE = ("ейш", "ейше")
+_DERIVATIONAL = ("ост", "ость")
+
+
+def _regions(word: str) -> Tuple[int, int]:
+    """
+    Находит начала областей RV и R2
+
+    Args:
+        word: Слово
+
+    Returns:
+        (rv, r2) - индексы начала областей
+    """
+    length = len(word)
+    rv = r2 = length
+
+    position = _skip(word, 0, vowels=False)
+    if position >= length:
+        return rv, r2
+    rv = position + 1
+
+    # R1 - после первой согласной за гласной, R2 - то же внутри R1
+    position = _skip(word, rv, vowels=True)
+    if position >= length:
+        return rv, r2
+
+    position = _skip(word, position + 1, vowels=False)
+    if position >= length:
+        return rv, r2
+
+    position = _skip(word, position + 1, vowels=True)
+    if position >= length:
+        return rv, r2
+
+    return rv, position + 1
+
+
+def _skip(word: str, position: int, vowels: bool) -> int:
+    """Пропускает гласные (vowels=True) или согласные начиная с position"""
+    while position < len(word) and (word[position] in _VOWELS) == vowels:
+        position += 1
+    return position
+
+
+def _strip(word: str, rv: int, group_1: Tuple[str, ...], group_2: Tuple[str, ...] = ()) -> Optional[str]:
+    """
+    Удаляет самое длинное подходящее окончание в области RV
+
+    Окончания group_1 удаляются, только если перед ними "а" или "я".
+
+    Args:
+        word: Слово
+        rv: Начало области RV
+        group_1: Окончания, требующие "а"/"я" перед собой
+        group_2: Остальные окончания
+
+    Returns:
+        Слово без окончания или None, если окончание не найдено
+    """
+    best = None
+    for ending in group_1 + group_2:
+        if word.endswith(ending) and len(word) - len(ending) >= rv:
+            if best is None or len(ending) > len(best):
+                best = ending
+
+    if best is None:
+        return None
+
+    stem = word[:-len(best)]
+    if best in group_1 and best not in group_2:
+        if len(stem) <= rv or stem[-1] not in "ая":
+            return None
+
+    return stem
+
+
+def snowball_stem(word: str) -> str:
+    """
+    Основа слова по алгоритму Snowball для русского языка
+
+    Args:
+        word: Слово в нижнем регистре
+
+    Returns:
+        Основа слова
+    """
+    word = word.replace("ё", "е")
+    rv, r2 = _regions(word)
+
+    # Шаг 1: деепричастие, иначе возвратность + прилагательное/глагол/существительное
+    stem = _strip(word, rv, _PERFECTIVE_GERUND_1, _PERFECTIVE_GERUND_2)
+    if stem is not None:
+        word = stem
+    else:
+        stem = _strip(word, rv, (), _REFLEXIVE)
+        if stem is not None:
+            word = stem
+
+        stem = _strip(word, rv, (), _ADJECTIVE)
+        if stem is not None:
+            word = _strip(stem, rv, _PARTICIPLE_1, _PARTICIPLE_2) or stem
+        else:
+            stem = _strip(word, rv, _VERB_1, _VERB_2)
+            if stem is None:
+                stem = _strip(word, rv, (), _NOUN)
+            if stem is not None:
+                word = stem
+
+    # Шаг 2: "и"
+    if word.endswith("и") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    # Шаг 3: словообразовательное окончание в R2
+    stem = _strip(word, r2, (), _DERIVATIONAL)
+    if stem is not None:
+        word = stem
+
+    # Шаг 4: превосходная степень, двойное "н", мягкий знак
+    stem = _strip(word, rv, (), _SUPERLATIVE)
+    if stem is not None:
+        word = stem
+        if word.endswith("нн") and len(word) - 2 >= rv:
+            word = word[:-1]
+    elif word.endswith("нн") and len(word) - 2 >= rv:
+        word = word[:-1]
+    elif word.endswith("ь") and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    return word
+
+
+# --- Нормализатор ---
+
+class RussianNormalizer:
+    """
+    Приведение слов к нормальной форме с кэшем результатов
+
+    backend:
+    - "auto": pymorphy3, если установлен, иначе Snowball
+    - "pymorphy": только pymorphy3 (ошибка, если не установлен)
+    - "snowball": только стеммер
+    """
+
+    def __init__(self, backend: str = "auto", cache_size: int = 50000):
+        """
+        Инициализация нормализатора
+
+        Args:
+            backend: Способ нормализации (auto/pymorphy/snowball)
+            cache_size: Размер кэша нормальных форм
+        """
+        self._morph = None
+
+        if backend in ("auto", "pymorphy"):
+            try:
+                import pymorphy3
+                self._morph = pymorphy3.MorphAnalyzer()
+                logger.info("Нормализация слов: pymorphy3")
+            except ImportError:
+                if backend == "pymorphy":
+                    raise
+                logger.info("pymorphy3 не установлен, нормализация слов: Snowball")
+
+        self.backend = "pymorphy" if self._morph else "snowball"
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+        self._stop_lemmas = {self.normalize(word) for word in STOP_WORDS}
+        self._shopping_markers = {self.normalize(word) for word in SHOPPING_MARKERS}
+
+    def _normalize(self, word: str) -> str:
+        """
+        Нормальная форма слова (без кэша)
+
+        Args:
+            word: Слово в нижнем регистре
+
+        Returns:
+            Лемма (pymorphy3) или основа (Snowball)
+        """
+        if self._morph is not None:
+            return self._morph.parse(word)[0].normal_form.replace("ё", "е")
+        return snowball_stem(word)
+
+    def tokenize(self, text: str) -> List[str]:
+        """
+        Разбивает текст на слова без пунктуации
+
+        Args:
+            text: Текст
+
+        Returns:
+            Слова в нижнем регистре
+        """
+        return _WORD_PATTERN.findall(text.lower())
+
+    def extract_terms(self, text: str) -> List[Tuple[str, str, str]]:
+        """
+        Извлекает ключевые слова и товары из сообщения пользователя
+
+        Args:
+            text: Текст сообщения
+
+        Returns:
+            Список (вид, нормальная форма, слово как в тексте), где вид -
+            TERM_KEYWORD или TERM_SHOPPING
+        """
+        words = self.tokenize(text)
+        lemmas = [self.normalize(word) for word in words]
+        terms = []
+
+        for word, lemma in zip(words, lemmas):
+            if len(word) > 3 and word not in STOP_WORDS and lemma not in self._stop_lemmas:
+                terms.append((TERM_KEYWORD, lemma, word))
+
+        # Простая эвристика: слово после "добавь", "купить", "купи"
+        if self._shopping_markers.intersection(lemmas):
+            for i, word in enumerate(words[:-1]):
+                if word in SHOPPING_VERBS and len(words[i + 1]) > 2:
+                    terms.append((TERM_SHOPPING, lemmas[i + 1], words[i + 1]))
+
+        return terms
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Метрики кэша нормальных форм"""
+        info = self.normalize.cache_info()
+        return {"backend": self.backend, "hits": info.hits, "misses": info.misses, "size": info.currsize}
+
+
+# Глобальный экземпляр нормализатора
+_normalizer_instance: Optional[RussianNormalizer] = None
+
+
+def get_normalizer(backend: Optional[str] = None) -> RussianNormalizer:
+    """
+    Получает глобальный экземпляр RussianNormalizer
+
+    Args:
+        backend: Способ нормализации при первом создании (по умолчанию auto)
+
+    Returns:
+        RussianNormalizer
+    """
+    global _normalizer_instance
+
+    if _normalizer_instance is None:
+        _normalizer_instance = RussianNormalizer(backend or "auto")
+
+    return _normalizer_instance